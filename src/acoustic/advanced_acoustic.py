@@ -19,8 +19,13 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple, Any
 from enum import Enum
 import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from scipy import signal as scipy_signal
-from scipy.fft import fft, fftfreq
+from scipy.fft import fft, fftfreq, irfft, next_fast_len, rfft, rfftfreq
+from scipy.io import wavfile
 
 
 class LeakType(Enum):
@@ -122,6 +127,24 @@ class LocalizationResult:
     time_delays: Dict[str, float]  # sensor_id -> delay in seconds
 
 
+@lru_cache(maxsize=64)
+def bandpass_sos(sample_rate: int, low_freq: float, high_freq: float, order: int = 4) -> Optional[np.ndarray]:
+    """
+    Butterworth band-pass as second-order sections, cached per sample rate.
+    
+    Returns None when the band can't be designed (filtering is then skipped).
+    """
+    nyquist = sample_rate / 2
+    low = max(low_freq / nyquist, 0.01)
+    high = min(high_freq / nyquist, 0.99)
+    
+    try:
+        sos = scipy_signal.butter(order, [low, high], btype='band', output='sos')
+    except Exception:
+        return None
+    return sos
+
+
 class AcousticSignalProcessor:
     """Processes acoustic signals for leak detection"""
     
@@ -186,17 +209,23 @@ class AcousticSignalProcessor:
         
         return features
     
+    def filter_bank(self) -> Dict[str, np.ndarray]:
+        """Band-pass SOS filter per pipe material at this sample rate"""
+        return {
+            material: bandpass_sos(self.sample_rate, low, high)
+            for material, (low, high) in self.material_frequencies.items()
+        }
+    
     def _bandpass_filter(self, signal: np.ndarray, low_freq: float, high_freq: float) -> np.ndarray:
         """Apply bandpass filter to signal"""
-        nyquist = self.sample_rate / 2
-        low = max(low_freq / nyquist, 0.01)
-        high = min(high_freq / nyquist, 0.99)
+        sos = bandpass_sos(self.sample_rate, low_freq, high_freq)
+        if sos is None:
+            return signal
         
         try:
-            b, a = scipy_signal.butter(4, [low, high], btype='band')
-            return scipy_signal.filtfilt(b, a, signal)
-        except Exception:
-            return signal
+            return scipy_signal.sosfiltfilt(sos, signal)
+        except ValueError:
+            return signal  # Too short for zero-phase padding
     
     def _subtract_noise(self, signal: np.ndarray, noise_baseline: np.ndarray) -> np.ndarray:
         """Subtract noise baseline from signal"""
@@ -230,6 +259,10 @@ class AcousticSignalProcessor:
         fft_magnitude = np.abs(fft_vals[:n // 2])
         frequencies = fftfreq(n, 1 / self.sample_rate)[:n // 2]
         
+        return self._frequency_features(frequencies, fft_magnitude)
+    
+    def _frequency_features(self, frequencies: np.ndarray, fft_magnitude: np.ndarray) -> Dict:
+        """Frequency-domain features from a magnitude spectrum"""
         # Find peaks
         peak_indices = self._find_peaks(fft_magnitude, min_height=np.mean(fft_magnitude))
         
@@ -259,6 +292,10 @@ class AcousticSignalProcessor:
         fft_magnitude = np.abs(fft_vals[:n // 2])
         frequencies = fftfreq(n, 1 / self.sample_rate)[:n // 2]
         
+        return self._spectral_features(frequencies, fft_magnitude)
+    
+    def _spectral_features(self, frequencies: np.ndarray, fft_magnitude: np.ndarray) -> Dict:
+        """Spectral shape features from a magnitude spectrum"""
         # Normalize magnitude
         magnitude_sum = np.sum(fft_magnitude)
         if magnitude_sum > 0:
@@ -291,11 +328,11 @@ class AcousticSignalProcessor:
     
     def _find_peaks(self, signal: np.ndarray, min_height: float = 0) -> np.ndarray:
         """Find peaks in signal"""
-        peaks = []
-        for i in range(1, len(signal) - 1):
-            if signal[i] > signal[i-1] and signal[i] > signal[i+1] and signal[i] > min_height:
-                peaks.append(i)
-        return np.array(peaks)
+        if len(signal) < 3:
+            return np.array([], dtype=np.int64)
+        middle = signal[1:-1]
+        is_peak = (middle > signal[:-2]) & (middle > signal[2:]) & (middle > min_height)
+        return np.flatnonzero(is_peak) + 1
     
     def _skewness(self, signal: np.ndarray) -> float:
         """Calculate skewness of signal"""
@@ -504,10 +541,411 @@ class LeakClassifier:
             return LeakSeverity.CATASTROPHIC
 
 
+class ChunkedSTFT:
+    """
+    Short-time Fourier transform over a stream of sample chunks.
+    
+    Frames straddling chunk boundaries are completed from a carried tail of
+    ``window_size - hop_size`` samples, so pushing a recording chunk by chunk
+    yields exactly the frames of a single whole-signal STFT.
+    """
+    
+    def __init__(self, window_size: int = 1024, hop_size: int = 512, window: Optional[str] = "hann"):
+        if not 0 < hop_size <= window_size:
+            raise ValueError("hop_size must be in (0, window_size]")
+        self.window_size = window_size
+        self.hop_size = hop_size
+        self.window = scipy_signal.get_window(window, window_size) if window else None
+        self._carry = np.zeros(0)
+        self.frames_emitted = 0
+    
+    @property
+    def freq_bins(self) -> int:
+        return self.window_size // 2 + 1
+    
+    def push(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Add samples and return magnitudes of the frames they complete.
+        
+        Returns:
+            Magnitude array [freq_bins, new_frames] (possibly zero frames)
+        """
+        buffer = np.concatenate([self._carry, np.asarray(chunk, dtype=np.float64)])
+        n_frames = (len(buffer) - self.window_size) // self.hop_size + 1 if len(buffer) >= self.window_size else 0
+        
+        if n_frames <= 0:
+            self._carry = buffer
+            return np.zeros((self.freq_bins, 0))
+        
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, self.window_size)[::self.hop_size][:n_frames]
+        if self.window is not None:
+            frames = frames * self.window
+        magnitudes = np.abs(rfft(frames, axis=1)).T
+        
+        self._carry = buffer[n_frames * self.hop_size:]
+        self.frames_emitted += n_frames
+        return magnitudes
+    
+    def reset(self):
+        self._carry = np.zeros(0)
+        self.frames_emitted = 0
+
+
+def iter_audio_chunks(
+    path: str,
+    chunk_samples: int,
+    dtype: Optional[str] = None,
+    sample_rate: Optional[int] = None
+):
+    """
+    Stream a WAV or headerless raw recording in fixed-size chunks.
+    
+    The file is memory-mapped, so only the current chunk is materialised.
+    Integer PCM is scaled to [-1, 1]; multi-channel audio uses channel 0.
+    
+    Args:
+        path: WAV file, or raw samples when ``dtype`` is given
+        chunk_samples: Samples per yielded chunk
+        dtype: NumPy dtype of a raw file (e.g. "int16", "float32")
+        sample_rate: Sample rate of a raw file
+    
+    Yields:
+        (sample_rate, float64 chunk)
+    """
+    if dtype is None:
+        rate, data = wavfile.read(path, mmap=True)
+    else:
+        if sample_rate is None:
+            raise ValueError("sample_rate is required for raw recordings")
+        rate, data = sample_rate, np.memmap(path, dtype=dtype, mode='r')
+    
+    if data.ndim > 1:
+        data = data[:, 0]
+    scale = float(np.iinfo(data.dtype).max) + 1 if np.issubdtype(data.dtype, np.integer) else 1.0
+    
+    for start in range(0, len(data), chunk_samples):
+        yield rate, np.asarray(data[start:start + chunk_samples], dtype=np.float64) / scale
+
+
+@dataclass
+class ChunkResult:
+    """Features and classification of one chunk of a streamed recording"""
+    index: int
+    start_seconds: float
+    duration_seconds: float
+    features: Dict
+    classification: Dict
+
+
+class StreamingAcousticPipeline:
+    """
+    Bounded-memory feature extraction and classification for long recordings.
+    
+    Each chunk is band-passed with the cached SOS filter for the sensor's pipe
+    material (filter state carried between chunks), framed by a ChunkedSTFT,
+    and reduced to the same feature dictionary as
+    AcousticSignalProcessor.process_signal, which is classified immediately.
+    Running sums give whole-recording features without keeping the signal.
+    
+    Unlike process_signal, filtering is causal (no zero-phase pass) and noise
+    baseline subtraction is not applied, since both need the whole signal.
+    """
+    
+    def __init__(
+        self,
+        sensor: AcousticSensor,
+        processor: Optional[AcousticSignalProcessor] = None,
+        classifier: Optional["LeakClassifier"] = None,
+        pressure: float = 3.0,
+        chunk_seconds: float = 10.0,
+        window_size: int = 1024,
+        hop_size: int = 512
+    ):
+        self.sensor = sensor
+        self.processor = processor or AcousticSignalProcessor(sensor.sampling_rate)
+        self.classifier = classifier or LeakClassifier()
+        self.pressure = pressure
+        self.chunk_seconds = chunk_seconds
+        self.stft = ChunkedSTFT(window_size, hop_size)
+        
+        low, high = self.processor.material_frequencies.get(sensor.pipe_material, (100, 1000))
+        self.sos = bandpass_sos(self.processor.sample_rate, low, high)
+        self.frequencies = rfftfreq(window_size, 1 / self.processor.sample_rate)
+        self.reset()
+    
+    def reset(self):
+        """Start a new recording"""
+        self.stft.reset()
+        self._zi = np.zeros((self.sos.shape[0], 2)) if self.sos is not None else None
+        self._chunks = 0
+        self._samples = 0
+        self._raw_peak = 0.0
+        self._moments = np.zeros(4)  # Sums of x, x², x³, x⁴ of the filtered signal
+        self._min = np.inf
+        self._max = -np.inf
+        self._crossings = 0
+        self._last_sign = None
+        self._spectrum_sum = np.zeros(self.stft.freq_bins)
+        self._frames = 0
+    
+    @property
+    def sample_rate(self) -> int:
+        return self.processor.sample_rate
+    
+    def process_chunk(self, chunk: np.ndarray) -> Optional[ChunkResult]:
+        """
+        Filter, frame and classify one chunk, updating running features.
+        
+        Returns:
+            ChunkResult, or None for an empty chunk
+        """
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if len(chunk) == 0:
+            return None
+        
+        if self.sos is not None:
+            filtered, self._zi = scipy_signal.sosfilt(self.sos, chunk, zi=self._zi)
+        else:
+            filtered = chunk
+        magnitudes = self.stft.push(filtered)
+        
+        # Per-chunk features, normalized like process_signal on this chunk alone
+        chunk_peak = float(np.max(np.abs(chunk)))
+        scale = 1 / chunk_peak if chunk_peak > 0 else 1.0
+        spectrum = magnitudes.mean(axis=1) if magnitudes.shape[1] else np.abs(rfft(filtered, self.stft.window_size))
+        features = {
+            "time_domain": self.processor._extract_time_features(filtered * scale),
+            "frequency_domain": self.processor._frequency_features(self.frequencies, spectrum),
+            "spectral": self.processor._spectral_features(self.frequencies, spectrum)
+        }
+        classification = self.classifier.classify(features, self.sensor.pipe_diameter, self.pressure)
+        
+        result = ChunkResult(
+            index=self._chunks,
+            start_seconds=self._samples / self.sample_rate,
+            duration_seconds=len(chunk) / self.sample_rate,
+            features=features,
+            classification=classification
+        )
+        
+        # Running whole-recording state
+        self._chunks += 1
+        self._samples += len(chunk)
+        self._raw_peak = max(self._raw_peak, chunk_peak)
+        squared = filtered * filtered
+        self._moments += (filtered.sum(), squared.sum(), (squared * filtered).sum(), (squared * squared).sum())
+        self._min = min(self._min, float(filtered.min()))
+        self._max = max(self._max, float(filtered.max()))
+        signs = np.sign(filtered)
+        if self._last_sign is not None:
+            self._crossings += int(signs[0] != self._last_sign)
+        self._crossings += int(np.count_nonzero(np.diff(signs)))
+        self._last_sign = signs[-1]
+        self._spectrum_sum += magnitudes.sum(axis=1)
+        self._frames += magnitudes.shape[1]
+        
+        return result
+    
+    def process_stream(self, chunks):
+        """Process an iterable of sample chunks, yielding a ChunkResult per chunk"""
+        for chunk in chunks:
+            result = self.process_chunk(chunk)
+            if result is not None:
+                yield result
+    
+    def process_array(self, audio: np.ndarray):
+        """Process an in-memory (or memory-mapped) array chunk by chunk"""
+        step = max(1, int(self.chunk_seconds * self.sample_rate))
+        return self.process_stream(audio[start:start + step] for start in range(0, len(audio), step))
+    
+    def process_file(self, path: str, dtype: Optional[str] = None):
+        """
+        Stream a WAV or raw recording from disk.
+        
+        Raw files are read with ``dtype`` at the sensor's sampling rate.
+        """
+        step = max(1, int(self.chunk_seconds * self.sample_rate))
+        for rate, chunk in iter_audio_chunks(path, step, dtype, self.sample_rate):
+            if rate != self.sample_rate:
+                raise ValueError(f"Recording sample rate {rate} Hz != pipeline {self.sample_rate} Hz")
+            result = self.process_chunk(chunk)
+            if result is not None:
+                yield result
+    
+    def summary_features(self) -> Dict:
+        """Whole-recording features from the running state, normalized by the global peak"""
+        n = self._samples
+        if n == 0:
+            return {}
+        
+        scale = 1 / self._raw_peak if self._raw_peak > 0 else 1.0
+        s1, s2, s3, s4 = self._moments / n * scale ** np.arange(1, 5)
+        variance = max(s2 - s1 * s1, 0.0)
+        std = np.sqrt(variance)
+        rms = np.sqrt(s2)
+        peak_abs = max(abs(self._min), abs(self._max)) * scale
+        
+        if std > 0:
+            skewness = (s3 - 3 * s1 * s2 + 2 * s1 ** 3) / std ** 3
+            kurtosis = (s4 - 4 * s1 * s3 + 6 * s1 ** 2 * s2 - 3 * s1 ** 4) / std ** 4 - 3
+        else:
+            skewness = kurtosis = 0.0
+        
+        spectrum = self._spectrum_sum / max(self._frames, 1)
+        return {
+            "time_domain": {
+                "rms": float(rms),
+                "peak_to_peak": float((self._max - self._min) * scale),
+                "crest_factor": float(peak_abs / rms) if rms > 0 else 0.0,
+                "zero_crossing_rate": float(self._crossings / n),
+                "variance": float(variance),
+                "skewness": float(skewness),
+                "kurtosis": float(kurtosis)
+            },
+            "frequency_domain": self.processor._frequency_features(self.frequencies, spectrum),
+            "spectral": self.processor._spectral_features(self.frequencies, spectrum)
+        }
+    
+    def summary(self) -> Dict:
+        """Whole-recording features and classification"""
+        features = self.summary_features()
+        if not features:
+            return {}
+        return {
+            "duration_seconds": self._samples / self.sample_rate,
+            "chunks": self._chunks,
+            "features": features,
+            "classification": self.classifier.classify(features, self.sensor.pipe_diameter, self.pressure)
+        }
+
+
+class GCCPhatCorrelator:
+    """
+    Generalized cross-correlation with phase transform (GCC-PHAT).
+    
+    Each sensor's spectrum is computed once (zero-padded real FFT) and reused
+    for every pair, so an N-sensor recording costs N forward FFTs plus one
+    inverse FFT per pair instead of O(n²) direct correlations. PHAT weighting
+    whitens the cross-spectrum, which sharpens the peak for the narrowband,
+    reverberant signals typical of pipe acoustics.
+    """
+    
+    def __init__(
+        self,
+        sample_rate: int = 8000,
+        band: Optional[Tuple[float, float]] = None,
+        epsilon: float = 1e-12
+    ):
+        self.sample_rate = sample_rate
+        self.band = band  # Hz; frequencies outside are ignored
+        self.epsilon = epsilon
+    
+    def spectra(self, signals: Dict[str, np.ndarray]) -> Tuple[List[str], np.ndarray, int]:
+        """
+        Compute one spectrum per sensor.
+        
+        Returns:
+            (sensor_ids, spectra [n_sensors, n_fft // 2 + 1], n_fft)
+        """
+        sensor_ids = list(signals.keys())
+        length = max(len(signals[sid]) for sid in sensor_ids)
+        n_fft = next_fast_len(2 * length - 1, real=True)
+        
+        stacked = np.zeros((len(sensor_ids), length))
+        for row, sid in enumerate(sensor_ids):
+            x = np.asarray(signals[sid], dtype=np.float64)
+            stacked[row, :len(x)] = x - x.mean()
+        
+        spectra = rfft(stacked, n=n_fft, axis=1)
+        
+        if self.band is not None:
+            freqs = rfftfreq(n_fft, 1 / self.sample_rate)
+            spectra[:, (freqs < self.band[0]) | (freqs > self.band[1])] = 0
+        
+        return sensor_ids, spectra, n_fft
+    
+    def correlate(
+        self,
+        spectrum_a: np.ndarray,
+        spectrum_b: np.ndarray,
+        n_fft: int,
+        max_lag: Optional[int] = None
+    ) -> Tuple[float, float]:
+        """
+        Delay of signal a relative to b from their spectra.
+        
+        Args:
+            spectrum_a, spectrum_b: Spectra from ``spectra``
+            n_fft: FFT length used for the spectra
+            max_lag: Largest physically possible delay in samples
+        
+        Returns:
+            (delay_seconds, peak) where a positive delay means a arrives later
+            and peak is the PHAT-normalized correlation height (0..1)
+        """
+        cross = spectrum_a * np.conj(spectrum_b)
+        magnitude = np.abs(cross)
+        weighted = np.where(magnitude > self.epsilon, cross / np.maximum(magnitude, self.epsilon), 0)
+        active = np.count_nonzero(weighted)
+        if active == 0:
+            return 0.0, 0.0
+        
+        cc = irfft(weighted, n=n_fft)
+        max_lag = n_fft // 2 - 1 if max_lag is None else min(max_lag, n_fft // 2 - 1)
+        
+        # Lags -max_lag..max_lag, wrapping negative lags from the end
+        window = np.concatenate([cc[-max_lag:], cc[:max_lag + 1]]) if max_lag > 0 else cc[:1]
+        k = int(np.argmax(window))
+        peak = window[k]
+        
+        # Parabolic interpolation of the peak for sub-sample resolution
+        offset = 0.0
+        if 0 < k < len(window) - 1:
+            left, right = window[k - 1], window[k + 1]
+            curvature = left - 2 * peak + right
+            if curvature < 0:
+                offset = 0.5 * (left - right) / curvature
+        
+        delay_samples = k - max_lag + offset
+        # A perfectly coherent pair concentrates all whitened bins in the peak
+        normalized_peak = float(peak * n_fft / (2 * active))
+        
+        return float(delay_samples / self.sample_rate), max(0.0, min(1.0, normalized_peak))
+    
+    def pair_delays(
+        self,
+        signals: Dict[str, np.ndarray],
+        max_lags: Optional[Dict[Tuple[str, str], int]] = None
+    ) -> List[Dict]:
+        """
+        Delays for every sensor pair, reusing each sensor's spectrum.
+        
+        Returns:
+            List of {"sensors": (a, b), "delay": seconds, "peak": 0..1}
+        """
+        max_lags = max_lags or {}
+        sensor_ids, spectra, n_fft = self.spectra(signals)
+        
+        results = []
+        for i in range(len(sensor_ids)):
+            for j in range(i + 1, len(sensor_ids)):
+                pair = (sensor_ids[i], sensor_ids[j])
+                delay, peak = self.correlate(spectra[i], spectra[j], n_fft, max_lags.get(pair))
+                results.append({"sensors": pair, "delay": delay, "peak": peak})
+        
+        return results
+
+
+def _localize_recording(args) -> "LocalizationResult":
+    """Process-pool entry point for LeakLocalizer.localize_batch"""
+    localizer, signals, sensors, pipe_material = args
+    return localizer.localize_tdoa(signals, sensors, pipe_material)
+
+
 class LeakLocalizer:
     """Localize leaks using TDOA and correlation methods"""
     
-    def __init__(self):
+    def __init__(self, band: Optional[Tuple[float, float]] = None, max_iterations: int = 20):
         # Sound velocity in water-filled pipes by material (m/s)
         self.sound_velocities = {
             "PVC": 400,
@@ -518,6 +956,10 @@ class LeakLocalizer:
             "Asbestos Cement": 900,
             "Concrete": 1000
         }
+        
+        # Correlation band (Hz) and multilateration iterations
+        self.band = band
+        self.max_iterations = max_iterations
     
     def localize_tdoa(
         self,
@@ -528,6 +970,9 @@ class LeakLocalizer:
         """
         Localize leak using Time Difference of Arrival.
         
+        Delays for all sensor pairs come from GCC-PHAT; the position is the
+        weighted least-squares fit of all pairwise range differences.
+        
         Args:
             signals: Dict of sensor_id -> signal array
             sensors: Dict of sensor_id -> AcousticSensor
@@ -541,64 +986,41 @@ class LeakLocalizer:
         
         sensor_ids = list(signals.keys())
         sound_velocity = self.sound_velocities.get(pipe_material, 500)
-        
-        # Calculate cross-correlation between sensor pairs
-        time_delays = {}
-        correlations = []
-        
+        sample_rate = sensors[sensor_ids[0]].sampling_rate
+        
+        # Sensor positions on a local tangent plane (meters)
+        lat0 = np.mean([sensors[sid].latitude for sid in sensor_ids])
+        lon0 = np.mean([sensors[sid].longitude for sid in sensor_ids])
+        positions = np.array([
+            self._to_plane(sensors[sid].latitude, sensors[sid].longitude, lat0, lon0)
+            for sid in sensor_ids
+        ])
+        
+        # A delay can't exceed the travel time between the two sensors
+        max_lags = {}
         for i in range(len(sensor_ids)):
             for j in range(i + 1, len(sensor_ids)):
-                sensor1 = sensor_ids[i]
-                sensor2 = sensor_ids[j]
-                
-                # Cross-correlation
-                corr = np.correlate(signals[sensor1], signals[sensor2], mode='full')
-                
-                # Find peak (time delay)
-                peak_idx = np.argmax(np.abs(corr))
-                center_idx = len(signals[sensor1]) - 1
-                
-                # Convert to time delay
-                sample_rate = sensors[sensor1].sampling_rate
-                delay_samples = peak_idx - center_idx
-                delay_seconds = delay_samples / sample_rate
-                
-                time_delays[f"{sensor1}_{sensor2}"] = delay_seconds
-                correlations.append({
-                    "sensors": (sensor1, sensor2),
-                    "delay": delay_seconds,
-                    "correlation_strength": float(np.max(np.abs(corr)))
-                })
-        
-        # Calculate leak position on pipe between sensors
-        # For simplicity, assume linear pipe between first two sensors
-        sensor1 = sensors[sensor_ids[0]]
-        sensor2 = sensors[sensor_ids[1]]
-        
-        # Distance between sensors (using coordinates)
-        distance = self._calculate_distance(
-            (sensor1.latitude, sensor1.longitude),
-            (sensor2.latitude, sensor2.longitude)
-        ) * 1000  # km to meters
-        
-        # Time delay
-        delay = list(time_delays.values())[0]
-        
-        # Distance from sensor1 to leak
-        # d1 - d2 = v * delay
-        # d1 + d2 = total_distance
-        # Solving: d1 = (total_distance + v * delay) / 2
-        distance_from_s1 = (distance + sound_velocity * delay) / 2
-        distance_from_s1 = max(0, min(distance_from_s1, distance))  # Clamp
-        
-        # Interpolate position
-        ratio = distance_from_s1 / distance if distance > 0 else 0.5
-        leak_lat = sensor1.latitude + ratio * (sensor2.latitude - sensor1.latitude)
-        leak_lon = sensor1.longitude + ratio * (sensor2.longitude - sensor1.longitude)
-        
-        # Estimate accuracy based on correlation strength
-        avg_correlation = np.mean([c["correlation_strength"] for c in correlations])
-        position_error = max(1, 20 * (1 - min(avg_correlation / 1000, 1)))  # meters
+                spacing = np.linalg.norm(positions[i] - positions[j])
+                max_lags[(sensor_ids[i], sensor_ids[j])] = int(np.ceil(spacing / sound_velocity * sample_rate)) + 2
+        
+        correlator = GCCPhatCorrelator(sample_rate, band=self.band)
+        correlations = correlator.pair_delays(signals, max_lags)
+        time_delays = {f"{c['sensors'][0]}_{c['sensors'][1]}": c["delay"] for c in correlations}
+        
+        index = {sid: i for i, sid in enumerate(sensor_ids)}
+        pairs = np.array([(index[c["sensors"][0]], index[c["sensors"][1]]) for c in correlations])
+        range_differences = np.array([c["delay"] for c in correlations]) * sound_velocity
+        weights = np.array([max(c["peak"], 1e-3) for c in correlations])
+        
+        position, rms_residual = self._multilaterate(positions, pairs, range_differences, weights)
+        
+        leak_lat, leak_lon = self._from_plane(position, lat0, lon0)
+        distance_from_s1 = float(np.linalg.norm(position - positions[0]))
+        
+        # Accuracy from the fit residual and the sub-sample timing resolution
+        avg_peak = float(np.mean([c["peak"] for c in correlations]))
+        resolution = 0.1 * sound_velocity / sample_rate
+        position_error = max(1.0, float(np.hypot(rms_residual, resolution)))
         
         return LocalizationResult(
             leak_id=f"LEAK_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
@@ -606,13 +1028,113 @@ class LeakLocalizer:
             latitude=leak_lat,
             longitude=leak_lon,
             distance_from_sensor=distance_from_s1,
-            pipe_id=sensor1.pipe_id,
-            confidence=min(avg_correlation / 1000, 0.95),
+            pipe_id=sensors[sensor_ids[0]].pipe_id,
+            confidence=min(avg_peak, 0.95),
             position_error_m=position_error,
             sensors_used=sensor_ids,
             time_delays=time_delays
         )
     
+    def localize_batch(
+        self,
+        recordings: List[Tuple[Dict[str, np.ndarray], Dict[str, AcousticSensor], str]],
+        max_workers: Optional[int] = None
+    ) -> List[LocalizationResult]:
+        """
+        Localize many logger recordings, in parallel across processes.
+        
+        Args:
+            recordings: (signals, sensors, pipe_material) per recording
+            max_workers: Worker processes (default: CPU count)
+        
+        Returns:
+            LocalizationResult per recording, in input order
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        tasks = [(self, signals, sensors, material) for signals, sensors, material in recordings]
+        
+        if max_workers <= 1 or len(tasks) <= 1:
+            return [_localize_recording(task) for task in tasks]
+        
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks)), mp_context=context) as pool:
+            return list(pool.map(_localize_recording, tasks, chunksize=max(1, len(tasks) // (4 * max_workers))))
+    
+    def _multilaterate(
+        self,
+        positions: np.ndarray,
+        pairs: np.ndarray,
+        range_differences: np.ndarray,
+        weights: np.ndarray
+    ) -> Tuple[np.ndarray, float]:
+        """
+        Weighted least-squares position from pairwise range differences.
+        
+        Solves |x - s_a| - |x - s_b| = v * delay_ab over all pairs with
+        damped Gauss-Newton. Two sensors (or collinear ones) constrain only
+        the position along their line, which the start point already lies on.
+        
+        Returns:
+            (position, weighted RMS residual in meters)
+        """
+        # Start on the segment of the most coherent pair, as for two sensors
+        best = int(np.argmax(weights))
+        a, b = positions[pairs[best, 0]], positions[pairs[best, 1]]
+        spacing = np.linalg.norm(b - a)
+        from_a = np.clip((spacing + range_differences[best]) / 2, 0, spacing)
+        x = a + (b - a) * (from_a / spacing if spacing > 0 else 0.5)
+        
+        sqrt_w = np.sqrt(weights)
+        damping = 1e-3
+        
+        def residuals(point):
+            da = np.linalg.norm(point - positions[pairs[:, 0]], axis=1)
+            db = np.linalg.norm(point - positions[pairs[:, 1]], axis=1)
+            return (da - db - range_differences) * sqrt_w, da, db
+        
+        r, da, db = residuals(x)
+        cost = float(r @ r)
+        for _ in range(self.max_iterations):
+            ua = (x - positions[pairs[:, 0]]) / np.maximum(da, 1e-9)[:, None]
+            ub = (x - positions[pairs[:, 1]]) / np.maximum(db, 1e-9)[:, None]
+            jacobian = (ua - ub) * sqrt_w[:, None]
+            
+            normal = jacobian.T @ jacobian
+            step = np.linalg.solve(
+                normal + damping * (np.trace(normal) / 2 + 1e-12) * np.eye(2),
+                -jacobian.T @ r
+            )
+            candidate = x + step
+            r_new, da_new, db_new = residuals(candidate)
+            cost_new = float(r_new @ r_new)
+            
+            if cost_new < cost:
+                x, r, da, db, cost = candidate, r_new, da_new, db_new, cost_new
+                damping = max(damping / 10, 1e-9)
+                if np.linalg.norm(step) < 1e-3:
+                    break
+            else:
+                damping *= 10
+                if damping > 1e6:
+                    break
+        
+        return x, float(np.sqrt(cost / weights.sum()))
+    
+    def _to_plane(self, lat: float, lon: float, lat0: float, lon0: float) -> np.ndarray:
+        """Equirectangular projection around (lat0, lon0), in meters"""
+        R = 6371000
+        return np.array([
+            R * np.radians(lon - lon0) * np.cos(np.radians(lat0)),
+            R * np.radians(lat - lat0)
+        ])
+    
+    def _from_plane(self, xy: np.ndarray, lat0: float, lon0: float) -> Tuple[float, float]:
+        R = 6371000
+        lat = lat0 + np.degrees(xy[1] / R)
+        lon = lon0 + np.degrees(xy[0] / (R * np.cos(np.radians(lat0))))
+        return float(lat), float(lon)
+    
     def _calculate_distance(self, coord1: Tuple[float, float], coord2: Tuple[float, float]) -> float:
         """Calculate distance between coordinates in km"""
         lat1, lon1 = coord1
@@ -48,6 +48,20 @@ from .baseline_comparison import (
     DriftSeverity,
     create_baseline_api
 )
+from .forecaster_registry import (
+    ForecasterRegistry,
+    ForecasterRegistryConfig,
+    DMAForecasters
+)
+
+# Shared-process model serving
+from .model_server import (
+    ModelServer,
+    ModelServerConfig,
+    ModelClient,
+    ModelServerError,
+    get_model_client
+)
 
 # Component 5: Continuous Learning Pipeline
 from .continuous_learning import (
@@ -109,6 +123,16 @@ __all__ = [
     'ComparisonVerdict',
     'DriftSeverity',
     'create_baseline_api',
+    'ForecasterRegistry',
+    'ForecasterRegistryConfig',
+    'DMAForecasters',
+    
+    # Model Serving
+    'ModelServer',
+    'ModelServerConfig',
+    'ModelClient',
+    'ModelServerError',
+    'get_model_client',
     
     # Continuous Learning (Component 5)
     'ContinuousLearningController',
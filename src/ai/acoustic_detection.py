@@ -479,17 +479,16 @@ class FrequencyAnalyzer:
                            sample_rate: int,
                            window_size: int = 1024,
                            hop_size: int = 512) -> Dict:
-        """Compute spectrogram (simplified)."""
-        # In production, use librosa or scipy
-        n_frames = (len(audio) - window_size) // hop_size + 1
+        """Compute spectrogram (rectangular frames, all frames in one FFT call)."""
+        n_frames = max(0, (len(audio) - window_size) // hop_size + 1)
         
-        spectrogram = np.zeros((window_size // 2 + 1, n_frames))
-        
-        for i in range(n_frames):
-            start = i * hop_size
-            frame = audio[start:start + window_size]
-            _, magnitudes = FrequencyAnalyzer.compute_fft(frame, sample_rate)
-            spectrogram[:, i] = magnitudes[:window_size // 2 + 1]
+        if n_frames:
+            frames = np.lib.stride_tricks.sliding_window_view(
+                np.asarray(audio, dtype=np.float64), window_size
+            )[::hop_size][:n_frames]
+            spectrogram = np.abs(np.fft.rfft(frames, axis=1)).T
+        else:
+            spectrogram = np.zeros((window_size // 2 + 1, 0))
         
         return {
             'spectrogram': spectrogram,
@@ -499,6 +498,28 @@ class FrequencyAnalyzer:
             'freq_resolution_hz': sample_rate / window_size
         }
     
+    @staticmethod
+    def stream_spectrogram(chunks,
+                           sample_rate: int,
+                           window_size: int = 1024,
+                           hop_size: int = 512):
+        """
+        Spectrogram of a chunked recording in bounded memory.
+        
+        Yields one block [freq_bins, frames] per chunk; concatenated along
+        time they equal compute_spectrogram of the whole recording.
+        
+        Args:
+            chunks: Iterable of sample arrays (e.g. from iter_audio_chunks)
+        """
+        from src.acoustic.advanced_acoustic import ChunkedSTFT
+        
+        stft = ChunkedSTFT(window_size, hop_size, window=None)
+        for chunk in chunks:
+            block = stft.push(chunk)
+            if block.shape[1]:
+                yield block
+    
     @staticmethod
     def classify_by_frequency(peak_freq: float, bandwidth: float) -> LeakType:
         """Classify leak type by frequency characteristics."""
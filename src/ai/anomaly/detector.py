@@ -12,6 +12,7 @@ Design Principles:
 4. Robust to noise and missing data
 """
 
+import logging
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional, Tuple, Any
@@ -27,6 +28,8 @@ from sklearn.preprocessing import StandardScaler, RobustScaler
 from sklearn.neighbors import LocalOutlierFactor
 import joblib
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class AnomalyResult:
@@ -178,15 +181,40 @@ class IsolationForestDetector:
         Returns:
             AnomalyResult with score, classification, and explanation
         """
+        # Ensure 2D
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        
+        return self.predict_batch(X[:1], [sensor_id])[0]
+    
+    def predict_batch(
+        self,
+        X: np.ndarray,
+        sensor_ids: Optional[List[str]] = None
+    ) -> List[AnomalyResult]:
+        """
+        Detect anomalies for many feature vectors with one model call.
+        
+        Scaling, `decision_function` and `predict` run once over the whole
+        matrix; only the explanation is assembled per row. Used by the
+        model server to amortise inference over micro-batches.
+        
+        Args:
+            X: Feature matrix (n_samples, n_features)
+            sensor_ids: Sensor identifier per row
+            
+        Returns:
+            One AnomalyResult per row
+        """
         import time
         start_time = time.time()
         
         if not self.is_fitted:
             raise RuntimeError("Model not fitted. Call fit() first.")
         
-        # Ensure 2D
-        if X.ndim == 1:
-            X = X.reshape(1, -1)
+        X = np.atleast_2d(X)
+        if sensor_ids is None:
+            sensor_ids = ['unknown'] * len(X)
         
         # Handle missing values
         X_clean = np.nan_to_num(X, nan=0.0)
@@ -194,39 +222,30 @@ class IsolationForestDetector:
         # Scale
         X_scaled = self.scaler.transform(X_clean)
         
-        # Get raw anomaly score
+        # Get raw anomaly scores
         # decision_function returns: negative = anomaly, positive = normal
-        raw_score = self.model.decision_function(X_scaled)[0]
-        
-        # Get prediction
-        prediction = self.model.predict(X_scaled)[0]  # -1 = anomaly, 1 = normal
-        
-        # Convert to 0-1 scale where 1 = anomaly
-        # Raw scores typically range from -0.5 to 0.5
-        # We normalize to 0-1 where higher = more anomalous
-        anomaly_score = self._normalize_score(raw_score)
-        
-        # Determine if anomaly based on threshold
-        is_anomaly = prediction == -1
-        
-        # Calculate confidence based on score magnitude
-        confidence = self._calculate_confidence(raw_score)
-        
-        # Get contributing features
-        contributing = self._explain_anomaly(X_clean[0], X_scaled[0])
-        
-        inference_time = (time.time() - start_time) * 1000
-        
-        return AnomalyResult(
-            sensor_id=sensor_id,
-            timestamp=datetime.utcnow(),
-            anomaly_score=anomaly_score,
-            is_anomaly=is_anomaly,
-            confidence=confidence,
-            contributing_features=contributing,
-            model_version=self.metadata.version if self.metadata else '0.0.0',
-            inference_time_ms=inference_time
-        )
+        raw_scores = self.model.decision_function(X_scaled)
+        
+        # Get predictions (-1 = anomaly, 1 = normal)
+        predictions = self.model.predict(X_scaled)
+        
+        model_version = self.metadata.version if self.metadata else '0.0.0'
+        timestamp = datetime.utcnow()
+        inference_time = (time.time() - start_time) * 1000 / max(len(X), 1)
+        
+        return [
+            AnomalyResult(
+                sensor_id=sensor_ids[i],
+                timestamp=timestamp,
+                anomaly_score=self._normalize_score(raw_scores[i]),
+                is_anomaly=bool(predictions[i] == -1),
+                confidence=self._calculate_confidence(raw_scores[i]),
+                contributing_features=self._explain_anomaly(X_clean[i], X_scaled[i]),
+                model_version=model_version,
+                inference_time_ms=inference_time
+            )
+            for i in range(len(X))
+        ]
     
     def _normalize_score(self, raw_score: float) -> float:
         """
@@ -329,9 +348,14 @@ class IsolationForestDetector:
         joblib.dump(model_data, path)
     
     @classmethod
-    def load(cls, path: str) -> 'IsolationForestDetector':
-        """Load model from disk."""
-        model_data = joblib.load(path)
+    def load(cls, path: str, mmap_mode: Optional[str] = None) -> 'IsolationForestDetector':
+        """
+        Load model from disk.
+        
+        Pass mmap_mode='r' to memory-map the stored arrays so processes
+        loading the same file share its pages.
+        """
+        model_data = joblib.load(path, mmap_mode=mmap_mode)
         
         detector = cls(contamination=model_data['contamination'])
         detector.model = model_data['model']
@@ -522,12 +546,58 @@ class AnomalyDetectorManager:
     - Create/load models for each DMA
     - Handle model versioning
     - Coordinate training and deployment
+    
+    Inference goes to the shared local model server when one is reachable
+    and loads its anomaly models from this manager's `model_dir`, so workers
+    do not each hold a copy of every DMA's model; otherwise (or if the
+    server fails) models are loaded and scored in-process.
     """
     
-    def __init__(self, model_dir: str = './models/anomaly'):
+    def __init__(
+        self,
+        model_dir: str = './models/anomaly',
+        model_client: Optional[Any] = None,
+        use_model_server: bool = True
+    ):
+        """
+        Args:
+            model_dir: Directory of `{dma_id}_latest.joblib` models
+            model_client: Explicit `ModelClient` (default: shared client
+                from `get_model_client` when a server is running)
+            use_model_server: Set False to always score in-process. A server
+                serving a different anomaly model directory is never used.
+        """
         self.model_dir = Path(model_dir)
         self.model_dir.mkdir(parents=True, exist_ok=True)
         self.detectors: Dict[str, IsolationForestDetector] = {}
+        self.model_client = model_client
+        self.use_model_server = use_model_server
+        self._checked_client: Optional[Any] = None  # Last client compared against model_dir
+        self._client_serves_model_dir = False
+    
+    def _served_client(self) -> Optional[Any]:
+        """Model server client, or None to score in-process."""
+        if not self.use_model_server:
+            return None
+        client = self.model_client
+        if client is None:
+            from ..model_server import get_model_client  # model_server imports this module
+            client = get_model_client()
+            if client is None:
+                return None
+        
+        # Only route when the server loads the same models we would
+        if client is not self._checked_client:
+            try:
+                served_dir = client.model_dirs().get('anomaly')
+            except Exception as e:
+                logger.warning(f"Model server unavailable, scoring in-process: {e}")
+                return None
+            self._checked_client = client
+            self._client_serves_model_dir = served_dir == str(self.model_dir.resolve())
+            if not self._client_serves_model_dir:
+                logger.info(f"Model server serves {served_dir}, not {self.model_dir}; scoring in-process")
+        return client if self._client_serves_model_dir else None
         
     def get_detector(self, dma_id: str) -> Optional[IsolationForestDetector]:
         """Get detector for a DMA, loading from disk if needed."""
@@ -566,6 +636,14 @@ class AnomalyDetectorManager:
         detector.save(str(versioned_path))
         
         self.detectors[dma_id] = detector
+        
+        # Served copies are stale now
+        client = self._served_client()
+        if client is not None:
+            try:
+                client.reload(dma_id)
+            except Exception as e:
+                logger.warning(f"Model server reload failed for {dma_id}: {e}")
         return detector
     
     def detect_anomaly(
@@ -576,8 +654,28 @@ class AnomalyDetectorManager:
     ) -> Optional[AnomalyResult]:
         """Run anomaly detection for a sensor."""
         
+        results = self.detect_anomalies(dma_id, [sensor_id], np.atleast_2d(features)[:1])
+        return results[0] if results else None
+    
+    def detect_anomalies(
+        self,
+        dma_id: str,
+        sensor_ids: List[str],
+        features: np.ndarray
+    ) -> Optional[List[AnomalyResult]]:
+        """Run anomaly detection for several sensors of one DMA."""
+        
+        client = self._served_client()
+        if client is not None:
+            try:
+                results = client.detect_anomalies(dma_id, sensor_ids, features)
+                if results is not None:
+                    return results
+            except Exception as e:
+                logger.warning(f"Model server unavailable for {dma_id}, scoring in-process: {e}")
+        
         detector = self.get_detector(dma_id)
         if detector is None:
             return None
         
-        return detector.predict(features, sensor_id)
+        return detector.predict_batch(np.atleast_2d(features), list(sensor_ids))
@@ -12,6 +12,7 @@ Key Features:
 - STL statistical baseline vs AI anomaly comparison
 - Prophet forecast vs LSTM prediction delta tracking
 - Baseline drift detection over time
+- Per-DMA forecaster registry (lazy-loaded, LRU-capped, background refits)
 - Anomaly classification reconciliation
 - API exposure for dashboard integration
 
@@ -26,10 +27,11 @@ Version: 1.0.0
 """
 
 import logging
+from concurrent.futures import Future
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import json
 import statistics
 
@@ -39,14 +41,12 @@ import pandas as pd
 # Import existing forecasting components
 from .time_series_forecasting import (
     STLAnomalyDetector,
-    ProphetForecaster,
-    LSTMForecaster,
-    EnsembleForecaster,
     STL_AVAILABLE,
     PROPHET_AVAILABLE,
     TF_AVAILABLE,
     STLAnomalyResult
 )
+from .forecaster_registry import ForecasterRegistry, ForecasterRegistryConfig
 
 logger = logging.getLogger(__name__)
 
@@ -256,6 +256,23 @@ class BaselineComparisonConfig:
     # Retraining triggers
     retrain_agreement_threshold: float = 0.6  # Retrain if agreement below this
     retrain_drift_threshold: float = 0.1  # Retrain if drift slope exceeds
+    
+    # Per-DMA model registry
+    model_dir: str = './models/forecasters'
+    max_resident_models: int = 64  # LRU cap on DMA model sets in memory
+    refit_workers: Optional[int] = None  # Background refit processes (None = CPU count)
+
+
+def _database_session_factory() -> Optional[Callable[[], Any]]:
+    """Session factory of the application database (None without a DB driver)."""
+    try:
+        from ..storage.database import get_database_handler, PSYCOPG2_AVAILABLE, SQLALCHEMY_AVAILABLE
+    except ImportError:
+        return None
+    if not (PSYCOPG2_AVAILABLE and SQLALCHEMY_AVAILABLE):
+        logger.info("No database driver installed - forecaster versions tracked in manifest only")
+        return None
+    return get_database_handler().get_session
 
 
 # =============================================================================
@@ -276,8 +293,22 @@ class BaselineComparisonService:
     5. Triggers retraining recommendations
     """
     
-    def __init__(self, config: Optional[BaselineComparisonConfig] = None):
-        """Initialize the comparison service."""
+    def __init__(
+        self,
+        config: Optional[BaselineComparisonConfig] = None,
+        registry: Optional[ForecasterRegistry] = None,
+        session_factory: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Initialize the comparison service.
+        
+        Args:
+            config: Service configuration
+            registry: Forecaster registry (built from config when omitted)
+            session_factory: SQLAlchemy session context manager factory used to
+                record fitted versions in `model_versions`. Defaults to the
+                application database when a driver is installed.
+        """
         self.config = config or BaselineComparisonConfig()
         
         # Initialize detectors
@@ -286,9 +317,15 @@ class BaselineComparisonService:
             zscore_threshold=self.config.stl_zscore_threshold
         ) if STL_AVAILABLE else None
         
-        self.prophet_forecaster = ProphetForecaster() if PROPHET_AVAILABLE else None
-        self.lstm_forecaster = LSTMForecaster() if TF_AVAILABLE else None
-        self.ensemble_forecaster = EnsembleForecaster()
+        # Per-DMA forecasters (lazy-loaded, LRU-capped, refit in background)
+        self.registry = registry or ForecasterRegistry(
+            ForecasterRegistryConfig(
+                model_dir=self.config.model_dir,
+                max_resident_models=self.config.max_resident_models,
+                max_workers=self.config.refit_workers
+            ),
+            session_factory=session_factory or _database_session_factory()
+        )
         
         # Storage for comparison history (in-memory, should be persisted)
         self.comparison_history: Dict[str, List[ComparisonResult]] = {}  # dma_id -> results
@@ -321,50 +358,9 @@ class BaselineComparisonService:
         Returns:
             Dictionary of model_name -> fit_success
         """
-        fit_status = {}
+        forecasters = self.registry.fit(dma_id, data, value_column, timestamp_column)
         
-        # Ensure data is properly formatted
-        if timestamp_column in data.columns:
-            df = data.copy()
-            if not isinstance(df.index, pd.DatetimeIndex):
-                df = df.set_index(timestamp_column)
-        else:
-            df = data.copy()
-        
-        # Fit Prophet
-        if self.prophet_forecaster:
-            try:
-                prophet_df = df.reset_index()
-                prophet_df.columns = ['ds', 'y'] if len(prophet_df.columns) == 2 else prophet_df.columns
-                if 'ds' not in prophet_df.columns:
-                    prophet_df = prophet_df.rename(columns={timestamp_column: 'ds', value_column: 'y'})
-                self.prophet_forecaster.fit(prophet_df.reset_index(drop=True), 'y' if 'y' in prophet_df.columns else value_column)
-                fit_status['prophet'] = True
-                logger.info(f"Prophet fitted for DMA {dma_id}")
-            except Exception as e:
-                fit_status['prophet'] = False
-                logger.error(f"Prophet fit failed for DMA {dma_id}: {e}")
-        
-        # Fit LSTM (needs more data)
-        if self.lstm_forecaster and len(df) > 500:
-            try:
-                self.lstm_forecaster.fit(df.reset_index(), value_column)
-                fit_status['lstm'] = True
-                logger.info(f"LSTM fitted for DMA {dma_id}")
-            except Exception as e:
-                fit_status['lstm'] = False
-                logger.error(f"LSTM fit failed for DMA {dma_id}: {e}")
-        else:
-            fit_status['lstm'] = False
-        
-        # Fit Ensemble
-        try:
-            self.ensemble_forecaster.fit(df.reset_index(), value_column)
-            fit_status['ensemble'] = True
-            logger.info(f"Ensemble fitted for DMA {dma_id}")
-        except Exception as e:
-            fit_status['ensemble'] = False
-            logger.error(f"Ensemble fit failed for DMA {dma_id}: {e}")
+        fit_status = dict(forecasters.fit_status)
         
         # STL doesn't need pre-fitting
         fit_status['stl'] = STL_AVAILABLE
@@ -372,6 +368,63 @@ class BaselineComparisonService:
         self.fitted_dmas[dma_id] = fit_status
         return fit_status
     
+    def refit_models_async(
+        self,
+        dma_id: str,
+        data: pd.DataFrame,
+        value_column: str = 'value',
+        timestamp_column: str = 'timestamp'
+    ) -> Future:
+        """
+        Refit models for a DMA on the background process pool.
+        
+        The current models keep serving analyses until the refit completes.
+        
+        Returns:
+            Future resolving to the new version's metadata
+        """
+        future = self.registry.submit_refit(dma_id, data, value_column, timestamp_column)
+        future.add_done_callback(lambda f, dma_id=dma_id: self.fitted_dmas.pop(dma_id, None))
+        return future
+    
+    def fit_all_models(
+        self,
+        dma_ids: List[str],
+        data_loader: Callable[[str], Optional[pd.DataFrame]],
+        value_column: str = 'value',
+        timestamp_column: str = 'timestamp',
+        resume_since: Optional[datetime] = None
+    ) -> Dict[str, Dict[str, bool]]:
+        """
+        Fit models for many DMAs in parallel (e.g. the overnight run).
+        
+        Args:
+            dma_ids: DMAs to fit
+            data_loader: Returns historical data for a DMA
+            value_column: Name of the value column
+            timestamp_column: Name of the timestamp column
+            resume_since: Skip DMAs already fitted since this time
+            
+        Returns:
+            Dictionary of dma_id -> fit status for DMAs fitted in this run
+        """
+        results = self.registry.fit_many(
+            dma_ids, data_loader, value_column, timestamp_column, resume_since
+        )
+        for dma_id in results:
+            self.fitted_dmas.pop(dma_id, None)
+        return results
+    
+    def get_fit_status(self, dma_id: str) -> Dict[str, bool]:
+        """Fit status for a DMA, including versions fitted by other processes."""
+        if dma_id not in self.fitted_dmas:
+            fit_status = self.registry.get_fit_status(dma_id)
+            if not fit_status:
+                return {}
+            fit_status['stl'] = STL_AVAILABLE
+            self.fitted_dmas[dma_id] = fit_status
+        return self.fitted_dmas[dma_id]
+    
     def analyze_point(
         self,
         dma_id: str,
@@ -506,11 +559,15 @@ class BaselineComparisonService:
         ai_confidence = 0.5
         ai_model = 'fallback'
         
+        forecasters = self.registry.get(dma_id)
+        ensemble = forecasters.ensemble if forecasters else None
+        prophet = forecasters.prophet if forecasters else None
+        
         # Try ensemble first
-        if hasattr(self.ensemble_forecaster, 'models') and self.ensemble_forecaster.models:
+        if ensemble is not None and ensemble.models:
             try:
                 df = historical_data.copy()
-                predictions = self.ensemble_forecaster.predict(df.reset_index(), value_column, steps=1)
+                predictions = ensemble.predict(df.reset_index(), value_column, steps=1)
                 
                 if 'ensemble' in predictions and len(predictions['ensemble']) > 0:
                     ai_predicted = float(predictions['ensemble'][0])
@@ -528,9 +585,9 @@ class BaselineComparisonService:
                 logger.warning(f"Ensemble prediction failed for {dma_id}: {e}")
         
         # Fallback to Prophet
-        elif self.prophet_forecaster and self.fitted_dmas.get(dma_id, {}).get('prophet'):
+        elif prophet is not None and prophet.is_fitted:
             try:
-                forecast = self.prophet_forecaster.predict(periods=1, include_history=False)
+                forecast = prophet.predict(periods=1, include_history=False)
                 if len(forecast) > 0:
                     ai_predicted = float(forecast['predicted'].iloc[0])
                     ai_lower_bound = float(forecast['lower_95'].iloc[0])
@@ -893,7 +950,7 @@ class BaselineComparisonService:
                 'stl': STL_AVAILABLE,
                 'prophet': PROPHET_AVAILABLE,
                 'lstm': TF_AVAILABLE,
-                'fitted': self.fitted_dmas.get(dma_id, {})
+                'fitted': self.get_fit_status(dma_id)
             }
         }
         
@@ -1062,7 +1119,7 @@ def create_baseline_api(service: BaselineComparisonService):
                 'prophet': PROPHET_AVAILABLE,
                 'lstm': TF_AVAILABLE
             },
-            'fitted_dmas': list(service.fitted_dmas.keys()),
+            'fitted_dmas': service.registry.fitted_dmas(),
             'timestamp': datetime.utcnow().isoformat()
         })
     
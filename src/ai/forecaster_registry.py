@@ -0,0 +1,592 @@
+"""
+AQUAWATCH NRW - PER-DMA FORECASTER REGISTRY
+===========================================
+
+Keeps one set of fitted forecasters (Prophet / LSTM / Ensemble) per DMA so
+that fitting DMA B no longer overwrites the models fitted for DMA A.
+
+Key Features:
+- Lazy loading of fitted forecasters from disk on first use
+- LRU cap on the number of DMA model sets resident in memory
+- Background refits on a process pool
+- Parallel, resumable bulk fitting (e.g. 500 DMAs overnight)
+- Version metadata recorded in the `model_versions` table
+
+On-disk layout (under `model_dir`):
+    manifest.json                      dma_id -> active version metadata
+    <dma_id>/<version>.joblib          fitted DMAForecasters
+
+The manifest is rewritten atomically after every completed fit, so an
+interrupted bulk run can be restarted and will skip DMAs already fitted.
+
+Author: AquaWatch AI Team
+Version: 1.0.0
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterable, List, Optional
+
+import joblib
+import pandas as pd
+
+from .time_series_forecasting import (
+    ProphetForecaster,
+    LSTMForecaster,
+    EnsembleForecaster,
+    PROPHET_AVAILABLE,
+    TF_AVAILABLE
+)
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+MODEL_NAME_PREFIX = "baseline_forecaster"
+_UNSAFE_PATH_CHARS = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+# =============================================================================
+# DATA CLASSES
+# =============================================================================
+
+@dataclass
+class ForecasterRegistryConfig:
+    """Configuration for the per-DMA forecaster registry."""
+    model_dir: str = './models/forecasters'
+    max_resident_models: int = 64  # LRU cap on DMA model sets held in memory
+    max_workers: Optional[int] = None  # Process pool size (None = CPU count)
+    lstm_min_samples: int = 500  # LSTM needs substantial data
+
+
+@dataclass
+class DMAForecasters:
+    """Fitted forecasters for a single DMA."""
+    dma_id: str
+    version: str
+    prophet: Optional[Any] = None
+    lstm: Optional[Any] = None
+    ensemble: Optional[EnsembleForecaster] = None
+    fit_status: Dict[str, bool] = field(default_factory=dict)
+    trained_at: datetime = field(default_factory=datetime.utcnow)
+    training_samples: int = 0
+    training_start: Optional[datetime] = None
+    training_end: Optional[datetime] = None
+
+
+# =============================================================================
+# FITTING (module level so it can run in worker processes)
+# =============================================================================
+
+def fit_dma_forecasters(
+    dma_id: str,
+    data: pd.DataFrame,
+    value_column: str = 'value',
+    timestamp_column: str = 'timestamp',
+    version: Optional[str] = None,
+    lstm_min_samples: int = 500
+) -> DMAForecasters:
+    """
+    Fit Prophet, LSTM and Ensemble forecasters for one DMA.
+
+    Args:
+        dma_id: District Metered Area identifier
+        data: Historical data with timestamp and value columns
+        value_column: Name of the value column
+        timestamp_column: Name of the timestamp column
+        version: Version label (defaults to a UTC timestamp)
+        lstm_min_samples: Minimum rows before the LSTM is fitted
+
+    Returns:
+        DMAForecasters with fit status per model
+    """
+    version = version or datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')
+    fit_status = {}
+
+    # Ensure data is properly formatted
+    df = data.copy()
+    if timestamp_column in df.columns and not isinstance(df.index, pd.DatetimeIndex):
+        df = df.set_index(timestamp_column)
+
+    forecasters = DMAForecasters(dma_id=dma_id, version=version, training_samples=len(df))
+    if isinstance(df.index, pd.DatetimeIndex) and len(df) > 0:
+        forecasters.training_start = df.index.min().to_pydatetime()
+        forecasters.training_end = df.index.max().to_pydatetime()
+
+    # Fit Prophet
+    if PROPHET_AVAILABLE:
+        try:
+            prophet_df = df.reset_index()
+            prophet_df.columns = ['ds', 'y'] if len(prophet_df.columns) == 2 else prophet_df.columns
+            if 'ds' not in prophet_df.columns:
+                prophet_df = prophet_df.rename(columns={timestamp_column: 'ds', value_column: 'y'})
+            prophet = ProphetForecaster()
+            prophet.fit(prophet_df.reset_index(drop=True), 'y' if 'y' in prophet_df.columns else value_column)
+            forecasters.prophet = prophet
+            fit_status['prophet'] = True
+            logger.info(f"Prophet fitted for DMA {dma_id}")
+        except Exception as e:
+            fit_status['prophet'] = False
+            logger.error(f"Prophet fit failed for DMA {dma_id}: {e}")
+
+    # Fit LSTM (needs more data)
+    if TF_AVAILABLE and len(df) > lstm_min_samples:
+        try:
+            lstm = LSTMForecaster()
+            lstm.fit(df.reset_index(), value_column)
+            forecasters.lstm = lstm
+            fit_status['lstm'] = True
+            logger.info(f"LSTM fitted for DMA {dma_id}")
+        except Exception as e:
+            fit_status['lstm'] = False
+            logger.error(f"LSTM fit failed for DMA {dma_id}: {e}")
+    else:
+        fit_status['lstm'] = False
+
+    # Fit Ensemble
+    try:
+        ensemble = EnsembleForecaster()
+        ensemble.fit(df.reset_index(), value_column)
+        forecasters.ensemble = ensemble
+        fit_status['ensemble'] = True
+        logger.info(f"Ensemble fitted for DMA {dma_id}")
+    except Exception as e:
+        fit_status['ensemble'] = False
+        logger.error(f"Ensemble fit failed for DMA {dma_id}: {e}")
+
+    forecasters.fit_status = fit_status
+    return forecasters
+
+
+def _artifact_path(model_dir: str, dma_id: str, version: str) -> Path:
+    """
+    Path of a versioned artifact for a DMA.
+
+    DMA ids are reduced to a filename-safe whitelist; ids that had to be
+    changed get a short hash suffix so distinct DMAs never share a folder.
+    The result is checked to stay under `model_dir`.
+    """
+    dma_id = str(dma_id)
+    safe_dma = _UNSAFE_PATH_CHARS.sub('_', dma_id).strip('.') or '_'
+    if safe_dma != dma_id:
+        safe_dma = f"{safe_dma}-{hashlib.sha1(dma_id.encode('utf-8')).hexdigest()[:8]}"
+
+    root = Path(model_dir).resolve()
+    path = (root / safe_dma / f"{version}.joblib").resolve()
+    if root not in path.parents:
+        raise ValueError(f"Artifact path for DMA {dma_id!r} escapes {model_dir}")
+    return path
+
+
+def _save_forecasters(forecasters: DMAForecasters, path: Path) -> str:
+    """Save forecasters atomically and return the SHA256 of the artifact."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    joblib.dump(forecasters, tmp_path)
+    os.replace(tmp_path, path)
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _version_metadata(
+    forecasters: DMAForecasters,
+    path: Path,
+    checksum: str,
+    value_column: str
+) -> Dict[str, Any]:
+    """JSON-serializable metadata for a persisted version (manifest entry)."""
+    return {
+        'dma_id': forecasters.dma_id,
+        'version': forecasters.version,
+        'artifact_path': str(path),
+        'checksum': checksum,
+        'fit_status': forecasters.fit_status,
+        'trained_at': forecasters.trained_at.isoformat(),
+        'training_samples': forecasters.training_samples,
+        'training_start': forecasters.training_start.isoformat() if forecasters.training_start else None,
+        'training_end': forecasters.training_end.isoformat() if forecasters.training_end else None,
+        'value_column': value_column
+    }
+
+
+def _fit_and_save(
+    dma_id: str,
+    data: pd.DataFrame,
+    value_column: str,
+    timestamp_column: str,
+    model_dir: str,
+    lstm_min_samples: int
+) -> Dict[str, Any]:
+    """Worker entry point: fit one DMA, persist it, return its metadata."""
+    forecasters = fit_dma_forecasters(
+        dma_id, data, value_column, timestamp_column,
+        lstm_min_samples=lstm_min_samples
+    )
+    path = _artifact_path(model_dir, dma_id, forecasters.version)
+    checksum = _save_forecasters(forecasters, path)
+
+    return _version_metadata(forecasters, path, checksum, value_column)
+
+
+# =============================================================================
+# FORECASTER REGISTRY
+# =============================================================================
+
+class ForecasterRegistry:
+    """
+    Per-DMA registry of fitted forecasters.
+
+    Responsibilities:
+    - Hold at most `max_resident_models` DMA model sets in memory (LRU)
+    - Lazily load the active version of a DMA from disk
+    - Fit synchronously, in the background, or in bulk on a process pool
+    - Record every fitted version in the `model_versions` table
+
+    Args:
+        config: Registry configuration
+        session_factory: Optional callable returning a SQLAlchemy session
+            context manager (e.g. `DatabasePool.get_session`). When omitted,
+            versions are only tracked in the on-disk manifest.
+    """
+
+    def __init__(
+        self,
+        config: Optional[ForecasterRegistryConfig] = None,
+        session_factory: Optional[Callable[[], ContextManager[Any]]] = None
+    ):
+        self.config = config or ForecasterRegistryConfig()
+        self.model_dir = Path(self.config.model_dir)
+        self.session_factory = session_factory
+
+        self._resident: "OrderedDict[str, DMAForecasters]" = OrderedDict()
+        self._manifest: Optional[Dict[str, Dict[str, Any]]] = None
+        self._pending: Dict[str, Future] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.RLock()
+
+    # -------------------------------------------------------------------------
+    # Lookup
+    # -------------------------------------------------------------------------
+
+    def get(self, dma_id: str) -> Optional[DMAForecasters]:
+        """Get forecasters for a DMA, loading the active version from disk if needed."""
+        with self._lock:
+            if dma_id in self._resident:
+                self._resident.move_to_end(dma_id)
+                return self._resident[dma_id]
+
+            entry = self._load_manifest().get(dma_id)
+
+        if not entry:
+            return None
+
+        path = Path(entry['artifact_path'])
+        if not path.exists():
+            logger.warning(f"Forecaster artifact missing for DMA {dma_id}: {path}")
+            return None
+
+        try:
+            forecasters = joblib.load(path)
+        except Exception as e:
+            logger.error(f"Failed to load forecasters for DMA {dma_id}: {e}")
+            return None
+
+        with self._lock:
+            self._make_resident(forecasters)
+        return forecasters
+
+    def get_fit_status(self, dma_id: str) -> Dict[str, bool]:
+        """Fit status of the active version, without loading the models."""
+        with self._lock:
+            if dma_id in self._resident:
+                return dict(self._resident[dma_id].fit_status)
+            return dict(self._load_manifest().get(dma_id, {}).get('fit_status', {}))
+
+    def fitted_dmas(self) -> List[str]:
+        """DMAs that have an active fitted version."""
+        with self._lock:
+            return sorted(set(self._load_manifest()) | set(self._resident))
+
+    def resident_dmas(self) -> List[str]:
+        """DMAs currently held in memory, least recently used first."""
+        with self._lock:
+            return list(self._resident)
+
+    def is_refitting(self, dma_id: str) -> bool:
+        """Whether a background refit is in flight for a DMA."""
+        with self._lock:
+            future = self._pending.get(dma_id)
+            return future is not None and not future.done()
+
+    # -------------------------------------------------------------------------
+    # Fitting
+    # -------------------------------------------------------------------------
+
+    def fit(
+        self,
+        dma_id: str,
+        data: pd.DataFrame,
+        value_column: str = 'value',
+        timestamp_column: str = 'timestamp'
+    ) -> DMAForecasters:
+        """Fit a DMA in-process, persist it and make it the active version."""
+        forecasters = fit_dma_forecasters(
+            dma_id, data, value_column, timestamp_column,
+            lstm_min_samples=self.config.lstm_min_samples
+        )
+        path = _artifact_path(str(self.model_dir), dma_id, forecasters.version)
+
+        try:
+            checksum = _save_forecasters(forecasters, path)
+        except Exception as e:
+            # Keep the in-memory models usable even if they cannot be persisted
+            logger.error(f"Failed to persist forecasters for DMA {dma_id}: {e}")
+            with self._lock:
+                self._make_resident(forecasters)
+            return forecasters
+
+        self._activate(_version_metadata(forecasters, path, checksum, value_column))
+
+        with self._lock:
+            self._make_resident(forecasters)
+        return forecasters
+
+    def submit_refit(
+        self,
+        dma_id: str,
+        data: pd.DataFrame,
+        value_column: str = 'value',
+        timestamp_column: str = 'timestamp'
+    ) -> Future:
+        """
+        Refit a DMA in a background process.
+
+        The currently active version keeps serving until the refit completes;
+        the new version is then activated and loaded lazily on next use.
+        A refit already in flight for the same DMA is returned as-is.
+        """
+        with self._lock:
+            pending = self._pending.get(dma_id)
+            if pending is not None and not pending.done():
+                return pending
+
+            future = self._get_executor().submit(
+                _fit_and_save, dma_id, data, value_column, timestamp_column,
+                str(self.model_dir), self.config.lstm_min_samples
+            )
+            self._pending[dma_id] = future
+
+        future.add_done_callback(lambda f, dma_id=dma_id: self._on_refit_done(dma_id, f))
+        return future
+
+    def fit_many(
+        self,
+        dma_ids: Iterable[str],
+        data_loader: Callable[[str], Optional[pd.DataFrame]],
+        value_column: str = 'value',
+        timestamp_column: str = 'timestamp',
+        resume_since: Optional[datetime] = None
+    ) -> Dict[str, Dict[str, bool]]:
+        """
+        Fit many DMAs in parallel on the process pool.
+
+        Data is loaded lazily through `data_loader` and at most two jobs per
+        worker are kept in flight, so memory stays bounded for large runs.
+
+        Args:
+            dma_ids: DMAs to fit
+            data_loader: Returns the training data for a DMA (None to skip)
+            value_column: Name of the value column
+            timestamp_column: Name of the timestamp column
+            resume_since: Skip DMAs whose active version was trained at or
+                after this time (restart an interrupted overnight run)
+
+        Returns:
+            Dictionary of dma_id -> fit status for the DMAs fitted in this run
+        """
+        dma_ids = list(dma_ids)
+        todo = [d for d in dma_ids if not self._fitted_since(d, resume_since)]
+        skipped = 0
+        results: Dict[str, Dict[str, bool]] = {}
+
+        executor = self._get_executor()
+        max_in_flight = 2 * (self.config.max_workers or os.cpu_count() or 1)
+        in_flight: Dict[Future, str] = {}
+        queue = iter(todo)
+
+        def submit_next() -> bool:
+            nonlocal skipped
+            for dma_id in queue:
+                data = data_loader(dma_id)
+                if data is None or len(data) == 0:
+                    skipped += 1
+                    continue
+                future = executor.submit(
+                    _fit_and_save, dma_id, data, value_column, timestamp_column,
+                    str(self.model_dir), self.config.lstm_min_samples
+                )
+                in_flight[future] = dma_id
+                return True
+            return False
+
+        while len(in_flight) < max_in_flight and submit_next():
+            pass
+
+        while in_flight:
+            done = next(as_completed(in_flight))
+            dma_id = in_flight.pop(done)
+            try:
+                meta = done.result()
+                self._activate(meta)
+                results[dma_id] = meta['fit_status']
+            except Exception as e:
+                logger.error(f"Bulk fit failed for DMA {dma_id}: {e}")
+            submit_next()
+
+        logger.info(
+            f"Bulk forecaster fit complete - fitted: {len(results)}, "
+            f"resumed: {len(dma_ids) - len(todo)}, "
+            f"no data: {skipped}"
+        )
+        return results
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down the background process pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    # -------------------------------------------------------------------------
+    # Internals
+    # -------------------------------------------------------------------------
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.config.max_workers)
+            return self._executor
+
+    def _make_resident(self, forecasters: DMAForecasters) -> None:
+        """Insert into the LRU cache, evicting the least recently used DMAs."""
+        self._resident[forecasters.dma_id] = forecasters
+        self._resident.move_to_end(forecasters.dma_id)
+        while len(self._resident) > self.config.max_resident_models:
+            evicted, _ = self._resident.popitem(last=False)
+            logger.debug(f"Evicted forecasters for DMA {evicted} from memory")
+
+    def _fitted_since(self, dma_id: str, since: Optional[datetime]) -> bool:
+        if since is None:
+            return False
+        with self._lock:
+            entry = self._load_manifest().get(dma_id)
+        if not entry or not Path(entry['artifact_path']).exists():
+            return False
+        return datetime.fromisoformat(entry['trained_at']) >= since
+
+    def _on_refit_done(self, dma_id: str, future: Future) -> None:
+        with self._lock:
+            if self._pending.get(dma_id) is future:
+                del self._pending[dma_id]
+        try:
+            self._activate(future.result())
+        except Exception as e:
+            logger.error(f"Background refit failed for DMA {dma_id}: {e}")
+
+    def _activate(self, meta: Dict[str, Any]) -> None:
+        """Make a persisted version the active one for its DMA."""
+        dma_id = meta['dma_id']
+        with self._lock:
+            manifest = self._load_manifest()
+            manifest[dma_id] = meta
+            self._write_manifest(manifest)
+
+            # Drop the stale version; the new one is loaded lazily on next use
+            resident = self._resident.get(dma_id)
+            if resident is not None and resident.version != meta['version']:
+                del self._resident[dma_id]
+
+        self._record_version(meta)
+        logger.info(f"Activated forecasters {meta['version']} for DMA {dma_id}")
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        if self._manifest is None:
+            path = self.model_dir / MANIFEST_FILE
+            if path.exists():
+                try:
+                    with open(path, 'r') as f:
+                        self._manifest = json.load(f)
+                except Exception as e:
+                    logger.error(f"Error loading forecaster manifest: {e}")
+                    self._manifest = {}
+            else:
+                self._manifest = {}
+        return self._manifest
+
+    def _write_manifest(self, manifest: Dict[str, Dict[str, Any]]) -> None:
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        path = self.model_dir / MANIFEST_FILE
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _record_version(self, meta: Dict[str, Any]) -> None:
+        """Record a fitted version in the `model_versions` table."""
+        if self.session_factory is None:
+            return
+
+        try:
+            from ..storage.models import ModelVersion
+        except ImportError as e:
+            logger.warning(f"ModelVersion table unavailable: {e}")
+            return
+
+        model_name = f"{MODEL_NAME_PREFIX}:{meta['dma_id']}"
+        now = datetime.utcnow()
+
+        try:
+            with self.session_factory() as session:
+                session.query(ModelVersion).filter(
+                    ModelVersion.model_name == model_name,
+                    ModelVersion.is_active.is_(True)
+                ).update({'is_active': False, 'retired_at': now}, synchronize_session=False)
+
+                session.add(ModelVersion(
+                    model_name=model_name,
+                    version=meta['version'],
+                    is_active=True,
+                    deployed_at=now,
+                    artifact_path=meta['artifact_path'],
+                    checksum=meta['checksum'],
+                    trained_at=datetime.fromisoformat(meta['trained_at']),
+                    training_data_start=(
+                        datetime.fromisoformat(meta['training_start']).date()
+                        if meta.get('training_start') else None
+                    ),
+                    training_data_end=(
+                        datetime.fromisoformat(meta['training_end']).date()
+                        if meta.get('training_end') else None
+                    ),
+                    training_samples=meta['training_samples'],
+                    metrics={'fit_status': meta['fit_status']},
+                    hyperparameters={
+                        'value_column': meta.get('value_column'),
+                        'lstm_min_samples': self.config.lstm_min_samples
+                    },
+                    description=f"Baseline comparison forecasters for DMA {meta['dma_id']}"
+                ))
+        except Exception as e:
+            logger.error(f"Failed to record model version for DMA {meta['dma_id']}: {e}")
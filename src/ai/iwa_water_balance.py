@@ -46,6 +46,8 @@ from dataclasses import dataclass, field
 from enum import Enum
 import logging
 
+from src.nrw.mnf_batch import MNFBatchEngine
+
 logger = logging.getLogger(__name__)
 
 
@@ -611,53 +613,69 @@ class IWAWaterBalanceCalculator:
         if flow_data is None or len(flow_data) == 0:
             return {}
         
-        df = flow_data.copy()
-        
-        # Ensure timestamp is datetime
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df['hour'] = df['timestamp'].dt.hour
-        elif isinstance(df.index, pd.DatetimeIndex):
-            df['hour'] = df.index.hour
+        # Ensure timestamp is available as a column
+        if 'timestamp' in flow_data.columns:
+            df = flow_data[['timestamp', 'flow_m3_hour']]
+        elif isinstance(flow_data.index, pd.DatetimeIndex):
+            df = pd.DataFrame({'timestamp': flow_data.index, 'flow_m3_hour': flow_data['flow_m3_hour'].to_numpy()})
         else:
             return {}
         
-        # Filter to MNF window
-        mnf_mask = df['hour'].isin(range(mnf_start_hour, mnf_end_hour))
-        mnf_df = df[mnf_mask]
-        
-        if len(mnf_df) == 0:
+        df = df.assign(dma_id=infrastructure.dma_id)
+        metrics = self.calculate_mnf_batch(df, {infrastructure.dma_id: infrastructure}, mnf_start_hour, mnf_end_hour)
+        if len(metrics) == 0:
             return {}
         
-        # Calculate MNF statistics
-        mnf_m3_hour = mnf_df['flow_m3_hour'].mean()
-        mnf_min_m3_hour = mnf_df['flow_m3_hour'].min()
-        mnf_max_m3_hour = mnf_df['flow_m3_hour'].max()
+        return {key: float(value) for key, value in metrics.iloc[0].items()}
+    
+    def calculate_mnf_batch(
+        self,
+        flow_data: pd.DataFrame,
+        infrastructure: Dict[str, DMAInfrastructure],
+        mnf_start_hour: int = 1,
+        mnf_end_hour: int = 4
+    ) -> pd.DataFrame:
+        """
+        Calculate MNF metrics for many DMAs from one long-format flow table.
         
-        # Calculate expected legitimate night use
-        expected_night_use_m3_hour = (
-            self.night_use_l_per_conn_hour * 
-            infrastructure.number_of_connections / 1000
-        )
+        Args:
+            flow_data: DataFrame with 'dma_id', 'timestamp' and 'flow_m3_hour' columns
+            infrastructure: DMA id -> infrastructure (DMAs without an entry
+                get no legitimate night use allowance)
+            mnf_start_hour: Start of MNF window (default 01:00)
+            mnf_end_hour: End of MNF window (default 04:00)
+            
+        Returns:
+            DataFrame indexed by dma_id with the calculate_mnf_from_flow_data metrics
+        """
+        engine = MNFBatchEngine(mnf_start_hour=mnf_start_hour, mnf_end_hour=mnf_end_hour)
+        summary = engine.window_summary(flow_data)
+        
+        connections = np.array([
+            infrastructure[dma_id].number_of_connections if dma_id in infrastructure else 0
+            for dma_id in summary.index
+        ], dtype=float)
         
-        # MNF excess (potential leakage)
-        mnf_excess_m3_hour = max(mnf_m3_hour - expected_night_use_m3_hour, 0)
-        mnf_excess_m3_day = mnf_excess_m3_hour * 24
+        # Expected legitimate night use and MNF excess (potential leakage)
+        mnf_m3_hour = summary['mnf_m3_hour'].to_numpy()
+        expected_night_use_m3_hour = self.night_use_l_per_conn_hour * connections / 1000
+        mnf_excess_m3_hour = np.maximum(mnf_m3_hour - expected_night_use_m3_hour, 0)
         
         # Average daily flow for comparison
-        avg_daily_flow = df['flow_m3_hour'].mean() * 24
-        mnf_percent = (mnf_m3_hour * 24 / avg_daily_flow * 100) if avg_daily_flow > 0 else 0
+        avg_daily_flow = summary['avg_flow_m3_hour'].to_numpy() * 24
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mnf_percent = np.where(avg_daily_flow > 0, mnf_m3_hour * 24 / avg_daily_flow * 100, 0.0)
         
-        return {
+        return pd.DataFrame({
             'mnf_m3_hour': mnf_m3_hour,
-            'mnf_min_m3_hour': mnf_min_m3_hour,
-            'mnf_max_m3_hour': mnf_max_m3_hour,
+            'mnf_min_m3_hour': summary['mnf_min_m3_hour'].to_numpy(),
+            'mnf_max_m3_hour': summary['mnf_max_m3_hour'].to_numpy(),
             'expected_night_use_m3_hour': expected_night_use_m3_hour,
             'mnf_excess_m3_hour': mnf_excess_m3_hour,
-            'mnf_excess_m3_day': mnf_excess_m3_day,
+            'mnf_excess_m3_day': mnf_excess_m3_hour * 24,
             'mnf_percent_of_daily': mnf_percent,
             'avg_daily_flow_m3': avg_daily_flow
-        }
+        }, index=summary.index)
     
     def estimate_real_losses_from_mnf(
         self,
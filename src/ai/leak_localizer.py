@@ -8,10 +8,13 @@ Localizes leaks to pipe segments using:
 """
 
 import numpy as np
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
+import heapq
 import json
 
 
@@ -42,12 +45,32 @@ class LeakLocation:
 
 
 class NetworkTopology:
-    """Manages the pipe network topology."""
+    """
+    Manages the pipe network topology.
+    
+    Segments are also indexed as integers with CSR-style adjacency arrays
+    (segments are adjacent when they share a node), rebuilt lazily after
+    edits. Single-source searches from a sensor's segment keep their
+    predecessor arrays, so repeated sensor-to-sensor path queries are a
+    walk back along the predecessors.
+    """
     
     def __init__(self):
         self.segments: Dict[str, PipeSegment] = {}
         self.nodes: Dict[str, List[str]] = {}  # node_id -> connected segment_ids
         self.sensor_locations: Dict[str, str] = {}  # sensor_id -> segment_id
+        
+        # Integer-indexed adjacency, rebuilt lazily after edits
+        self._segment_ids: List[str] = []
+        self._segment_index: Dict[str, int] = {}
+        self._indptr: Optional[List[int]] = None
+        self._indices: List[int] = []
+        self._lengths: List[float] = []
+        
+        # Source segment index -> predecessor array (hop-count BFS)
+        self._bfs_predecessors: Dict[int, List[int]] = {}
+        # Source segment index -> (predecessors, distances) (length-weighted)
+        self._dijkstra_predecessors: Dict[int, Tuple[List[int], List[float]]] = {}
     
     def add_segment(self, segment: PipeSegment):
         """Add a pipe segment to the network."""
@@ -62,24 +85,125 @@ class NetworkTopology:
         # Register sensors
         for sensor_id in segment.sensors:
             self.sensor_locations[sensor_id] = segment.segment_id
+        
+        self._invalidate()
+    
+    def _invalidate(self):
+        """Drop the integer adjacency and cached searches after an edit."""
+        self._indptr = None
+        self._bfs_predecessors.clear()
+        self._dijkstra_predecessors.clear()
+    
+    def _ensure_index(self):
+        """Build CSR adjacency over integer segment indices."""
+        if self._indptr is not None:
+            return
+        
+        self._segment_ids = list(self.segments)
+        self._segment_index = {sid: i for i, sid in enumerate(self._segment_ids)}
+        
+        indptr = [0]
+        indices: List[int] = []
+        for segment_id in self._segment_ids:
+            segment = self.segments[segment_id]
+            # Ordered de-duplication keeps the node-list order callers relied on
+            adjacent = dict.fromkeys(
+                adj
+                for node in (segment.start_node, segment.end_node)
+                for adj in self.nodes.get(node, ())
+                if adj != segment_id
+            )
+            indices.extend(self._segment_index[adj] for adj in adjacent)
+            indptr.append(len(indices))
+        
+        self._indptr = indptr
+        self._indices = indices
+        self._lengths = [self.segments[sid].length_m for sid in self._segment_ids]
     
     def get_adjacent_segments(self, segment_id: str) -> List[str]:
         """Get segments adjacent to the given segment."""
         if segment_id not in self.segments:
             return []
         
-        segment = self.segments[segment_id]
-        adjacent = []
+        self._ensure_index()
+        i = self._segment_index[segment_id]
+        return [self._segment_ids[j] for j in self._indices[self._indptr[i]:self._indptr[i + 1]]]
+    
+    def _bfs_from(self, source: int) -> List[int]:
+        """Hop-count BFS predecessors from a segment (-1 = source, -2 = unreached)."""
+        if source in self._bfs_predecessors:
+            return self._bfs_predecessors[source]
         
-        for node in [segment.start_node, segment.end_node]:
-            for adj_segment_id in self.nodes.get(node, []):
-                if adj_segment_id != segment_id and adj_segment_id not in adjacent:
-                    adjacent.append(adj_segment_id)
+        indptr, indices = self._indptr, self._indices
+        predecessors = [-2] * len(self._segment_ids)
+        predecessors[source] = -1
+        queue = deque([source])
         
-        return adjacent
+        while queue:
+            current = queue.popleft()
+            for adjacent in indices[indptr[current]:indptr[current + 1]]:
+                if predecessors[adjacent] == -2:
+                    predecessors[adjacent] = current
+                    queue.append(adjacent)
+        
+        self._bfs_predecessors[source] = predecessors
+        return predecessors
     
-    def get_path_between_sensors(self, sensor1: str, sensor2: str) -> List[str]:
-        """Find path between two sensors using BFS."""
+    def _dijkstra_from(self, source: int) -> Tuple[List[int], List[float]]:
+        """
+        Length-weighted shortest paths from a segment.
+        
+        Moving between adjacent segments costs half of each length, so
+        distances run midpoint to midpoint along the pipes.
+        """
+        if source in self._dijkstra_predecessors:
+            return self._dijkstra_predecessors[source]
+        
+        indptr, indices, lengths = self._indptr, self._indices, self._lengths
+        n = len(self._segment_ids)
+        distances = [float('inf')] * n
+        predecessors = [-2] * n
+        distances[source] = 0.0
+        predecessors[source] = -1
+        heap = [(0.0, source)]
+        
+        while heap:
+            dist, current = heapq.heappop(heap)
+            if dist > distances[current]:
+                continue
+            half = lengths[current] / 2
+            for adjacent in indices[indptr[current]:indptr[current + 1]]:
+                candidate = dist + half + lengths[adjacent] / 2
+                if candidate < distances[adjacent]:
+                    distances[adjacent] = candidate
+                    predecessors[adjacent] = current
+                    heapq.heappush(heap, (candidate, adjacent))
+        
+        self._dijkstra_predecessors[source] = (predecessors, distances)
+        return predecessors, distances
+    
+    def _walk_back(self, predecessors: List[int], target: int) -> List[str]:
+        if predecessors[target] == -2:
+            return []
+        path = []
+        while target != -1:
+            path.append(self._segment_ids[target])
+            target = predecessors[target]
+        return path[::-1]
+    
+    def get_path_between_sensors(self, sensor1: str, sensor2: str,
+                                 weighted: bool = False) -> List[str]:
+        """
+        Find path between two sensors.
+        
+        Args:
+            sensor1: Source sensor
+            sensor2: Target sensor
+            weighted: Shortest by pipe length instead of fewest segments
+        
+        Returns:
+            Segment ids from sensor1's segment to sensor2's, or [] if unconnected
+        """
         if sensor1 not in self.sensor_locations or sensor2 not in self.sensor_locations:
             return []
         
@@ -89,23 +213,39 @@ class NetworkTopology:
         if start_segment == end_segment:
             return [start_segment]
         
-        # BFS
-        visited = {start_segment}
-        queue = [[start_segment]]
+        self._ensure_index()
+        source = self._segment_index[start_segment]
+        target = self._segment_index[end_segment]
         
-        while queue:
-            path = queue.pop(0)
-            current = path[-1]
-            
-            for adjacent in self.get_adjacent_segments(current):
-                if adjacent == end_segment:
-                    return path + [adjacent]
-                
-                if adjacent not in visited:
-                    visited.add(adjacent)
-                    queue.append(path + [adjacent])
+        if weighted:
+            predecessors, _ = self._dijkstra_from(source)
+        else:
+            predecessors = self._bfs_from(source)
+        
+        return self._walk_back(predecessors, target)
+    
+    def get_sensor_distance(self, sensor1: str, sensor2: str) -> float:
+        """Pipe length between the midpoints of two sensors' segments (inf if unconnected)."""
+        if sensor1 not in self.sensor_locations or sensor2 not in self.sensor_locations:
+            return float('inf')
         
-        return []
+        self._ensure_index()
+        _, distances = self._dijkstra_from(self._segment_index[self.sensor_locations[sensor1]])
+        return distances[self._segment_index[self.sensor_locations[sensor2]]]
+    
+    def precompute_sensor_paths(self, weighted: bool = True):
+        """
+        Fill the all-pairs sensor path cache.
+        
+        Runs one single-source search per sensor segment; every later
+        sensor-to-sensor query is a predecessor walk.
+        """
+        self._ensure_index()
+        for segment_id in set(self.sensor_locations.values()):
+            source = self._segment_index[segment_id]
+            self._bfs_from(source)
+            if weighted:
+                self._dijkstra_from(source)
     
     def save(self, filepath: str):
         """Save topology to file."""
@@ -209,13 +349,13 @@ class LeakLocalizer:
         if sensor_id not in self.pressure_drops:
             self.pressure_drops[sensor_id] = []
         
-        self.pressure_drops[sensor_id].append((timestamp, magnitude))
+        # Drops are kept in time order so windows are found by bisection
+        drops = self.pressure_drops[sensor_id]
+        insort(drops, (timestamp, magnitude))
         
         # Keep only last hour
         cutoff = timestamp - timedelta(hours=1)
-        self.pressure_drops[sensor_id] = [
-            (t, m) for t, m in self.pressure_drops[sensor_id] if t > cutoff
-        ]
+        del drops[:bisect_right(drops, (cutoff, float('inf')))]
     
     def localize(self, primary_sensor: str, timestamp: datetime,
                 pressure_drop: float) -> Optional[LeakLocation]:
@@ -317,21 +457,20 @@ class LeakLocalizer:
                                window_seconds: float = 30) -> Dict[str, Tuple[datetime, float]]:
         """Find pressure drops from other sensors within time window."""
         correlated = {}
+        window = timedelta(seconds=window_seconds)
         
         for sensor_id, drops in self.pressure_drops.items():
             if sensor_id == primary_sensor:
                 continue
             
-            for drop_time, magnitude in drops:
-                time_diff = abs((drop_time - timestamp).total_seconds())
-                if time_diff <= window_seconds:
-                    # Keep the drop closest in time
-                    if sensor_id not in correlated:
-                        correlated[sensor_id] = (drop_time, magnitude)
-                    else:
-                        existing_diff = abs((correlated[sensor_id][0] - timestamp).total_seconds())
-                        if time_diff < existing_diff:
-                            correlated[sensor_id] = (drop_time, magnitude)
+            # Only the drops inside the window, located by bisection
+            lo = bisect_left(drops, (timestamp - window,))
+            hi = bisect_right(drops, (timestamp + window, float('inf')))
+            if lo < hi:
+                # Keep the drop closest in time
+                correlated[sensor_id] = min(
+                    drops[lo:hi], key=lambda d: abs((d[0] - timestamp).total_seconds())
+                )
         
         return correlated
     
@@ -359,7 +498,8 @@ class LeakLocalizer:
             return 0
         
         # Find sensors on this segment
-        segment_sensors = [s for s in sensors if s in segment.sensors]
+        on_segment = set(segment.sensors)
+        segment_sensors = [s for s in sensors if s in on_segment]
         
         if len(segment_sensors) < 2:
             return segment.length_m / 2
@@ -367,10 +507,12 @@ class LeakLocalizer:
         # Get drop times for these sensors
         drop_times = []
         for sensor_id in segment_sensors[:2]:
-            if sensor_id in self.pressure_drops and self.pressure_drops[sensor_id]:
-                # Find closest drop to timestamp
-                closest = min(self.pressure_drops[sensor_id],
-                            key=lambda x: abs((x[0] - timestamp).total_seconds()))
+            drops = self.pressure_drops.get(sensor_id)
+            if drops:
+                # Closest drop to timestamp is one of the two around it
+                i = bisect_left(drops, (timestamp,))
+                closest = min(drops[max(i - 1, 0):i + 1],
+                              key=lambda x: abs((x[0] - timestamp).total_seconds()))
                 drop_times.append(closest[0])
         
         if len(drop_times) < 2:
@@ -17,7 +17,7 @@ import pandas as pd
 from typing import Dict, List, Optional, Tuple, Any, Set
 from dataclasses import dataclass, field
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, deque
 import json
 
 try:
@@ -26,6 +26,13 @@ try:
 except ImportError:
     HAS_NETWORKX = False
 
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
 
 @dataclass
 class LocalizationResult:
@@ -67,6 +74,24 @@ class SensorNode:
     coordinates: Tuple[float, float]
 
 
+@dataclass
+class DistanceIndex:
+    """
+    Network distances from every sensor, computed once per topology.
+    
+    segment_distances[i, j] is the distance from sensor i to the midpoint
+    of segment j (nearest end node + half the segment length);
+    sensor_distances[i, k] is the sensor-to-sensor path length. Unreachable
+    pairs are inf.
+    """
+    sensor_ids: List[str]
+    segment_ids: List[str]
+    sensor_index: Dict[str, int]
+    segment_index: Dict[str, int]
+    segment_distances: np.ndarray   # (n_sensors, n_segments)
+    sensor_distances: np.ndarray    # (n_sensors, n_sensors)
+
+
 class PipeNetworkGraph:
     """
     Represents the water distribution network as a graph.
@@ -88,10 +113,15 @@ class PipeNetworkGraph:
         self.segments: Dict[str, PipeSegment] = {}
         self.sensors: Dict[str, SensorNode] = {}
         
+        # Sensor distance cache, rebuilt lazily after topology edits
+        self._distance_index: Optional[DistanceIndex] = None
+        self.topology_version = 0
+        
     def add_segment(self, segment: PipeSegment) -> None:
         """Add a pipe segment to the network."""
         
         self.segments[segment.segment_id] = segment
+        self.invalidate_distances()
         
         # Add edge with attributes
         self.graph.add_edge(
@@ -108,12 +138,99 @@ class PipeNetworkGraph:
         """Add a sensor to the network."""
         
         self.sensors[sensor.sensor_id] = sensor
+        self.invalidate_distances()
         
         # Mark node as sensor location
         if sensor.node_id in self.graph:
             self.graph.nodes[sensor.node_id]['sensor_id'] = sensor.sensor_id
             self.graph.nodes[sensor.node_id]['coordinates'] = sensor.coordinates
     
+    def remove_segment(self, segment_id: str) -> None:
+        """Remove a pipe segment (e.g. abandoned main or closed valve)."""
+        
+        segment = self.segments.pop(segment_id, None)
+        if segment is None:
+            return
+        
+        if self.graph.has_edge(segment.upstream_node, segment.downstream_node):
+            self.graph.remove_edge(segment.upstream_node, segment.downstream_node)
+        self.invalidate_distances()
+    
+    def remove_sensor(self, sensor_id: str) -> None:
+        """Remove a sensor from the network."""
+        
+        sensor = self.sensors.pop(sensor_id, None)
+        if sensor is None:
+            return
+        
+        if sensor.node_id in self.graph:
+            self.graph.nodes[sensor.node_id].pop('sensor_id', None)
+        self.invalidate_distances()
+    
+    def invalidate_distances(self) -> None:
+        """
+        Drop the cached distance index.
+        
+        Called by every topology edit; call it explicitly after modifying
+        `self.graph` or segment lengths directly.
+        """
+        self._distance_index = None
+        self.topology_version += 1
+    
+    def get_distance_index(self) -> DistanceIndex:
+        """
+        Sensor x segment and sensor x sensor distances, built on first use.
+        
+        One Dijkstra per sensor replaces the two point-to-point searches
+        per (sensor, segment) pair that distance queries used to cost.
+        """
+        if self._distance_index is None:
+            self._distance_index = self._build_distance_index()
+        return self._distance_index
+    
+    def _build_distance_index(self) -> DistanceIndex:
+        """Run one single-source Dijkstra per sensor and tabulate distances."""
+        
+        sensor_ids = list(self.sensors)
+        segment_ids = list(self.segments)
+        
+        # Segment end nodes as column indices into a per-node distance vector
+        nodes = list(self.graph.nodes)
+        node_index = {node: i for i, node in enumerate(nodes)}
+        segments = [self.segments[s] for s in segment_ids]
+        upstream = np.array([node_index.get(s.upstream_node, -1) for s in segments], dtype=np.int64)
+        downstream = np.array([node_index.get(s.downstream_node, -1) for s in segments], dtype=np.int64)
+        half_length = np.array([s.length_m / 2 for s in segments], dtype=float)
+        sensor_nodes = np.array(
+            [node_index.get(self.sensors[s].node_id, -1) for s in sensor_ids], dtype=np.int64
+        )
+        
+        segment_distances = np.full((len(sensor_ids), len(segment_ids)), np.inf)
+        sensor_distances = np.full((len(sensor_ids), len(sensor_ids)), np.inf)
+        
+        for i, sensor_id in enumerate(sensor_ids):
+            source = self.sensors[sensor_id].node_id
+            if source not in node_index:
+                continue
+            
+            lengths = nx.single_source_dijkstra_path_length(self.graph, source, weight='length')
+            
+            # Append an inf slot so index -1 (unknown node) reads as unreachable
+            node_dist = np.full(len(nodes) + 1, np.inf)
+            node_dist[[node_index[n] for n in lengths]] = list(lengths.values())
+            
+            segment_distances[i] = np.minimum(node_dist[upstream], node_dist[downstream]) + half_length
+            sensor_distances[i] = node_dist[sensor_nodes]
+        
+        return DistanceIndex(
+            sensor_ids=sensor_ids,
+            segment_ids=segment_ids,
+            sensor_index={s: i for i, s in enumerate(sensor_ids)},
+            segment_index={s: j for j, s in enumerate(segment_ids)},
+            segment_distances=segment_distances,
+            sensor_distances=sensor_distances
+        )
+    
     def get_distance_to_segment(
         self,
         sensor_id: str,
@@ -122,6 +239,9 @@ class PipeNetworkGraph:
         """
         Calculate network distance from sensor to segment.
         
+        Distance to the nearer end node plus half the segment length,
+        read from the cached distance index.
+        
         Returns distance in meters.
         """
         if sensor_id not in self.sensors:
@@ -130,31 +250,10 @@ class PipeNetworkGraph:
         if segment_id not in self.segments:
             return float('inf')
         
-        sensor = self.sensors[sensor_id]
-        segment = self.segments[segment_id]
-        
-        try:
-            # Distance to upstream node
-            dist_upstream = nx.shortest_path_length(
-                self.graph,
-                sensor.node_id,
-                segment.upstream_node,
-                weight='length'
-            )
-            
-            # Distance to downstream node
-            dist_downstream = nx.shortest_path_length(
-                self.graph,
-                sensor.node_id,
-                segment.downstream_node,
-                weight='length'
-            )
-            
-            # Return minimum + half segment length
-            return min(dist_upstream, dist_downstream) + segment.length_m / 2
-            
-        except nx.NetworkXNoPath:
-            return float('inf')
+        index = self.get_distance_index()
+        return float(index.segment_distances[
+            index.sensor_index[sensor_id], index.segment_index[segment_id]
+        ])
     
     def get_segments_between_sensors(
         self,
@@ -192,26 +291,14 @@ class PipeNetworkGraph:
         if sensor_id not in self.sensors:
             return []
         
-        source_node = self.sensors[sensor_id].node_id
-        neighbors = []
+        index = self.get_distance_index()
+        distances = index.sensor_distances[index.sensor_index[sensor_id]]
         
-        for other_id, other_sensor in self.sensors.items():
-            if other_id == sensor_id:
-                continue
-            
-            try:
-                distance = nx.shortest_path_length(
-                    self.graph,
-                    source_node,
-                    other_sensor.node_id,
-                    weight='length'
-                )
-                
-                if distance <= max_distance:
-                    neighbors.append((other_id, distance))
-                    
-            except nx.NetworkXNoPath:
-                continue
+        neighbors = [
+            (other_id, float(distances[k]))
+            for k, other_id in enumerate(index.sensor_ids)
+            if other_id != sensor_id and distances[k] <= max_distance
+        ]
         
         return sorted(neighbors, key=lambda x: x[1])
 
@@ -342,28 +429,34 @@ class LeakLocalizer:
             if sensor_id in self.network.sensors:
                 self.network.sensors[sensor_id].current_probability = prob
         
-        # Calculate posterior for each segment
-        posteriors = {}
-        
-        for segment_id in self.network.segments:
-            posterior = self._calculate_segment_posterior(
-                segment_id, sensor_probabilities
-            )
-            posteriors[segment_id] = posterior
+        # Calculate normalized posterior for every segment at once
+        segment_ids, posteriors = self._calculate_posteriors(sensor_probabilities)
         
-        # Normalize posteriors
-        total = sum(posteriors.values())
-        if total > 0:
-            posteriors = {k: v/total for k, v in posteriors.items()}
+        return self._build_result(
+            dma_id, segment_ids, posteriors, sensor_probabilities, start_time
+        )
+    
+    def _build_result(
+        self,
+        dma_id: str,
+        segment_ids: List[str],
+        posteriors: np.ndarray,
+        sensor_probabilities: Dict[str, float],
+        start_time: float,
+        extra_reasoning: Optional[List[str]] = None
+    ) -> LocalizationResult:
+        """Rank scored segments and assemble the explained result."""
+        import time
         
-        # Rank segments
-        ranked = sorted(posteriors.items(), key=lambda x: x[1], reverse=True)
+        # Rank segments (stable, so ties keep network order)
+        top = np.argsort(-posteriors, kind='stable')[:10]
         
         # Build detailed results for top segments
         ranked_segments = []
         cumulative_prob = 0
         
-        for segment_id, prob in ranked[:10]:
+        for j in top:
+            segment_id, prob = segment_ids[j], posteriors[j]
             segment = self.network.segments[segment_id]
             
             ranked_segments.append({
@@ -395,6 +488,7 @@ class LeakLocalizer:
         reasoning = self._generate_reasoning(
             ranked_segments, sensor_probabilities
         )
+        reasoning.extend(extra_reasoning or [])
         
         inference_time = (time.time() - start_time) * 1000
         
@@ -410,6 +504,52 @@ class LeakLocalizer:
             inference_time_ms=inference_time
         )
     
+    def _calculate_posteriors(
+        self,
+        sensor_probabilities: Dict[str, float]
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        Normalized posterior for every segment, vectorized over the distance index.
+        
+        Same likelihood as `_calculate_segment_posterior`, accumulated as a
+        log-likelihood sum over sensors so many sensors cannot underflow
+        the product before normalization.
+        """
+        index = self.network.get_distance_index()
+        segment_ids = index.segment_ids
+        
+        log_posterior = np.log([self.segment_priors.get(s, 0.01) for s in segment_ids])
+        
+        observed = [
+            (index.sensor_index[sensor_id], prob)
+            for sensor_id, prob in sensor_probabilities.items()
+            if sensor_id in index.sensor_index
+        ]
+        if observed:
+            rows, probs = zip(*observed)
+            distances = index.segment_distances[list(rows)]
+            p = np.asarray(probs, dtype=float)[:, None]
+            
+            # Leak signal decays exponentially with distance
+            expected_signal = np.exp(-distances / self.decay_constant)
+            contribution = np.where(
+                p > 0.5,
+                expected_signal * p,
+                (1 - expected_signal) * (1 - p)
+            )
+            log_contribution = np.log(np.maximum(contribution, 0.01))
+            
+            # Unreachable sensors carry no evidence about the segment
+            log_contribution[np.isinf(distances)] = 0.0
+            log_posterior += log_contribution.sum(axis=0)
+        
+        posteriors = np.exp(log_posterior - log_posterior.max()) if len(segment_ids) else log_posterior
+        total = posteriors.sum()
+        if total > 0:
+            posteriors = posteriors / total
+        
+        return segment_ids, posteriors
+    
     def _calculate_segment_posterior(
         self,
         segment_id: str,
@@ -569,6 +709,9 @@ class SimpleLocalizer:
         self.decay_constant = decay_constant
         self.sensor_positions: Dict[str, Tuple[float, float]] = {}
         self.dma_zones: Dict[str, Dict[str, Any]] = {}
+        
+        # Zone ids and (lat, lon) centers as arrays, rebuilt when zones change
+        self._zone_arrays: Optional[Tuple[List[str], np.ndarray]] = None
     
     def add_sensor(
         self,
@@ -593,6 +736,7 @@ class SimpleLocalizer:
             'center': (center_lat, center_lon),
             'description': description
         }
+        self._zone_arrays = None
     
     def localize(
         self,
@@ -654,16 +798,27 @@ class SimpleLocalizer:
                     inference_time_ms=0.0
                 )
         
-        # Find nearest zones
+        # Find nearest zones: distances to all zone centers in one pass
+        if self._zone_arrays is None:
+            zone_ids = list(self.dma_zones)
+            centers = np.array(
+                [self.dma_zones[z]['center'] for z in zone_ids], dtype=float
+            ).reshape(-1, 2)
+            self._zone_arrays = (zone_ids, centers)
+        zone_ids, centers = self._zone_arrays
+        
+        distances = self._haversine_distance(
+            estimated_lat, estimated_lon, centers[:, 0], centers[:, 1]
+        )
+        zone_probs = 1.0 / (1 + distances / 100)  # Simple distance weighting
+        
+        # Sort by probability, only materialising the zones we return
         ranked_zones = []
-        for zone_id, zone_data in self.dma_zones.items():
-            zone_lat, zone_lon = zone_data['center']
-            distance = self._haversine_distance(
-                estimated_lat, estimated_lon, zone_lat, zone_lon
-            )
+        for j in np.argsort(-zone_probs, kind='stable')[:5]:
+            zone_data = self.dma_zones[zone_ids[j]]
             ranked_zones.append({
-                'segment_id': zone_id,
-                'probability': 1.0 / (1 + distance / 100),  # Simple distance weighting
+                'segment_id': zone_ids[j],
+                'probability': float(zone_probs[j]),
                 'coordinates': zone_data['center'],
                 'pipe_info': {
                     'street': zone_data['name'],
@@ -671,9 +826,6 @@ class SimpleLocalizer:
                 }
             })
         
-        # Sort by probability
-        ranked_zones.sort(key=lambda x: x['probability'], reverse=True)
-        
         # Calculate confidence
         max_prob = max(sensor_probabilities.values())
         num_high = sum(1 for p in sensor_probabilities.values() if p > 0.5)
@@ -710,9 +862,9 @@ class SimpleLocalizer:
     def _haversine_distance(
         self,
         lat1: float, lon1: float,
-        lat2: float, lon2: float
-    ) -> float:
-        """Calculate distance between two points in meters."""
+        lat2: Any, lon2: Any
+    ) -> Any:
+        """Calculate distance between two points in meters (broadcasts over arrays)."""
         R = 6371000  # Earth radius in meters
         
         phi1 = np.radians(lat1)
@@ -724,3 +876,428 @@ class SimpleLocalizer:
         c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
         
         return R * c
+
+
+# =============================================================================
+# HIERARCHICAL LOCALIZATION
+# =============================================================================
+
+def partition_network(
+    network: PipeNetworkGraph,
+    target_segments: int = 256
+) -> Dict[str, int]:
+    """
+    Partition the network into connected clusters of ~target_segments pipes.
+    
+    Breadth-first region growing: start at an unassigned node and claim
+    segments outward until the cluster is full, so clusters are compact
+    along the pipe network. Use DMA or pressure-zone membership instead
+    when it is known.
+    
+    Returns:
+        {segment_id: cluster_number}
+    """
+    adjacency: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+    for segment_id, segment in network.segments.items():
+        adjacency[segment.upstream_node].append((segment_id, segment.downstream_node))
+        adjacency[segment.downstream_node].append((segment_id, segment.upstream_node))
+    
+    assignment: Dict[str, int] = {}
+    visited: Set[str] = set()
+    cluster = 0
+    
+    for seed in adjacency:
+        if seed in visited:
+            continue
+        
+        queue = deque([seed])
+        visited.add(seed)
+        size = 0
+        while queue and size < target_segments:
+            node = queue.popleft()
+            for segment_id, other in adjacency[node]:
+                if segment_id not in assignment:
+                    assignment[segment_id] = cluster
+                    size += 1
+                if other not in visited:
+                    visited.add(other)
+                    queue.append(other)
+        
+        # Frontier nodes return to the pool and can seed the next cluster
+        for node in queue:
+            visited.discard(node)
+        cluster += 1
+    
+    return assignment
+
+
+class HierarchicalLocalizer(LeakLocalizer):
+    """
+    Coarse-to-fine Bayesian localization for utility-scale networks.
+    
+    Scoring every segment is wasteful on a city model of 10^5-10^6 pipes
+    when only a few sensors fire. Instead:
+    
+    1. Segments are grouped into clusters (DMA, pressure zone, or
+       `partition_network`).
+    2. Each cluster gets an upper bound on the score of its best segment:
+       its highest prior times the best likelihood any of its segments
+       could reach from the firing sensors, times the most a quiet sensor
+       can contribute (1 - p).
+    3. The top-k clusters by bound are refined to segments with the exact
+       LeakLocalizer likelihood over all sensors, followed by every other
+       cluster whose bound still beats the 10th best refined segment. The
+       ranked top 10 is therefore the one the flat localizer would return.
+    
+    Segments no sensor can reach are scored as far field, whereas the flat
+    localizer ignores unreachable sensors for them.
+    
+    Distances come from one radius-limited Dijkstra per sensor on a sparse
+    adjacency matrix, cached until the topology changes. Beyond the
+    far-field radius, a leak signal of exp(-far_field_factor) is treated as
+    zero, so per-query work depends on sensor density, not network size.
+    """
+    
+    def __init__(
+        self,
+        network: Optional[PipeNetworkGraph] = None,
+        decay_constant: float = 500.0,
+        top_k_clusters: int = 5,
+        cluster_size: int = 256,
+        far_field_factor: float = 10.0,
+        clusters: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize localizer.
+        
+        Args:
+            network: Pipe network graph
+            decay_constant: Distance at which leak signal decays by 63%
+            top_k_clusters: Clusters refined down to segments
+            cluster_size: Target segments per cluster when partitioning
+            far_field_factor: Search radius in decay constants
+            clusters: Optional {segment_id: cluster_key}, e.g. DMA membership
+        """
+        if not HAS_SCIPY:
+            raise ImportError("scipy required for hierarchical localization")
+        
+        super().__init__(network=None, decay_constant=decay_constant)
+        self.top_k_clusters = top_k_clusters
+        self.cluster_size = cluster_size
+        self.far_field_m = far_field_factor * decay_constant
+        self.clusters = clusters
+        
+        self._topology_version: Optional[int] = None
+        self._reach: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        
+        if network is not None:
+            self.set_network(network, clusters)
+    
+    def set_network(
+        self,
+        network: PipeNetworkGraph,
+        clusters: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Set or update the network graph and rebuild the cluster hierarchy."""
+        self.network = network
+        if clusters is not None:
+            self.clusters = clusters
+        self._calculate_priors()
+        self._build_hierarchy()
+    
+    def _build_hierarchy(self) -> None:
+        """Tabulate adjacency, segment arrays and cluster membership."""
+        
+        graph = self.network.graph
+        nodes = list(graph.nodes)
+        node_index = {node: i for i, node in enumerate(nodes)}
+        
+        # Sparse adjacency from the graph (one entry per pipe, as networkx sees it)
+        edges = list(graph.edges(data='length'))
+        rows = np.fromiter((node_index[u] for u, _, _ in edges), dtype=np.int64, count=len(edges))
+        cols = np.fromiter((node_index[v] for _, v, _ in edges), dtype=np.int64, count=len(edges))
+        # csgraph ignores explicit zeros, so give zero-length pipes a tiny weight
+        weights = np.maximum(
+            np.fromiter((w for _, _, w in edges), dtype=float, count=len(edges)), 1e-9
+        )
+        self._adjacency = csr_matrix((weights, (rows, cols)), shape=(len(nodes), len(nodes)))
+        
+        segments = list(self.network.segments.values())
+        self._segment_ids = [seg.segment_id for seg in segments]
+        self._seg_u = np.array([node_index[seg.upstream_node] for seg in segments], dtype=np.int64)
+        self._seg_v = np.array([node_index[seg.downstream_node] for seg in segments], dtype=np.int64)
+        self._seg_half = np.array([seg.length_m / 2 for seg in segments], dtype=float)
+        self._seg_prior = np.array(
+            [self.segment_priors.get(sid, 0.01) for sid in self._segment_ids], dtype=float
+        )
+        
+        membership = self.clusters or partition_network(self.network, self.cluster_size)
+        keys = [membership.get(sid, '__unassigned__') for sid in self._segment_ids]
+        self._cluster_keys, codes = np.unique(np.asarray(keys, dtype=str), return_inverse=True)
+        self._seg_cluster = codes.astype(np.int64)
+        
+        n_clusters = len(self._cluster_keys)
+        counts = np.bincount(self._seg_cluster, minlength=n_clusters)
+        self._cluster_order = np.argsort(self._seg_cluster, kind='stable')
+        self._cluster_ptr = np.concatenate([[0], np.cumsum(counts)])
+        self._cluster_max_prior = np.zeros(n_clusters)
+        np.maximum.at(self._cluster_max_prior, self._seg_cluster, self._seg_prior)
+        
+        self._sensor_node = {
+            sid: node_index[sensor.node_id]
+            for sid, sensor in self.network.sensors.items()
+            if sensor.node_id in node_index
+        }
+        self._reach = {}
+        self._topology_version = self.network.topology_version
+    
+    def _sensor_reach(self, sensor_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Segments within the far-field radius of a sensor and their distances."""
+        
+        if sensor_id not in self._reach:
+            node_dist = csgraph_dijkstra(
+                self._adjacency, directed=False,
+                indices=self._sensor_node[sensor_id], limit=self.far_field_m
+            )
+            seg_dist = np.minimum(node_dist[self._seg_u], node_dist[self._seg_v]) + self._seg_half
+            reached = np.flatnonzero(seg_dist <= self.far_field_m)
+            self._reach[sensor_id] = (reached, seg_dist[reached])
+        return self._reach[sensor_id]
+    
+    def _cluster_segments(self, clusters: np.ndarray) -> np.ndarray:
+        """Segment positions belonging to the given clusters."""
+        return np.concatenate([
+            self._cluster_order[self._cluster_ptr[c]:self._cluster_ptr[c + 1]]
+            for c in clusters
+        ])
+    
+    def _refine(self, candidates: np.ndarray, observed: List[Tuple[str, float]]) -> np.ndarray:
+        """Exact log posterior (unnormalized) of candidate segments over all sensors."""
+        log_posterior = np.log(self._seg_prior[candidates])
+        for sensor_id, prob in observed:
+            reached, dist = self._sensor_reach(sensor_id)
+            
+            # Far-field value: expected signal ~ 0
+            contribution = np.full(len(candidates), 0.01 if prob > 0.5 else (1 - prob))
+            
+            pos = np.minimum(np.searchsorted(reached, candidates), max(len(reached) - 1, 0))
+            hit = (reached[pos] == candidates) if len(reached) else np.zeros(len(candidates), dtype=bool)
+            expected_signal = np.exp(-dist[pos[hit]] / self.decay_constant)
+            contribution[hit] = np.where(
+                prob > 0.5,
+                expected_signal * prob,
+                (1 - expected_signal) * (1 - prob)
+            )
+            log_posterior += np.log(np.maximum(contribution, 0.01))
+        return log_posterior
+    
+    def warm_up(self) -> None:
+        """Precompute every sensor's reach so the first query is not slower."""
+        for sensor_id in self._sensor_node:
+            self._sensor_reach(sensor_id)
+    
+    def localize(
+        self,
+        sensor_probabilities: Dict[str, float],
+        dma_id: str = 'unknown'
+    ) -> LocalizationResult:
+        """
+        Localize leak by scoring clusters, then refining the best ones.
+        
+        Ranked probabilities are relative to the refined clusters.
+        """
+        import time
+        start_time = time.time()
+        
+        if self.network is None or len(self.network.segments) == 0:
+            return super().localize(sensor_probabilities, dma_id)
+        
+        if self._topology_version != self.network.topology_version:
+            self._calculate_priors()
+            self._build_hierarchy()
+        
+        # Update sensor probabilities in network
+        for sensor_id, prob in sensor_probabilities.items():
+            if sensor_id in self.network.sensors:
+                self.network.sensors[sensor_id].current_probability = prob
+        
+        observed = [
+            (sensor_id, float(prob))
+            for sensor_id, prob in sensor_probabilities.items()
+            if sensor_id in self._sensor_node
+        ]
+        
+        # Coarse: upper bound on the best segment score in each cluster
+        n_clusters = len(self._cluster_keys)
+        cluster_bound = np.log(self._cluster_max_prior)
+        for sensor_id, prob in observed:
+            if prob <= 0.5:
+                cluster_bound += np.log(max(1 - prob, 0.01))
+                continue
+            reached, dist = self._sensor_reach(sensor_id)
+            nearest = np.full(n_clusters, np.inf)
+            np.minimum.at(nearest, self._seg_cluster[reached], dist)
+            cluster_bound += np.log(np.maximum(np.exp(-nearest / self.decay_constant) * prob, 0.01))
+        
+        order = np.argsort(-cluster_bound, kind='stable')
+        k = min(self.top_k_clusters, n_clusters)
+        candidates = self._cluster_segments(order[:k])
+        log_posterior = self._refine(candidates, observed)
+        
+        # Any cluster that could still place a segment in the top 10 is refined
+        # too; refining more can only raise the cut-off, so one pass suffices
+        if len(log_posterior) >= 10:
+            cutoff = np.partition(log_posterior, -10)[-10]
+        else:
+            cutoff = -np.inf
+        rest = order[k:][cluster_bound[order[k:]] >= cutoff]
+        if len(rest):
+            extra_candidates = self._cluster_segments(rest)
+            candidates = np.concatenate([candidates, extra_candidates])
+            log_posterior = np.concatenate([log_posterior, self._refine(extra_candidates, observed)])
+            k += len(rest)
+        
+        posteriors = np.exp(log_posterior - log_posterior.max())
+        posteriors /= posteriors.sum()
+        
+        refined_ids = [self._segment_ids[j] for j in candidates]
+        extra = [
+            f"Refined {k} of {n_clusters} clusters "
+            f"({len(candidates)} of {len(self._segment_ids)} segments); "
+            f"probabilities are relative to the refined area"
+        ]
+        
+        return self._build_result(
+            dma_id, refined_ids, posteriors, sensor_probabilities, start_time, extra
+        )
+
+
+# =============================================================================
+# SYNTHETIC NETWORKS & BENCHMARK
+# =============================================================================
+
+def generate_synthetic_network(
+    n_segments: int = 100_000,
+    n_sensors: int = 200,
+    spacing_m: float = 100.0,
+    origin: Tuple[float, float] = (-15.4167, 28.2833),
+    seed: int = 42
+) -> PipeNetworkGraph:
+    """
+    Build a city-scale street-grid network for benchmarking.
+    
+    Nodes sit on a square lattice; pipes run along grid lines with jittered
+    lengths and a realistic mix of materials, ages and failure histories.
+    A random ~10% of grid links are left out so the layout is not perfectly
+    regular.
+    """
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(np.sqrt(n_segments / 1.8))) + 1
+    
+    # All horizontal and vertical lattice links, then a random subset
+    ii, jj = np.meshgrid(np.arange(side), np.arange(side), indexing='ij')
+    node = ii * side + jj
+    links = np.concatenate([
+        np.stack([node[:, :-1].ravel(), node[:, 1:].ravel()], axis=1),
+        np.stack([node[:-1, :].ravel(), node[1:, :].ravel()], axis=1)
+    ])
+    links = links[rng.permutation(len(links))[:n_segments]]
+    
+    materials = np.array(['pvc', 'hdpe', 'ductile_iron', 'cast_iron', 'steel', 'asbestos_cement'])
+    material = rng.choice(materials, size=len(links), p=[0.35, 0.2, 0.15, 0.15, 0.05, 0.1])
+    lengths = spacing_m * rng.uniform(0.6, 1.4, size=len(links))
+    ages = rng.integers(1, 80, size=len(links))
+    failures = rng.poisson(0.2, size=len(links))
+    diameters = rng.choice([100, 150, 200, 300], size=len(links))
+    
+    m_per_deg = 111_320.0
+    
+    network = PipeNetworkGraph()
+    for k, (u, v) in enumerate(links):
+        mid_row = (u // side + v // side) / 2
+        mid_col = (u % side + v % side) / 2
+        network.add_segment(PipeSegment(
+            segment_id=f"P{k:07d}",
+            upstream_node=f"N{u}",
+            downstream_node=f"N{v}",
+            length_m=float(lengths[k]),
+            diameter_mm=float(diameters[k]),
+            material=str(material[k]),
+            age_years=int(ages[k]),
+            failure_count=int(failures[k]),
+            last_inspection=None,
+            street_name=f"Street {u // side}",
+            coordinates=(
+                origin[0] + mid_row * spacing_m / m_per_deg,
+                origin[1] + mid_col * spacing_m / m_per_deg
+            )
+        ))
+    
+    nodes = list(network.graph.nodes)
+    for i, n in enumerate(rng.choice(len(nodes), size=min(n_sensors, len(nodes)), replace=False)):
+        node_id = nodes[n]
+        idx = int(node_id[1:])
+        network.add_sensor(SensorNode(
+            sensor_id=f"S{i:04d}",
+            node_id=node_id,
+            sensor_type='pressure',
+            current_probability=0.0,
+            coordinates=(
+                origin[0] + (idx // side) * spacing_m / m_per_deg,
+                origin[1] + (idx % side) * spacing_m / m_per_deg
+            )
+        ))
+    
+    return network
+
+
+def benchmark_hierarchical_localization(
+    n_segments: int = 100_000,
+    n_sensors: int = 200,
+    n_firing: int = 3,
+    n_queries: int = 20,
+    seed: int = 42
+) -> Dict[str, float]:
+    """Time hierarchy build, warm-up and per-query latency on a synthetic network."""
+    import time
+    
+    rng = np.random.default_rng(seed)
+    
+    t0 = time.perf_counter()
+    network = generate_synthetic_network(n_segments, n_sensors, seed=seed)
+    t1 = time.perf_counter()
+    localizer = HierarchicalLocalizer(network)
+    t2 = time.perf_counter()
+    localizer.warm_up()
+    t3 = time.perf_counter()
+    
+    sensor_ids = list(network.sensors)
+    latencies = []
+    for _ in range(n_queries):
+        probs = {sid: float(rng.uniform(0.0, 0.3)) for sid in sensor_ids}
+        for sid in rng.choice(sensor_ids, size=n_firing, replace=False):
+            probs[str(sid)] = float(rng.uniform(0.7, 0.95))
+        
+        q0 = time.perf_counter()
+        localizer.localize(probs)
+        latencies.append((time.perf_counter() - q0) * 1000)
+    
+    return {
+        'segments': len(network.segments),
+        'sensors': len(sensor_ids),
+        'clusters': len(localizer._cluster_keys),
+        'generate_s': t1 - t0,
+        'hierarchy_build_s': t2 - t1,
+        'warm_up_s': t3 - t2,
+        'query_p50_ms': float(np.percentile(latencies, 50)),
+        'query_max_ms': float(np.max(latencies))
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"Hierarchical localization benchmark ({n:,} segments)")
+    for key, value in benchmark_hierarchical_localization(n_segments=n).items():
+        print(f"  {key}: {value:.3f}" if isinstance(value, float) else f"  {key}: {value}")
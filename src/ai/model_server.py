@@ -0,0 +1,696 @@
+"""
+AquaWatch NRW - Local Model Server
+==================================
+
+One process holds the anomaly and leak-probability models for every DMA and
+serves batched inference to the API workers, dashboards and SystemRunner
+over a Unix domain socket.
+
+Why:
+- Each web worker loading its own IsolationForest / calibrated classifier
+  copies multiplies RSS and cold-start time per worker.
+- Scoring one feature vector at a time leaves most of the model call as
+  fixed overhead; coalescing concurrent requests amortises it.
+
+How:
+- Models are loaded lazily from the same `{dma_id}_latest.joblib` files the
+  managers write, on a loader thread so a cold DMA never blocks the event
+  loop, memory-mapped (`mmap_mode='r'`) so a restarted server reuses the
+  page cache.
+- Requests for the same (model kind, DMA) are coalesced into micro-batches.
+  An idle model flushes when the batch reaches `max_batch_size` rows or when
+  waiting any longer would break the latency SLO given its recent inference
+  time; while a batch is running, new requests accumulate and go out as the
+  next batch the moment it finishes.
+- Wire format is a small binary frame: JSON header plus raw float64 feature
+  bytes. Nothing is unpickled from the socket, and a requested DMA id only
+  maps to a model file if it is filename-safe and stays in the model dir.
+
+Usage:
+    python -m src.ai.model_server --socket /run/aquawatch/models.sock
+
+    from src.ai.model_server import ModelClient
+    client = ModelClient('/run/aquawatch/models.sock')
+    result = client.detect_anomaly('DMA001', 'S1', features)
+
+`AnomalyDetectorManager` uses the server automatically when it is reachable
+(see `get_model_client`) and scores in-process otherwise; `SystemRunner`
+starts an embedded server when none is running.
+
+Runs entirely on one Linux box; no external services.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .anomaly.detector import AnomalyResult, IsolationForestDetector
+from .probability.estimator import LeakProbabilityEstimator, LeakProbabilityResult
+
+logger = logging.getLogger(__name__)
+
+MODEL_KINDS = ('anomaly', 'probability')
+
+# header length, payload length
+_FRAME_HEADER = struct.Struct('!II')
+
+# DMA ids that may name a model file: the forecaster registry's filename whitelist
+_SAFE_DMA_ID = re.compile(r'[A-Za-z0-9_.-]+')
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+@dataclass
+class ModelServerConfig:
+    """Configuration for the local model server."""
+    socket_path: str = os.environ.get('AQUAWATCH_MODEL_SOCKET', '/tmp/aquawatch-models.sock')
+    anomaly_model_dir: str = './models/anomaly'
+    probability_model_dir: str = './models/probability'
+
+    # Micro-batching
+    max_batch_size: int = 256
+    latency_slo_ms: float = 20.0      # Target end-to-end latency per request
+    min_batch_wait_ms: float = 0.5    # Always wait this long for company
+
+    # Memory-map stored arrays so repeated loads share pages
+    mmap_mode: Optional[str] = 'r'
+
+    # Inference threads; sklearn releases the GIL in its heavy loops
+    inference_workers: int = 2
+
+    # Threads reading model files on a cache miss (kept off the event loop)
+    load_workers: int = 1
+
+    # Per-call joblib parallelism inside the models. Spinning up a worker
+    # pool costs more than scoring a micro-batch, so default to one.
+    model_n_jobs: int = 1
+
+    # Latency samples kept for stats
+    stats_window: int = 2048
+
+
+class ModelServerError(RuntimeError):
+    """Raised by the client when the server reports a failure."""
+
+
+# =============================================================================
+# WIRE FORMAT
+# =============================================================================
+
+def _encode_frame(header: Dict[str, Any], array: Optional[np.ndarray] = None) -> bytes:
+    """Encode a JSON header and optional float64 matrix into one frame."""
+    payload = b''
+    if array is not None:
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        header = dict(header, shape=list(array.shape))
+        payload = array.tobytes()
+    head = json.dumps(header, default=_json_default).encode()
+    return _FRAME_HEADER.pack(len(head), len(payload)) + head + payload
+
+
+def _decode_frame(head: bytes, payload: bytes) -> Tuple[Dict[str, Any], Optional[np.ndarray]]:
+    """Inverse of `_encode_frame`."""
+    header = json.loads(head)
+    array = None
+    if 'shape' in header:
+        array = np.frombuffer(payload, dtype=np.float64).reshape(header['shape'])
+    return header, array
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Not JSON serializable: {type(obj).__name__}")
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("Model server closed the connection")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+# =============================================================================
+# MICRO-BATCHING
+# =============================================================================
+
+@dataclass
+class _PendingRequest:
+    rows: np.ndarray
+    ids: List[str]
+    future: asyncio.Future
+    arrived: float
+
+
+@dataclass
+class _BatchQueue:
+    """Pending requests for one (model kind, DMA) pair."""
+    pending: List[_PendingRequest] = field(default_factory=list)
+    rows: int = 0
+    flush_handle: Optional[asyncio.TimerHandle] = None
+    in_flight: bool = False
+    inference_ms_ewma: float = 1.0
+
+
+class ModelServer:
+    """
+    Serves batched anomaly and leak-probability inference over a Unix socket.
+
+    Requests:
+        {"op": "anomaly", "dma_id": ..., "ids": [...]}      + features
+        {"op": "probability", "dma_id": ..., "ids": [...]}  + features
+        {"op": "ping"} / {"op": "stats"} / {"op": "reload", "dma_id": ...}
+
+    Responses:
+        {"ok": true, "results": [...]} or {"ok": false, "error": ..., "code": ...}
+    """
+
+    def __init__(self, config: Optional[ModelServerConfig] = None):
+        self.config = config or ModelServerConfig()
+        self._models: Dict[Tuple[str, str], Any] = {}
+        self._loading: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._generation = 0  # Bumped by reload; stale loads are not cached
+        self._queues: Dict[Tuple[str, str], _BatchQueue] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.config.inference_workers,
+            thread_name_prefix='model-server'
+        )
+        # Disk loads get their own thread so they never queue behind inference
+        self._load_executor = ThreadPoolExecutor(
+            max_workers=self.config.load_workers,
+            thread_name_prefix='model-loader'
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+
+        # Stats
+        self._latencies_ms: Deque[float] = deque(maxlen=self.config.stats_window)
+        self._batch_sizes: Deque[int] = deque(maxlen=self.config.stats_window)
+        self._requests = 0
+        self._rows = 0
+        self._errors = 0
+
+    # =========================================================================
+    # MODELS
+    # =========================================================================
+
+    def register_model(self, kind: str, dma_id: str, model: Any) -> None:
+        """Serve an already-loaded model instead of loading it from disk."""
+        if kind not in MODEL_KINDS:
+            raise ValueError(f"Unknown model kind: {kind}")
+        self._models[(kind, dma_id)] = self._tune_model(model)
+
+    def _tune_model(self, model: Any) -> Any:
+        estimator = getattr(model, 'model', None)
+        if estimator is not None and hasattr(estimator, 'n_jobs'):
+            estimator.n_jobs = self.config.model_n_jobs
+        return model
+
+    def _model_path(self, kind: str, dma_id: str) -> Optional[Path]:
+        """
+        Model file of a DMA, or None when the id cannot name one.
+
+        The id comes from the socket, so it must match the filename
+        whitelist and the file must stay inside the model directory.
+        """
+        dma_id = str(dma_id)
+        if not _SAFE_DMA_ID.fullmatch(dma_id) or dma_id.startswith('.'):
+            return None
+        model_dir = self.config.anomaly_model_dir if kind == 'anomaly' else self.config.probability_model_dir
+        root = Path(model_dir).resolve()
+        path = (root / f"{dma_id}_latest.joblib").resolve()
+        if path.parent != root:
+            return None
+        return path
+
+    def _read_model(self, kind: str, dma_id: str) -> Optional[Any]:
+        """Load a model from disk (blocking; runs on the loader thread)."""
+        path = self._model_path(kind, dma_id)
+        if path is None:
+            logger.warning(f"Rejected {kind} model request for unsafe DMA id {dma_id!r}")
+            return None
+        if not path.exists():
+            return None
+
+        loader = IsolationForestDetector if kind == 'anomaly' else LeakProbabilityEstimator
+        model = self._tune_model(loader.load(str(path), mmap_mode=self.config.mmap_mode))
+        logger.info(f"Loaded {kind} model for {dma_id} from {path}")
+        return model
+
+    async def _get_model(self, kind: str, dma_id: str) -> Optional[Any]:
+        """
+        Cached model for (kind, DMA), loading it off the event loop on a miss.
+
+        Concurrent misses for the same model share one load, so a cold DMA
+        never stalls requests for models that are already resident.
+        """
+        key = (kind, dma_id)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        loading = self._loading.get(key)
+        if loading is None:
+            loading = self._loading[key] = self._loop.create_task(self._load_model(key))
+        return await asyncio.shield(loading)
+
+    async def _load_model(self, key: Tuple[str, str]) -> Optional[Any]:
+        generation = self._generation
+        try:
+            model = await self._loop.run_in_executor(self._load_executor, self._read_model, *key)
+        finally:
+            self._loading.pop(key, None)
+        # Cache on the loop thread, unless a reload raced with the load
+        if model is not None and generation == self._generation:
+            self._models[key] = model
+        return model
+
+    def _reload(self, dma_id: Optional[str]) -> int:
+        """Drop cached models so the next request re-reads them from disk."""
+        self._generation += 1
+        stale = [k for k in self._models if dma_id is None or k[1] == dma_id]
+        for key in stale:
+            del self._models[key]
+        return len(stale)
+
+    # =========================================================================
+    # LIFECYCLE
+    # =========================================================================
+
+    async def serve(self) -> None:
+        """Bind the socket and serve until cancelled."""
+        path = self.config.socket_path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        if os.path.exists(path):
+            os.unlink(path)  # Stale socket from a previous run
+
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=path)
+        os.chmod(path, 0o660)  # Local workers of the same group only
+        logger.info(f"Model server listening on {path}")
+        self._started.set()
+
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def start(self) -> None:
+        """Run the server on a background thread (embedding and tests)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._started.clear()
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self._serve_until_stopped()),
+            name='model-server',
+            daemon=True
+        )
+        self._thread.start()
+        if not self._started.wait(timeout=10):
+            raise RuntimeError("Model server failed to start")
+
+    async def _serve_until_stopped(self) -> None:
+        try:
+            await self.serve()
+        except asyncio.CancelledError:
+            pass
+
+    def stop(self) -> None:
+        """Stop a server started with `start()`."""
+        if self._loop and self._server:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._executor.shutdown(wait=False)
+        self._load_executor.shutdown(wait=False)
+
+    # =========================================================================
+    # CONNECTIONS
+    # =========================================================================
+
+    async def _handle_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                try:
+                    head_len, payload_len = _FRAME_HEADER.unpack(
+                        await reader.readexactly(_FRAME_HEADER.size)
+                    )
+                    head = await reader.readexactly(head_len)
+                    payload = await reader.readexactly(payload_len)
+                except asyncio.IncompleteReadError:
+                    break
+
+                header, array = _decode_frame(head, payload)
+                response = await self._dispatch(header, array)
+                writer.write(_encode_frame(response))
+                await writer.drain()
+        except asyncio.CancelledError:
+            pass  # Server shutting down
+        except Exception as e:
+            logger.warning(f"Model server connection error: {e}")
+        finally:
+            writer.close()
+
+    async def _dispatch(self, header: Dict[str, Any], array: Optional[np.ndarray]) -> Dict[str, Any]:
+        op = header.get('op')
+        try:
+            if op == 'ping':
+                return {'ok': True, 'model_dirs': self.model_dirs()}
+            if op == 'stats':
+                return {'ok': True, 'stats': self.get_stats()}
+            if op == 'reload':
+                return {'ok': True, 'reloaded': self._reload(header.get('dma_id'))}
+            if op in MODEL_KINDS:
+                if array is None or array.ndim != 2:
+                    return {'ok': False, 'code': 'bad_request', 'error': 'features must be a 2D matrix'}
+                ids = header.get('ids') or ['unknown'] * len(array)
+                results = await self._submit(op, header['dma_id'], array, ids)
+                if results is None:
+                    return {'ok': False, 'code': 'no_model',
+                            'error': f"No {op} model for {header['dma_id']}"}
+                return {'ok': True, 'results': [asdict(r) for r in results]}
+            return {'ok': False, 'code': 'bad_request', 'error': f"Unknown op: {op}"}
+        except Exception as e:
+            self._errors += 1
+            logger.error(f"Model server {op} request failed: {e}")
+            return {'ok': False, 'code': 'error', 'error': str(e)}
+
+    # =========================================================================
+    # BATCHING
+    # =========================================================================
+
+    async def _submit(
+        self,
+        kind: str,
+        dma_id: str,
+        rows: np.ndarray,
+        ids: List[str]
+    ) -> Optional[List[Any]]:
+        """Queue rows for the next micro-batch and wait for their results."""
+        if await self._get_model(kind, dma_id) is None:
+            return None
+
+        key = (kind, dma_id)
+        queue = self._queues.setdefault(key, _BatchQueue())
+        request = _PendingRequest(rows, ids, self._loop.create_future(), time.perf_counter())
+        queue.pending.append(request)
+        queue.rows += len(rows)
+        self._requests += 1
+
+        if queue.rows >= self.config.max_batch_size:
+            self._flush(key)
+        elif queue.flush_handle is None and not queue.in_flight:
+            # While a batch is running, new requests simply accumulate and
+            # are flushed as soon as it completes
+            # Wait only as long as the SLO leaves after expected inference time
+            wait_ms = max(
+                self.config.min_batch_wait_ms,
+                self.config.latency_slo_ms - 2 * queue.inference_ms_ewma
+            )
+            queue.flush_handle = self._loop.call_later(wait_ms / 1000, self._flush, key)
+
+        return await request.future
+
+    def _flush(self, key: Tuple[str, str]) -> None:
+        queue = self._queues[key]
+        if queue.flush_handle is not None:
+            queue.flush_handle.cancel()
+            queue.flush_handle = None
+        if not queue.pending:
+            return
+
+        batch, queue.pending, queue.rows = queue.pending, [], 0
+        queue.in_flight = True
+        self._loop.create_task(self._run_batch(key, batch))
+
+    async def _run_batch(self, key: Tuple[str, str], batch: List[_PendingRequest]) -> None:
+        kind, dma_id = key
+        X = np.vstack([r.rows for r in batch])
+        ids = [i for r in batch for i in r.ids]
+
+        queue = self._queues[key]
+        try:
+            # Normally resident; re-read off-loop if a reload dropped it meanwhile
+            model = await self._get_model(kind, dma_id)
+            if model is None:
+                raise ModelServerError(f"No {kind} model for {dma_id}")
+            started = time.perf_counter()
+            if kind == 'anomaly':
+                results = await self._loop.run_in_executor(self._executor, model.predict_batch, X, ids)
+            else:
+                results = await self._loop.run_in_executor(self._executor, model.predict_proba_batch, X, ids)
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        finally:
+            queue.in_flight = False
+            if queue.pending:
+                self._flush(key)
+
+        finished = time.perf_counter()
+        queue.inference_ms_ewma = 0.8 * queue.inference_ms_ewma + 0.2 * (finished - started) * 1000
+        self._batch_sizes.append(len(X))
+        self._rows += len(X)
+
+        offset = 0
+        for request in batch:
+            n = len(request.rows)
+            if not request.future.done():
+                request.future.set_result(results[offset:offset + n])
+            offset += n
+            self._latencies_ms.append((finished - request.arrived) * 1000)
+
+    def model_dirs(self) -> Dict[str, str]:
+        """Resolved directory each model kind is loaded from."""
+        return {
+            'anomaly': str(Path(self.config.anomaly_model_dir).resolve()),
+            'probability': str(Path(self.config.probability_model_dir).resolve())
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Request counts, batch sizes and latency percentiles."""
+        latencies = np.array(self._latencies_ms) if self._latencies_ms else np.zeros(1)
+        return {
+            'requests': self._requests,
+            'rows': self._rows,
+            'errors': self._errors,
+            'loaded_models': [f"{kind}:{dma}" for kind, dma in self._models],
+            'mean_batch_size': float(np.mean(self._batch_sizes)) if self._batch_sizes else 0.0,
+            'latency_p50_ms': float(np.percentile(latencies, 50)),
+            'latency_p99_ms': float(np.percentile(latencies, 99)),
+            'latency_slo_ms': self.config.latency_slo_ms
+        }
+
+
+# =============================================================================
+# CLIENT
+# =============================================================================
+
+class ModelClient:
+    """
+    Blocking client for the model server.
+
+    Each thread keeps its own connection, so a threaded web worker can issue
+    concurrent requests that the server coalesces into one batch.
+    `detect_anomaly` mirrors `AnomalyDetectorManager.detect_anomaly`.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: float = 5.0):
+        self.socket_path = socket_path or ModelServerConfig().socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def close(self) -> None:
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _request(self, header: Dict[str, Any], array: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        frame = _encode_frame(header, array)
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                sock.sendall(frame)
+                head_len, payload_len = _FRAME_HEADER.unpack(_recv_exact(sock, _FRAME_HEADER.size))
+                response, _ = _decode_frame(_recv_exact(sock, head_len), _recv_exact(sock, payload_len))
+                return response
+            except (ConnectionError, BrokenPipeError, socket.timeout):
+                # Server restarted underneath us: reconnect once
+                self.close()
+                if attempt:
+                    raise
+
+    def _infer(
+        self,
+        op: str,
+        dma_id: str,
+        ids: List[str],
+        features: np.ndarray
+    ) -> Optional[List[Dict[str, Any]]]:
+        features = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        response = self._request({'op': op, 'dma_id': dma_id, 'ids': ids}, features)
+        if response.get('ok'):
+            return response['results']
+        if response.get('code') == 'no_model':
+            return None
+        raise ModelServerError(response.get('error', 'unknown error'))
+
+    def detect_anomaly(
+        self,
+        dma_id: str,
+        sensor_id: str,
+        features: np.ndarray
+    ) -> Optional[AnomalyResult]:
+        """Run anomaly detection for one sensor; None if the DMA has no model."""
+        results = self.detect_anomalies(dma_id, [sensor_id], np.atleast_2d(features)[:1])
+        return results[0] if results else None
+
+    def detect_anomalies(
+        self,
+        dma_id: str,
+        sensor_ids: List[str],
+        features: np.ndarray
+    ) -> Optional[List[AnomalyResult]]:
+        """Run anomaly detection for several sensors of one DMA."""
+        results = self._infer('anomaly', dma_id, list(sensor_ids), features)
+        if results is None:
+            return None
+        return [_restore(AnomalyResult, r) for r in results]
+
+    def predict_leak_probability(
+        self,
+        dma_id: str,
+        features: np.ndarray
+    ) -> Optional[LeakProbabilityResult]:
+        """Estimate leak probability for one feature vector of a DMA."""
+        features = np.atleast_2d(features)[:1]
+        results = self._infer('probability', dma_id, [dma_id], features)
+        return _restore(LeakProbabilityResult, results[0]) if results else None
+
+    def reload(self, dma_id: Optional[str] = None) -> int:
+        """Ask the server to re-read models from disk after retraining."""
+        return self._request({'op': 'reload', 'dma_id': dma_id}).get('reloaded', 0)
+
+    def ping(self) -> bool:
+        try:
+            return bool(self._request({'op': 'ping'}).get('ok'))
+        except OSError:
+            return False
+
+    def model_dirs(self) -> Dict[str, str]:
+        """Resolved model directory per kind the server loads from."""
+        return self._request({'op': 'ping'}).get('model_dirs', {})
+
+    def stats(self) -> Dict[str, Any]:
+        return self._request({'op': 'stats'}).get('stats', {})
+
+
+def _restore(result_cls: type, data: Dict[str, Any]) -> Any:
+    data = dict(data)
+    data['timestamp'] = datetime.fromisoformat(data['timestamp'])
+    return result_cls(**data)
+
+
+_model_client: Optional[ModelClient] = None
+_next_probe = 0.0
+_PROBE_INTERVAL_S = 30.0
+
+
+def get_model_client() -> Optional[ModelClient]:
+    """
+    Shared client if a model server is reachable, else None.
+
+    Callers fall back to loading models in-process when this returns None.
+    An unreachable server is probed again at most every 30 seconds, so the
+    fallback path does not pay a connect attempt per call.
+    """
+    global _model_client, _next_probe
+    if _model_client is None:
+        now = time.monotonic()
+        if now < _next_probe:
+            return None
+        client = ModelClient()
+        if not client.ping():
+            _next_probe = now + _PROBE_INTERVAL_S
+            return None
+        _model_client = client
+    return _model_client
+
+
+# =============================================================================
+# ENTRY POINT
+# =============================================================================
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AquaWatch local model server")
+    defaults = ModelServerConfig()
+    parser.add_argument('--socket', default=defaults.socket_path)
+    parser.add_argument('--anomaly-model-dir', default=defaults.anomaly_model_dir)
+    parser.add_argument('--probability-model-dir', default=defaults.probability_model_dir)
+    parser.add_argument('--max-batch-size', type=int, default=defaults.max_batch_size)
+    parser.add_argument('--latency-slo-ms', type=float, default=defaults.latency_slo_ms)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    server = ModelServer(ModelServerConfig(
+        socket_path=args.socket,
+        anomaly_model_dir=args.anomaly_model_dir,
+        probability_model_dir=args.probability_model_dir,
+        max_batch_size=args.max_batch_size,
+        latency_slo_ms=args.latency_slo_ms
+    ))
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        logger.info("Model server stopped")
+
+
+if __name__ == "__main__":
+    main()
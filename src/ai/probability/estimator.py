@@ -288,81 +288,98 @@ class LeakProbabilityEstimator:
         Returns:
             LeakProbabilityResult with probability, confidence, and explanation
         """
+        # Ensure 2D
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        
+        return self.predict_proba_batch(X[:1], [dma_id])[0]
+    
+    def predict_proba_batch(
+        self,
+        X: np.ndarray,
+        dma_ids: Optional[List[str]] = None
+    ) -> List[LeakProbabilityResult]:
+        """
+        Estimate leak probabilities for many feature vectors at once.
+        
+        The calibrated model and each calibration fold are evaluated once
+        over the whole matrix; explanations are assembled per row.
+        
+        Args:
+            X: Feature matrix (n_samples, n_features)
+            dma_ids: DMA identifier per row
+            
+        Returns:
+            One LeakProbabilityResult per row
+        """
         import time
         start_time = time.time()
         
         if not self.is_fitted:
             raise RuntimeError("Model not fitted. Call fit() first.")
         
-        # Ensure 2D
-        if X.ndim == 1:
-            X = X.reshape(1, -1)
+        X = np.atleast_2d(X)
+        if dma_ids is None:
+            dma_ids = ['unknown'] * len(X)
         
         # Handle missing values
         X_clean = np.nan_to_num(X, nan=0.0)
         X_scaled = self.scaler.transform(X_clean)
         
-        # Get probability
-        proba = self.model.predict_proba(X_scaled)[0, 1]
+        # Get probabilities
+        probas = self.model.predict_proba(X_scaled)[:, 1]
         
-        # Calculate confidence interval using bootstrap-like approach
-        confidence_lower, confidence_upper = self._estimate_confidence_interval(
-            X_scaled, proba
-        )
-        
-        # Confidence based on how extreme the probability is
-        confidence = self._calculate_confidence(proba, X_clean[0])
-        
-        # Get explanation
-        explanation = self._explain_prediction(X_clean[0], X_scaled[0])
+        # Calculate confidence intervals using bootstrap-like approach
+        lowers, uppers = self._estimate_confidence_intervals(X_scaled, probas)
         
-        # Classify severity
-        severity = self._classify_severity(proba)
+        timestamp = datetime.utcnow()
+        inference_time = (time.time() - start_time) * 1000 / max(len(X), 1)
         
-        # Estimate water loss (rough estimation based on probability and severity)
-        estimated_loss = self._estimate_water_loss(proba, severity)
-        
-        inference_time = (time.time() - start_time) * 1000
-        
-        return LeakProbabilityResult(
-            dma_id=dma_id,
-            timestamp=datetime.utcnow(),
-            probability=float(proba),
-            confidence=float(confidence),
-            confidence_lower=float(confidence_lower),
-            confidence_upper=float(confidence_upper),
-            severity=severity,
-            estimated_loss_m3_day=estimated_loss,
-            explanation=explanation,
-            model_version='2.0.0',
-            inference_time_ms=inference_time
-        )
+        results = []
+        for i, proba in enumerate(probas):
+            # Classify severity
+            severity = self._classify_severity(proba)
+            
+            results.append(LeakProbabilityResult(
+                dma_id=dma_ids[i],
+                timestamp=timestamp,
+                probability=float(proba),
+                confidence=float(self._calculate_confidence(proba, X_clean[i])),
+                confidence_lower=float(lowers[i]),
+                confidence_upper=float(uppers[i]),
+                severity=severity,
+                estimated_loss_m3_day=self._estimate_water_loss(proba, severity),
+                explanation=self._explain_prediction(X_clean[i], X_scaled[i]),
+                model_version='2.0.0',
+                inference_time_ms=inference_time
+            ))
+        
+        return results
     
-    def _estimate_confidence_interval(
+    def _estimate_confidence_intervals(
         self,
         X_scaled: np.ndarray,
-        point_estimate: float
-    ) -> Tuple[float, float]:
+        point_estimates: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Estimate confidence interval for probability.
+        Estimate confidence intervals for a batch of probabilities.
         
         Uses calibrated classifiers' variance as uncertainty measure.
         """
         # Get predictions from each calibrated classifier
-        probas = []
-        for calibrated in self.model.calibrated_classifiers_:
-            proba = calibrated.predict_proba(X_scaled)[0, 1]
-            probas.append(proba)
+        probas = [
+            calibrated.predict_proba(X_scaled)[:, 1]
+            for calibrated in self.model.calibrated_classifiers_
+        ]
         
         if len(probas) > 1:
-            std = np.std(probas)
-            lower = max(0, point_estimate - 2 * std)
-            upper = min(1, point_estimate + 2 * std)
+            uncertainty = 2 * np.std(probas, axis=0)
         else:
             # Fallback: use fixed interval based on typical uncertainty
             uncertainty = 0.1
-            lower = max(0, point_estimate - uncertainty)
-            upper = min(1, point_estimate + uncertainty)
+        
+        lower = np.maximum(0, point_estimates - uncertainty)
+        upper = np.minimum(1, point_estimates + uncertainty)
         
         return lower, upper
     
@@ -540,9 +557,14 @@ class LeakProbabilityEstimator:
         joblib.dump(model_data, path)
     
     @classmethod
-    def load(cls, path: str) -> 'LeakProbabilityEstimator':
-        """Load model from disk."""
-        model_data = joblib.load(path)
+    def load(cls, path: str, mmap_mode: Optional[str] = None) -> 'LeakProbabilityEstimator':
+        """
+        Load model from disk.
+        
+        Pass mmap_mode='r' to memory-map the stored arrays so processes
+        loading the same file share its pages.
+        """
+        model_data = joblib.load(path, mmap_mode=mmap_mode)
         
         estimator = cls(model_type=model_data['model_type'])
         estimator.model = model_data['model']
@@ -82,8 +82,15 @@ class IntegratedNRWService:
     This is the main entry point for the NRW detection system.
     """
     
-    def __init__(self, config: Optional[IntegratedNRWConfig] = None):
-        """Initialize all integrated components."""
+    def __init__(self, config: Optional[IntegratedNRWConfig] = None, session_factory=None):
+        """
+        Initialize all integrated components.
+        
+        Args:
+            config: Service configuration
+            session_factory: Database session factory for model version
+                records (defaults to the application database)
+        """
         self.config = config or IntegratedNRWConfig()
         
         # Initialize Component 1: SIV Manager
@@ -108,7 +115,7 @@ class IntegratedNRWService:
             stl_zscore_threshold=self.config.stl_zscore_threshold,
             ai_deviation_threshold_percent=self.config.ai_deviation_threshold_percent
         )
-        self.baseline_service = BaselineComparisonService(baseline_config)
+        self.baseline_service = BaselineComparisonService(baseline_config, session_factory=session_factory)
         
         # Initialize Component 5: Continuous Learning
         learning_config = ContinuousLearningConfig(
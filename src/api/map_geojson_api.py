@@ -9,6 +9,11 @@ This module provides GeoJSON endpoints for the map visualization:
 - GET /tenants/{tenant_id}/map/sensors - Sensor locations
 - GET /tenants/{tenant_id}/map/leaks - Leak markers
 - GET /tenants/{tenant_id}/map/dmas - DMA polygons with NRW heatmap
+- GET /tenants/{tenant_id}/map/layers/{layer} - Bbox-filtered layer GeoJSON
+- GET /tenants/{tenant_id}/map/tiles/{layer}/{z}/{x}/{y} - Slippy-map GeoJSON tiles
+
+Layers are served from per-tenant snapshots held by MapLayerService and
+returned as cached, pre-serialized bytes with ETag / If-None-Match support.
 
 Author: AquaWatch AI Team
 Version: 3.0.0
@@ -17,14 +22,29 @@ Version: 3.0.0
 import logging
 import random
 import math
+import json
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, Depends, Header
+from fastapi.responses import Response
 from pydantic import BaseModel, Field
 
+from src.gis.gis_integration import encode_polyline, simplify_path
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 logger = logging.getLogger(__name__)
 
 # =============================================================================
@@ -115,6 +135,23 @@ class SampleGeoJSONGenerator:
     CENTER_LAT = -15.4167
     CENTER_LNG = 28.2833
     
+    # Leak marker styling
+    LEAK_SEVERITY_COLORS = {
+        "critical": "#dc2626",
+        "high": "#f97316",
+        "medium": "#eab308",
+        "low": "#3b82f6"
+    }
+    LEAK_MARKER_SIZES = {"critical": 18, "high": 16, "medium": 14, "low": 12}
+    LEAK_STATUS_ICONS = {
+        "active": "leak-active",
+        "assigned": "leak-assigned",
+        "in-progress": "leak-progress",
+        "monitoring": "leak-monitor",
+        "repaired": "leak-repaired",
+        "verified": "leak-verified"
+    }
+    
     # DMA definitions with approximate boundaries
     DMA_DEFINITIONS = [
         {
@@ -509,23 +546,6 @@ class SampleGeoJSONGenerator:
             
             leak_id = f"LEAK-{tenant_id[:3].upper()}-{idx:04d}"
             
-            # Determine marker styling
-            severity_colors = {
-                "critical": "#dc2626",
-                "high": "#f97316",
-                "medium": "#eab308",
-                "low": "#3b82f6"
-            }
-            
-            status_icons = {
-                "active": "leak-active",
-                "assigned": "leak-assigned",
-                "in-progress": "leak-progress",
-                "monitoring": "leak-monitor",
-                "repaired": "leak-repaired",
-                "verified": "leak-verified"
-            }
-            
             detected_days_ago = random.randint(0, 14)
             
             feature = GeoJSONFeature(
@@ -559,9 +579,9 @@ class SampleGeoJSONGenerator:
                     "work_order_id": f"WO-{random.randint(1000,9999)}" if leak["status"] in ["assigned", "in-progress", "repaired"] else None,
                     
                     # Styling
-                    "marker_color": severity_colors.get(leak["severity"], "#64748b"),
-                    "marker_size": {"critical": 18, "high": 16, "medium": 14, "low": 12}.get(leak["severity"], 14),
-                    "icon": status_icons.get(leak["status"], "leak-active"),
+                    "marker_color": cls.LEAK_SEVERITY_COLORS.get(leak["severity"], "#64748b"),
+                    "marker_size": cls.LEAK_MARKER_SIZES.get(leak["severity"], 14),
+                    "icon": cls.LEAK_STATUS_ICONS.get(leak["status"], "leak-active"),
                     "pulse": leak["status"] == "active" and leak["severity"] in ["critical", "high"],
                     
                     # Priority score (for sorting)
@@ -617,6 +637,508 @@ class SampleGeoJSONGenerator:
         }
 
 
+# =============================================================================
+# MAP LAYER SERVICE
+# =============================================================================
+
+MAP_LAYERS = ("dmas", "sensors", "leaks")
+MAX_TILE_ZOOM = 22
+
+# Central event manager events shown as leak markers, and how their
+# lifecycle maps onto marker status (closed events and false alarms are removed)
+LEAK_EVENT_TYPES = ("leak", "burst")
+LEAK_EVENT_STATUS = {
+    "new": "active",
+    "acknowledged": "assigned",
+    "investigating": "monitoring",
+    "in_progress": "in-progress",
+    "resolved": "repaired"
+}
+
+
+def dumps_json(payload: Any) -> bytes:
+    """Serialize a payload to compact JSON bytes (orjson when installed)."""
+    if HAS_ORJSON:
+        return orjson.dumps(payload, default=str)
+    return json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def zoom_decimals(zoom: int) -> int:
+    """Coordinate decimals resolving about one pixel of a 256 px tile at a zoom level."""
+    degrees_per_pixel = 360.0 / (256 * (1 << zoom))
+    return int(min(7, max(0, math.ceil(-math.log10(degrees_per_pixel)))))
+
+
+def tile_bbox(zoom: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(west, south, east, north) of a Web Mercator slippy-map tile."""
+    n = 1 << zoom
+    west = x / n * 360 - 180
+    east = (x + 1) / n * 360 - 180
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return west, south, east, north
+
+
+def _positions(coordinates: Any) -> List[List[float]]:
+    """Flatten the nested coordinate arrays of any geometry into positions."""
+    if not coordinates:
+        return []
+    if isinstance(coordinates[0], (int, float)):
+        return [coordinates]
+    return [p for part in coordinates for p in _positions(part)]
+
+
+def geometry_bounds(geometry: Dict[str, Any]) -> Tuple[float, float, float, float]:
+    """(west, south, east, north) of a GeoJSON geometry; NaN when it is empty."""
+    positions = _positions(geometry.get("coordinates"))
+    if not positions:
+        return (math.nan,) * 4
+    xy = np.asarray([p[:2] for p in positions], dtype=float)
+    west, south = xy.min(axis=0)
+    east, north = xy.max(axis=0)
+    return float(west), float(south), float(east), float(north)
+
+
+def _snap_path(path: List[List[float]], decimals: int, min_points: int, encoding: Optional[str]) -> Any:
+    """Simplify a vertex path to one grid step, snap it to the grid and drop repeated vertices."""
+    snapped = np.round(simplify_path(path, 10.0 ** -decimals, min_points), decimals)
+    keep = np.ones(len(snapped), dtype=bool)
+    keep[1:] = np.any(snapped[1:] != snapped[:-1], axis=1)
+    if keep.sum() >= min_points:
+        snapped = snapped[keep]
+    if encoding == "polyline":
+        return encode_polyline(snapped, decimals)
+    return snapped.tolist()
+
+
+def simplify_geometry(geometry: Dict[str, Any], decimals: int, encoding: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Simplify a geometry for the coordinate grid of a zoom level.
+    
+    Lines and rings are Douglas-Peucker simplified with a tolerance of one
+    grid step, snapped to the grid and stripped of vertices that snapping
+    repeats, so detail that would not be visible at that zoom is dropped.
+    Rings keep at least four vertices and stay closed. With
+    ``encoding="polyline"`` each line or ring is sent as a Google encoded
+    polyline at the same precision.
+    """
+    gtype = geometry.get("type")
+    coords = geometry.get("coordinates")
+    if not coords:
+        return geometry
+    if gtype == "Point":
+        return {**geometry, "coordinates": [round(c, decimals) for c in coords]}
+    if gtype == "MultiPoint":
+        return {**geometry, "coordinates": np.round(np.asarray(coords, dtype=float), decimals).tolist()}
+    
+    if gtype == "LineString":
+        snapped = _snap_path(coords, decimals, 2, encoding)
+    elif gtype == "MultiLineString":
+        snapped = [_snap_path(line, decimals, 2, encoding) for line in coords]
+    elif gtype == "Polygon":
+        snapped = [_snap_path(ring, decimals, 4, encoding) for ring in coords]
+    elif gtype == "MultiPolygon":
+        snapped = [[_snap_path(ring, decimals, 4, encoding) for ring in polygon] for polygon in coords]
+    else:
+        return geometry
+    if encoding is None:
+        return {**geometry, "coordinates": snapped}
+    return {**geometry, "coordinates": snapped, "encoding": encoding, "precision": decimals}
+
+
+def leak_feature_from_event(event: Any, tenant_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Leak marker feature for a central event manager Event.
+    
+    Returns None for events that do not belong on the leak layer (other event
+    types, or no coordinates to place the marker).
+    """
+    if event.event_type.value not in LEAK_EVENT_TYPES or not event.coordinates:
+        return None
+    
+    lat, lng = event.coordinates
+    severity = event.severity.value if event.severity.value in LeakSeverity._value2member_map_ else "low"
+    status = LEAK_EVENT_STATUS.get(event.status.value, "repaired")
+    flow_lph = round(event.estimated_water_loss * 1000, 1) if status != "repaired" else 0  # m³/h -> L/h
+    
+    return {
+        "type": "Feature",
+        "id": event.event_id,
+        "geometry": {"type": "Point", "coordinates": [lng, lat]},
+        "properties": {
+            "id": event.event_id,
+            "type": "leak",
+            "tenant_id": tenant_id,
+            "dma_id": event.zone_id,
+            "dma_name": event.zone_id.replace("dma-", "").replace("-", " ").title(),
+            "location": event.title,
+            "severity": severity,
+            "status": status,
+            "flow_rate_lph": flow_lph,
+            "estimated_loss_m3_day": round(event.estimated_water_loss * 24, 2) if flow_lph else 0,
+            "detected_at": event.detected_at.isoformat(),
+            "detection_method": event.sources[0].source_type if event.sources else "event",
+            "assigned_to": event.assigned_to,
+            "event_type": event.event_type.value,
+            "marker_color": SampleGeoJSONGenerator.LEAK_SEVERITY_COLORS.get(severity, "#64748b"),
+            "marker_size": SampleGeoJSONGenerator.LEAK_MARKER_SIZES.get(severity, 14),
+            "icon": SampleGeoJSONGenerator.LEAK_STATUS_ICONS.get(status, "leak-active"),
+            "pulse": status == "active" and severity in ["critical", "high"],
+            "priority_score": SampleGeoJSONGenerator._calculate_leak_priority(
+                {"severity": severity, "status": status, "flow": flow_lph}
+            )
+        }
+    }
+
+
+@dataclass
+class LayerSnapshot:
+    """Current features of one tenant map layer, held as plain GeoJSON dicts."""
+    layer: str
+    features: List[Dict[str, Any]] = field(default_factory=list)
+    metadata: Optional[Dict[str, Any]] = None
+    version: int = 0
+    updated_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    bounds: np.ndarray = field(default_factory=lambda: np.empty((0, 4)))  # west, south, east, north
+    positions: Dict[str, int] = field(default_factory=dict)  # feature id -> row
+    
+    @classmethod
+    def from_features(cls, layer: str, features: List[Dict[str, Any]],
+                      metadata: Optional[Dict[str, Any]] = None) -> "LayerSnapshot":
+        snapshot = cls(layer=layer, features=list(features), metadata=metadata)
+        snapshot.bounds = np.array(
+            [geometry_bounds(f["geometry"]) for f in snapshot.features], dtype=float
+        ).reshape(-1, 4)
+        snapshot.positions = {f.get("id"): i for i, f in enumerate(snapshot.features)}
+        return snapshot
+    
+    def put(self, feature: Dict[str, Any]):
+        """Replace the feature with the same id, or append it."""
+        row = self.positions.get(feature.get("id"))
+        box = np.array(geometry_bounds(feature["geometry"]), dtype=float)
+        if row is None:
+            self.positions[feature.get("id")] = len(self.features)
+            self.features.append(feature)
+            self.bounds = np.vstack([self.bounds, box])
+        else:
+            self.features[row] = feature
+            self.bounds[row] = box
+    
+    def discard(self, feature_id: str) -> bool:
+        """Remove a feature by id; returns False when it is not in the layer."""
+        row = self.positions.pop(feature_id, None)
+        if row is None:
+            return False
+        del self.features[row]
+        self.bounds = np.delete(self.bounds, row, axis=0)
+        for i in range(row, len(self.features)):
+            self.positions[self.features[i].get("id")] = i
+        return True
+    
+    def rows_in_bbox(self, bbox: Tuple[float, float, float, float]) -> np.ndarray:
+        """Rows whose bounding box intersects (west, south, east, north)."""
+        west, south, east, north = bbox
+        b = self.bounds
+        return np.flatnonzero((b[:, 0] <= east) & (b[:, 2] >= west) & (b[:, 1] <= north) & (b[:, 3] >= south))
+
+
+class MapLayerService:
+    """
+    Per-tenant map layer snapshots served as cached, pre-serialized JSON.
+    
+    A tenant's layers are generated on first access and regenerated once they
+    are older than snapshot_ttl_seconds (never, when None) or after refresh().
+    In between they change through upsert_feature / update_properties /
+    remove_feature; connect_event_manager() wires a CentralEventManager so
+    that leak and burst events are mirrored onto the tenant's leak layer as
+    they are raised and change status. Each change stamps the layer with a
+    new version. Rendered responses are cached as JSON bytes keyed by the
+    layer versions and the query, with a content hash as ETag, so map panning
+    and polling never reach the generators or Pydantic serialization.
+    """
+    
+    def __init__(
+        self,
+        generator=SampleGeoJSONGenerator,
+        max_cached_responses: int = 2048,
+        snapshot_ttl_seconds: Optional[float] = None
+    ):
+        self.generator = generator
+        self.max_cached_responses = max_cached_responses
+        self.snapshot_ttl_seconds = snapshot_ttl_seconds
+        self._tenants: Dict[str, Dict[str, LayerSnapshot]] = {}
+        self._built_at: Dict[str, float] = {}
+        self._event_sources: List[Tuple[Any, str]] = []  # (event manager, tenant_id)
+        self._responses: "OrderedDict[Tuple, Tuple[bytes, str]]" = OrderedDict()
+        self._version = 0
+        self._lock = threading.RLock()
+        self.stats = {"cache_hits": 0, "cache_misses": 0, "snapshots_built": 0}
+    
+    def _next_version(self) -> int:
+        # Service-wide, so a rebuilt snapshot never reuses a cached version
+        self._version += 1
+        return self._version
+    
+    def _touch(self, snapshot: LayerSnapshot) -> int:
+        snapshot.version = self._next_version()
+        snapshot.updated_at = datetime.utcnow().isoformat()
+        return snapshot.version
+    
+    # -------------------------------------------------------------------------
+    # Snapshots
+    # -------------------------------------------------------------------------
+    
+    def layers(self, tenant_id: str) -> Dict[str, LayerSnapshot]:
+        """All layer snapshots of a tenant, generated on first access or once expired."""
+        with self._lock:
+            snapshots = self._tenants.get(tenant_id)
+            if snapshots is not None and self.snapshot_ttl_seconds is not None and \
+                    time.monotonic() - self._built_at[tenant_id] > self.snapshot_ttl_seconds:
+                snapshots = None
+            if snapshots is None:
+                snapshots = {}
+                for name, collection in self.generator.generate_full_geojson(tenant_id).items():
+                    snapshot = LayerSnapshot.from_features(
+                        name, [f.model_dump() for f in collection.features], collection.metadata
+                    )
+                    self._touch(snapshot)
+                    snapshots[name] = snapshot
+                
+                # Replay connected event managers so a rebuild keeps their leaks
+                if "leaks" in snapshots:
+                    for manager, event_tenant in self._event_sources:
+                        if event_tenant == tenant_id:
+                            for event in list(manager.events.values()):
+                                self._apply_event(snapshots["leaks"], tenant_id, event)
+                
+                self._tenants[tenant_id] = snapshots
+                self._built_at[tenant_id] = time.monotonic()
+                self.stats["snapshots_built"] += 1
+            return snapshots
+    
+    def snapshot(self, tenant_id: str, layer: str) -> LayerSnapshot:
+        """Snapshot of one layer; raises KeyError for an unknown layer."""
+        snapshots = self.layers(tenant_id)
+        if layer not in snapshots:
+            raise KeyError(f"Unknown map layer: {layer}")
+        return snapshots[layer]
+    
+    def refresh(self, tenant_id: Optional[str] = None):
+        """Drop snapshots (one tenant or all) so they are regenerated on next access."""
+        with self._lock:
+            if tenant_id is None:
+                self._tenants.clear()
+            else:
+                self._tenants.pop(tenant_id, None)
+    
+    def connect_event_manager(self, event_manager: Any, tenant_id: str):
+        """
+        Mirror a CentralEventManager's leak and burst events onto a tenant's leak layer.
+        
+        Events already held by the manager are applied on the next access;
+        later events follow through its new_event / event_acknowledged /
+        event_status_changed notifications.
+        """
+        with self._lock:
+            self._event_sources.append((event_manager, tenant_id))
+            self._tenants.pop(tenant_id, None)
+        
+        def on_event(event):
+            self.apply_event(tenant_id, event)
+        
+        for name in ("new_event", "event_acknowledged", "event_status_changed"):
+            event_manager.subscribe(name, on_event)
+    
+    # -------------------------------------------------------------------------
+    # Event updates
+    # -------------------------------------------------------------------------
+    
+    def upsert_feature(self, tenant_id: str, layer: str, feature: Any) -> int:
+        """
+        Insert or replace a feature (matched on id).
+        
+        Args:
+            feature: GeoJSONFeature or plain GeoJSON feature dict
+        
+        Returns:
+            New layer version
+        """
+        if isinstance(feature, GeoJSONFeature):
+            feature = feature.model_dump()
+        with self._lock:
+            snapshot = self.snapshot(tenant_id, layer)
+            snapshot.put(feature)
+            return self._touch(snapshot)
+    
+    def update_properties(
+        self,
+        tenant_id: str,
+        layer: str,
+        feature_id: str,
+        properties: Dict[str, Any],
+        geometry: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Merge property changes (and optionally a new geometry) into one feature."""
+        with self._lock:
+            snapshot = self.snapshot(tenant_id, layer)
+            row = snapshot.positions.get(feature_id)
+            if row is None:
+                return False
+            current = snapshot.features[row]
+            snapshot.put({
+                **current,
+                "geometry": geometry if geometry is not None else current["geometry"],
+                "properties": {**current["properties"], **properties}
+            })
+            self._touch(snapshot)
+            return True
+    
+    def remove_feature(self, tenant_id: str, layer: str, feature_id: str) -> bool:
+        """Remove a feature from a layer."""
+        with self._lock:
+            snapshot = self.snapshot(tenant_id, layer)
+            if not snapshot.discard(feature_id):
+                return False
+            self._touch(snapshot)
+            return True
+    
+    def apply_event(self, tenant_id: str, event: Any) -> bool:
+        """
+        Upsert or remove the leak marker of a central event manager Event.
+        
+        Returns:
+            Whether the leak layer changed
+        """
+        with self._lock:
+            return self._apply_event(self.snapshot(tenant_id, "leaks"), tenant_id, event)
+    
+    def _apply_event(self, snapshot: LayerSnapshot, tenant_id: str, event: Any) -> bool:
+        feature = leak_feature_from_event(event, tenant_id)
+        if feature is None:
+            return False
+        if event.status.value in LEAK_EVENT_STATUS:
+            snapshot.put(feature)
+        elif not snapshot.discard(feature["id"]):
+            return False
+        self._touch(snapshot)
+        return True
+    
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+    
+    def select(
+        self,
+        tenant_id: str,
+        layer: str,
+        equals: Optional[Dict[str, Any]] = None,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Features matching property filters and intersecting a bbox.
+        
+        Args:
+            equals: property -> required value (None values are ignored)
+            ranges: property -> (min, max), either bound optional
+            bbox: (west, south, east, north)
+        """
+        snapshot = self.snapshot(tenant_id, layer)
+        if bbox is None:
+            features = snapshot.features
+        else:
+            features = [snapshot.features[i] for i in snapshot.rows_in_bbox(bbox).tolist()]
+        
+        for key, value in (equals or {}).items():
+            if value is not None:
+                features = [f for f in features if f["properties"].get(key) == value]
+        for key, (low, high) in (ranges or {}).items():
+            if low is None and high is None:
+                continue
+            features = [
+                f for f in features
+                if f["properties"].get(key) is not None
+                and (low is None or f["properties"][key] >= low)
+                and (high is None or f["properties"][key] <= high)
+            ]
+        return list(features)
+    
+    def collection(
+        self,
+        features: List[Dict[str, Any]],
+        zoom: Optional[int] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        encoding: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        FeatureCollection dict.
+        
+        Args:
+            zoom: Simplify geometry for this zoom level (see simplify_geometry)
+            encoding: "polyline" to send lines and rings as encoded polylines
+                (at 6 decimals when no zoom is given)
+        """
+        if zoom is not None or encoding is not None:
+            decimals = zoom_decimals(zoom) if zoom is not None else 6
+            features = [
+                {**f, "geometry": simplify_geometry(f["geometry"], decimals, encoding)} for f in features
+            ]
+        return {"type": "FeatureCollection", "features": features, "metadata": metadata}
+    
+    def versions(self, tenant_id: str, layers: Tuple[str, ...] = MAP_LAYERS) -> Tuple[int, ...]:
+        """Current versions of the given layers (part of every response cache key)."""
+        snapshots = self.layers(tenant_id)
+        return tuple(snapshots[name].version if name in snapshots else 0 for name in layers)
+    
+    def render(self, key: Tuple, build) -> Tuple[bytes, str]:
+        """
+        Cached JSON bytes and ETag of a response.
+        
+        Args:
+            key: Hashable cache key; include ``versions(...)`` of the layers read
+            build: Zero-argument callable returning the payload on a cache miss
+        """
+        with self._lock:
+            cached = self._responses.get(key)
+            if cached is not None:
+                self._responses.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return cached
+            
+            self.stats["cache_misses"] += 1
+            payload = dumps_json(build())
+            etag = '"' + hashlib.blake2b(payload, digest_size=12).hexdigest() + '"'
+            self._responses[key] = (payload, etag)
+            while len(self._responses) > self.max_cached_responses:
+                self._responses.popitem(last=False)
+            return payload, etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names the current ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def cached_json_response(payload: bytes, etag: str, if_none_match: Optional[str] = None) -> Response:
+    """200 with pre-serialized bytes, or 304 when the client already holds this ETag."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+
+map_layer_service = MapLayerService(snapshot_ttl_seconds=300)
+
+
+def get_map_layer_service() -> MapLayerService:
+    """Dependency returning the shared map layer service."""
+    return map_layer_service
+
+
 # =============================================================================
 # FASTAPI ROUTER
 # =============================================================================
@@ -624,6 +1146,19 @@ class SampleGeoJSONGenerator:
 router = APIRouter(prefix="/tenants/{tenant_id}/map", tags=["Map GeoJSON"])
 
 
+def _parse_bbox(bbox: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    """Parse a ``west,south,east,north`` query value."""
+    if not bbox:
+        return None
+    try:
+        west, south, east, north = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be 'west,south,east,north'")
+    if west > east or south > north:
+        raise HTTPException(status_code=400, detail="bbox must be 'west,south,east,north'")
+    return west, south, east, north
+
+
 @router.get("/geojson", response_model=FullMapResponse)
 async def get_full_map_geojson(
     tenant_id: str,
@@ -650,7 +1185,9 @@ async def get_full_map_geojson(
     min_nrw: Optional[float] = Query(
         default=None,
         description="Filter DMAs with NRW >= this value"
-    )
+    ),
+    if_none_match: Optional[str] = Header(default=None),
+    service: MapLayerService = Depends(get_map_layer_service)
 ):
     """
     Get full map GeoJSON data for a tenant.
@@ -663,101 +1200,110 @@ async def get_full_map_geojson(
     Use query parameters to filter and customize the response.
     """
     try:
-        # Generate sample data
-        layers_to_include = [l.strip() for l in include_layers.split(",")]
-        all_layers = SampleGeoJSONGenerator.generate_full_geojson(tenant_id)
-        
-        result_layers = {}
-        
-        # Filter DMA layer
-        if "dmas" in layers_to_include:
-            dma_layer = all_layers["dmas"]
-            if dma_filter:
-                dma_layer.features = [f for f in dma_layer.features if f.properties.get("id") == dma_filter]
-            if min_nrw is not None:
-                dma_layer.features = [f for f in dma_layer.features if f.properties.get("nrw_percent", 0) >= min_nrw]
-            result_layers["dmas"] = dma_layer
-        
-        # Filter sensor layer
-        if "sensors" in layers_to_include:
-            sensor_layer = all_layers["sensors"]
-            if dma_filter:
-                sensor_layer.features = [f for f in sensor_layer.features if f.properties.get("dma_id") == dma_filter]
-            if sensor_status:
-                sensor_layer.features = [f for f in sensor_layer.features if f.properties.get("status") == sensor_status.value]
-            result_layers["sensors"] = sensor_layer
-        
-        # Filter leak layer
-        if "leaks" in layers_to_include:
-            leak_layer = all_layers["leaks"]
-            if dma_filter:
-                leak_layer.features = [f for f in leak_layer.features if f.properties.get("dma_id") == dma_filter]
-            if leak_status:
-                leak_layer.features = [f for f in leak_layer.features if f.properties.get("status") == leak_status.value]
-            if leak_severity:
-                leak_layer.features = [f for f in leak_layer.features if f.properties.get("severity") == leak_severity.value]
-            result_layers["leaks"] = leak_layer
-        
-        # Calculate metadata
-        total_sensors = len(result_layers.get("sensors", GeoJSONFeatureCollection(features=[])).features)
-        online_sensors = len([
-            f for f in result_layers.get("sensors", GeoJSONFeatureCollection(features=[])).features
-            if f.properties.get("status") == "online"
-        ])
-        active_leaks = len([
-            f for f in result_layers.get("leaks", GeoJSONFeatureCollection(features=[])).features
-            if f.properties.get("status") == "active"
-        ])
+        layers_to_include = tuple(l.strip() for l in include_layers.split(","))
+        filters = {
+            "dma": dma_filter,
+            "sensor_status": sensor_status.value if sensor_status else None,
+            "leak_status": leak_status.value if leak_status else None,
+            "leak_severity": leak_severity.value if leak_severity else None,
+            "min_nrw": min_nrw
+        }
         
-        return FullMapResponse(
-            tenantId=tenant_id,
-            layers=result_layers,
-            metadata={
-                "total_dmas": len(result_layers.get("dmas", GeoJSONFeatureCollection(features=[])).features),
-                "total_sensors": total_sensors,
-                "sensors_online": online_sensors,
-                "total_leaks": len(result_layers.get("leaks", GeoJSONFeatureCollection(features=[])).features),
-                "active_leaks": active_leaks,
-                "filters_applied": {
-                    "dma": dma_filter,
-                    "sensor_status": sensor_status.value if sensor_status else None,
-                    "leak_status": leak_status.value if leak_status else None,
-                    "leak_severity": leak_severity.value if leak_severity else None,
-                    "min_nrw": min_nrw
+        def build():
+            snapshots = service.layers(tenant_id)
+            selections = {}
+            if "dmas" in layers_to_include:
+                selections["dmas"] = service.select(
+                    tenant_id, "dmas", equals={"id": dma_filter}, ranges={"nrw_percent": (min_nrw, None)}
+                )
+            if "sensors" in layers_to_include:
+                selections["sensors"] = service.select(
+                    tenant_id, "sensors", equals={"dma_id": dma_filter, "status": filters["sensor_status"]}
+                )
+            if "leaks" in layers_to_include:
+                selections["leaks"] = service.select(
+                    tenant_id, "leaks",
+                    equals={"dma_id": dma_filter, "status": filters["leak_status"],
+                            "severity": filters["leak_severity"]}
+                )
+            
+            sensors = selections.get("sensors", [])
+            leaks = selections.get("leaks", [])
+            return {
+                "tenantId": tenant_id,
+                "layers": {
+                    name: service.collection(features, metadata=snapshots[name].metadata)
+                    for name, features in selections.items()
                 },
-                "center": [SampleGeoJSONGenerator.CENTER_LNG, SampleGeoJSONGenerator.CENTER_LAT],
-                "zoom": 12
-            },
-            generatedAt=datetime.utcnow().isoformat()
-        )
+                "metadata": {
+                    "total_dmas": len(selections.get("dmas", [])),
+                    "total_sensors": len(sensors),
+                    "sensors_online": sum(1 for f in sensors if f["properties"].get("status") == "online"),
+                    "total_leaks": len(leaks),
+                    "active_leaks": sum(1 for f in leaks if f["properties"].get("status") == "active"),
+                    "filters_applied": filters,
+                    "center": [SampleGeoJSONGenerator.CENTER_LNG, SampleGeoJSONGenerator.CENTER_LAT],
+                    "zoom": 12
+                },
+                "generatedAt": max(
+                    (snapshots[name].updated_at for name in selections), default=datetime.utcnow().isoformat()
+                )
+            }
+        
+        key = ("geojson", tenant_id, service.versions(tenant_id), layers_to_include,
+               tuple(filters.values()))
+        payload, etag = service.render(key, build)
+        return cached_json_response(payload, etag, if_none_match)
         
     except Exception as e:
         logger.error(f"Error generating map GeoJSON: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _layer_response(
+    service: MapLayerService,
+    tenant_id: str,
+    layer: str,
+    query: Tuple,
+    select,
+    if_none_match: Optional[str],
+    zoom: Optional[int] = None,
+    encoding: Optional[str] = None
+) -> Response:
+    """Cached MapLayerResponse-shaped bytes for one layer query."""
+    def build():
+        features = select()
+        return {
+            "layer": layer,
+            "geojson": service.collection(features, zoom=zoom, encoding=encoding),
+            "lastUpdated": service.snapshot(tenant_id, layer).updated_at,
+            "count": len(features)
+        }
+    
+    key = (layer, tenant_id, service.versions(tenant_id, (layer,)), query, zoom, encoding)
+    payload, etag = service.render(key, build)
+    return cached_json_response(payload, etag, if_none_match)
+
+
 @router.get("/sensors", response_model=MapLayerResponse)
 async def get_sensors_geojson(
     tenant_id: str,
     dma_id: Optional[str] = None,
     sensor_type: Optional[SensorType] = None,
-    status: Optional[SensorStatus] = None
+    status: Optional[SensorStatus] = None,
+    if_none_match: Optional[str] = Header(default=None),
+    service: MapLayerService = Depends(get_map_layer_service)
 ):
     """Get GeoJSON for sensors only."""
-    features = SampleGeoJSONGenerator.generate_sensor_features(tenant_id)
-    
-    if dma_id:
-        features = [f for f in features if f.properties.get("dma_id") == dma_id]
-    if sensor_type:
-        features = [f for f in features if f.properties.get("sensor_type") == sensor_type.value]
-    if status:
-        features = [f for f in features if f.properties.get("status") == status.value]
-    
-    return MapLayerResponse(
-        layer="sensors",
-        geojson=GeoJSONFeatureCollection(features=features),
-        lastUpdated=datetime.utcnow().isoformat(),
-        count=len(features)
+    equals = {
+        "dma_id": dma_id,
+        "sensor_type": sensor_type.value if sensor_type else None,
+        "status": status.value if status else None
+    }
+    return _layer_response(
+        service, tenant_id, "sensors", tuple(equals.values()),
+        lambda: service.select(tenant_id, "sensors", equals=equals),
+        if_none_match
     )
 
 
@@ -767,28 +1313,27 @@ async def get_leaks_geojson(
     dma_id: Optional[str] = None,
     severity: Optional[LeakSeverity] = None,
     status: Optional[LeakStatus] = None,
-    active_only: bool = False
+    active_only: bool = False,
+    if_none_match: Optional[str] = Header(default=None),
+    service: MapLayerService = Depends(get_map_layer_service)
 ):
     """Get GeoJSON for leaks only."""
-    features = SampleGeoJSONGenerator.generate_leak_features(tenant_id)
-    
-    if dma_id:
-        features = [f for f in features if f.properties.get("dma_id") == dma_id]
-    if severity:
-        features = [f for f in features if f.properties.get("severity") == severity.value]
-    if status:
-        features = [f for f in features if f.properties.get("status") == status.value]
-    if active_only:
-        features = [f for f in features if f.properties.get("status") == "active"]
-    
-    # Sort by priority
-    features.sort(key=lambda f: f.properties.get("priority_score", 0), reverse=True)
-    
-    return MapLayerResponse(
-        layer="leaks",
-        geojson=GeoJSONFeatureCollection(features=features),
-        lastUpdated=datetime.utcnow().isoformat(),
-        count=len(features)
+    equals = {
+        "dma_id": dma_id,
+        "severity": severity.value if severity else None,
+        "status": status.value if status else None
+    }
+    
+    def select():
+        features = service.select(tenant_id, "leaks", equals=equals)
+        if active_only:
+            features = [f for f in features if f["properties"].get("status") == "active"]
+        # Sort by priority
+        features.sort(key=lambda f: f["properties"].get("priority_score", 0), reverse=True)
+        return features
+    
+    return _layer_response(
+        service, tenant_id, "leaks", tuple(equals.values()) + (active_only,), select, if_none_match
     )
 
 
@@ -798,43 +1343,113 @@ async def get_dmas_geojson(
     dma_id: Optional[str] = None,
     status: Optional[DMAStatus] = None,
     min_nrw: Optional[float] = None,
-    max_nrw: Optional[float] = None
+    max_nrw: Optional[float] = None,
+    if_none_match: Optional[str] = Header(default=None),
+    service: MapLayerService = Depends(get_map_layer_service)
 ):
     """Get GeoJSON for DMAs with NRW heatmap data."""
-    features = SampleGeoJSONGenerator.generate_dma_features(tenant_id)
-    
-    if dma_id:
-        features = [f for f in features if f.properties.get("id") == dma_id]
-    if status:
-        features = [f for f in features if f.properties.get("status") == status.value]
-    if min_nrw is not None:
-        features = [f for f in features if f.properties.get("nrw_percent", 0) >= min_nrw]
-    if max_nrw is not None:
-        features = [f for f in features if f.properties.get("nrw_percent", 100) <= max_nrw]
-    
-    # Sort by NRW (highest first)
-    features.sort(key=lambda f: f.properties.get("nrw_percent", 0), reverse=True)
-    
-    return MapLayerResponse(
-        layer="dmas",
-        geojson=GeoJSONFeatureCollection(features=features),
-        lastUpdated=datetime.utcnow().isoformat(),
-        count=len(features)
+    equals = {"id": dma_id, "status": status.value if status else None}
+    
+    def select():
+        features = service.select(
+            tenant_id, "dmas", equals=equals, ranges={"nrw_percent": (min_nrw, max_nrw)}
+        )
+        # Sort by NRW (highest first)
+        features.sort(key=lambda f: f["properties"].get("nrw_percent", 0), reverse=True)
+        return features
+    
+    return _layer_response(
+        service, tenant_id, "dmas", tuple(equals.values()) + (min_nrw, max_nrw), select, if_none_match
     )
 
 
+@router.get("/layers/{layer}", response_model=MapLayerResponse)
+async def get_layer_geojson(
+    tenant_id: str,
+    layer: str,
+    bbox: Optional[str] = Query(
+        default=None,
+        description="Only features intersecting 'west,south,east,north'"
+    ),
+    zoom: Optional[int] = Query(
+        default=None, ge=0, le=MAX_TILE_ZOOM,
+        description="Snap geometry to the coordinate grid of this zoom level"
+    ),
+    encoding: Optional[str] = Query(
+        default=None, pattern="^polyline$",
+        description="'polyline' to send lines and rings as Google encoded polylines"
+    ),
+    dma_id: Optional[str] = None,
+    status: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
+    service: MapLayerService = Depends(get_map_layer_service)
+):
+    """
+    Get one layer clipped to the map viewport.
+    
+    Serves panning and zooming from the tenant snapshot: features are
+    selected by bounding box and geometry is simplified for the zoom level.
+    """
+    if layer not in MAP_LAYERS:
+        raise HTTPException(status_code=404, detail=f"Unknown map layer: {layer}")
+    box = _parse_bbox(bbox)
+    equals = {"id" if layer == "dmas" else "dma_id": dma_id, "status": status}
+    return _layer_response(
+        service, tenant_id, layer, ("bbox", box) + tuple(equals.values()),
+        lambda: service.select(tenant_id, layer, equals=equals, bbox=box),
+        if_none_match, zoom=zoom, encoding=encoding
+    )
+
+
+@router.get("/tiles/{layer}/{z}/{x}/{y}", response_model=GeoJSONFeatureCollection)
+async def get_layer_tile(
+    tenant_id: str,
+    layer: str,
+    z: int,
+    x: int,
+    y: int,
+    encoding: Optional[str] = Query(
+        default=None, pattern="^polyline$",
+        description="'polyline' to send lines and rings as Google encoded polylines"
+    ),
+    if_none_match: Optional[str] = Header(default=None),
+    service: MapLayerService = Depends(get_map_layer_service)
+):
+    """
+    Get a slippy-map GeoJSON tile of one layer.
+    
+    A tile holds the features whose bounding box intersects it, with
+    geometry snapped to the tile zoom. Geometry is not cut at tile edges.
+    """
+    if layer not in MAP_LAYERS:
+        raise HTTPException(status_code=404, detail=f"Unknown map layer: {layer}")
+    if not 0 <= z <= MAX_TILE_ZOOM or not (0 <= x < (1 << z) and 0 <= y < (1 << z)):
+        raise HTTPException(status_code=400, detail=f"Invalid tile {z}/{x}/{y}")
+    
+    def build():
+        features = service.select(tenant_id, layer, bbox=tile_bbox(z, x, y))
+        return service.collection(
+            features, zoom=z, metadata={"layer": layer, "tile": [z, x, y]}, encoding=encoding
+        )
+    
+    key = ("tile", tenant_id, service.versions(tenant_id, (layer,)), layer, z, x, y, encoding)
+    payload, etag = service.render(key, build)
+    return cached_json_response(payload, etag, if_none_match)
+
+
 @router.get("/bounds")
-async def get_map_bounds(tenant_id: str):
+async def get_map_bounds(
+    tenant_id: str,
+    service: MapLayerService = Depends(get_map_layer_service)
+):
     """Get the bounding box for the tenant's network."""
-    features = SampleGeoJSONGenerator.generate_dma_features(tenant_id)
-    
-    all_coords = []
-    for feature in features:
-        if feature.geometry["type"] == "Polygon":
-            for coord in feature.geometry["coordinates"][0]:
-                all_coords.append(coord)
+    try:
+        bounds = service.snapshot(tenant_id, "dmas").bounds
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown map layer: dmas")
+    bounds = bounds[~np.isnan(bounds).any(axis=1)]
     
-    if not all_coords:
+    if len(bounds) == 0:
         return {
             "bounds": [
                 [SampleGeoJSONGenerator.CENTER_LNG - 0.1, SampleGeoJSONGenerator.CENTER_LAT - 0.1],
@@ -844,17 +1459,17 @@ async def get_map_bounds(tenant_id: str):
             "zoom": 12
         }
     
-    lngs = [c[0] for c in all_coords]
-    lats = [c[1] for c in all_coords]
+    west, south = bounds[:, 0].min(), bounds[:, 1].min()
+    east, north = bounds[:, 2].max(), bounds[:, 3].max()
     
     return {
         "bounds": [
-            [min(lngs), min(lats)],  # Southwest
-            [max(lngs), max(lats)]   # Northeast
+            [float(west), float(south)],  # Southwest
+            [float(east), float(north)]   # Northeast
         ],
         "center": [
-            (min(lngs) + max(lngs)) / 2,
-            (min(lats) + max(lats)) / 2
+            float(west + east) / 2,
+            float(south + north) / 2
         ],
         "zoom": 12
     }
@@ -864,16 +1479,23 @@ async def get_map_bounds(tenant_id: str):
 # INTEGRATION WITH MAIN API
 # =============================================================================
 
-def register_map_routes(app):
-    """Register map routes with the main FastAPI app."""
+def register_map_routes(app, event_tenant_id: Optional[str] = None):
+    """
+    Register map routes with the main FastAPI app.
+    
+    Args:
+        event_tenant_id: Tenant whose leak layer mirrors the global event
+            manager's leak and burst events (not wired when None)
+    """
     app.include_router(router)
+    if event_tenant_id is not None:
+        from src.events.event_management import get_event_manager
+        map_layer_service.connect_event_manager(get_event_manager(), event_tenant_id)
     logger.info("Map GeoJSON routes registered")
 
 
 # For standalone testing
 if __name__ == "__main__":
-    import json
-    
     # Generate sample data
     tenant = "lusaka-water"
     data = SampleGeoJSONGenerator.generate_full_geojson(tenant)
@@ -885,3 +1507,22 @@ if __name__ == "__main__":
         print(f"Total features: {len(layer_data.features)}")
         if layer_data.features:
             print(f"Sample feature: {json.dumps(layer_data.features[0].model_dump(), indent=2, default=str)[:500]}...")
+    
+    print("\n=== MAP LAYER SERVICE ===\n")
+    
+    service = MapLayerService()
+    dma = service.snapshot(tenant, "dmas").features[0]
+    west, south, east, north = geometry_bounds(dma["geometry"])
+    query = ("demo", tenant, (west, south, east, north))
+    
+    def build_viewport():
+        features = service.select(tenant, "dmas", bbox=(west, south, east, north))
+        return service.collection(features, zoom=12)
+    
+    for _ in range(3):
+        payload, etag = service.render(query + (service.versions(tenant),), build_viewport)
+    print(f"Viewport: {len(payload)} bytes, ETag {etag}, stats {service.stats}")
+    
+    service.update_properties(tenant, "dmas", dma["id"], {"nrw_percent": 30.0})
+    payload, new_etag = service.render(query + (service.versions(tenant),), build_viewport)
+    print(f"After DMA update: ETag {new_etag} (changed: {new_etag != etag})")
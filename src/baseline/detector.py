@@ -175,6 +175,61 @@ class BaselineLeakDetector:
         if rule.triggered:
             triggered_rules.append(rule)
         
+        return self._finalize_detection(sensor_id, triggered_rules, datetime.utcnow())
+    
+    def detect_batch(self, features: Any) -> List[BaselineDetectionResult]:
+        """
+        Apply all rules to every sensor in one vectorized pass.
+        
+        Rule inputs are pulled out of the feature matrix as columns and the
+        eight threshold rules are evaluated with array comparisons. Only
+        sensors that trip at least one rule are materialised into
+        `BaselineDetectionResult`s, using the same rule methods as `detect`
+        so descriptions, severities and confidence are identical.
+        Consecutive-anomaly counters are advanced for every sensor, so
+        calling this once per period is equivalent to calling `detect`
+        for each sensor.
+        
+        Args:
+            features: Sensors x features. Accepts a DataFrame indexed by
+                sensor id, a `FeatureMatrix` from batch feature engineering,
+                or a mapping of sensor id to feature dictionary. Missing or
+                NaN features are treated as absent.
+            
+        Returns:
+            Results for alerting sensors only, in input order
+        """
+        frame = self._as_feature_frame(features)
+        sensor_ids = [str(s) for s in frame.index]
+        timestamp = datetime.utcnow()
+        
+        inputs = self._batch_rule_inputs(frame)
+        triggered = self._batch_rule_triggers(inputs)
+        alerting = triggered.any(axis=1)
+        
+        results: List[BaselineDetectionResult] = []
+        for i, sensor_id in enumerate(sensor_ids):
+            if not alerting[i]:
+                self.consecutive_anomalies[sensor_id] = 0
+                continue
+            
+            triggered_rules = [
+                self._evaluate_rule_input(rule_name, inputs[rule_name][i])
+                for k, rule_name in enumerate(self.BATCH_RULES)
+                if triggered[i, k]
+            ]
+            results.append(self._finalize_detection(sensor_id, triggered_rules, timestamp))
+        
+        return results
+    
+    def _finalize_detection(
+        self,
+        sensor_id: str,
+        triggered_rules: List[RuleResult],
+        timestamp: datetime
+    ) -> BaselineDetectionResult:
+        """Apply the consecutive-anomaly rule and build the detection result."""
+        
         # Determine overall severity
         overall_severity = self._determine_severity(triggered_rules)
         
@@ -208,7 +263,7 @@ class BaselineLeakDetector:
         
         return BaselineDetectionResult(
             sensor_id=sensor_id,
-            timestamp=datetime.utcnow(),
+            timestamp=timestamp,
             alert=alert,
             severity=overall_severity,
             triggered_rules=triggered_rules,
@@ -217,6 +272,117 @@ class BaselineLeakDetector:
             confidence=confidence
         )
     
+    # =========================================================================
+    # VECTORIZED RULE EVALUATION
+    # =========================================================================
+    
+    # Rules in `detect` order, mapped to the feature key that reproduces the
+    # rule input when passed back to the scalar rule method
+    BATCH_RULES: Dict[str, Tuple[str, str]] = {
+        'min_pressure': ('_check_min_pressure', 'pressure_min'),
+        'sudden_drop': ('_check_sudden_drop', 'pressure_1h_change_rate'),
+        'gradual_decline': ('_check_gradual_decline', 'pressure_24h_change'),
+        'baseline_deviation': ('_check_baseline_deviation', 'deviation_from_baseline'),
+        'night_day_ratio': ('_check_night_day_ratio', 'night_day_ratio'),
+        'mnf_deviation': ('_check_mnf_deviation', 'mnf_deviation'),
+        'gradient_change': ('_check_gradient_change', 'gradient_to_max'),
+        'variance_increase': ('_check_variance', 'pressure_std'),
+    }
+    
+    @staticmethod
+    def _as_feature_frame(features: Any) -> pd.DataFrame:
+        """Normalise supported feature containers to a sensors x features frame."""
+        
+        if isinstance(features, pd.DataFrame):
+            return features
+        
+        if hasattr(features, 'present') and hasattr(features, 'feature_names'):
+            # FeatureMatrix: hide entries the per-sensor pipeline would not emit
+            values = np.where(features.present, features.values, np.nan)
+            if not features.is_valid:
+                values = np.full_like(values, np.nan)
+            return pd.DataFrame(values, index=features.sensor_ids, columns=features.feature_names)
+        
+        if isinstance(features, dict):
+            return pd.DataFrame.from_dict(features, orient='index')
+        
+        raise TypeError(f"Unsupported feature container: {type(features).__name__}")
+    
+    @staticmethod
+    def _batch_rule_inputs(frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Extract the per-rule input value for every sensor, mirroring the scalar defaults."""
+        
+        n = len(frame)
+        
+        def column(name: str, default: float) -> np.ndarray:
+            if name not in frame.columns:
+                return np.full(n, default)
+            values = pd.to_numeric(frame[name], errors='coerce').to_numpy(dtype=float)
+            return np.where(np.isnan(values), default, values)
+        
+        pressure_mean = column('pressure_mean', 999.0)
+        pressure_min = column('pressure_min', np.nan)
+        pressure = np.where(np.isnan(pressure_min), pressure_mean, pressure_min)
+        
+        gradient_cols = [
+            c for c in frame.columns
+            if isinstance(c, str) and 'gradient' in c.lower() and 'to_' in c
+        ]
+        if gradient_cols:
+            gradients = frame[gradient_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+            max_gradient = np.nan_to_num(np.abs(gradients), nan=0.0).max(axis=1)
+        else:
+            max_gradient = np.zeros(n)
+        
+        current_std = column('pressure_std', 0.0)
+        baseline_std = column('baseline_std', np.nan)
+        baseline_std = np.where(np.isnan(baseline_std), current_std, baseline_std)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance_ratio = np.where(baseline_std > 0, current_std / baseline_std, 1.0)
+        
+        return {
+            'min_pressure': pressure,
+            'sudden_drop': column('pressure_1h_change_rate', 0.0),
+            'gradual_decline': column('pressure_24h_change', 0.0),
+            'baseline_deviation': column('deviation_from_baseline', 0.0),
+            'night_day_ratio': column('night_day_ratio', 1.0),
+            'mnf_deviation': column('mnf_deviation', 0.0),
+            'gradient_change': max_gradient,
+            'variance_increase': variance_ratio,
+        }
+    
+    def _batch_rule_triggers(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        """Boolean (sensors x rules) matrix of triggered rules, columns in `BATCH_RULES` order."""
+        
+        c = self.config
+        
+        def below(x: np.ndarray, *thresholds: float) -> np.ndarray:
+            return x < max(thresholds)
+        
+        def above(x: np.ndarray, *thresholds: float) -> np.ndarray:
+            return x > min(thresholds)
+        
+        triggered = {
+            'min_pressure': below(inputs['min_pressure'], c.pressure_min_critical, c.pressure_min_warning),
+            'sudden_drop': below(inputs['sudden_drop'], -c.drop_1h_critical, -c.drop_1h_warning),
+            'gradual_decline': below(inputs['gradual_decline'], -c.drop_24h_warning),
+            'baseline_deviation': below(inputs['baseline_deviation'], -c.deviation_critical, -c.deviation_warning),
+            'night_day_ratio': below(inputs['night_day_ratio'], c.night_day_ratio_critical, c.night_day_ratio_warning),
+            'mnf_deviation': below(inputs['mnf_deviation'], c.mnf_deviation_critical, c.mnf_deviation_warning),
+            'gradient_change': above(inputs['gradient_change'], c.gradient_change_critical, c.gradient_change_warning),
+            'variance_increase': above(inputs['variance_increase'], c.variance_ratio_critical, c.variance_ratio_warning),
+        }
+        return np.column_stack([triggered[name] for name in self.BATCH_RULES])
+    
+    def _evaluate_rule_input(self, rule_name: str, value: float) -> RuleResult:
+        """Run one scalar rule on a pre-extracted input value."""
+        
+        method_name, key = self.BATCH_RULES[rule_name]
+        features = {key: float(value)}
+        if rule_name == 'variance_increase':
+            features['baseline_std'] = 1.0  # Input is already the ratio
+        return getattr(self, method_name)(features)
+    
     def _check_min_pressure(self, features: Dict[str, float]) -> RuleResult:
         """Rule 1: Check if pressure is below minimum threshold."""
         
@@ -609,6 +775,20 @@ class BaselineLeakDetector:
         return min(base + rule_boost, 1.0)
 
 
+@dataclass
+class ConfusionCounts:
+    """Running alert counts for one detection system against ground truth."""
+    alerts: int = 0
+    true_positives: int = 0
+    false_positives: int = 0
+    
+    def update(self, alerts: np.ndarray, actual: np.ndarray, confirmed: np.ndarray) -> None:
+        """Add a batch of alert flags; `actual` is only read where `confirmed`."""
+        self.alerts += int(alerts.sum())
+        self.true_positives += int((alerts & actual & confirmed).sum())
+        self.false_positives += int((alerts & ~actual & confirmed).sum())
+
+
 class BaselineVsAIComparison:
     """
     Compare baseline and AI system performance.
@@ -626,6 +806,19 @@ class BaselineVsAIComparison:
     
     def __init__(self):
         self.results: List[Dict[str, Any]] = []
+        self.reset_metrics()
+    
+    def reset_metrics(self) -> None:
+        """Clear logged results and running counters."""
+        self.results.clear()
+        self.baseline_counts = ConfusionCounts()
+        self.ai_counts = ConfusionCounts()
+        self.total_samples = 0
+        self.actual_leaks = 0
+        self.actual_non_leaks = 0
+        self.agreements = 0
+        self.ai_only = 0
+        self.baseline_only = 0
         
     def log_comparison(
         self,
@@ -637,93 +830,114 @@ class BaselineVsAIComparison:
     ) -> None:
         """Log a comparison result."""
         
-        self.results.append({
-            'timestamp': datetime.utcnow(),
-            'sensor_id': sensor_id,
-            'baseline_alert': baseline_result.alert,
-            'baseline_severity': baseline_result.severity.value,
-            'baseline_confidence': baseline_result.confidence,
-            'ai_probability': ai_probability,
-            'ai_anomaly_score': ai_anomaly_score,
-            'ai_alert': ai_probability > 0.5,
-            'actual_leak': actual_leak,
-            'baseline_rules_triggered': len(baseline_result.triggered_rules)
-        })
+        self.log_comparisons(
+            [sensor_id], [baseline_result], [ai_probability], [ai_anomaly_score], [actual_leak]
+        )
+    
+    def log_comparisons(
+        self,
+        sensor_ids: List[str],
+        baseline_results: List[BaselineDetectionResult],
+        ai_probabilities: Any,
+        ai_anomaly_scores: Any,
+        actual_leaks: Optional[List[Optional[bool]]] = None
+    ) -> None:
+        """
+        Log a batch of comparison results.
+        
+        Running confusion counters are updated with array operations, so
+        `calculate_metrics` never has to rescan the history.
+        """
+        
+        n = len(sensor_ids)
+        if n == 0:
+            return
+        if actual_leaks is None:
+            actual_leaks = [None] * n
+        
+        ai_probabilities = np.asarray(ai_probabilities, dtype=float)
+        ai_anomaly_scores = np.asarray(ai_anomaly_scores, dtype=float)
+        baseline_alert = np.fromiter((r.alert for r in baseline_results), dtype=bool, count=n)
+        ai_alert = ai_probabilities > 0.5
+        confirmed = np.fromiter((a is not None for a in actual_leaks), dtype=bool, count=n)
+        actual = np.fromiter((bool(a) for a in actual_leaks), dtype=bool, count=n)
+        
+        self.baseline_counts.update(baseline_alert, actual, confirmed)
+        self.ai_counts.update(ai_alert, actual, confirmed)
+        self.total_samples += n
+        self.actual_leaks += int((actual & confirmed).sum())
+        self.actual_non_leaks += int((~actual & confirmed).sum())
+        self.agreements += int((baseline_alert == ai_alert).sum())
+        self.ai_only += int((ai_alert & ~baseline_alert).sum())
+        self.baseline_only += int((baseline_alert & ~ai_alert).sum())
+        
+        timestamp = datetime.utcnow()
+        for i, (sensor_id, result) in enumerate(zip(sensor_ids, baseline_results)):
+            self.results.append({
+                'timestamp': timestamp,
+                'sensor_id': sensor_id,
+                'baseline_alert': result.alert,
+                'baseline_severity': result.severity.value,
+                'baseline_confidence': result.confidence,
+                'ai_probability': float(ai_probabilities[i]),
+                'ai_anomaly_score': float(ai_anomaly_scores[i]),
+                'ai_alert': bool(ai_alert[i]),
+                'actual_leak': actual_leaks[i],
+                'baseline_rules_triggered': len(result.triggered_rules)
+            })
     
     def calculate_metrics(self) -> Dict[str, Any]:
-        """Calculate comparative metrics."""
+        """Calculate comparative metrics from the running counters."""
         
-        if not self.results:
+        if not self.total_samples:
             return {'status': 'insufficient_data'}
         
-        df = pd.DataFrame(self.results)
-        
+        total = self.total_samples
         metrics = {
-            'total_samples': len(df),
+            'total_samples': total,
             'baseline': {},
             'ai': {},
             'comparison': {}
         }
         
-        # Calculate baseline metrics
-        baseline_alerts = df['baseline_alert'].sum()
-        metrics['baseline']['alert_count'] = int(baseline_alerts)
-        metrics['baseline']['alert_rate'] = float(baseline_alerts / len(df))
-        
-        # Calculate AI metrics
-        ai_alerts = df['ai_alert'].sum()
-        metrics['ai']['alert_count'] = int(ai_alerts)
-        metrics['ai']['alert_rate'] = float(ai_alerts / len(df))
+        # Alert rates
+        metrics['baseline']['alert_count'] = self.baseline_counts.alerts
+        metrics['baseline']['alert_rate'] = float(self.baseline_counts.alerts / total)
+        metrics['ai']['alert_count'] = self.ai_counts.alerts
+        metrics['ai']['alert_rate'] = float(self.ai_counts.alerts / total)
         
         # If we have ground truth
-        confirmed = df[df['actual_leak'].notna()]
-        if len(confirmed) > 0:
-            # True positives (correctly detected leaks)
-            baseline_tp = ((confirmed['baseline_alert']) & (confirmed['actual_leak'])).sum()
-            ai_tp = ((confirmed['ai_alert']) & (confirmed['actual_leak'])).sum()
-            
-            # False positives (alerts when no leak)
-            baseline_fp = ((confirmed['baseline_alert']) & (~confirmed['actual_leak'])).sum()
-            ai_fp = ((confirmed['ai_alert']) & (~confirmed['actual_leak'])).sum()
-            
-            # Actual leaks
-            actual_leaks = confirmed['actual_leak'].sum()
-            actual_non_leaks = (~confirmed['actual_leak']).sum()
-            
-            if actual_leaks > 0:
-                metrics['baseline']['true_positive_rate'] = float(baseline_tp / actual_leaks)
-                metrics['ai']['true_positive_rate'] = float(ai_tp / actual_leaks)
-            
-            if actual_non_leaks > 0:
-                metrics['baseline']['false_positive_rate'] = float(baseline_fp / actual_non_leaks)
-                metrics['ai']['false_positive_rate'] = float(ai_fp / actual_non_leaks)
-            
-            # AI improvement
-            if metrics['baseline'].get('true_positive_rate', 0) > 0:
-                tpr_improvement = (
-                    metrics['ai'].get('true_positive_rate', 0) - 
-                    metrics['baseline']['true_positive_rate']
-                )
-                metrics['comparison']['tpr_improvement'] = float(tpr_improvement)
-            
-            if metrics['baseline'].get('false_positive_rate', 0) > 0:
-                fpr_reduction = (
-                    metrics['baseline']['false_positive_rate'] - 
-                    metrics['ai'].get('false_positive_rate', 0)
-                )
-                metrics['comparison']['fpr_reduction'] = float(fpr_reduction)
+        if self.actual_leaks > 0:
+            metrics['baseline']['true_positive_rate'] = float(self.baseline_counts.true_positives / self.actual_leaks)
+            metrics['ai']['true_positive_rate'] = float(self.ai_counts.true_positives / self.actual_leaks)
+        
+        if self.actual_non_leaks > 0:
+            metrics['baseline']['false_positive_rate'] = float(self.baseline_counts.false_positives / self.actual_non_leaks)
+            metrics['ai']['false_positive_rate'] = float(self.ai_counts.false_positives / self.actual_non_leaks)
+        
+        # AI improvement
+        if metrics['baseline'].get('true_positive_rate', 0) > 0:
+            tpr_improvement = (
+                metrics['ai'].get('true_positive_rate', 0) - 
+                metrics['baseline']['true_positive_rate']
+            )
+            metrics['comparison']['tpr_improvement'] = float(tpr_improvement)
+        
+        if metrics['baseline'].get('false_positive_rate', 0) > 0:
+            fpr_reduction = (
+                metrics['baseline']['false_positive_rate'] - 
+                metrics['ai'].get('false_positive_rate', 0)
+            )
+            metrics['comparison']['fpr_reduction'] = float(fpr_reduction)
         
         # Agreement rate
-        agreement = (df['baseline_alert'] == df['ai_alert']).mean()
-        metrics['comparison']['agreement_rate'] = float(agreement)
+        metrics['comparison']['agreement_rate'] = float(self.agreements / total)
         
         # AI only detections (caught by AI, missed by baseline)
-        ai_only = ((df['ai_alert']) & (~df['baseline_alert'])).sum()
-        metrics['comparison']['ai_only_detections'] = int(ai_only)
+        metrics['comparison']['ai_only_detections'] = self.ai_only
         
         # Baseline only (caught by baseline, missed by AI)
-        baseline_only = ((df['baseline_alert']) & (~df['ai_alert'])).sum()
-        metrics['comparison']['baseline_only_detections'] = int(baseline_only)
+        metrics['comparison']['baseline_only_detections'] = self.baseline_only
         
         return metrics
     
@@ -54,6 +54,15 @@ except ImportError as e:
     LeakLocalizer = None
     AutonomousWaterSystem = None
 
+# Shared model server (one copy of the per-DMA models per box)
+try:
+    from src.ai.anomaly.detector import AnomalyDetectorManager
+    from src.ai.model_server import ModelClient, ModelServer, ModelServerConfig, get_model_client
+except ImportError as e:
+    logging.warning(f"Model server not available: {e}")
+    AnomalyDetectorManager = None
+    ModelServer = None
+
 # Enterprise/AI components (actual locations)
 try:
     from src.ai.decision_engine import DecisionEngine
@@ -151,6 +160,8 @@ class SystemRunner:
         self.anomaly_detector: Optional[Any] = None
         self.leak_localizer: Optional[Any] = None
         self.autonomous_system: Optional[Any] = None
+        self.model_server: Optional[Any] = None
+        self.dma_anomaly_detector: Optional[Any] = None
         
         # Enterprise components
         self.decision_engine: Optional[Any] = None
@@ -334,6 +345,8 @@ class SystemRunner:
             except Exception as e:
                 logger.warning(f"  ⚠ Anomaly Detector failed: {e}")
         
+        self._init_model_server()
+        
         if LeakLocalizer:
             try:
                 self.leak_localizer = LeakLocalizer()
@@ -405,6 +418,27 @@ class SystemRunner:
             except Exception as e:
                 logger.warning(f"  ⚠ Notification Service failed: {e}")
     
+    def _init_model_server(self):
+        """Attach per-DMA model inference to the local model server."""
+        if AnomalyDetectorManager is None or not self.config.get('model_server', True):
+            return
+        
+        try:
+            client = get_model_client()
+            if client is None:
+                # No server on this box yet: host one for every worker
+                self.model_server = ModelServer(ModelServerConfig(**self.config.get('model_server_config', {})))
+                self.model_server.start()
+                client = ModelClient(self.model_server.config.socket_path)
+                logger.info(f"  ✓ Model Server started on {self.model_server.config.socket_path}")
+            else:
+                logger.info("  ✓ Using running Model Server")
+            self.dma_anomaly_detector = AnomalyDetectorManager(model_client=client)
+        except Exception as e:
+            logger.warning(f"  ⚠ Model Server failed: {e}")
+            logger.warning("  ⚠ Scoring DMA models in-process")
+            self.dma_anomaly_detector = AnomalyDetectorManager(use_model_server=False)
+    
     def _init_orchestrator(self):
         """Initialize system orchestrator."""
         logger.info("[8/8] Initializing System Orchestrator...")
@@ -575,6 +609,11 @@ class SystemRunner:
             self.continuous_learning.stop()
             logger.info("  ✓ Continuous Learning stopped")
         
+        # Stop embedded model server
+        if self.model_server:
+            self.model_server.stop()
+            logger.info("  ✓ Model Server stopped")
+        
         # Stop health monitor
         if self.health_monitor:
             self.health_monitor.stop()
@@ -606,6 +645,8 @@ class SystemRunner:
                 'feature_store': self.feature_store is not None,
                 'database': self.database is not None,
                 'anomaly_detector': self.anomaly_detector is not None,
+                'dma_anomaly_detector': self.dma_anomaly_detector is not None,
+                'model_server': self.model_server is not None,
                 'leak_localizer': self.leak_localizer is not None,
                 'decision_engine': self.decision_engine is not None,
                 'nrw_calculator': self.nrw_calculator is not None,
@@ -0,0 +1,380 @@
+"""
+AquaWatch Digital Twin Calibration
+==================================
+Incremental demand calibration of the digital twin against observed pressures.
+
+DigitalTwinEngine.sync_sensor_data copies readings onto nodes but never
+reconciles the hydraulic model with them. DemandCalibrator keeps a solved
+state of the network and, on every update, compares observed pressures with
+the model's prediction. While the residual stays within tolerance nothing is
+re-simulated: demand-pattern changes between updates are propagated through
+the solver's linearised demand sensitivity. When the residual exceeds the
+tolerance, a damped least-squares (Levenberg-Marquardt) step adjusts the
+nodal demand multipliers, the network is re-solved warm-started from the
+previous flows, and the sensitivity is refreshed at the new state.
+
+Features:
+- Observations from FeatureStore vectors (one pressure node per DMA) or dicts
+- Per-junction or grouped (e.g. per-zone) demand multipliers
+- Observation-space damped least squares, cheap for few sensors / many nodes
+- Background loop on a fixed cadence (default 5 minutes)
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.digital_twin.network_twin import DigitalTwinEngine, HydraulicSolution
+from src.digital_twin.scenario_engine import NetworkSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CalibrationConfig:
+    """Settings for the incremental calibration loop"""
+    tolerance_bar: float = 0.05  # RMS residual that triggers re-calibration
+    damping: float = 1e-3  # Initial Levenberg-Marquardt damping, relative to mean JJᵀ diagonal
+    max_iterations: int = 5  # Re-solves per update
+    min_multiplier: float = 0.2
+    max_multiplier: float = 5.0
+    interval_seconds: float = 300.0
+
+
+@dataclass
+class CalibrationResult:
+    """Outcome of one calibration update"""
+    timestamp: datetime
+    hour: int
+    observed_nodes: int
+    rms_before: float
+    rms_after: float
+    resimulated: bool
+    iterations: int
+    converged: bool
+    multiplier_range: tuple = (1.0, 1.0)
+    residuals: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return {
+            "timestamp": self.timestamp.isoformat(),
+            "hour": self.hour,
+            "observed_nodes": self.observed_nodes,
+            "rms_before": self.rms_before,
+            "rms_after": self.rms_after,
+            "resimulated": self.resimulated,
+            "iterations": self.iterations,
+            "converged": self.converged,
+            "multiplier_range": list(self.multiplier_range),
+            "residuals": self.residuals
+        }
+
+
+class DemandCalibrator:
+    """
+    Calibrate nodal demand multipliers of a DigitalTwinEngine against
+    observed pressures, re-simulating only when residuals exceed tolerance.
+
+    Args:
+        engine: Twin whose network is calibrated (snapshotted on creation/refresh)
+        pressure_nodes: FeatureStore DMA id -> node id carrying that DMA's pressure
+        groups: Optional node id -> group id; junctions in a group share one
+            multiplier. Ungrouped junctions get their own multiplier.
+        config: Calibration settings
+    """
+
+    def __init__(
+        self,
+        engine: DigitalTwinEngine,
+        pressure_nodes: Optional[Dict[str, str]] = None,
+        groups: Optional[Dict[str, str]] = None,
+        config: Optional[CalibrationConfig] = None
+    ):
+        self.engine = engine
+        self.pressure_nodes = dict(pressure_nodes or {})
+        self.groups = dict(groups or {})
+        self.config = config or CalibrationConfig()
+
+        self.history: List[CalibrationResult] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.refresh()
+
+    # =========================================================================
+    # NETWORK STATE
+    # =========================================================================
+
+    def refresh(self):
+        """Re-snapshot the engine network and reset the solved state"""
+        snapshot = NetworkSnapshot.from_engine(self.engine)
+        self.snapshot = snapshot
+        self.solver = snapshot.build_solver()
+        self.node_index = {node_id: i for i, node_id in enumerate(snapshot.node_ids)}
+
+        junctions = np.flatnonzero(~snapshot.fixed_mask)
+        group_ids: Dict[str, int] = {}
+        self.group_of_node = np.full(len(snapshot.node_ids), -1, dtype=np.int64)
+        for i in junctions:
+            key = self.groups.get(snapshot.node_ids[i], snapshot.node_ids[i])
+            self.group_of_node[i] = group_ids.setdefault(key, len(group_ids))
+        self.group_names = list(group_ids)
+        self.multipliers = np.ones(len(group_ids))
+
+        self._hour: Optional[int] = None
+        self._solution: Optional[HydraulicSolution] = None
+        self._solved_demands: Optional[np.ndarray] = None
+        self._solved_pressure: Optional[np.ndarray] = None
+        self._sensitivity_nodes: Optional[np.ndarray] = None
+        self._sensitivity: Optional[np.ndarray] = None
+
+    def _demands(self, hour: int, multipliers: np.ndarray) -> np.ndarray:
+        """Nodal demand (L/s) for an hour under the given multipliers"""
+        pattern = DigitalTwinEngine.DEMAND_PATTERN[hour % 24]
+        node_multiplier = np.where(
+            self.group_of_node >= 0, multipliers[np.maximum(self.group_of_node, 0)], 0.0
+        )
+        return self.snapshot.base_demand * pattern * node_multiplier
+
+    def _pressures(self, solution: HydraulicSolution) -> np.ndarray:
+        return np.where(
+            np.isnan(solution.heads), 0.0,
+            np.maximum(0.0, (solution.heads - self.snapshot.elevation) / 10.2)
+        )
+
+    def _solve(self, demands: np.ndarray, observe: np.ndarray):
+        """Full solve warm-started from the last state, then re-linearise"""
+        warm = self._solution.flows if self._solution is not None else None
+        solution = self.solver.solve(demands / 1000, self.snapshot.fixed_heads, warm)
+        self._solution = solution
+        self._solved_demands = demands
+        self._solved_pressure = self._pressures(solution)
+        self._sensitivity_nodes = observe
+        # Head response in m per m³/s -> pressure in bar per L/s
+        self._sensitivity = self.solver.demand_sensitivity(solution.flows, observe) / 1000 / 10.2
+
+    def _predict(self, demands: np.ndarray, observe: np.ndarray) -> np.ndarray:
+        """First-order pressure prediction at observed nodes from the solved state"""
+        linear = self._solved_pressure[observe] + self._sensitivity @ (demands - self._solved_demands)
+        return np.maximum(0.0, linear)
+
+    def _group_jacobian(self, hour: int) -> np.ndarray:
+        """d(pressure at observed nodes) / d(multiplier per group), bar per unit"""
+        pattern = DigitalTwinEngine.DEMAND_PATTERN[hour % 24]
+        per_node = self._sensitivity * (self.snapshot.base_demand * pattern)[None, :]
+        jacobian = np.zeros((per_node.shape[0], len(self.multipliers)))
+        junctions = self.group_of_node >= 0
+        np.add.at(jacobian.T, self.group_of_node[junctions], per_node[:, junctions].T)
+        return jacobian
+
+    # =========================================================================
+    # CALIBRATION
+    # =========================================================================
+
+    def update(self, observed_pressures: Dict[str, float], hour: Optional[int] = None,
+               timestamp: Optional[datetime] = None) -> Optional[CalibrationResult]:
+        """
+        Reconcile the model with the latest observed pressures.
+
+        Args:
+            observed_pressures: Pressure (bar) per node id
+            hour: Hour of day selecting the demand pattern (default: from timestamp/now)
+            timestamp: Observation time
+
+        Returns:
+            CalibrationResult, or None when no observation maps onto the network
+        """
+        timestamp = timestamp or datetime.now()
+        hour = timestamp.hour if hour is None else hour
+        names = [n for n in observed_pressures if n in self.node_index]
+        if not names:
+            return None
+        observe = np.array([self.node_index[n] for n in names], dtype=np.int64)
+        observed = np.array([observed_pressures[n] for n in names], dtype=float)
+
+        with self._lock:
+            config = self.config
+            demands = self._demands(hour, self.multipliers)
+            if (self._solution is None or self._sensitivity_nodes is None
+                    or not np.array_equal(self._sensitivity_nodes, observe)):
+                self._solve(demands, observe)
+                resimulated, iterations = True, 1
+            else:
+                resimulated, iterations = False, 0
+
+            residual = observed - self._predict(demands, observe)
+            rms_before = float(np.sqrt(np.mean(residual ** 2)))
+            rms = rms_before
+            damping = config.damping
+
+            while rms > config.tolerance_bar and iterations < config.max_iterations:
+                if not resimulated or iterations == 0:
+                    # Linear prediction is off: settle on the true state before stepping
+                    self._solve(demands, observe)
+                    resimulated = True
+                    iterations += 1
+                    residual = observed - self._solved_pressure[observe]
+                    rms = float(np.sqrt(np.mean(residual ** 2)))
+                    if rms <= config.tolerance_bar:
+                        break
+
+                jacobian = self._group_jacobian(hour)
+                gram = jacobian @ jacobian.T
+                scale = max(float(np.trace(gram)) / len(observe), 1e-12)
+                gram[np.diag_indices_from(gram)] += damping * scale
+                step = jacobian.T @ np.linalg.solve(gram, residual)
+                candidate = np.clip(self.multipliers + step, config.min_multiplier, config.max_multiplier)
+
+                previous = (self._solution, self._solved_demands, self._solved_pressure, self._sensitivity)
+                candidate_demands = self._demands(hour, candidate)
+                self._solve(candidate_demands, observe)
+                iterations += 1
+                candidate_residual = observed - self._solved_pressure[observe]
+                candidate_rms = float(np.sqrt(np.mean(candidate_residual ** 2)))
+
+                if candidate_rms < rms:
+                    self.multipliers, demands = candidate, candidate_demands
+                    residual, rms = candidate_residual, candidate_rms
+                    damping = max(damping / 3, 1e-12)
+                else:
+                    (self._solution, self._solved_demands,
+                     self._solved_pressure, self._sensitivity) = previous
+                    damping *= 4
+
+            self._hour = hour
+            result = CalibrationResult(
+                timestamp=timestamp,
+                hour=hour,
+                observed_nodes=len(names),
+                rms_before=rms_before,
+                rms_after=rms,
+                resimulated=resimulated,
+                iterations=iterations,
+                converged=rms <= config.tolerance_bar,
+                multiplier_range=(float(self.multipliers.min()), float(self.multipliers.max()))
+                if len(self.multipliers) else (1.0, 1.0),
+                residuals=dict(zip(names, residual.tolist()))
+            )
+            self.history.append(result)
+            if len(self.history) > 1000:
+                del self.history[:-1000]
+
+        if not result.converged:
+            logger.warning(
+                "Twin calibration residual %.3f bar above tolerance after %d solves",
+                result.rms_after, result.iterations
+            )
+        return result
+
+    def update_from_feature_store(self, store=None) -> Optional[CalibrationResult]:
+        """Calibrate against the latest FeatureStore vector of every mapped DMA"""
+        if store is None:
+            from src.core.feature_store import get_feature_store
+            store = get_feature_store()
+        from src.core.feature_store import DataQuality
+
+        vectors = store.get_latest_all()
+        observed, latest = {}, None
+        for dma_id, node_id in self.pressure_nodes.items():
+            vector = vectors.get(dma_id)
+            if vector is None or vector.data_quality == DataQuality.BAD:
+                continue
+            observed[node_id] = vector.pressure_bar
+            latest = vector.timestamp if latest is None else max(latest, vector.timestamp)
+
+        if not observed:
+            return None
+        return self.update(observed, timestamp=latest)
+
+    def multiplier_by_node(self) -> Dict[str, float]:
+        """Calibrated demand multiplier per junction"""
+        return {
+            self.snapshot.node_ids[i]: float(self.multipliers[g])
+            for i, g in enumerate(self.group_of_node.tolist()) if g >= 0
+        }
+
+    def apply_to_engine(self):
+        """Write the calibrated state (demands, heads, pressures) to the live nodes"""
+        with self._lock:
+            if self._solution is None:
+                return
+            fixed = self.snapshot.fixed_mask.tolist()
+            for node_id, is_fixed, demand, head, pressure in zip(
+                self.snapshot.node_ids, fixed, self._solved_demands.tolist(),
+                self._solution.heads.tolist(), self._solved_pressure.tolist()
+            ):
+                node = self.engine.nodes.get(node_id)
+                if node is None:
+                    continue
+                if not is_fixed:
+                    node.actual_demand = demand
+                    node.head = head
+                node.pressure = pressure
+
+    # =========================================================================
+    # BACKGROUND LOOP
+    # =========================================================================
+
+    def start(self, store=None):
+        """Run update_from_feature_store every ``config.interval_seconds``"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    self.update_from_feature_store(store)
+                except Exception as e:
+                    logger.error(f"Twin calibration failed: {e}")
+                self._stop.wait(self.config.interval_seconds)
+
+        self._thread = threading.Thread(target=loop, name="twin-calibration", daemon=True)
+        self._thread.start()
+        logger.info(f"Twin calibration started ({self.config.interval_seconds:.0f}s cadence)")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+if __name__ == "__main__":
+    import time
+
+    from src.digital_twin.network_twin import generate_synthetic_twin
+
+    print("=" * 60)
+    print("AquaWatch Digital Twin Calibration")
+    print("=" * 60)
+
+    twin = generate_synthetic_twin(2_500)
+    sensors = list(twin.nodes)[::50]
+    zones = {n: ("north" if int(n.split("_")[1]) < 25 else "south")
+             for n in twin.nodes if n.startswith("J_")}
+
+    # "Field" network: the northern zone consumes 40% more than modelled
+    calibrator = DemandCalibrator(twin, groups=zones, config=CalibrationConfig(tolerance_bar=0.002))
+    field_multipliers = np.array([1.4 if g == "north" else 1.0 for g in calibrator.group_names])
+    print(f"\nNetwork: {len(twin.nodes)} nodes, {len(sensors)} pressure sensors, "
+          f"{len(calibrator.multipliers)} demand zones")
+
+    for step, hour in enumerate([7, 7, 7, 8, 8, 9]):
+        field = calibrator.solver.solve(
+            calibrator._demands(hour, field_multipliers) / 1000, calibrator.snapshot.fixed_heads
+        )
+        field_pressure = calibrator._pressures(field)
+        observed = {n: float(field_pressure[calibrator.node_index[n]]) for n in sensors}
+
+        started = time.perf_counter()
+        result = calibrator.update(observed, hour=hour)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"  update {step} (hour {hour:02d}): rms {result.rms_before:.3f} -> {result.rms_after:.4f} bar, "
+              f"solves={result.iterations}, {elapsed:.0f} ms, "
+              f"multipliers={dict(zip(calibrator.group_names, np.round(calibrator.multipliers, 3)))}")
@@ -0,0 +1,522 @@
+"""
+AquaWatch Digital Twin Scenario Engine
+======================================
+Batched what-if evaluation on top of the gradient hydraulic solver.
+
+The live DigitalTwinEngine mutates its node and link objects on every
+simulation, so scenarios there run one at a time and cannot be shared
+between threads. This module snapshots the network into immutable arrays,
+places them in one shared-memory block and evaluates scenarios on a process
+pool. Each worker attaches to the block, builds the base solver and the
+baseline solution once, and then solves every scenario warm-started from
+that baseline. Results are returned as deltas against the baseline; the
+live network is never touched.
+
+Features:
+- Immutable NetworkSnapshot of a DigitalTwinEngine
+- Pipe closures, extra demands (leaks), demand factors and source head changes
+- Process-pool evaluation over shared memory, or in-process for small batches
+- Burst candidate ranking against observed pressures
+"""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.digital_twin.network_twin import (
+    DigitalTwinEngine, GradientHydraulicSolver, HydraulicSolution, SimulationScenario
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class NetworkSnapshot:
+    """Immutable array view of a network for scenario evaluation"""
+    node_ids: Tuple[str, ...]
+    link_ids: Tuple[str, ...]
+    fixed_mask: np.ndarray
+    elevation: np.ndarray  # m
+    base_demand: np.ndarray  # L/s
+    fixed_heads: np.ndarray  # m, at reservoirs/tanks
+    start_idx: np.ndarray
+    end_idx: np.ndarray
+    length: np.ndarray  # m
+    diameter: np.ndarray  # mm
+    roughness: np.ndarray  # Hazen-Williams C
+    open_mask: np.ndarray
+
+    ARRAY_FIELDS = (
+        "fixed_mask", "elevation", "base_demand", "fixed_heads", "start_idx",
+        "end_idx", "length", "diameter", "roughness", "open_mask"
+    )
+
+    def __post_init__(self):
+        for name in self.ARRAY_FIELDS:
+            getattr(self, name).setflags(write=False)
+
+    @classmethod
+    def from_engine(cls, engine: DigitalTwinEngine) -> "NetworkSnapshot":
+        """Copy the current topology, pipe status, demands and source heads"""
+        nodes = list(engine.nodes.values())
+        node_index = {n.node_id: i for i, n in enumerate(nodes)}
+        links = [l for l in engine.links.values()
+                 if l.start_node in node_index and l.end_node in node_index]
+        fixed_mask = np.array([n.node_type in ("reservoir", "tank") for n in nodes], dtype=bool)
+
+        return cls(
+            node_ids=tuple(n.node_id for n in nodes),
+            link_ids=tuple(l.link_id for l in links),
+            fixed_mask=fixed_mask,
+            elevation=np.array([n.elevation for n in nodes], dtype=float),
+            base_demand=np.array([n.base_demand for n in nodes], dtype=float),
+            fixed_heads=np.array([
+                engine._source_head(n) if fixed else 0.0 for n, fixed in zip(nodes, fixed_mask)
+            ], dtype=float),
+            start_idx=np.array([node_index[l.start_node] for l in links], dtype=np.int64),
+            end_idx=np.array([node_index[l.end_node] for l in links], dtype=np.int64),
+            length=np.array([l.length for l in links], dtype=float),
+            diameter=np.array([l.diameter for l in links], dtype=float),
+            roughness=np.array([l.roughness for l in links], dtype=float),
+            open_mask=np.array([l.status != "closed" for l in links], dtype=bool),
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.ARRAY_FIELDS}
+
+    def build_solver(self, open_mask: Optional[np.ndarray] = None) -> GradientHydraulicSolver:
+        return GradientHydraulicSolver(
+            node_ids=list(self.node_ids),
+            fixed_mask=self.fixed_mask,
+            link_ids=list(self.link_ids),
+            start_idx=self.start_idx,
+            end_idx=self.end_idx,
+            length=self.length,
+            diameter_mm=self.diameter,
+            roughness=self.roughness,
+            open_mask=self.open_mask if open_mask is None else open_mask,
+        )
+
+
+@dataclass
+class WhatIfScenario:
+    """One candidate change to evaluate against the baseline"""
+    scenario_id: str
+    closed_links: Tuple[str, ...] = ()
+    extra_demands: Dict[str, float] = field(default_factory=dict)  # L/s per node
+    demand_factor: float = 1.0
+    head_changes: Dict[str, float] = field(default_factory=dict)  # m per source node
+
+    @classmethod
+    def from_simulation_scenario(cls, scenario: SimulationScenario) -> "WhatIfScenario":
+        """Translate DigitalTwinEngine scenario changes into a what-if scenario"""
+        closed, extra, heads = [], {}, {}
+        for change in scenario.changes:
+            change_type = change.get("type")
+            if change_type == "close_pipe":
+                closed.append(change.get("link_id"))
+            elif change_type == "increase_demand":
+                node_id = change.get("node_id")
+                extra[node_id] = extra.get(node_id, 0.0) + change.get("increase", 0)
+            elif change_type == "add_pump":
+                node_id = change.get("node_id")
+                heads[node_id] = heads.get(node_id, 0.0) + change.get("head", 20)
+        return cls(scenario.scenario_id, tuple(closed), extra, 1.0, heads)
+
+    @classmethod
+    def pipe_burst(cls, link_id: str, start_node: str, end_node: str, leak_rate: float) -> "WhatIfScenario":
+        """Burst on a pipe, modelled as demand split between its end nodes"""
+        half = leak_rate / 2
+        demands = {start_node: half}
+        demands[end_node] = demands.get(end_node, 0.0) + half
+        return cls(f"BURST_{link_id}_{leak_rate:g}", extra_demands=demands)
+
+
+@dataclass
+class ScenarioOutcome:
+    """Result of one scenario, as deltas against the baseline"""
+    scenario_id: str
+    node_ids: Sequence[str]
+    pressure: np.ndarray  # bar at node_ids
+    pressure_delta: np.ndarray  # bar at node_ids, scenario minus baseline
+    link_flow_delta: Optional[np.ndarray]  # L/s per link, None when not requested
+    unsupplied_nodes: List[str]
+    converged: bool
+    iterations: int
+
+    def affected_nodes(self, threshold: float = 0.1) -> List[Dict]:
+        """Nodes whose pressure moved by more than ``threshold`` bar"""
+        order = np.argsort(-np.abs(self.pressure_delta))
+        return [
+            {
+                "node_id": self.node_ids[i],
+                "new_pressure": float(self.pressure[i]),
+                "pressure_change": float(self.pressure_delta[i]),
+            }
+            for i in order if abs(self.pressure_delta[i]) > threshold
+        ]
+
+    def to_dict(self, threshold: float = 0.1) -> Dict:
+        return {
+            "scenario_id": self.scenario_id,
+            "converged": self.converged,
+            "iterations": self.iterations,
+            "max_pressure_drop": float(max(0.0, -self.pressure_delta.min())) if len(self.pressure_delta) else 0.0,
+            "affected_nodes": self.affected_nodes(threshold),
+            "unsupplied_nodes": self.unsupplied_nodes,
+        }
+
+
+class _ScenarioEvaluator:
+    """Per-process solver state: base solver, baseline solution, index maps"""
+
+    def __init__(self, snapshot: NetworkSnapshot, hour: int):
+        self.snapshot = snapshot
+        self.hour = hour
+        self.node_index = {node_id: i for i, node_id in enumerate(snapshot.node_ids)}
+        self.link_index = {link_id: k for k, link_id in enumerate(snapshot.link_ids)}
+
+        multiplier = DigitalTwinEngine.DEMAND_PATTERN[hour % 24]
+        self.base_demands = np.where(snapshot.fixed_mask, 0.0, snapshot.base_demand * multiplier)
+
+        self.solver = snapshot.build_solver()
+        self.baseline = self.solver.solve(self.base_demands / 1000, snapshot.fixed_heads)
+        self.baseline_pressure = self._pressures(self.baseline)
+
+    def _pressures(self, solution: HydraulicSolution) -> np.ndarray:
+        heads = solution.heads
+        return np.where(
+            np.isnan(heads), 0.0,
+            np.maximum(0.0, (heads - self.snapshot.elevation) / 10.2)
+        )
+
+    def evaluate(
+        self,
+        scenario: WhatIfScenario,
+        observe: Optional[np.ndarray] = None,
+        include_flows: bool = False
+    ) -> ScenarioOutcome:
+        snapshot = self.snapshot
+
+        solver = self.solver
+        if scenario.closed_links:
+            open_mask = snapshot.open_mask.copy()
+            for link_id in scenario.closed_links:
+                if link_id in self.link_index:
+                    open_mask[self.link_index[link_id]] = False
+            solver = snapshot.build_solver(open_mask)
+
+        demands = self.base_demands * scenario.demand_factor
+        for node_id, extra in scenario.extra_demands.items():
+            if node_id in self.node_index:
+                demands[self.node_index[node_id]] += extra
+
+        fixed_heads = snapshot.fixed_heads
+        if scenario.head_changes:
+            fixed_heads = fixed_heads.copy()
+            for node_id, change in scenario.head_changes.items():
+                if node_id in self.node_index:
+                    fixed_heads[self.node_index[node_id]] += change
+
+        solution = solver.solve(demands / 1000, fixed_heads, self.baseline.flows)
+        pressure = self._pressures(solution)
+        delta = pressure - self.baseline_pressure
+        if observe is None:
+            observe = np.arange(len(snapshot.node_ids))
+
+        unsupplied = np.flatnonzero(~solver.supplied_mask)
+        return ScenarioOutcome(
+            scenario_id=scenario.scenario_id,
+            node_ids=[snapshot.node_ids[i] for i in observe],
+            pressure=pressure[observe],
+            pressure_delta=delta[observe],
+            link_flow_delta=(solution.flows - self.baseline.flows) * 1000 if include_flows else None,
+            unsupplied_nodes=[snapshot.node_ids[i] for i in unsupplied],
+            converged=solution.converged,
+            iterations=solution.iterations,
+        )
+
+
+# Worker-process state, populated by the pool initializer
+_worker_evaluator: Optional[_ScenarioEvaluator] = None
+_worker_memory: Optional[shared_memory.SharedMemory] = None
+
+
+def _attach_shared(name: str, own_tracker: bool) -> shared_memory.SharedMemory:
+    """
+    Attach to the parent's block without letting this worker's resource
+    tracker unlink it on exit. Forked workers share the parent's tracker,
+    whose registration the parent removes itself on unlink.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        memory = shared_memory.SharedMemory(name=name)
+        if own_tracker:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(memory._name, "shared_memory")
+        return memory
+
+
+def _init_worker(shm_name: str, own_tracker: bool, layout: Dict, node_ids: Tuple[str, ...],
+                 link_ids: Tuple[str, ...], hour: int):
+    global _worker_evaluator, _worker_memory
+    _worker_memory = _attach_shared(shm_name, own_tracker)
+    arrays = {
+        name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=_worker_memory.buf, offset=offset)
+        for name, (offset, dtype, shape) in layout.items()
+    }
+    snapshot = NetworkSnapshot(node_ids=node_ids, link_ids=link_ids, **arrays)
+    _worker_evaluator = _ScenarioEvaluator(snapshot, hour)
+
+
+def _evaluate_chunk(scenarios: List[WhatIfScenario], observe: Optional[np.ndarray],
+                    include_flows: bool) -> List[ScenarioOutcome]:
+    return [_worker_evaluator.evaluate(s, observe, include_flows) for s in scenarios]
+
+
+class ScenarioRunner:
+    """
+    Evaluate batches of what-if scenarios against a frozen network snapshot.
+
+    With ``max_workers`` of 0 or 1 scenarios run in-process; otherwise a
+    process pool is started on first use and kept until ``close()``. The
+    snapshot arrays are copied once into shared memory and every worker maps
+    them read-only.
+    """
+
+    def __init__(
+        self,
+        snapshot: NetworkSnapshot,
+        hour: int = 12,
+        max_workers: Optional[int] = None,
+        chunk_size: int = 16
+    ):
+        self.snapshot = snapshot
+        self.hour = hour
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.chunk_size = max(1, chunk_size)
+
+        self._local: Optional[_ScenarioEvaluator] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._memory: Optional[shared_memory.SharedMemory] = None
+
+    @classmethod
+    def from_engine(cls, engine: DigitalTwinEngine, **kwargs) -> "ScenarioRunner":
+        return cls(NetworkSnapshot.from_engine(engine), **kwargs)
+
+    def __enter__(self) -> "ScenarioRunner":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def evaluator(self) -> _ScenarioEvaluator:
+        """In-process evaluator, also used for the baseline"""
+        if self._local is None:
+            self._local = _ScenarioEvaluator(self.snapshot, self.hour)
+        return self._local
+
+    def _observe_index(self, observe: Optional[Sequence[str]]) -> Optional[np.ndarray]:
+        if observe is None:
+            return None
+        index = self.evaluator.node_index
+        return np.array([index[node_id] for node_id in observe if node_id in index], dtype=np.int64)
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            arrays = self.snapshot.arrays()
+            size = sum(a.nbytes for a in arrays.values())
+            self._memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+
+            layout, offset = {}, 0
+            for name, array in arrays.items():
+                view = np.ndarray(array.shape, dtype=array.dtype, buffer=self._memory.buf, offset=offset)
+                view[...] = array
+                layout[name] = (offset, array.dtype.str, array.shape)
+                offset += array.nbytes
+
+            context = multiprocessing.get_context()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._memory.name, context.get_start_method() != "fork", layout,
+                          self.snapshot.node_ids, self.snapshot.link_ids, self.hour)
+            )
+        return self._pool
+
+    def run(
+        self,
+        scenarios: Sequence[WhatIfScenario],
+        observe: Optional[Sequence[str]] = None,
+        include_flows: bool = False
+    ) -> List[ScenarioOutcome]:
+        """
+        Evaluate scenarios and return their outcomes in input order.
+
+        Args:
+            scenarios: Scenarios to evaluate
+            observe: Node ids to report pressures for (default: every node)
+            include_flows: Also return per-link flow deltas
+
+        Returns:
+            One ScenarioOutcome per scenario
+        """
+        scenarios = list(scenarios)
+        observe_idx = self._observe_index(observe)
+
+        if self.max_workers <= 1 or len(scenarios) <= self.chunk_size:
+            return [self.evaluator.evaluate(s, observe_idx, include_flows) for s in scenarios]
+
+        pool = self._ensure_pool()
+        chunks = [scenarios[i:i + self.chunk_size] for i in range(0, len(scenarios), self.chunk_size)]
+        futures = [pool.submit(_evaluate_chunk, chunk, observe_idx, include_flows) for chunk in chunks]
+        return [outcome for future in futures for outcome in future.result()]
+
+    def burst_scenarios(self, leak_rate: float, link_ids: Optional[Sequence[str]] = None) -> List[WhatIfScenario]:
+        """One pipe-burst scenario per open link (or per given link)"""
+        snapshot = self.snapshot
+        link_index = self.evaluator.link_index
+        scenarios = []
+        for link_id in (snapshot.link_ids if link_ids is None else link_ids):
+            k = link_index.get(link_id)
+            if k is None or not snapshot.open_mask[k]:
+                continue
+            scenarios.append(WhatIfScenario.pipe_burst(
+                link_id, snapshot.node_ids[snapshot.start_idx[k]],
+                snapshot.node_ids[snapshot.end_idx[k]], leak_rate
+            ))
+        return scenarios
+
+    def rank_burst_candidates(
+        self,
+        observed_pressures: Dict[str, float],
+        link_ids: Optional[Sequence[str]] = None,
+        top_k: int = 10,
+        refine: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Answer "which pipe burst explains these pressures?".
+
+        Candidates are screened with the solver's linearised demand
+        sensitivity at the baseline: one factorisation prices every pipe, and
+        a least-squares fit of each pipe's response to the observed pressure
+        change gives its burst flow. The best ``refine`` candidates are then
+        re-solved in full (on the pool when configured), their flow corrected
+        with one secant step on the nonlinear response, solved again and
+        ranked by RMSE against the observations.
+
+        Args:
+            observed_pressures: Measured pressure (bar) per node id
+            link_ids: Candidate pipes (default: every open pipe)
+            top_k: Number of candidates to return
+            refine: Candidates re-solved without linearisation (default 4 * top_k)
+
+        Returns:
+            Best-matching candidates with estimated leak rate, lowest error first
+        """
+        evaluator = self.evaluator
+        snapshot = self.snapshot
+        sensors = [node_id for node_id in observed_pressures if node_id in evaluator.node_index]
+        if not sensors:
+            return []
+        observe_idx = self._observe_index(sensors)
+        observed = np.array([observed_pressures[node_id] for node_id in sensors])
+
+        links = np.array([
+            k for k in (range(len(snapshot.link_ids)) if link_ids is None
+                        else (evaluator.link_index[l] for l in link_ids if l in evaluator.link_index))
+            if snapshot.open_mask[k]
+        ], dtype=np.int64)
+        if not len(links):
+            return []
+
+        # Linear screen: pressure response (bar per L/s) to half the burst at each end node
+        sensitivity = evaluator.solver.demand_sensitivity(evaluator.baseline.flows, observe_idx)
+        response = (sensitivity[:, snapshot.start_idx[links]]
+                    + sensitivity[:, snapshot.end_idx[links]]) / 2 / 1000 / 10.2
+        change = observed - evaluator.baseline_pressure[observe_idx]
+
+        power = np.einsum("ij,ij->j", response, response)
+        rates = np.maximum(0.0, (change @ response) / np.maximum(power, 1e-30))
+        residual = np.sqrt(np.mean((change[:, None] - response * rates) ** 2, axis=0))
+
+        n_refine = max(top_k, refine if refine is not None else 4 * top_k)
+        shortlist = np.argsort(residual, kind="stable")[:n_refine]
+        shortlist = shortlist[rates[shortlist] > 0]
+
+        def bursts(candidate_rates):
+            return [
+                WhatIfScenario.pipe_burst(
+                    snapshot.link_ids[links[i]], snapshot.node_ids[snapshot.start_idx[links[i]]],
+                    snapshot.node_ids[snapshot.end_idx[links[i]]], float(rate)
+                )
+                for i, rate in zip(shortlist, candidate_rates)
+            ]
+
+        fitted = rates[shortlist]
+        for outcome_index, outcome in enumerate(self.run(bursts(fitted), observe=sensors)):
+            delta = outcome.pressure_delta
+            power = delta @ delta
+            if power > 0:
+                fitted[outcome_index] *= max(0.0, (change @ delta) / power)
+        outcomes = self.run(bursts(fitted), observe=sensors)
+
+        ranked = [
+            {
+                "link_id": snapshot.link_ids[links[i]],
+                "leak_rate_lps": float(rate),
+                "rmse_bar": float(np.sqrt(np.mean((outcome.pressure - observed) ** 2))),
+                "screening_rmse_bar": float(residual[i]),
+                "converged": outcome.converged,
+            }
+            for i, rate, outcome in zip(shortlist, fitted, outcomes)
+        ]
+        ranked.sort(key=lambda c: c["rmse_bar"])
+        return ranked[:top_k]
+
+    def close(self):
+        """Shut down the worker pool and release shared memory"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self._memory is not None:
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+
+if __name__ == "__main__":
+    import time
+
+    from src.digital_twin.network_twin import generate_synthetic_twin
+
+    print("=" * 60)
+    print("AquaWatch Digital Twin Scenario Engine")
+    print("=" * 60)
+
+    twin = generate_synthetic_twin(10_000)
+    with ScenarioRunner.from_engine(twin, hour=12) as runner:
+        sensors = list(runner.snapshot.node_ids[::10])
+        truth = runner.burst_scenarios(8.0, ["P_20_30_E"])[0]
+        observed = runner.run([truth], observe=sensors)[0]
+        observed_pressures = dict(zip(observed.node_ids, observed.pressure))
+
+        started = time.perf_counter()
+        ranked = runner.rank_burst_candidates(observed_pressures, top_k=5)
+        elapsed = time.perf_counter() - started
+
+    print(f"\nNetwork: {len(twin.nodes)} nodes, {len(twin.links)} links, {len(sensors)} sensors")
+    print("True burst: P_20_30_E at 8.0 L/s")
+    print(f"Screened {len(runner.snapshot.link_ids)} burst candidates in {elapsed:.2f} s")
+    for candidate in ranked:
+        print(f"  {candidate['link_id']:<14} {candidate['leak_rate_lps']:5.1f} L/s  "
+              f"rmse={candidate['rmse_bar']:.5f} bar")
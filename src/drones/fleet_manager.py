@@ -21,6 +21,10 @@ from enum import Enum
 import random
 import math
 
+import numpy as np
+
+from src.gis.gis_integration import KM_PER_DEGREE, RoutingEngine, haversine_m
+
 logger = logging.getLogger(__name__)
 
 
@@ -131,21 +135,13 @@ class FlightPlan:
     
     def calculate_distance(self):
         """Calculate total flight distance."""
-        total = 0.0
-        for i in range(len(self.waypoints) - 1):
-            wp1 = self.waypoints[i]
-            wp2 = self.waypoints[i + 1]
-            # Haversine formula
-            R = 6371  # Earth radius in km
-            lat1, lon1 = math.radians(wp1.lat), math.radians(wp1.lon)
-            lat2, lon2 = math.radians(wp2.lat), math.radians(wp2.lon)
-            dlat = lat2 - lat1
-            dlon = lon2 - lon1
-            a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-            c = 2 * math.asin(math.sqrt(a))
-            total += R * c
-        self.total_distance_km = total
-        return total
+        if len(self.waypoints) < 2:
+            self.total_distance_km = 0.0
+            return 0.0
+        coords = np.array([(wp.lat, wp.lon) for wp in self.waypoints])
+        legs = haversine_m(coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1])
+        self.total_distance_km = float(legs.sum()) / 1000
+        return self.total_distance_km
 
 
 @dataclass
@@ -264,6 +260,7 @@ class DroneFleetManager:
         self.drones: Dict[str, Drone] = {}
         self.missions: Dict[str, Mission] = {}
         self.visual_detector = VisualLeakDetector()
+        self.routing = RoutingEngine(time_budget_s=0.2)
         
         # Fleet bases (example for Lusaka)
         self.bases = {
@@ -391,6 +388,7 @@ class DroneFleetManager:
     def _generate_flight_plan(self, mission: Mission) -> FlightPlan:
         """Generate optimal flight plan for mission."""
         target = mission.target_location
+        km_per_deg_lon = KM_PER_DEGREE * math.cos(math.radians(target[0]))
         
         waypoints = []
         
@@ -399,8 +397,8 @@ class DroneFleetManager:
             for i in range(8):
                 angle = i * 45
                 radius = mission.target_radius_m / 1000  # Convert to km
-                lat_offset = radius * math.cos(math.radians(angle)) / 111  # Rough conversion
-                lon_offset = radius * math.sin(math.radians(angle)) / 111
+                lat_offset = radius * math.cos(math.radians(angle)) / KM_PER_DEGREE
+                lon_offset = radius * math.sin(math.radians(angle)) / km_per_deg_lon
                 
                 waypoints.append(Waypoint(
                     lat=target[0] + lat_offset,
@@ -417,8 +415,8 @@ class DroneFleetManager:
             
             for row in range(grid_size):
                 for col in range(grid_size):
-                    lat_offset = (row - grid_size/2) * spacing / 111
-                    lon_offset = (col - grid_size/2) * spacing / 111
+                    lat_offset = (row - grid_size/2) * spacing / KM_PER_DEGREE
+                    lon_offset = (col - grid_size/2) * spacing / km_per_deg_lon
                     
                     waypoints.append(Waypoint(
                         lat=target[0] + lat_offset,
@@ -438,6 +436,12 @@ class DroneFleetManager:
                 hover_time_sec=60
             ))
         
+        # Visit the pattern in the shortest round trip from the closest base
+        if len(waypoints) > 2:
+            base = min(self.bases.values(), key=lambda b: self._distance(b, target))
+            order = self.routing.order_stops(base, [(wp.lat, wp.lon) for wp in waypoints])
+            waypoints = [waypoints[i] for i in order]
+        
         plan = FlightPlan(
             plan_id=f"FP_{mission.mission_id}",
             waypoints=waypoints
@@ -476,14 +480,7 @@ class DroneFleetManager:
     
     def _distance(self, loc1: Tuple[float, float], loc2: Tuple[float, float]) -> float:
         """Calculate distance between two coordinates."""
-        R = 6371
-        lat1, lon1 = math.radians(loc1[0]), math.radians(loc1[1])
-        lat2, lon2 = math.radians(loc2[0]), math.radians(loc2[1])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        return R * c
+        return float(haversine_m(loc1[0], loc1[1], loc2[0], loc2[1])) / 1000
     
     async def execute_mission(self, mission_id: str):
         """Execute a mission (simulation)."""
@@ -19,9 +19,12 @@ from typing import Dict, List, Optional, Tuple, Any, Callable
 from enum import Enum
 import uuid
 import json
+import itertools
 import numpy as np
 from collections import defaultdict
 
+from src.gis.gis_integration import geohash_encode, geohash_neighbourhood, geohash_precision
+
 
 class EventType(Enum):
     """Types of water network events"""
@@ -285,13 +288,129 @@ class EventClassifier:
         return report
 
 
+class EventCorrelationIndex:
+    """
+    Space-time buckets over events for correlation lookups.
+
+    Events are bucketed by time slot (one slot per correlation window) and by
+    geohash cell (the finest precision whose cells are still at least the
+    distance threshold across), so a lookup only visits neighbouring buckets.
+    Open (non-closed) events are also kept per event type in arrival order,
+    which gives rule matching its counts without rescanning.
+    """
+
+    def __init__(self, time_window: timedelta, distance_threshold_km: float):
+        self.slot_seconds = time_window.total_seconds()
+        self.distance_threshold = distance_threshold_km
+        self.precision = geohash_precision(distance_threshold_km)
+
+        self._seq = 0
+        self._events: Dict[str, Tuple[int, Optional[int], Optional[str], EventType]] = {}
+        self._slots: Dict[int, Dict[str, Tuple[int, float]]] = defaultdict(dict)
+        self._cells: Dict[str, Dict[str, Tuple[int, float, float]]] = defaultdict(dict)
+        self._open_by_type: Dict[EventType, Dict[str, int]] = defaultdict(dict)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __contains__(self, event_id: str) -> bool:
+        return event_id in self._events
+
+    def _slot(self, timestamp: float) -> int:
+        return int(timestamp // self.slot_seconds)
+
+    def add(self, event: Event):
+        """Index an event (re-adding an id replaces the old entry)"""
+        if event.event_id in self._events:
+            self.remove(event.event_id)
+        self._seq += 1
+        timestamp = event.detected_at.timestamp()
+        slot = self._slot(timestamp)
+        self._slots[slot][event.event_id] = (self._seq, timestamp)
+
+        cell = None
+        if event.coordinates:
+            lat, lon = event.coordinates
+            cell = geohash_encode(lat, lon, self.precision)
+            self._cells[cell][event.event_id] = (self._seq, lat, lon)
+
+        self._events[event.event_id] = (self._seq, slot, cell, event.event_type)
+        if event.status != EventStatus.CLOSED:
+            self._open_by_type[event.event_type][event.event_id] = self._seq
+
+    def update(self, event: Event):
+        """Refresh open/closed bookkeeping after a status change"""
+        if event.event_id not in self._events:
+            self.add(event)
+            return
+        seq, _, _, event_type = self._events[event.event_id]
+        if event.status == EventStatus.CLOSED:
+            self._open_by_type[event_type].pop(event.event_id, None)
+        else:
+            self._open_by_type[event_type][event.event_id] = seq
+
+    def remove(self, event_id: str):
+        entry = self._events.pop(event_id, None)
+        if entry is None:
+            return
+        _, slot, cell, event_type = entry
+        self._slots[slot].pop(event_id, None)
+        if not self._slots[slot]:
+            del self._slots[slot]
+        if cell is not None:
+            self._cells[cell].pop(event_id, None)
+            if not self._cells[cell]:
+                del self._cells[cell]
+        self._open_by_type[event_type].pop(event_id, None)
+
+    def near_in_time(self, moment: datetime) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """(ids, arrival sequence, timestamps) of events in the neighbouring time slots"""
+        timestamp = moment.timestamp()
+        entries = {}
+        for slot in range(self._slot(timestamp - self.slot_seconds), self._slot(timestamp + self.slot_seconds) + 1):
+            entries.update(self._slots.get(slot, {}))
+        values = np.array(list(entries.values()), dtype=float).reshape(-1, 2)
+        return list(entries), values[:, 0], values[:, 1]
+
+    def near_in_space(self, latitude: float, longitude: float) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """(ids, arrival sequence, [lat, lon] rows) of events in the cells around a point"""
+        entries = {}
+        for cell in geohash_neighbourhood(latitude, longitude, self.distance_threshold, self.precision):
+            entries.update(self._cells.get(cell, {}))
+        values = np.array(list(entries.values()), dtype=float).reshape(-1, 3)
+        return list(entries), values[:, 0], values[:, 1:]
+
+    def recent_open_events(self, event_types: List[EventType], limit: int,
+                           exclude: Optional[str] = None) -> List[str]:
+        """Ids of the latest ``limit`` open events of the given types, in arrival order"""
+        latest = []
+        for event_type in event_types:
+            open_events = self._open_by_type.get(event_type, {})
+            # Newest first; one extra in case the excluded id is among them
+            latest.extend(
+                (seq, event_id)
+                for event_id, seq in itertools.islice(reversed(open_events.items()), limit + 1)
+                if event_id != exclude
+            )
+        return [event_id for _, event_id in sorted(latest)[-limit:]] if limit > 0 else []
+
+    def open_count(self, event_types: List[EventType]) -> int:
+        return sum(len(self._open_by_type.get(t, {})) for t in event_types)
+
+    def is_open(self, event_id: str, event_types: List[EventType]) -> bool:
+        return any(event_id in self._open_by_type.get(t, {}) for t in event_types)
+
+
 class EventCorrelationEngine:
     """Correlates related events to identify root causes"""
     
-    def __init__(self, time_window_minutes: int = 60, distance_threshold_km: float = 2.0):
+    def __init__(self, time_window_minutes: int = 60, distance_threshold_km: float = 2.0,
+                 max_rule_event_ids: int = 50):
         self.time_window = timedelta(minutes=time_window_minutes)
         self.distance_threshold = distance_threshold_km
+        self.max_rule_event_ids = max_rule_event_ids  # Latest ids listed per rule match
         self.correlation_rules = self._initialize_rules()
+        self.index = EventCorrelationIndex(self.time_window, self.distance_threshold)
     
     def _initialize_rules(self) -> List[Dict]:
         """Initialize correlation rules"""
@@ -330,79 +449,96 @@ class EventCorrelationEngine:
             }
         ]
     
-    def find_correlations(self, new_event: Event, existing_events: List[Event]) -> List[Dict]:
-        """Find events correlated with a new event"""
+    def add_event(self, event: Event):
+        """Make an event visible to later find_correlations calls"""
+        self.index.add(event)
+    
+    def update_event(self, event: Event):
+        """Record a status change of an indexed event"""
+        self.index.update(event)
+    
+    def find_correlations(self, new_event: Event, existing_events: Optional[List[Event]] = None) -> List[Dict]:
+        """
+        Find events correlated with a new event.
+        
+        Searches the events registered with add_event, or only the given
+        existing_events when a list is passed.
+        """
+        if existing_events is None:
+            index = self.index
+        else:
+            index = EventCorrelationIndex(self.time_window, self.distance_threshold)
+            for event in existing_events:
+                index.add(event)
+        
         correlations = []
         
         # Time-based correlation
-        time_correlated = self._find_time_correlated(new_event, existing_events)
+        time_correlated = self._find_time_correlated(new_event, index)
         if time_correlated:
             correlations.extend(time_correlated)
         
         # Location-based correlation
         if new_event.coordinates:
-            location_correlated = self._find_location_correlated(new_event, existing_events)
+            location_correlated = self._find_location_correlated(new_event, index)
             if location_correlated:
                 correlations.extend(location_correlated)
         
         # Rule-based correlation
-        rule_correlations = self._apply_correlation_rules(new_event, existing_events)
+        rule_correlations = self._apply_correlation_rules(new_event, index)
         if rule_correlations:
             correlations.extend(rule_correlations)
         
         return correlations
     
-    def _find_time_correlated(self, new_event: Event, events: List[Event]) -> List[Dict]:
+    def _find_time_correlated(self, new_event: Event, index: EventCorrelationIndex) -> List[Dict]:
         """Find events within time window"""
-        correlations = []
+        ids, order, timestamps = index.near_in_time(new_event.detected_at)
         
-        for event in events:
-            if event.event_id == new_event.event_id:
+        window = self.time_window.total_seconds()
+        time_diff = np.abs(new_event.detected_at.timestamp() - timestamps)
+        strength = 1 - time_diff / window
+        keep = (time_diff <= window) & (strength > 0.3)  # Threshold
+        
+        correlations = []
+        for i in np.flatnonzero(keep)[np.argsort(order[keep], kind="stable")]:
+            if ids[i] == new_event.event_id:
                 continue
-            
-            time_diff = abs((new_event.detected_at - event.detected_at).total_seconds())
-            
-            if time_diff <= self.time_window.total_seconds():
-                correlation_strength = 1 - (time_diff / self.time_window.total_seconds())
-                
-                if correlation_strength > 0.3:  # Threshold
-                    correlations.append({
-                        "event_id": event.event_id,
-                        "correlation_type": "temporal",
-                        "strength": correlation_strength,
-                        "time_difference_seconds": time_diff
-                    })
+            correlations.append({
+                "event_id": ids[i],
+                "correlation_type": "temporal",
+                "strength": float(strength[i]),
+                "time_difference_seconds": float(time_diff[i])
+            })
         
         return correlations
     
-    def _find_location_correlated(self, new_event: Event, events: List[Event]) -> List[Dict]:
+    def _find_location_correlated(self, new_event: Event, index: EventCorrelationIndex) -> List[Dict]:
         """Find events within distance threshold"""
-        correlations = []
-        
         if not new_event.coordinates:
-            return correlations
+            return []
         
-        for event in events:
-            if event.event_id == new_event.event_id or not event.coordinates:
+        ids, order, coords = index.near_in_space(*new_event.coordinates)
+        
+        distance = self._calculate_distance(new_event.coordinates, (coords[:, 0], coords[:, 1]))
+        strength = 1 - distance / self.distance_threshold
+        keep = (distance <= self.distance_threshold) & (strength > 0.3)
+        
+        correlations = []
+        for i in np.flatnonzero(keep)[np.argsort(order[keep], kind="stable")]:
+            if ids[i] == new_event.event_id:
                 continue
-            
-            distance = self._calculate_distance(new_event.coordinates, event.coordinates)
-            
-            if distance <= self.distance_threshold:
-                correlation_strength = 1 - (distance / self.distance_threshold)
-                
-                if correlation_strength > 0.3:
-                    correlations.append({
-                        "event_id": event.event_id,
-                        "correlation_type": "spatial",
-                        "strength": correlation_strength,
-                        "distance_km": distance
-                    })
+            correlations.append({
+                "event_id": ids[i],
+                "correlation_type": "spatial",
+                "strength": float(strength[i]),
+                "distance_km": float(distance[i])
+            })
         
         return correlations
     
     def _calculate_distance(self, coord1: Tuple[float, float], coord2: Tuple[float, float]) -> float:
-        """Calculate distance between two coordinates in km"""
+        """Calculate distance between two coordinates in km (either may hold arrays)"""
         lat1, lon1 = coord1
         lat2, lon2 = coord2
         
@@ -410,15 +546,15 @@ class EventCorrelationEngine:
         
         lat1_rad = np.radians(lat1)
         lat2_rad = np.radians(lat2)
-        delta_lat = np.radians(lat2 - lat1)
-        delta_lon = np.radians(lon2 - lon1)
+        delta_lat = np.radians(np.subtract(lat2, lat1))
+        delta_lon = np.radians(np.subtract(lon2, lon1))
         
         a = np.sin(delta_lat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lon/2)**2
         c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
         
         return R * c
     
-    def _apply_correlation_rules(self, new_event: Event, events: List[Event]) -> List[Dict]:
+    def _apply_correlation_rules(self, new_event: Event, index: EventCorrelationIndex) -> List[Dict]:
         """Apply correlation rules to find patterns"""
         correlations = []
         
@@ -427,22 +563,26 @@ class EventCorrelationEngine:
             if new_event.event_type not in rule["event_types"]:
                 continue
             
-            # Find matching events
-            matching_events = [
-                e for e in events
-                if e.event_type in rule["event_types"]
-                and e.event_id != new_event.event_id
-                and e.status != EventStatus.CLOSED
-            ]
+            # Open events of the rule's types, from the index's running counters
+            min_events = rule.get("min_events", 2)
+            count = index.open_count(rule["event_types"])
+            if count + 1 < min_events:
+                continue
             
-            if len(matching_events) + 1 >= rule.get("min_events", 2):
+            # Only the latest ids are listed: during a storm the open set is
+            # large, and the strength comes from the count alone
+            matching = count - index.is_open(new_event.event_id, rule["event_types"])
+            if matching + 1 >= min_events:
                 correlations.append({
                     "rule_name": rule["name"],
                     "correlation_type": "rule_based",
                     "description": rule["description"],
-                    "event_ids": [e.event_id for e in matching_events],
+                    "event_ids": index.recent_open_events(
+                        rule["event_types"], self.max_rule_event_ids, exclude=new_event.event_id
+                    ),
+                    "event_count": matching,
                     "suggested_type": rule["result_type"].value,
-                    "strength": min(len(matching_events) / rule.get("min_events", 2), 1.0)
+                    "strength": min(matching / min_events, 1.0)
                 })
         
         return correlations
@@ -587,9 +727,7 @@ class CentralEventManager:
         )
         
         # Find correlations with existing events
-        correlations = self.correlation_engine.find_correlations(
-            event, list(self.events.values())
-        )
+        correlations = self.correlation_engine.find_correlations(event)
         
         for corr in correlations:
             if "event_id" in corr:
@@ -597,6 +735,7 @@ class CentralEventManager:
         
         # Store event
         self.events[event_id] = event
+        self.correlation_engine.add_event(event)
         
         # Update statistics
         self._update_stats(event)
@@ -825,6 +964,7 @@ class CentralEventManager:
         
         if status == EventStatus.RESOLVED:
             event.resolved_at = datetime.now()
+        self.correlation_engine.update_event(event)
         
         if notes:
             event.notes.append({
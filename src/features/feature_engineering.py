@@ -25,11 +25,12 @@ Design Principles:
 import numpy as np
 import pandas as pd
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from scipy import stats
 from scipy.signal import savgol_filter
 from enum import Enum
+import hashlib
 import warnings
 
 warnings.filterwarnings('ignore')
@@ -202,6 +203,92 @@ class SensorFeatures:
     computation_time_ms: float = 0.0
 
 
+@dataclass
+class DMAAlignedWindow:
+    """
+    Recent readings of every sensor in a DMA on one shared time grid, with
+    the pairwise statistics derived from them. Cached per DMA until new
+    data arrives.
+    """
+
+    dma_id: str
+    sensor_ids: List[str]
+    timestamps: pd.DatetimeIndex
+    values: np.ndarray            # (time × sensors), NaN where missing
+    fingerprint: Tuple
+    latest: np.ndarray            # Last valid reading per sensor
+    history: np.ndarray           # Samples per sensor before windowing
+    overlap: np.ndarray           # (sensors × sensors) co-observed samples
+    correlation: np.ndarray       # (sensors × sensors) Pearson, pairwise-complete
+    mean_diff: np.ndarray         # (sensors × sensors) mean of (i - j) over overlap
+
+
+@dataclass
+class FeatureMatrix:
+    """
+    Features for many sensors computed in one vectorized pass.
+
+    Rows are sensors, columns are features. A feature that the per-sensor
+    pipeline would not have produced for a sensor (e.g. too few samples)
+    is NaN in `values` and False in `present`.
+    """
+
+    sensor_ids: List[str]
+    feature_names: List[str]
+    values: np.ndarray            # (sensors × features)
+    present: np.ndarray           # (sensors × features) bool
+    valid_samples: np.ndarray     # Usable samples per sensor (quality scoring)
+    timestamp: datetime
+    warnings: List[str] = field(default_factory=list)
+    is_valid: bool = True         # False when the window was rejected outright
+    computation_time_ms: float = 0.0
+    relative_features: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    engineer: Optional['FeatureEngineer'] = field(default=None, repr=False)
+
+    def __post_init__(self):
+        self._index = {sensor_id: i for i, sensor_id in enumerate(self.sensor_ids)}
+        self._columns = {name: j for j, name in enumerate(self.feature_names)}
+
+    def column(self, name: str) -> np.ndarray:
+        """Values of one feature for every sensor (NaN where not present)."""
+        return self.values[:, self._columns[name]]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Features as a DataFrame indexed by sensor id."""
+        return pd.DataFrame(self.values, index=self.sensor_ids, columns=self.feature_names)
+
+    def sensor_features(self, sensor_id: str) -> SensorFeatures:
+        """Per-sensor view, equivalent to `FeatureEngineer.compute_features`."""
+        i = self._index[sensor_id]
+        result = SensorFeatures(
+            sensor_id=sensor_id,
+            timestamp=self.timestamp,
+            warnings=list(self.warnings),
+            computation_time_ms=self.computation_time_ms / max(len(self.sensor_ids), 1)
+        )
+
+        if not self.is_valid:
+            result.quality_score = 0.0
+            return result
+
+        row = self.values[i]
+        mask = self.present[i]
+        result.features = {
+            name: float(row[j]) for j, name in enumerate(self.feature_names) if mask[j]
+        }
+        result.features.update(self.relative_features.get(sensor_id, {}))
+
+        engineer = self.engineer or FeatureEngineer()
+        result.features.update(engineer._compute_derived_features(result.features))
+        result.quality_score = engineer._score_quality(int(self.valid_samples[i]), result.features)
+
+        return result
+
+    def views(self) -> Dict[str, SensorFeatures]:
+        """Per-sensor views for every sensor."""
+        return {sensor_id: self.sensor_features(sensor_id) for sensor_id in self.sensor_ids}
+
+
 class FeatureEngineer:
     """
     Main feature engineering class for pressure-based leak detection.
@@ -221,11 +308,15 @@ class FeatureEngineer:
     def __init__(self, config: Optional[FeatureConfig] = None):
         self.config = config or FeatureConfig()
         
+        # DMA-level relative feature state (dma_id -> aligned window)
+        self._dma_windows: Dict[str, DMAAlignedWindow] = {}
+        
     def compute_features(
         self,
         pressure_data: pd.DataFrame,
         neighbor_data: Optional[Dict[str, pd.DataFrame]] = None,
-        pipe_metadata: Optional[Dict] = None
+        pipe_metadata: Optional[Dict] = None,
+        dma_id: Optional[str] = None
     ) -> SensorFeatures:
         """
         Compute all features for a sensor.
@@ -235,6 +326,10 @@ class FeatureEngineer:
                           Must contain at least baseline_window hours of data
             neighbor_data: Dict of {sensor_id: DataFrame} for relative features
             pipe_metadata: Dict with pipe attributes (length, material, age, etc.)
+            dma_id: When given, relative features come from the matrix
+                    DMA-level pass (`compute_dma_relative_features`) over the
+                    prepared target series and raw neighbors. To align a whole
+                    DMA once, use that method or `compute_features_batch`
             
         Returns:
             SensorFeatures object containing all computed features
@@ -263,7 +358,17 @@ class FeatureEngineer:
         result.features.update(self._compute_night_features(df))
         
         # Relative features (if neighbor data available)
-        if neighbor_data:
+        if neighbor_data and dma_id is not None:
+            dma_data = dict(neighbor_data)
+            dma_data[sensor_id] = df[['value']]
+            relative = self.compute_dma_relative_features(
+                dma_id,
+                dma_data,
+                neighbors={sensor_id: list(neighbor_data)},
+                distances={sensor_id: (pipe_metadata or {}).get('distances', {})}
+            )
+            result.features.update(relative.get(sensor_id, {}))
+        elif neighbor_data:
             result.features.update(
                 self._compute_relative_features(df, neighbor_data, pipe_metadata)
             )
@@ -312,8 +417,9 @@ class FeatureEngineer:
         df = df.sort_index()
         
         # Remove extreme outliers (likely sensor errors)
-        zscore = np.abs(stats.zscore(df['value'].dropna()))
-        df.loc[zscore > self.config.zscore_threshold, 'value'] = np.nan
+        valid = df['value'].dropna()
+        zscore = np.abs(stats.zscore(valid))
+        df.loc[valid.index[zscore > self.config.zscore_threshold], 'value'] = np.nan
         
         # Forward fill small gaps (up to 1 hour)
         df['value'] = df['value'].ffill(limit=4)
@@ -687,6 +793,194 @@ class FeatureEngineer:
             
         return features
     
+    def compute_dma_relative_features(
+        self,
+        dma_id: str,
+        sensor_data,
+        neighbors: Optional[Dict[str, List[str]]] = None,
+        distances: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Compute relative features for every sensor in a DMA in one pass.
+        
+        All sensors are aligned once onto a shared time grid and pairwise
+        correlations / pressure differences are computed as matrices, instead
+        of re-aligning each neighbor once per target sensor. The aligned
+        window is cached per DMA and reused until new data arrives.
+        
+        Produces the same feature names as `_compute_relative_features`
+        (pressure_diff_*, gradient_to_*, correlation_*, and aggregates) plus
+        diff_residual_* - the current pressure difference minus its mean over
+        the window. A leak between two sensors shows up as a growing residual.
+        
+        Args:
+            dma_id: District Metered Area identifier (cache key)
+            sensor_data: {sensor_id: DataFrame['timestamp', 'value']} or a wide
+                        (time × sensors) DataFrame with a DatetimeIndex
+            neighbors: Optional {sensor_id: [neighbor_ids]}; default is every
+                      other sensor in the DMA
+            distances: Optional {sensor_id: {neighbor_id: metres}}; default 500m
+            
+        Returns:
+            {sensor_id: {feature_name: value}}
+        """
+        window = self._get_dma_window(dma_id, sensor_data)
+        index = {sensor_id: i for i, sensor_id in enumerate(window.sensor_ids)}
+        n_sensors = len(window.sensor_ids)
+        distances = distances or {}
+        
+        # Pairwise matrices (target row i, neighbor column j)
+        pressure_diff = window.latest[:, None] - window.latest[None, :]
+        has_corr = (
+            (window.overlap >= 50)
+            & (window.history[:, None] >= 96)
+            & (window.history[None, :] >= 96)
+        )
+        residual = pressure_diff - window.mean_diff
+        
+        results: Dict[str, Dict[str, float]] = {}
+        for i, sensor_id in enumerate(window.sensor_ids):
+            if neighbors is not None:
+                neighbor_idx = [index[n] for n in neighbors.get(sensor_id, []) if n in index and n != sensor_id]
+            else:
+                neighbor_idx = [j for j in range(n_sensors) if j != i]
+            
+            features = {}
+            gradients = []
+            correlations = []
+            residuals = []
+            sensor_distances = distances.get(sensor_id, {})
+            
+            for j in neighbor_idx:
+                neighbor_id = window.sensor_ids[j]
+                if window.history[j] == 0:
+                    continue
+                
+                distance = sensor_distances.get(neighbor_id, 500)  # Default 500m
+                gradient = (pressure_diff[i, j] / distance) * 1000  # bar/km
+                
+                features[f'pressure_diff_{neighbor_id}'] = float(pressure_diff[i, j])
+                features[f'gradient_to_{neighbor_id}'] = float(gradient)
+                gradients.append(gradient)
+                
+                if has_corr[i, j]:
+                    features[f'correlation_{neighbor_id}'] = float(window.correlation[i, j])
+                    features[f'diff_residual_{neighbor_id}'] = float(residual[i, j])
+                    correlations.append(window.correlation[i, j])
+                    residuals.append(abs(residual[i, j]))
+            
+            # Aggregate relative features
+            if gradients:
+                features['max_gradient'] = float(max(gradients))
+                features['mean_gradient'] = float(np.mean(gradients))
+            
+            if correlations:
+                features['min_neighbor_correlation'] = float(min(correlations))
+                features['mean_neighbor_correlation'] = float(np.mean(correlations))
+                features['max_abs_diff_residual'] = float(max(residuals))
+            
+            results[sensor_id] = features
+        
+        return results
+    
+    def invalidate_dma_cache(self, dma_id: Optional[str] = None) -> None:
+        """Drop the cached aligned window for one DMA (or all DMAs)."""
+        if dma_id is None:
+            self._dma_windows.clear()
+        else:
+            self._dma_windows.pop(dma_id, None)
+    
+    def _get_dma_window(self, dma_id: str, sensor_data) -> DMAAlignedWindow:
+        """Return the cached aligned window for a DMA, rebuilding it on new data."""
+        fingerprint = self._dma_fingerprint(sensor_data)
+        cached = self._dma_windows.get(dma_id)
+        if cached is not None and cached.fingerprint == fingerprint:
+            return cached
+        
+        window = self._align_dma(dma_id, sensor_data, fingerprint)
+        self._dma_windows[dma_id] = window
+        return window
+    
+    @staticmethod
+    def _dma_fingerprint(sensor_data) -> Tuple:
+        """
+        Identity of the data: changes whenever a reading is added or edited.
+        
+        Values are digested in full, so a cleaned copy of a sensor's series
+        never reuses a window aligned from the raw one.
+        """
+        if isinstance(sensor_data, pd.DataFrame):
+            last = sensor_data.index[-1] if len(sensor_data) else None
+            return ('wide', sensor_data.shape, tuple(sensor_data.columns), last,
+                    _digest(sensor_data.to_numpy(dtype=float)))
+        
+        parts = []
+        for sensor_id in sorted(sensor_data):
+            df = sensor_data[sensor_id]
+            if len(df) == 0:
+                parts.append((sensor_id, 0, None, None))
+                continue
+            last_ts = df['timestamp'].iloc[-1] if 'timestamp' in df.columns else df.index[-1]
+            parts.append((sensor_id, len(df), last_ts, _digest(df['value'].to_numpy(dtype=float))))
+        return ('dict', tuple(parts))
+    
+    def _align_dma(self, dma_id: str, sensor_data, fingerprint: Tuple) -> DMAAlignedWindow:
+        """Align every sensor of a DMA once onto a shared grid and precompute pair stats."""
+        if isinstance(sensor_data, pd.DataFrame):
+            grid = sensor_data.sort_index()
+            grid.columns = [str(c) for c in grid.columns]
+        else:
+            series = {}
+            for sensor_id, df in sensor_data.items():
+                if 'timestamp' in df.columns:
+                    s = pd.Series(df['value'].values, index=pd.to_datetime(df['timestamp']))
+                else:
+                    s = df['value']
+                series[str(sensor_id)] = s[~s.index.duplicated(keep='last')]
+            grid = pd.concat(series, axis=1).sort_index() if series else pd.DataFrame()
+        
+        values = grid.to_numpy(dtype=float)
+        valid = ~np.isnan(values)
+        history = valid.sum(axis=0)
+        
+        # Last valid reading per sensor
+        n_rows = len(values)
+        if n_rows:
+            last_row = n_rows - 1 - np.argmax(valid[::-1], axis=0)
+            latest = np.where(history > 0, values[last_row, np.arange(values.shape[1])], np.nan)
+        else:
+            latest = np.full(values.shape[1], np.nan)
+        
+        # Pairwise-complete statistics over the last 24 hours of the grid
+        tail = values[-96:]
+        mask = (~np.isnan(tail)).astype(float)
+        x = np.where(mask > 0, tail, 0.0)
+        with np.errstate(all='ignore'):
+            overlap = mask.T @ mask
+            sum_i = x.T @ mask                  # sum of x_i where both observed
+            sum_j = sum_i.T
+            sum_ii = (x * x).T @ mask
+            sum_jj = sum_ii.T
+            sum_ij = x.T @ x
+            cov = sum_ij - sum_i * sum_j / overlap
+            var_i = sum_ii - sum_i ** 2 / overlap
+            var_j = sum_jj - sum_j ** 2 / overlap
+            correlation = cov / np.sqrt(var_i * var_j)
+            mean_diff = (sum_i - sum_j) / overlap
+        
+        return DMAAlignedWindow(
+            dma_id=dma_id,
+            sensor_ids=list(grid.columns),
+            timestamps=pd.DatetimeIndex(grid.index[-96:]),
+            values=tail,
+            fingerprint=fingerprint,
+            latest=latest,
+            history=history,
+            overlap=overlap,
+            correlation=correlation,
+            mean_diff=mean_diff
+        )
+    
     # =========================================================================
     # CATEGORY 7: DERIVED COMPOSITE FEATURES
     # =========================================================================
@@ -787,11 +1081,14 @@ class FeatureEngineer:
         Returns:
             Quality score from 0 to 1
         """
+        return self._score_quality(len(df.dropna()), features)
+    
+    def _score_quality(self, actual_samples: int, features: Dict[str, float]) -> float:
+        """Quality score from the number of usable samples and the features present."""
         quality = 1.0
         
         # Penalize for missing data
         expected_samples = self.config.baseline_window * 4
-        actual_samples = len(df.dropna())
         completeness = actual_samples / expected_samples
         quality *= min(completeness / 0.8, 1.0)  # No penalty above 80%
         
@@ -811,6 +1108,316 @@ class FeatureEngineer:
                 
         return max(0.0, min(1.0, quality))
 
+    # =========================================================================
+    # BATCH MODE (MANY SENSORS AT ONCE)
+    # =========================================================================
+    
+    def compute_features_batch(
+        self,
+        pressure_data,
+        timestamps: Optional[pd.DatetimeIndex] = None,
+        sensor_ids: Optional[List[str]] = None,
+        dma_id: Optional[str] = None,
+        neighbors: Optional[Dict[str, List[str]]] = None,
+        distances: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> FeatureMatrix:
+        """
+        Compute features for many sensors sharing one time grid.
+        
+        Equivalent to calling `compute_features` on every column (without
+        neighbor data), but each feature is computed for all sensors with a
+        single column-wise NumPy operation.
+        
+        Args:
+            pressure_data: Wide (time × sensors) DataFrame with a DatetimeIndex
+                          and one column per sensor, or a 2-D array
+            timestamps: Time grid (required when pressure_data is an array)
+            sensor_ids: Sensor ids (required when pressure_data is an array)
+            dma_id: When given, sensors are treated as one DMA and relative
+                    features are added via `compute_dma_relative_features`
+            neighbors: Optional {sensor_id: [neighbor_ids]} (default: all)
+            distances: Optional {sensor_id: {neighbor_id: metres}}
+            
+        Returns:
+            FeatureMatrix with a features matrix and per-sensor views
+        """
+        import time
+        start_time = time.time()
+        
+        if isinstance(pressure_data, pd.DataFrame):
+            timestamps = pd.DatetimeIndex(pressure_data.index)
+            sensor_ids = [str(c) for c in pressure_data.columns]
+            values = pressure_data.to_numpy(dtype=float)
+        else:
+            values = np.asarray(pressure_data, dtype=float)
+            timestamps = pd.DatetimeIndex(timestamps)
+            if values.ndim == 1:
+                values = values[:, None]
+            if sensor_ids is None:
+                sensor_ids = [f"sensor_{i}" for i in range(values.shape[1])]
+        
+        if len(timestamps) != values.shape[0] or len(sensor_ids) != values.shape[1]:
+            raise ValueError("pressure_data must be (len(timestamps) × len(sensor_ids))")
+        
+        matrix = FeatureMatrix(
+            sensor_ids=list(sensor_ids),
+            feature_names=[],
+            values=np.empty((len(sensor_ids), 0)),
+            present=np.empty((len(sensor_ids), 0), dtype=bool),
+            valid_samples=np.zeros(len(sensor_ids), dtype=int),
+            timestamp=datetime.utcnow(),
+            engineer=self
+        )
+        
+        # Validate input window (shared by all sensors)
+        n_samples = values.shape[0]
+        if n_samples == 0:
+            matrix.warnings.append("No data provided")
+            matrix.is_valid = False
+            return matrix
+        
+        completeness = n_samples / (self.config.baseline_window * 4)
+        if completeness < self.config.min_completeness:
+            matrix.warnings.append(f"Insufficient data: {completeness:.1%} of required")
+            if completeness < 0.5:
+                matrix.is_valid = False
+                return matrix
+        
+        # Prepare data
+        if not timestamps.is_monotonic_increasing:
+            order = np.argsort(timestamps.values, kind='stable')
+            timestamps = timestamps[order]
+            values = values[order]
+        values, smooth = self._prepare_batch(values)
+        
+        # Compute feature categories
+        columns: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        n_sensors = values.shape[1]
+        
+        def put(name: str, column, present=True):
+            column = np.broadcast_to(np.asarray(column, dtype=float), (n_sensors,))
+            present = np.broadcast_to(np.asarray(present, dtype=bool), (n_sensors,))
+            columns[name] = (np.where(present, column, np.nan), present)
+        
+        # All-NaN columns are expected (offline sensors) and yield NaN features
+        with np.errstate(all='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self._batch_absolute_features(values, put)
+            self._batch_temporal_features(values, smooth, put)
+            for name, value in self._compute_contextual_features(
+                pd.DataFrame(index=timestamps[-1:])
+            ).items():
+                put(name, value)
+            self._batch_statistical_features(values, put)
+            self._batch_night_features(values, timestamps, put)
+        
+        matrix.feature_names = list(columns)
+        matrix.values = np.column_stack([c[0] for c in columns.values()])
+        matrix.present = np.column_stack([c[1] for c in columns.values()])
+        matrix.valid_samples = (~np.isnan(values)).sum(axis=0)
+        matrix.__post_init__()
+        
+        if dma_id is not None:
+            matrix.relative_features = self.compute_dma_relative_features(
+                dma_id,
+                pd.DataFrame(values, index=timestamps, columns=matrix.sensor_ids),
+                neighbors=neighbors,
+                distances=distances
+            )
+        
+        matrix.computation_time_ms = (time.time() - start_time) * 1000
+        
+        return matrix
+    
+    def _prepare_batch(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Column-wise equivalent of `_prepare_data`; returns (value, value_smooth)."""
+        values = values.copy()
+        n_samples = values.shape[0]
+        
+        # Remove extreme outliers (likely sensor errors)
+        with np.errstate(all='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            mean = np.nanmean(values, axis=0)
+            std = np.nanstd(values, axis=0)
+            zscore = np.abs(values - mean) / std
+        values[zscore > self.config.zscore_threshold] = np.nan
+        
+        # Forward fill small gaps (up to 1 hour)
+        valid = ~np.isnan(values)
+        if not valid.all():
+            rows = np.arange(n_samples)[:, None]
+            last_valid = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+            fill = ~valid & (last_valid >= 0) & (rows - last_valid <= 4)
+            fill_rows, fill_cols = np.nonzero(fill)
+            values[fill_rows, fill_cols] = values[last_valid[fill_rows, fill_cols], fill_cols]
+            valid = ~np.isnan(values)
+        
+        # Apply smoothing to reduce noise
+        smooth = values.copy()
+        window = self.config.savgol_window
+        if n_samples >= window:
+            complete = valid.all(axis=0)
+            if complete.any():
+                smooth[:, complete] = savgol_filter(
+                    values[:, complete], window, self.config.savgol_order, axis=0
+                )
+            # Columns with gaps are smoothed over their valid samples only
+            for col in np.nonzero(~complete & (valid.sum(axis=0) >= window))[0]:
+                mask = valid[:, col]
+                smooth[mask, col] = savgol_filter(
+                    values[mask, col], window, self.config.savgol_order
+                )
+        
+        return values, smooth
+    
+    def _batch_absolute_features(self, values: np.ndarray, put: Callable) -> None:
+        """Column-wise equivalent of `_compute_absolute_features`."""
+        current = values[-96:]
+        
+        if len(current) >= self.config.min_samples_short:
+            mean = np.nanmean(current, axis=0)
+            std = np.nanstd(current, axis=0, ddof=1)
+            p_min = np.nanmin(current, axis=0)
+            p_max = np.nanmax(current, axis=0)
+            put('pressure_mean', mean)
+            put('pressure_std', std)
+            put('pressure_min', p_min)
+            put('pressure_max', p_max)
+            put('pressure_range', p_max - p_min)
+            put('pressure_median', np.nanmedian(current, axis=0))
+            put('pressure_cv', np.where(mean > 0, std / mean, 0.0))
+        
+        put('pressure_latest', values[-1])
+    
+    def _batch_temporal_features(
+        self,
+        values: np.ndarray,
+        smooth: np.ndarray,
+        put: Callable
+    ) -> None:
+        """Column-wise equivalent of `_compute_temporal_features`."""
+        n_samples = len(values)
+        current = smooth[-1]
+        
+        for lag, hours, name in [(4, 1.0, '1h'), (24, 6.0, '6h'), (96, 24.0, '24h')]:
+            if n_samples >= lag:
+                change = current - smooth[-lag]
+                put(f'pressure_{name}_change', change)
+                put(f'pressure_{name}_change_rate', change / hours)
+        
+        put('rolling_mean_1h', np.nanmean(values[-4:], axis=0))
+        put('rolling_mean_6h', np.nanmean(values[-24:], axis=0))
+        put('rolling_mean_24h', np.nanmean(values[-96:], axis=0))
+        
+        # 7-day baseline comparison
+        if n_samples >= 672:
+            baseline_mean = np.nanmean(values[:-96], axis=0)
+            baseline_std = np.nanstd(values[:-96], axis=0, ddof=1)
+            put('baseline_mean', baseline_mean)
+            put('baseline_std', baseline_std)
+            put('deviation_from_baseline', current - baseline_mean)
+            put('zscore_vs_baseline', np.where(
+                baseline_std > 0, (current - baseline_mean) / baseline_std, 0.0
+            ))
+        
+        # Trend detection using closed-form least squares
+        if n_samples >= 24:
+            slope, r_value, count = _masked_linregress(smooth[-24:])
+            put('trend_slope_6h', slope * 4, count >= 12)  # Convert to bar/hour
+            put('trend_r_squared', r_value ** 2, count >= 12)
+    
+    def _batch_statistical_features(self, values: np.ndarray, put: Callable) -> None:
+        """Column-wise equivalent of `_compute_statistical_features`."""
+        recent = values[-96:]
+        valid = ~np.isnan(recent)
+        count = valid.sum(axis=0)
+        present = count >= self.config.min_samples_long
+        if not present.any():
+            return
+        
+        # Biased central moments (scipy.stats.skew / kurtosis defaults)
+        mean = np.nansum(recent, axis=0) / count
+        centered = np.where(valid, recent - mean, 0.0)
+        m2 = (centered ** 2).sum(axis=0) / count
+        m3 = (centered ** 3).sum(axis=0) / count
+        m4 = (centered ** 4).sum(axis=0) / count
+        degenerate = m2 <= (np.finfo(float).eps * mean) ** 2
+        put('pressure_skewness', np.where(degenerate, np.nan, m3 / m2 ** 1.5), present)
+        put('pressure_kurtosis', np.where(degenerate, np.nan, m4 / m2 ** 2 - 3.0), present)
+        
+        # Percentiles (one call for complete columns, per column otherwise)
+        q = [5, 25, 50, 75, 95]
+        pct = np.full((len(q), recent.shape[1]), np.nan)
+        complete = count == len(recent)
+        if complete.any():
+            pct[:, complete] = np.percentile(recent[:, complete], q, axis=0)
+        for col in np.nonzero(present & ~complete)[0]:
+            pct[:, col] = np.percentile(recent[valid[:, col], col], q)
+        p05, p25, median, p75, p95 = pct
+        iqr = p75 - p25
+        put('pressure_p05', p05, present)
+        put('pressure_p25', p25, present)
+        put('pressure_p75', p75, present)
+        put('pressure_p95', p95, present)
+        put('pressure_iqr', iqr, present)
+        
+        # Robust Z-score of the latest valid reading
+        last_row = len(recent) - 1 - np.argmax(valid[::-1], axis=0)
+        latest = recent[last_row, np.arange(recent.shape[1])]
+        put('pressure_robust_zscore', np.where(
+            iqr > 0, (latest - median) / (iqr / 1.349), 0.0
+        ), present)
+        
+        lower_bound = p25 - 1.5 * iqr
+        put('low_pressure_count', (recent < lower_bound).sum(axis=0), present)
+    
+    def _batch_night_features(
+        self,
+        values: np.ndarray,
+        timestamps: pd.DatetimeIndex,
+        put: Callable
+    ) -> None:
+        """Column-wise equivalent of `_compute_night_features`."""
+        if len(values) < 96:
+            return
+        
+        mnf_hours = range(self.config.mnf_start_hour, self.config.mnf_end_hour)
+        recent = values[-672:]
+        hours = timestamps[-672:].hour
+        is_mnf = np.asarray(hours.isin(mnf_hours))
+        is_day = np.asarray(hours.isin(range(8, 20)))
+        
+        has_night = is_mnf.sum() >= 12
+        if has_night:
+            night = recent[is_mnf]
+            mnf_mean = np.nanmean(night, axis=0)
+            mnf_std = np.nanstd(night, axis=0, ddof=1)
+            put('mnf_pressure_mean', mnf_mean)
+            put('mnf_pressure_std', mnf_std)
+            put('mnf_pressure_min', np.nanmin(night, axis=0))
+        
+        has_day = is_day.sum() >= 48
+        if has_day:
+            day_mean = np.nanmean(recent[is_day], axis=0)
+            put('day_pressure_mean', day_mean)
+        
+        # Night/Day ratio - KEY LEAK INDICATOR
+        if has_night and has_day:
+            put('night_day_ratio', np.where(day_mean > 0, mnf_mean / day_mean, 1.0))
+        
+        # Compare last night to 7-day night average
+        last_night = np.asarray(timestamps[-96:].hour.isin(mnf_hours))
+        if last_night.sum() >= 3 and has_night:
+            last_night_mean = np.nanmean(values[-96:][last_night], axis=0)
+            deviation = last_night_mean - mnf_mean
+            put('mnf_last_night', last_night_mean)
+            put('mnf_deviation', deviation)
+            put('mnf_zscore', np.where(mnf_std > 0, deviation / mnf_std, 0.0))
+        
+        # Night pressure stability
+        if has_night:
+            put('mnf_cv', np.where(mnf_mean > 0, mnf_std / mnf_mean, 0.0))
+
     # =========================================================================
     # IWA WATER BALANCE ALIGNED CLASSIFICATION
     # =========================================================================
@@ -1052,6 +1659,45 @@ class FeatureEngineer:
             return 0.9  # Very high - pressure reduction recommended
 
 
+# =============================================================================
+# VECTORIZED HELPERS
+# =============================================================================
+
+def _masked_linregress(y: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Closed-form least-squares fit of each column of `y` against sample position.
+    
+    NaNs are dropped per column and the remaining samples re-indexed 0..n-1,
+    matching `stats.linregress(np.arange(n), column.dropna())`.
+    
+    Returns:
+        (slope, r_value, n_valid) per column
+    """
+    valid = ~np.isnan(y)
+    count = valid.sum(axis=0)
+    x = np.where(valid, np.cumsum(valid, axis=0) - 1, 0).astype(float)
+    
+    with np.errstate(all='ignore'):
+        x_mean = x.sum(axis=0) / count
+        y_mean = np.where(valid, y, 0.0).sum(axis=0) / count
+        dx = np.where(valid, x - x_mean, 0.0)
+        dy = np.where(valid, y - y_mean, 0.0)
+        ssxm = (dx * dx).sum(axis=0) / count
+        ssym = (dy * dy).sum(axis=0) / count
+        ssxym = (dx * dy).sum(axis=0) / count
+        
+        slope = ssxym / ssxm
+        r_den = np.sqrt(ssxm * ssym)
+        r_value = np.where(r_den == 0, 0.0, np.clip(ssxym / r_den, -1.0, 1.0))
+    
+    return slope, r_value, count
+
+
+def _digest(values: np.ndarray) -> bytes:
+    """Short content hash of an array (cache fingerprints)."""
+    return hashlib.blake2b(np.ascontiguousarray(values).tobytes(), digest_size=16).digest()
+
+
 # =============================================================================
 # FEATURE DOCUMENTATION (IWA WATER BALANCE ALIGNED)
 # =============================================================================
@@ -1185,3 +1831,81 @@ This is water network intelligence for utility operations.
 def get_feature_documentation() -> str:
     """Return IWA-aligned feature documentation string."""
     return FEATURE_DOCUMENTATION
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def benchmark_batch_features(
+    sensor_counts: Tuple[int, ...] = (100, 1000, 10000),
+    days: int = 8,
+    per_sensor_sample: int = 50,
+    seed: int = 42
+) -> List[Dict[str, float]]:
+    """
+    Benchmark `compute_features_batch` against the per-sensor pipeline.
+    
+    The per-sensor pipeline is timed on `per_sensor_sample` sensors and
+    extrapolated; its output is also used to check the batch results.
+    
+    Returns:
+        One row per sensor count with timings, speedup and max abs difference
+    """
+    import time
+    
+    rng = np.random.default_rng(seed)
+    engineer = FeatureEngineer()
+    n_samples = days * 96
+    timestamps = pd.date_range('2024-01-01', periods=n_samples, freq='15min')
+    t = np.arange(n_samples)[:, None]
+    daily = 0.3 * np.sin(2 * np.pi * t / 96)
+    
+    rows = []
+    for n_sensors in sensor_counts:
+        values = (
+            3.0 + daily
+            + 0.05 * rng.standard_normal((n_samples, n_sensors))
+            - 0.0005 * t * rng.random(n_sensors)
+        )
+        values[rng.random(values.shape) < 0.005] = np.nan
+        sensor_ids = [f"S{i:05d}" for i in range(n_sensors)]
+        
+        start = time.perf_counter()
+        matrix = engineer.compute_features_batch(values, timestamps, sensor_ids)
+        batch_s = time.perf_counter() - start
+        
+        sample = min(per_sensor_sample, n_sensors)
+        max_diff = 0.0
+        start = time.perf_counter()
+        for i in range(sample):
+            single = engineer.compute_features(
+                pd.DataFrame({'timestamp': timestamps, 'value': values[:, i]})
+            )
+            view = matrix.sensor_features(sensor_ids[i])
+            for name, value in single.features.items():
+                if isinstance(value, float) and np.isfinite(value):
+                    max_diff = max(max_diff, abs(value - view.features[name]))
+        per_sensor_s = (time.perf_counter() - start) / sample * n_sensors
+        
+        rows.append({
+            'sensors': n_sensors,
+            'batch_s': batch_s,
+            'per_sensor_s_est': per_sensor_s,
+            'speedup': per_sensor_s / batch_s if batch_s > 0 else float('inf'),
+            'max_abs_diff': max_diff
+        })
+    
+    return rows
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 70)
+    print("FEATURE ENGINEERING - BATCH MODE BENCHMARK")
+    print("=" * 70)
+    print(f"{'Sensors':>10} {'Batch (s)':>12} {'Per-sensor (s)':>16} {'Speedup':>10} {'Max diff':>12}")
+    for row in benchmark_batch_features():
+        print(
+            f"{row['sensors']:>10} {row['batch_s']:>12.3f} {row['per_sensor_s_est']:>16.2f} "
+            f"{row['speedup']:>9.0f}x {row['max_abs_diff']:>12.2e}"
+        )
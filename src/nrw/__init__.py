@@ -17,6 +17,7 @@ from .nrw_calculator import (
     calculate_simple_nrw,
     get_nrw_rating,
 )
+from .mnf_batch import MNFBatchEngine
 
 __all__ = [
     'NRWCalculator',
@@ -24,4 +25,5 @@ __all__ = [
     'DMANRWSummary',
     'calculate_simple_nrw',
     'get_nrw_rating',
+    'MNFBatchEngine',
 ]
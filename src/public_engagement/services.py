@@ -15,13 +15,20 @@ import hashlib
 import logging
 import math
 import re
-from collections import defaultdict
-from datetime import datetime, timedelta
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 import uuid
 
+import numpy as np
+
+from src.gis.gis_integration import (
+    geohash_encode, geohash_neighbourhood, geohash_precision, haversine_m
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -229,6 +236,9 @@ class PublicReportService:
                 master_report_id = duplicates[0].report_id
                 report_data["master_report_id"] = master_report_id
                 report_data["is_master"] = False
+        # Quarantined reports never become masters for later duplicates
+        if not master_report_id and not report_data["quarantine"]:
+            self.duplicate_service.add_report(report_data)
         
         # 6. Generate tracking URL
         tracking_url = f"/track/{ticket}"
@@ -412,6 +422,168 @@ class PublicReportService:
         return hashlib.sha256(normalized.encode()).hexdigest()
 
 
+# =============================================================================
+# REPORT INDEXING
+# =============================================================================
+
+def _parse_report_time(value) -> datetime:
+    """Report timestamps arrive as datetimes or ISO strings."""
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def _epoch_seconds(moment: datetime) -> float:
+    """Epoch seconds; naive datetimes are taken as UTC."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class ReportIndex:
+    """
+    Per-tenant index of located reports keyed by (time bucket, geohash cell).
+    
+    Timestamps are parsed once on insert. A lookup visits only the time
+    buckets overlapping its window and the cells covering its radius, so a
+    viral incident with thousands of nearby reports elsewhere in the city
+    (or in another tenant) costs nothing. Buckets older than the retention
+    period are dropped as newer ones open.
+    """
+    
+    def __init__(self, bucket_minutes: int = 30, cell_meters: float = 100, retention_hours: float = 24):
+        self.bucket_seconds = bucket_minutes * 60
+        self.precision = geohash_precision(cell_meters / 1000)
+        self.retention_buckets = math.ceil(retention_hours * 3600 / self.bucket_seconds)
+        self._tenants: Dict[str, Dict[int, Dict[str, List[Dict]]]] = defaultdict(dict)
+        self._newest: Dict[str, int] = {}
+        self._size = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def add(self, report: Dict) -> bool:
+        """Index a report; returns False for reports without coordinates."""
+        latitude, longitude = report.get("latitude"), report.get("longitude")
+        if latitude is None or longitude is None:
+            return False
+        
+        created_at = _parse_report_time(report.get("created_at", ""))
+        entry = {**report, "created_at": created_at}
+        tenant_id = report.get("tenant_id")
+        bucket = int(_epoch_seconds(created_at) // self.bucket_seconds)
+        cell = geohash_encode(latitude, longitude, self.precision)
+        
+        buckets = self._tenants[tenant_id]
+        buckets.setdefault(bucket, {}).setdefault(cell, []).append(entry)
+        self._size += 1
+        
+        if bucket > self._newest.get(tenant_id, bucket - 1):
+            self._newest[tenant_id] = bucket
+            horizon = bucket - self.retention_buckets
+            for stale in [b for b in buckets if b < horizon]:
+                self._size -= sum(len(entries) for entries in buckets.pop(stale).values())
+        return True
+    
+    def nearby(
+        self,
+        tenant_id: str,
+        latitude: float,
+        longitude: float,
+        moment: datetime,
+        window_minutes: float,
+        radius_meters: float,
+    ) -> List[Dict]:
+        """Reports in the buckets around a point and time (a superset of the exact matches)."""
+        buckets = self._tenants.get(tenant_id)
+        if not buckets:
+            return []
+        
+        t = _epoch_seconds(moment)
+        first = int((t - window_minutes * 60) // self.bucket_seconds)
+        last = int((t + window_minutes * 60) // self.bucket_seconds)
+        cells = geohash_neighbourhood(latitude, longitude, radius_meters / 1000, self.precision)
+        
+        reports = []
+        for bucket in range(first, last + 1):
+            by_cell = buckets.get(bucket)
+            if by_cell:
+                for cell in cells:
+                    reports.extend(by_cell.get(cell, ()))
+        return reports
+
+
+class SlidingWindowCounter:
+    """
+    Per-key hit counts over a trailing window.
+    
+    Hits are stored as (bucket, count) runs at a fixed resolution, so a key
+    hit thousands of times a minute holds at most window/resolution runs and
+    a count is a running total rather than a rescan. Counts are exact to
+    within one resolution step; keys idle for a whole window are swept.
+    """
+    
+    def __init__(self, window_seconds: float, resolution_seconds: float = 1.0):
+        self.window_seconds = window_seconds
+        self.resolution_seconds = resolution_seconds
+        self._runs: Dict[str, deque] = {}
+        self._totals: Dict[str, int] = {}
+        self._last_sweep = -math.inf
+    
+    def __len__(self) -> int:
+        return len(self._runs)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._runs
+    
+    def _cutoff(self, now: float) -> int:
+        return math.floor((now - self.window_seconds) / self.resolution_seconds)
+    
+    def count(self, key: str, now: float) -> int:
+        """Hits for key in the window ending at now (epoch seconds)."""
+        self._sweep(now)
+        runs = self._runs.get(key)
+        if runs is None:
+            return 0
+        
+        cutoff = self._cutoff(now)
+        total = self._totals[key]
+        while runs and runs[0][0] < cutoff:
+            total -= runs.popleft()[1]
+        if not runs:
+            self.clear(key)
+            return 0
+        self._totals[key] = total
+        return total
+    
+    def add(self, key: str, now: float, amount: int = 1) -> int:
+        """Record hits and return the new windowed count."""
+        total = self.count(key, now) + amount
+        bucket = math.floor(now / self.resolution_seconds)
+        runs = self._runs.setdefault(key, deque())
+        if runs and runs[-1][0] == bucket:
+            runs[-1][1] += amount
+        else:
+            runs.append([bucket, amount])
+        self._totals[key] = total
+        return total
+    
+    def clear(self, key: Optional[str] = None):
+        """Forget one key, or every key."""
+        if key is None:
+            self._runs.clear()
+            self._totals.clear()
+        else:
+            self._runs.pop(key, None)
+            self._totals.pop(key, None)
+    
+    def _sweep(self, now: float):
+        if now - self._last_sweep < self.window_seconds:
+            return
+        self._last_sweep = now
+        cutoff = self._cutoff(now)
+        for key in [k for k, runs in self._runs.items() if runs[-1][0] < cutoff]:
+            self.clear(key)
+
+
 # =============================================================================
 # DUPLICATE DETECTION SERVICE
 # =============================================================================
@@ -445,6 +617,24 @@ class DuplicateDetectionService:
         In real implementation, this would query the database.
         """
         self.existing_reports = existing_reports or []
+        self.index = ReportIndex(
+            bucket_minutes=self.MAX_TIME_WINDOW_MINUTES,
+            cell_meters=self.MAX_DISTANCE_METERS,
+        )
+        for report in self.existing_reports:
+            self.index.add(report)
+    
+    def add_report(self, report: Dict) -> bool:
+        """
+        Make a new report a candidate for later duplicate checks.
+        
+        Reports already linked to a master are not indexed: later reports
+        match the master instead, which keeps the candidate set small when
+        thousands of people report the same incident.
+        """
+        if report.get("master_report_id"):
+            return False
+        return self.index.add(report)
     
     def find_duplicates(
         self,
@@ -476,29 +666,27 @@ class DuplicateDetectionService:
         
         matches = []
         
-        # Would query database for recent reports in area
-        # For now, search through existing_reports
-        for report in self.existing_reports:
-            if report.get("tenant_id") != tenant_id:
-                continue
-            
-            # Check time window
-            report_time = datetime.fromisoformat(report.get("created_at", ""))
-            time_diff = abs((created_at - report_time).total_seconds() / 60)
-            if time_diff > time_window:
-                continue
-            
-            # Check distance
-            report_lat = report.get("latitude")
-            report_lon = report.get("longitude")
-            if report_lat is None or report_lon is None:
-                continue
-            
-            distance = self._haversine_distance(
-                latitude, longitude,
-                report_lat, report_lon
+        candidates = [
+            report for report in self._get_nearby_reports(
+                tenant_id, latitude, longitude, created_at, time_window, distance_threshold
             )
-            if distance > distance_threshold:
+            if report.get("latitude") is not None and report.get("longitude") is not None
+        ]
+        if not candidates:
+            return matches
+        
+        # Check time and distance for all candidates in one pass
+        report_times = np.array(
+            [_epoch_seconds(_parse_report_time(r.get("created_at", ""))) for r in candidates]
+        )
+        time_diffs = np.abs(_epoch_seconds(created_at) - report_times) / 60
+        coords = np.array(
+            [(r["latitude"], r["longitude"]) for r in candidates], dtype=float
+        )
+        distances = haversine_m(latitude, longitude, coords[:, 0], coords[:, 1])
+        
+        for report, time_diff, distance in zip(candidates, time_diffs.tolist(), distances.tolist()):
+            if time_diff > time_window or distance > distance_threshold:
                 continue
             
             # Calculate similarity
@@ -523,6 +711,21 @@ class DuplicateDetectionService:
         
         return matches
     
+    def _get_nearby_reports(
+        self,
+        tenant_id: str,
+        latitude: float,
+        longitude: float,
+        created_at: datetime,
+        time_window_minutes: float,
+        distance_meters: float,
+    ) -> List[Dict]:
+        """Candidate reports for a tenant from the index buckets around a point and time."""
+        # Would be a PostGIS radius + time range query in production
+        return self.index.nearby(
+            tenant_id, latitude, longitude, created_at, time_window_minutes, distance_meters
+        )
+    
     def merge_reports(
         self,
         tenant_id: str,
@@ -578,19 +781,7 @@ class DuplicateDetectionService:
         lat2: float, lon2: float,
     ) -> float:
         """Calculate distance between two points in meters."""
-        R = 6371000  # Earth radius in meters
-        
-        phi1 = math.radians(lat1)
-        phi2 = math.radians(lat2)
-        delta_phi = math.radians(lat2 - lat1)
-        delta_lambda = math.radians(lon2 - lon1)
-        
-        a = (math.sin(delta_phi / 2) ** 2 +
-             math.cos(phi1) * math.cos(phi2) *
-             math.sin(delta_lambda / 2) ** 2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        
-        return R * c
+        return float(haversine_m(lat1, lon1, lat2, lon2))
     
     def _category_similarity(self, cat1: str, cat2: str) -> float:
         """Calculate similarity between two categories."""
@@ -655,10 +846,10 @@ class SpamDetectionService:
     MIN_DESCRIPTION_LENGTH = 10
     
     def __init__(self):
-        # In-memory rate tracking (would use Redis in production)
-        self._ip_counts: Dict[str, List[datetime]] = defaultdict(list)
-        self._device_counts: Dict[str, List[datetime]] = defaultdict(list)
-        self._text_hashes: Dict[str, List[datetime]] = defaultdict(list)
+        # In-memory sliding-window counters (would use Redis in production)
+        self._ip_counts = SlidingWindowCounter(3600)
+        self._device_counts = SlidingWindowCounter(3600)
+        self._text_hashes = SlidingWindowCounter(3600)
     
     def check_report(self, request: ReportCreateRequest) -> SpamCheckResult:
         """
@@ -676,27 +867,18 @@ class SpamDetectionService:
         rate_limit_exceeded = False
         trust_adjustment = 0
         
-        now = datetime.utcnow()
-        hour_ago = now - timedelta(hours=1)
+        now = time.time()
         
         # 1. IP rate limiting
         if request.reporter_ip:
-            self._ip_counts[request.reporter_ip] = [
-                t for t in self._ip_counts[request.reporter_ip]
-                if t > hour_ago
-            ]
-            if len(self._ip_counts[request.reporter_ip]) >= self.MAX_REPORTS_PER_IP_PER_HOUR:
+            if self._ip_counts.count(request.reporter_ip, now) >= self.MAX_REPORTS_PER_IP_PER_HOUR:
                 reasons.append("IP rate limit exceeded")
                 rate_limit_exceeded = True
                 is_spam = True
         
         # 2. Device fingerprint rate limiting
         if request.device_fingerprint:
-            self._device_counts[request.device_fingerprint] = [
-                t for t in self._device_counts[request.device_fingerprint]
-                if t > hour_ago
-            ]
-            if len(self._device_counts[request.device_fingerprint]) >= self.MAX_REPORTS_PER_DEVICE_PER_HOUR:
+            if self._device_counts.count(request.device_fingerprint, now) >= self.MAX_REPORTS_PER_DEVICE_PER_HOUR:
                 reasons.append("Device rate limit exceeded")
                 rate_limit_exceeded = True
                 is_spam = True
@@ -712,13 +894,10 @@ class SpamDetectionService:
             trust_adjustment = -10
         
         # 4. Check for repeated text (spam pattern)
+        text_hash = None
         if request.description:
             text_hash = hashlib.md5(request.description.lower().strip().encode()).hexdigest()
-            self._text_hashes[text_hash] = [
-                t for t in self._text_hashes[text_hash]
-                if t > hour_ago
-            ]
-            if len(self._text_hashes[text_hash]) >= 3:
+            if self._text_hashes.count(text_hash, now) >= 3:
                 reasons.append("Repeated text pattern detected")
                 is_spam = True
                 trust_adjustment = -20
@@ -739,12 +918,11 @@ class SpamDetectionService:
         
         # Record this request for future rate limiting
         if request.reporter_ip:
-            self._ip_counts[request.reporter_ip].append(now)
+            self._ip_counts.add(request.reporter_ip, now)
         if request.device_fingerprint:
-            self._device_counts[request.device_fingerprint].append(now)
-        if request.description:
-            text_hash = hashlib.md5(request.description.lower().strip().encode()).hexdigest()
-            self._text_hashes[text_hash].append(now)
+            self._device_counts.add(request.device_fingerprint, now)
+        if text_hash:
+            self._text_hashes.add(text_hash, now)
         
         return SpamCheckResult(
             is_spam=is_spam,
@@ -756,10 +934,10 @@ class SpamDetectionService:
     
     def clear_rate_limits(self, ip: Optional[str] = None, device: Optional[str] = None):
         """Clear rate limits for testing or admin override."""
-        if ip and ip in self._ip_counts:
-            del self._ip_counts[ip]
-        if device and device in self._device_counts:
-            del self._device_counts[device]
+        if ip:
+            self._ip_counts.clear(ip)
+        if device:
+            self._device_counts.clear(device)
 
 
 # =============================================================================
@@ -14,14 +14,13 @@ from .mnf_analyzer import MNFAnalyzer
 from .burst_detector import BurstDetector
 from .pressure_analyzer import PressureInstabilityAnalyzer
 from .leak_localizer import LeakLocalizer
-from .dispatch_engine import AutoDispatchEngine
-from .report_generator import NRWReportGenerator
+from .state_store import IncidentStore, ReadingBuffer
 
 __all__ = [
     'MNFAnalyzer',
     'BurstDetector', 
     'PressureInstabilityAnalyzer',
     'LeakLocalizer',
-    'AutoDispatchEngine',
-    'NRWReportGenerator'
+    'IncidentStore',
+    'ReadingBuffer'
 ]
@@ -14,6 +14,11 @@ Burst Types:
 - Type A: Catastrophic burst (immediate, large)
 - Type B: Progressive burst (developing over hours)
 - Type C: Background leak (detected via MNF, not burst)
+
+Readings are processed as streams: each sensor/DMA keeps a fixed-size ring
+buffer, EWMA level, CUSUM accumulator and level-crossing counter in shared
+NumPy arrays, so batches from large sensor fleets ingest in one vectorized
+pass (ingest_many).
 """
 
 import uuid
@@ -22,9 +27,12 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
 from enum import Enum
-import statistics
 import math
 
+import numpy as np
+
+from .state_store import IncidentStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -127,6 +135,160 @@ class PressureOscillation:
     possible_cause: str  # waterhammer, pump_cycling, valve_instability
 
 
+# =============================================================================
+# STREAMING STATE
+# =============================================================================
+
+def to_epoch_seconds(timestamps) -> np.ndarray:
+    """Naive UTC datetimes or datetime64 values -> float epoch seconds."""
+    values = np.asarray(timestamps)
+    return values.astype("datetime64[ns]").astype(np.int64) / 1e9
+
+
+def occurrence_rounds(slots: np.ndarray) -> List[np.ndarray]:
+    """
+    Split batch positions into rounds with at most one reading per slot,
+    keeping each slot's readings in batch order.
+    """
+    order = np.argsort(slots, kind="stable")
+    ordered = slots[order]
+    starts = np.ones(len(slots), dtype=bool)
+    starts[1:] = ordered[1:] != ordered[:-1]
+    positions = np.arange(len(slots))
+    rank = np.empty(len(slots), dtype=np.int64)
+    rank[order] = positions - np.maximum.accumulate(np.where(starts, positions, 0))
+    if len(slots) == 0 or rank.max() == 0:
+        return [positions]
+    return [np.flatnonzero(rank == r) for r in range(rank.max() + 1)]
+
+
+class SensorStreamState:
+    """
+    Compact per-key streaming state in struct-of-arrays form.
+    
+    Each key (sensor or DMA) owns a slot holding:
+    - a ring buffer of its last ``ring_size`` readings and timestamps
+    - an EWMA level and a running count of level crossings in the ring
+      (incremental oscillation evidence)
+    - a one-sided CUSUM of deviations from its baseline in ``direction``
+      (-1 = drops, +1 = rises; ``relative`` scales by the baseline), with
+      an alarm latch that clears once the CUSUM drains back to zero
+    
+    push() updates one reading per slot for many slots with a handful of
+    NumPy operations, so cost per reading is independent of fleet size.
+    """
+    
+    def __init__(
+        self,
+        ring_size: int = 20,
+        ewma_alpha: float = 0.2,
+        direction: int = -1,
+        relative: bool = False,
+        cusum_drift: float = 0.1,
+        capacity: int = 1024
+    ):
+        self.ring_size = ring_size
+        self.ewma_alpha = ewma_alpha
+        self.direction = direction
+        self.relative = relative
+        self.cusum_drift = cusum_drift
+        
+        self._slots: Dict[str, int] = {}
+        self.keys: List[str] = []
+        self.active_count = 0  # Slots that have received readings
+        self.capacity = 0
+        self._grow(capacity)
+    
+    def _grow(self, capacity: int):
+        def resized(name, fill, dtype, per_reading=False):
+            shape = (capacity, self.ring_size) if per_reading else (capacity,)
+            array = np.full(shape, fill, dtype=dtype)
+            if self.capacity:
+                array[:self.capacity] = getattr(self, name)
+            setattr(self, name, array)
+        
+        resized("values", np.nan, float, per_reading=True)
+        resized("times", -np.inf, float, per_reading=True)
+        resized("crossed", False, bool, per_reading=True)
+        resized("head", 0, np.int64)
+        resized("count", 0, np.int64)
+        resized("level", np.nan, float)
+        resized("last_deviation", 0.0, float)
+        resized("baseline", np.nan, float)
+        resized("cusum", 0.0, float)
+        resized("alarmed", False, bool)
+        resized("crossings", 0, np.int64)
+        self.capacity = capacity
+    
+    def slot(self, key: str) -> Optional[int]:
+        return self._slots.get(key)
+    
+    def slots(self, keys) -> np.ndarray:
+        """Slot per key, registering unseen keys."""
+        lookup = self._slots
+        slots = np.fromiter((lookup.get(key, -1) for key in keys), dtype=np.int64, count=len(keys))
+        for i in np.flatnonzero(slots < 0):
+            key = keys[i]
+            if key not in lookup:
+                lookup[key] = len(self.keys)
+                self.keys.append(key)
+            slots[i] = lookup[key]
+        if len(self.keys) > self.capacity:
+            self._grow(max(2 * self.capacity, len(self.keys)))
+        return slots
+    
+    def set_baseline(self, key: str, value: float):
+        slot = self.slots([key])[0]
+        self.baseline[slot] = value
+        self.cusum[slot] = 0.0
+        self.alarmed[slot] = False
+    
+    def push(self, slots: np.ndarray, values: np.ndarray, times: np.ndarray):
+        """Append one reading to each (distinct) slot and update EWMA, crossings and CUSUM."""
+        pos = self.head[slots]
+        previous = self.level[slots]
+        first = np.isnan(previous)
+        
+        # Level crossing: deviation from the EWMA changed sign since the last reading
+        deviation = np.where(first, 0.0, values - previous)
+        crossed = deviation * self.last_deviation[slots] < 0
+        self.crossings[slots] += crossed.astype(np.int64) - self.crossed[slots, pos]
+        self.crossed[slots, pos] = crossed
+        self.last_deviation[slots] = np.where(deviation != 0, deviation, self.last_deviation[slots])
+        
+        self.values[slots, pos] = values
+        self.times[slots, pos] = times
+        self.head[slots] = (pos + 1) % self.ring_size
+        self.active_count += int(np.count_nonzero(self.count[slots] == 0))
+        self.count[slots] += 1
+        self.level[slots] = np.where(first, values, previous + self.ewma_alpha * deviation)
+        
+        baseline = self.baseline[slots]
+        excess = self.direction * (values - baseline)
+        if self.relative:
+            excess = np.divide(excess, baseline, out=np.zeros_like(excess), where=baseline > 0)
+        cusum = np.where(np.isnan(baseline), 0.0, np.maximum(0.0, self.cusum[slots] + excess - self.cusum_drift))
+        self.cusum[slots] = cusum
+        self.alarmed[slots] &= cusum > 0
+    
+    def cusum_alarms(self, slots: np.ndarray, threshold: float, eligible: np.ndarray) -> np.ndarray:
+        """Eligible slots whose CUSUM crossed ``threshold`` since their last alarm cleared (latches them)."""
+        alarms = eligible & (self.cusum[slots] >= threshold) & ~self.alarmed[slots]
+        self.alarmed[slots[alarms]] = True
+        return alarms
+    
+    def window(self, slots: np.ndarray, cutoff: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Ring contents newest first as (values, times, valid) with valid = newer than cutoff."""
+        order = (self.head[slots, None] - 1 - np.arange(self.ring_size)) % self.ring_size
+        rows = slots[:, None]
+        times = self.times[rows, order]
+        return self.values[rows, order], times, times > cutoff
+
+
+# =============================================================================
+# BURST DETECTOR
+# =============================================================================
+
 class BurstDetector:
     """
     Production burst detection engine.
@@ -136,8 +298,15 @@ class BurstDetector:
     - Flow spike detection
     - Oscillation analysis
     - Cross-sensor correlation
+    
+    Sensor and DMA histories are kept as streaming state (ring buffer,
+    EWMA, CUSUM) so readings can be ingested one at a time or as NumPy
+    batches via ingest_many. The CUSUM catches progressive drops/rises
+    that stay below the sudden-burst thresholds.
     """
     
+    ACTIVE_STATUSES = ("active", "acknowledged", "responding")
+    
     def __init__(self, config: Optional[Dict] = None):
         """Initialize burst detector."""
         self.config = config or {}
@@ -155,53 +324,61 @@ class BurstDetector:
         self.detection_window_minutes = self.config.get('detection_window', 15)
         self.oscillation_window_seconds = self.config.get('oscillation_window', 60)
         
-        # Baselines
-        self._pressure_baselines: Dict[str, float] = {}  # sensor_id -> baseline bar
-        self._flow_baselines: Dict[str, float] = {}      # dma_id -> baseline m³/h
+        # CUSUM alarms for progressive change (accumulated bar below / fraction above baseline)
+        self.pressure_cusum_threshold = self.config.get('pressure_cusum_threshold', 1.0)
+        self.flow_cusum_threshold = self.config.get('flow_cusum_threshold', 1.0)
         
-        # Recent readings buffer
-        self._pressure_history: Dict[str, List[PressureReading]] = {}
-        self._flow_history: Dict[str, List[FlowReading]] = {}
+        # Streaming state: sensor_id / dma_id -> ring buffer, EWMA, CUSUM, baseline
+        ring_size = self.config.get('history_size', 20)
+        ewma_alpha = self.config.get('ewma_alpha', 0.2)
+        self._pressure_state = SensorStreamState(
+            ring_size, ewma_alpha, direction=-1,
+            cusum_drift=self.config.get('pressure_cusum_drift', 0.1)  # bar
+        )
+        self._flow_state = SensorStreamState(
+            ring_size, ewma_alpha, direction=1, relative=True,
+            cusum_drift=self.config.get('flow_cusum_drift', 0.1)  # fraction of baseline
+        )
+        self._sensor_info: Dict[str, Tuple[str, float, float]] = {}  # sensor_id -> (dma_id, lat, lng)
         
         # Detected events
-        self._events: Dict[str, List[BurstEvent]] = {}
-        self._oscillations: Dict[str, List[PressureOscillation]] = {}
+        max_per_dma = self.config.get('max_events_per_dma', 1000)
+        self._events = IncidentStore(
+            "event_id",
+            active_statuses=self.ACTIVE_STATUSES,
+            tally=lambda e: {f"severity:{e.severity.value}": 1, "loss_m3_hour": e.estimated_loss_m3_hour},
+            max_per_dma=max_per_dma
+        )
+        self._oscillations = IncidentStore("event_id", max_per_dma=max_per_dma)
         
         logger.info("BurstDetector initialized")
     
     def set_pressure_baseline(self, sensor_id: str, baseline_bar: float):
         """Set pressure baseline for a sensor."""
-        self._pressure_baselines[sensor_id] = baseline_bar
+        self._pressure_state.set_baseline(sensor_id, baseline_bar)
         logger.debug(f"Set pressure baseline for {sensor_id}: {baseline_bar} bar")
     
     def set_flow_baseline(self, dma_id: str, baseline_m3h: float):
         """Set flow baseline for a DMA."""
-        self._flow_baselines[dma_id] = baseline_m3h
+        self._flow_state.set_baseline(dma_id, baseline_m3h)
         logger.debug(f"Set flow baseline for {dma_id}: {baseline_m3h} m³/h")
     
+    def register_sensor(self, sensor_id: str, dma_id: str, lat: float = 0.0, lng: float = 0.0):
+        """Record a sensor's DMA and location for batches ingested without them."""
+        self._sensor_info[sensor_id] = (dma_id, lat, lng)
+    
     def ingest_pressure(self, reading: PressureReading) -> Optional[BurstEvent]:
         """
         Ingest pressure reading and check for burst signals.
         
         Returns BurstEvent if burst detected, None otherwise.
         """
-        sensor_id = reading.sensor_id
-        
-        # Add to history
-        if sensor_id not in self._pressure_history:
-            self._pressure_history[sensor_id] = []
-        
-        self._pressure_history[sensor_id].append(reading)
-        
-        # Keep only recent history
-        cutoff = datetime.utcnow() - timedelta(minutes=self.detection_window_minutes * 2)
-        self._pressure_history[sensor_id] = [
-            r for r in self._pressure_history[sensor_id] 
-            if r.timestamp > cutoff
-        ]
-        
-        # Check for burst signals
-        return self._check_pressure_burst(reading)
+        self._sensor_info[reading.sensor_id] = (reading.dma_id, reading.location_lat, reading.location_lng)
+        events = self._ingest_pressure_batch(
+            [reading.sensor_id], np.array([reading.pressure_bar], dtype=float),
+            to_epoch_seconds([reading.timestamp])
+        )
+        return events[0][1] if events else None
     
     def ingest_flow(self, reading: FlowReading) -> Optional[BurstEvent]:
         """
@@ -209,65 +386,139 @@ class BurstDetector:
         
         Returns BurstEvent if burst detected, None otherwise.
         """
-        dma_id = reading.dma_id
-        
-        # Add to history
-        if dma_id not in self._flow_history:
-            self._flow_history[dma_id] = []
-        
-        self._flow_history[dma_id].append(reading)
-        
-        # Keep only recent history
-        cutoff = datetime.utcnow() - timedelta(minutes=self.detection_window_minutes * 2)
-        self._flow_history[dma_id] = [
-            r for r in self._flow_history[dma_id]
-            if r.timestamp > cutoff
-        ]
-        
-        # Check for burst signals
-        return self._check_flow_burst(reading)
+        events = self._ingest_flow_batch(
+            [reading.dma_id], np.array([reading.flow_m3_hour], dtype=float),
+            to_epoch_seconds([reading.timestamp])
+        )
+        return events[0][1] if events else None
     
-    def _check_pressure_burst(self, reading: PressureReading) -> Optional[BurstEvent]:
-        """Check pressure reading for burst indicators."""
-        sensor_id = reading.sensor_id
-        history = self._pressure_history.get(sensor_id, [])
+    def ingest_many(
+        self,
+        sensor_ids,
+        pressures,
+        timestamps=None,
+        dma_ids=None,
+        lats=None,
+        lngs=None
+    ) -> List[BurstEvent]:
+        """
+        Ingest a batch of pressure readings (sequences or NumPy arrays).
         
-        if len(history) < 3:
-            return None
+        Args:
+            sensor_ids: Sensor id per reading
+            pressures: Pressure (bar) per reading
+            timestamps: datetime64 / naive UTC datetimes (default: now)
+            dma_ids, lats, lngs: Optional sensor metadata; otherwise taken
+                from earlier readings or register_sensor
         
-        # Get baseline
-        baseline = self._pressure_baselines.get(sensor_id)
-        if baseline is None:
-            # Auto-calculate baseline from recent stable readings
-            pressures = [r.pressure_bar for r in history[-20:]]
-            if len(pressures) >= 10:
-                baseline = statistics.mean(pressures)
-                self._pressure_baselines[sensor_id] = baseline
-            else:
-                return None
-        
-        current = reading.pressure_bar
-        
-        # Check 1: Sudden pressure drop
-        pressure_drop = baseline - current
-        
-        if pressure_drop < self.pressure_drop_threshold_bar:
-            return None  # No significant drop
-        
-        # Calculate drop rate
-        recent = history[-5:]
-        if len(recent) >= 2:
-            time_span = (recent[-1].timestamp - recent[0].timestamp).total_seconds() / 60
-            if time_span > 0:
-                drop_rate = (recent[0].pressure_bar - recent[-1].pressure_bar) / time_span
-            else:
-                drop_rate = 0
-        else:
-            drop_rate = 0
+        Readings of one sensor are applied in batch order. Returns the
+        detected burst events in batch order.
+        """
+        sensor_ids = list(sensor_ids)
+        if dma_ids is not None:
+            lats = np.zeros(len(sensor_ids)) if lats is None else lats
+            lngs = np.zeros(len(sensor_ids)) if lngs is None else lngs
+            for sensor_id, dma_id, lat, lng in zip(sensor_ids, dma_ids, lats, lngs):
+                self._sensor_info[sensor_id] = (dma_id, float(lat), float(lng))
+        
+        times = None if timestamps is None else to_epoch_seconds(timestamps)
+        events = self._ingest_pressure_batch(sensor_ids, np.asarray(pressures, dtype=float), times)
+        return [event for _, event in events]
+    
+    def ingest_flow_many(self, dma_ids, flows, timestamps=None) -> List[BurstEvent]:
+        """Ingest a batch of DMA inlet flow readings; see ingest_many."""
+        times = None if timestamps is None else to_epoch_seconds(timestamps)
+        events = self._ingest_flow_batch(list(dma_ids), np.asarray(flows, dtype=float), times)
+        return [event for _, event in events]
+    
+    def _batch_context(self, state: SensorStreamState, keys: List[str], times: Optional[np.ndarray]):
+        now = to_epoch_seconds([datetime.utcnow()])[0]
+        if times is None:
+            times = np.full(len(keys), now)
+        cutoff = now - self.detection_window_minutes * 2 * 60  # History kept for 2x the detection window
+        return state.slots(keys), times, cutoff
+    
+    @staticmethod
+    def _window_baselines(state, slots, values, valid, n_valid) -> np.ndarray:
+        """Baselines per slot, auto-set from the mean of recent readings once 10 are available."""
+        baseline = state.baseline[slots]
+        auto = np.isnan(baseline) & (n_valid >= 10)
+        if auto.any():
+            baseline[auto] = np.where(valid[auto], values[auto], 0.0).sum(axis=1) / n_valid[auto]
+            state.baseline[slots[auto]] = baseline[auto]
+        return baseline
+    
+    def _ingest_pressure_batch(
+        self,
+        sensor_ids: List[str],
+        pressures: np.ndarray,
+        times: Optional[np.ndarray]
+    ) -> List[Tuple[int, BurstEvent]]:
+        """Push pressure readings and evaluate burst rules; returns (batch index, event) pairs."""
+        state = self._pressure_state
+        slots, times, cutoff = self._batch_context(state, sensor_ids, times)
+        detected = []
+        
+        for batch in occurrence_rounds(slots):
+            rows = slots[batch]
+            current = pressures[batch]
+            state.push(rows, current, times[batch])
+            
+            values, stamps, valid = state.window(rows, cutoff)
+            n_valid = valid.sum(axis=1)
+            baseline = self._window_baselines(state, rows, values, valid, n_valid)
+            
+            # Check 1: Sudden pressure drop
+            pressure_drop = baseline - current
+            ready = (n_valid >= 3) & ~np.isnan(baseline)
+            sudden = ready & (pressure_drop >= self.pressure_drop_threshold_bar)
+            
+            # Check 2: Sustained drop accumulated by the CUSUM
+            progressive = state.cusum_alarms(rows, self.pressure_cusum_threshold, ready) & ~sudden
+            fired = np.flatnonzero(sudden | progressive)
+            if len(fired) == 0:
+                continue
+            
+            # Drop rate over the last 5 recent readings
+            at = np.arange(len(rows))
+            oldest = np.argmax(np.cumsum(valid, axis=1) >= np.clip(np.minimum(n_valid, 5), 1, None)[:, None], axis=1)
+            newest = np.argmax(valid, axis=1)
+            span_min = (stamps[at, newest] - stamps[at, oldest]) / 60
+            with np.errstate(invalid="ignore", divide="ignore"):
+                drop_rate = np.where(
+                    (n_valid >= 2) & (span_min > 0),
+                    (values[at, oldest] - values[at, newest]) / span_min, 0.0
+                )
+            
+            for i in fired:
+                sensor_id = sensor_ids[batch[i]]
+                if sudden[i]:
+                    event = self._pressure_event(sensor_id, pressure_drop[i], drop_rate[i])
+                else:
+                    event = self._pressure_event(
+                        sensor_id, baseline[i] - state.level[rows[i]], 0.0, progressive=True
+                    )
+                detected.append((int(batch[i]), event))
+        
+        detected.sort(key=lambda item: item[0])
+        return detected
+    
+    def _pressure_event(
+        self,
+        sensor_id: str,
+        pressure_drop: float,
+        drop_rate: float,
+        progressive: bool = False
+    ) -> BurstEvent:
+        """Build a burst event for a pressure drop at a sensor."""
+        pressure_drop, drop_rate = float(pressure_drop), float(drop_rate)
+        dma_id, lat, lng = self._sensor_info.get(sensor_id, ("", 0.0, 0.0))
         
         # Determine severity
         severity = BurstSeverity.SUSPECTED
-        if pressure_drop > 1.5 or drop_rate > 0.3:
+        if progressive:
+            pass  # Slow CUSUM build-up: keep as suspected until confirmed
+        elif pressure_drop > 1.5 or drop_rate > 0.3:
             severity = BurstSeverity.CATASTROPHIC
         elif pressure_drop > 1.0 or drop_rate > 0.2:
             severity = BurstSeverity.MAJOR
@@ -278,9 +529,9 @@ class BurstDetector:
         event = BurstEvent(
             event_id=str(uuid.uuid4()),
             tenant_id="",  # Will be set by caller
-            dma_id=reading.dma_id,
+            dma_id=dma_id,
             detected_at=datetime.utcnow(),
-            detection_method="pressure_drop",
+            detection_method="pressure_cusum" if progressive else "pressure_drop",
             burst_type=BurstType.SUDDEN_BURST if drop_rate > 0.2 else BurstType.PROGRESSIVE,
             severity=severity,
             confidence=self._calculate_burst_confidence(pressure_drop, drop_rate),
@@ -288,8 +539,8 @@ class BurstDetector:
             pressure_drop_rate_bar_min=round(drop_rate, 3),
             flow_increase_m3_hour=0,
             flow_increase_percent=0,
-            estimated_lat=reading.location_lat,
-            estimated_lng=reading.location_lng,
+            estimated_lat=lat,
+            estimated_lng=lng,
             nearest_sensor_id=sensor_id,
             location_hint=f"Near sensor {sensor_id}",
             priority_score=self._calculate_priority(severity, pressure_drop)
@@ -297,45 +548,73 @@ class BurstDetector:
         
         # Estimate loss (rough estimate based on pressure drop)
         # Using orifice equation approximation: Q ∝ √(ΔP)
-        estimated_leak_rate = 10 * math.sqrt(pressure_drop)  # Rough m³/h estimate
+        estimated_leak_rate = 10 * math.sqrt(max(pressure_drop, 0.0))  # Rough m³/h estimate
         event.estimated_loss_m3_hour = round(estimated_leak_rate, 1)
         event.estimated_loss_m3_day = round(estimated_leak_rate * 24, 1)
         
         return event
     
-    def _check_flow_burst(self, reading: FlowReading) -> Optional[BurstEvent]:
-        """Check flow reading for burst indicators."""
-        dma_id = reading.dma_id
-        history = self._flow_history.get(dma_id, [])
-        
-        if len(history) < 3:
-            return None
-        
-        # Get baseline
-        baseline = self._flow_baselines.get(dma_id)
-        if baseline is None:
-            # Auto-calculate from history
-            flows = [r.flow_m3_hour for r in history[-20:]]
-            if len(flows) >= 10:
-                baseline = statistics.mean(flows)
-                self._flow_baselines[dma_id] = baseline
-            else:
-                return None
-        
-        current = reading.flow_m3_hour
-        
-        # Calculate increase
-        flow_increase = current - baseline
-        flow_increase_pct = (flow_increase / baseline) * 100 if baseline > 0 else 0
-        
-        # Check thresholds
-        if (flow_increase_pct < self.flow_spike_threshold_pct and 
-            flow_increase < self.flow_spike_absolute_m3h):
-            return None
+    def _ingest_flow_batch(
+        self,
+        dma_ids: List[str],
+        flows: np.ndarray,
+        times: Optional[np.ndarray]
+    ) -> List[Tuple[int, BurstEvent]]:
+        """Push DMA inlet flows and evaluate spike rules; returns (batch index, event) pairs."""
+        state = self._flow_state
+        slots, times, cutoff = self._batch_context(state, dma_ids, times)
+        detected = []
+        
+        for batch in occurrence_rounds(slots):
+            rows = slots[batch]
+            current = flows[batch]
+            state.push(rows, current, times[batch])
+            
+            values, _, valid = state.window(rows, cutoff)
+            n_valid = valid.sum(axis=1)
+            baseline = self._window_baselines(state, rows, values, valid, n_valid)
+            
+            # Calculate increase
+            flow_increase = current - baseline
+            with np.errstate(invalid="ignore", divide="ignore"):
+                flow_increase_pct = np.where(baseline > 0, flow_increase / baseline * 100, 0.0)
+            
+            # Check thresholds (spike), then accumulated CUSUM excess (progressive)
+            ready = (n_valid >= 3) & ~np.isnan(baseline)
+            spike = ready & (
+                (flow_increase_pct >= self.flow_spike_threshold_pct) |
+                (flow_increase >= self.flow_spike_absolute_m3h)
+            )
+            progressive = state.cusum_alarms(rows, self.flow_cusum_threshold, ready) & ~spike
+            fired = np.flatnonzero(spike | progressive)
+            
+            for i in fired:
+                if spike[i]:
+                    increase, increase_pct = flow_increase[i], flow_increase_pct[i]
+                else:
+                    increase = state.level[rows[i]] - baseline[i]
+                    increase_pct = increase / baseline[i] * 100 if baseline[i] > 0 else 0.0
+                event = self._flow_event(dma_ids[batch[i]], increase, increase_pct, progressive=bool(progressive[i]))
+                detected.append((int(batch[i]), event))
+        
+        detected.sort(key=lambda item: item[0])
+        return detected
+    
+    def _flow_event(
+        self,
+        dma_id: str,
+        flow_increase: float,
+        flow_increase_pct: float,
+        progressive: bool = False
+    ) -> BurstEvent:
+        """Build a burst event for a flow increase at a DMA inlet."""
+        flow_increase, flow_increase_pct = float(flow_increase), float(flow_increase_pct)
         
         # Determine severity based on flow increase
         severity = BurstSeverity.SUSPECTED
-        if flow_increase_pct > 100 or flow_increase > 200:
+        if progressive:
+            pass  # Slow CUSUM build-up: keep as suspected until confirmed
+        elif flow_increase_pct > 100 or flow_increase > 200:
             severity = BurstSeverity.CATASTROPHIC
         elif flow_increase_pct > 60 or flow_increase > 100:
             severity = BurstSeverity.MAJOR
@@ -347,7 +626,7 @@ class BurstDetector:
             tenant_id="",
             dma_id=dma_id,
             detected_at=datetime.utcnow(),
-            detection_method="flow_spike",
+            detection_method="flow_cusum" if progressive else "flow_spike",
             burst_type=BurstType.SUDDEN_BURST if flow_increase_pct > 80 else BurstType.PROGRESSIVE,
             severity=severity,
             confidence=self._calculate_flow_confidence(flow_increase_pct),
@@ -373,40 +652,44 @@ class BurstDetector:
         Detect pressure oscillation patterns.
         
         Oscillations indicate waterhammer, pump issues, or valve problems.
+        Uses the sensor's ring buffer and its incremental count of EWMA
+        level crossings, so the cost does not grow with history.
         """
-        history = self._pressure_history.get(sensor_id, [])
-        
-        if len(history) < 10:
+        state = self._pressure_state
+        slot = state.slot(sensor_id)
+        if slot is None:
             return None
         
-        # Get recent high-frequency readings
-        recent = history[-20:]
-        pressures = [r.pressure_bar for r in recent]
+        now = to_epoch_seconds([datetime.utcnow()])[0]
+        values, stamps, valid = state.window(np.array([slot]), now - self.detection_window_minutes * 2 * 60)
+        valid = valid[0]
+        pressures = values[0][valid]
         
         if len(pressures) < 10:
             return None
         
         # Calculate statistics
-        mean_p = statistics.mean(pressures)
-        std_p = statistics.stdev(pressures) if len(pressures) > 1 else 0
+        std_p = float(np.std(pressures, ddof=1))
         
         # Detect oscillation (high variance)
         if std_p < self.oscillation_threshold_bar / 2:
             return None
         
         # Calculate amplitude (peak-to-peak)
-        amplitude = max(pressures) - min(pressures)
+        amplitude = float(pressures.max() - pressures.min())
         
         if amplitude < self.oscillation_threshold_bar:
             return None
         
-        # Estimate frequency (rough)
-        zero_crossings = 0
-        for i in range(1, len(pressures)):
-            if (pressures[i-1] - mean_p) * (pressures[i] - mean_p) < 0:
-                zero_crossings += 1
+        # Estimate frequency from level crossings between the readings in the window
+        if valid.all():
+            zero_crossings = int(state.crossings[slot] - state.crossed[slot, state.head[slot]])
+        else:
+            ring_order = (state.head[slot] - 1 - np.arange(state.ring_size)) % state.ring_size
+            zero_crossings = int(state.crossed[slot, ring_order][valid][:-1].sum())
         
-        time_span = (recent[-1].timestamp - recent[0].timestamp).total_seconds()
+        recent_times = stamps[0][valid]
+        time_span = float(recent_times[0] - recent_times[-1])
         frequency = zero_crossings / (2 * time_span) if time_span > 0 else 0
         
         # Determine severity
@@ -439,14 +722,11 @@ class BurstDetector:
         )
         
         # Store oscillation
-        key = f"{tenant_id}:{dma_id}"
-        if key not in self._oscillations:
-            self._oscillations[key] = []
-        self._oscillations[key].append(oscillation)
+        self._oscillations.add(oscillation)
         
         logger.warning(f"Pressure oscillation detected: {amplitude:.2f} bar @ {frequency:.2f} Hz - {possible_cause}")
         return oscillation
-    
+
     def _calculate_burst_confidence(self, pressure_drop: float, drop_rate: float) -> float:
         """Calculate confidence score for burst detection."""
         confidence = 0.4
@@ -493,18 +773,30 @@ class BurstDetector:
         
         return min(100, base)
     
+    def record_event(self, tenant_id: str, event: BurstEvent) -> BurstEvent:
+        """Assign a detected event to its tenant and track it."""
+        event.tenant_id = tenant_id
+        return self._events.add(event)
+    
+    def update_event_status(
+        self,
+        tenant_id: str,
+        event_id: str,
+        status: str
+    ) -> Optional[BurstEvent]:
+        """Move a tracked burst event through its lifecycle, stamping the timeline."""
+        timeline = {
+            "acknowledged": "acknowledged_at",
+            "responding": "response_started_at",
+            "contained": "contained_at",
+            "resolved": "resolved_at"
+        }
+        changes = {timeline[status]: datetime.utcnow()} if status in timeline else {}
+        return self._events.set_status(event_id, status, tenant_id=tenant_id, **changes)
+    
     def get_active_events(self, tenant_id: str, dma_id: Optional[str] = None) -> List[BurstEvent]:
         """Get all active burst events."""
-        results = []
-        for key, events in self._events.items():
-            if not key.startswith(tenant_id):
-                continue
-            if dma_id and not key.endswith(dma_id):
-                continue
-            
-            active = [e for e in events if e.status in ("active", "acknowledged", "responding")]
-            results.extend(active)
-        
+        results = self._events.active(tenant_id, dma_id or None)
         return sorted(results, key=lambda x: x.priority_score, reverse=True)
     
     def get_recent_oscillations(
@@ -514,37 +806,29 @@ class BurstDetector:
     ) -> List[PressureOscillation]:
         """Get recent pressure oscillation events."""
         cutoff = datetime.utcnow() - timedelta(hours=hours)
-        results = []
-        
-        for key, oscillations in self._oscillations.items():
-            if not key.startswith(tenant_id):
-                continue
-            
-            recent = [o for o in oscillations if o.detected_at > cutoff]
-            results.extend(recent)
-        
+        results = self._oscillations.recent(tenant_id, cutoff)
         return sorted(results, key=lambda x: x.detected_at, reverse=True)
     
     def get_summary(self, tenant_id: str) -> Dict[str, Any]:
-        """Get burst detection summary for dashboard."""
-        active_events = self.get_active_events(tenant_id)
-        oscillations = self.get_recent_oscillations(tenant_id, hours=24)
+        """Get burst detection summary for dashboard (counts read from the event indexes)."""
+        counts = self._events.counts(tenant_id)
+        oscillations = self._oscillations.recent(tenant_id, datetime.utcnow() - timedelta(hours=24))
         
-        catastrophic = len([e for e in active_events if e.severity == BurstSeverity.CATASTROPHIC])
-        major = len([e for e in active_events if e.severity == BurstSeverity.MAJOR])
-        confirmed = len([e for e in active_events if e.severity == BurstSeverity.CONFIRMED])
+        catastrophic = int(counts.get(f"severity:{BurstSeverity.CATASTROPHIC.value}", 0))
+        major = int(counts.get(f"severity:{BurstSeverity.MAJOR.value}", 0))
+        confirmed = int(counts.get(f"severity:{BurstSeverity.CONFIRMED.value}", 0))
         
-        total_loss = sum(e.estimated_loss_m3_hour for e in active_events)
+        total_loss = max(0.0, counts.get("loss_m3_hour", 0.0))
         
         return {
-            "has_data": len(self._pressure_history) > 0 or len(self._flow_history) > 0,
-            "active_events": len(active_events),
+            "has_data": self._pressure_state.active_count > 0 or self._flow_state.active_count > 0,
+            "active_events": int(counts["active"]),
             "catastrophic_count": catastrophic,
             "major_count": major,
             "confirmed_count": confirmed,
             "oscillation_count_24h": len(oscillations),
             "total_estimated_loss_m3_hour": round(total_loss, 1),
-            "sensors_monitored": len(self._pressure_history),
-            "dmas_monitored": len(self._flow_history),
+            "sensors_monitored": self._pressure_state.active_count,
+            "dmas_monitored": self._flow_state.active_count,
             "status": "alert" if catastrophic > 0 else "warning" if major > 0 else "monitoring"
         }
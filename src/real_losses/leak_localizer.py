@@ -20,10 +20,14 @@ Accuracy depends on:
 
 import uuid
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Iterable, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
-import math
+
+import numpy as np
+
+from src.gis.gis_integration import haversine_m
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +45,60 @@ class SensorLocation:
     deviation_bar: float = 0.0
 
 
+class DMASensorArrays:
+    """
+    Sensor registry of one DMA stored column-wise.
+    
+    Coordinates, baselines, readings and deviations live in NumPy arrays
+    (grown by doubling) so localization is a handful of vector operations.
+    """
+    
+    def __init__(self, dma_id: str, capacity: int = 16):
+        self.dma_id = dma_id
+        self.sensor_ids: List[str] = []
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.lat = np.zeros(capacity)
+        self.lng = np.zeros(capacity)
+        self.baseline = np.zeros(capacity)
+        self.current = np.zeros(capacity)
+        self.deviation = np.zeros(capacity)
+    
+    def __len__(self) -> int:
+        return len(self.sensor_ids)
+    
+    def add(self, sensor_id: str, name: str, lat: float, lng: float, baseline: float):
+        i = self.index.get(sensor_id)
+        if i is None:
+            i = len(self.sensor_ids)
+            if i == len(self.lat):
+                for attr in ("lat", "lng", "baseline", "current", "deviation"):
+                    column = getattr(self, attr)
+                    setattr(self, attr, np.concatenate([column, np.zeros(len(column))]))
+            self.index[sensor_id] = i
+            self.sensor_ids.append(sensor_id)
+            self.names.append(name)
+        else:
+            self.names[i] = name
+        self.lat[i] = lat
+        self.lng[i] = lng
+        self.baseline[i] = baseline
+        self.current[i] = 0.0
+        self.deviation[i] = 0.0
+    
+    def sensor(self, i: int) -> SensorLocation:
+        return SensorLocation(
+            sensor_id=self.sensor_ids[i],
+            name=self.names[i],
+            lat=float(self.lat[i]),
+            lng=float(self.lng[i]),
+            dma_id=self.dma_id,
+            baseline_pressure_bar=float(self.baseline[i]),
+            current_pressure_bar=float(self.current[i]),
+            deviation_bar=float(self.deviation[i])
+        )
+
+
 @dataclass
 class LeakLocationEstimate:
     """Estimated leak location"""
@@ -94,11 +152,15 @@ class LeakLocalizer:
         # Weighting exponent (higher = more weight to larger deviations)
         self.weight_exponent = self.config.get('weight_exponent', 2)
         
+        # Maximum estimates kept per tenant (oldest evicted first)
+        self.max_estimates = self.config.get('max_estimates_per_tenant', 10000)
+        
         # Sensor registry
-        self._sensors: Dict[str, Dict[str, SensorLocation]] = {}  # dma_id -> {sensor_id -> SensorLocation}
+        self._sensors: Dict[str, DMASensorArrays] = {}  # dma_id -> column-wise sensors
         
-        # Location estimates
-        self._estimates: Dict[str, List[LeakLocationEstimate]] = {}  # tenant_id -> estimates
+        # Location estimates, in computation order
+        self._estimates: Dict[str, Deque[LeakLocationEstimate]] = {}  # tenant_id -> estimates
+        self._by_incident: Dict[str, Dict[str, LeakLocationEstimate]] = {}  # tenant_id -> incident_id -> latest
         
         logger.info("LeakLocalizer initialized")
     
@@ -113,16 +175,9 @@ class LeakLocalizer:
     ):
         """Register a sensor for localization."""
         if dma_id not in self._sensors:
-            self._sensors[dma_id] = {}
+            self._sensors[dma_id] = DMASensorArrays(dma_id)
         
-        self._sensors[dma_id][sensor_id] = SensorLocation(
-            sensor_id=sensor_id,
-            name=name,
-            lat=lat,
-            lng=lng,
-            dma_id=dma_id,
-            baseline_pressure_bar=baseline_pressure
-        )
+        self._sensors[dma_id].add(sensor_id, name, lat, lng, baseline_pressure)
         
         logger.debug(f"Registered sensor {sensor_id} at ({lat}, {lng}) for DMA {dma_id}")
     
@@ -133,14 +188,31 @@ class LeakLocalizer:
         current_pressure: float
     ):
         """Update current pressure reading for a sensor."""
-        if dma_id not in self._sensors:
+        sensors = self._sensors.get(dma_id)
+        if sensors is None:
             return
-        if sensor_id not in self._sensors[dma_id]:
+        i = sensors.index.get(sensor_id)
+        if i is None:
             return
         
-        sensor = self._sensors[dma_id][sensor_id]
-        sensor.current_pressure_bar = current_pressure
-        sensor.deviation_bar = sensor.baseline_pressure_bar - current_pressure
+        sensors.current[i] = current_pressure
+        sensors.deviation[i] = sensors.baseline[i] - current_pressure
+    
+    def update_readings(
+        self,
+        dma_id: str,
+        readings: Dict[str, float]
+    ):
+        """Update current pressure readings for many sensors of a DMA at once."""
+        sensors = self._sensors.get(dma_id)
+        if sensors is None:
+            return
+        pairs = [(sensors.index[sid], p) for sid, p in readings.items() if sid in sensors.index]
+        if not pairs:
+            return
+        idx = np.fromiter((i for i, _ in pairs), dtype=np.int64, count=len(pairs))
+        sensors.current[idx] = [p for _, p in pairs]
+        sensors.deviation[idx] = sensors.baseline[idx] - sensors.current[idx]
     
     def update_baseline(
         self,
@@ -149,8 +221,9 @@ class LeakLocalizer:
         baseline_pressure: float
     ):
         """Update baseline pressure for a sensor."""
-        if dma_id in self._sensors and sensor_id in self._sensors[dma_id]:
-            self._sensors[dma_id][sensor_id].baseline_pressure_bar = baseline_pressure
+        sensors = self._sensors.get(dma_id)
+        if sensors is not None and sensor_id in sensors.index:
+            sensors.baseline[sensors.index[sensor_id]] = baseline_pressure
     
     def localize_leak(
         self,
@@ -169,57 +242,51 @@ class LeakLocalizer:
         Returns:
             LeakLocationEstimate if localization possible, None otherwise
         """
-        sensors = self._sensors.get(dma_id, {})
+        sensors = self._sensors.get(dma_id)
+        n_sensors = len(sensors) if sensors is not None else 0
         
-        if len(sensors) < self.min_sensors:
-            logger.warning(f"Insufficient sensors for localization in {dma_id}: {len(sensors)} < {self.min_sensors}")
+        if n_sensors < self.min_sensors:
+            logger.warning(f"Insufficient sensors for localization in {dma_id}: {n_sensors} < {self.min_sensors}")
             return None
         
+        lat = sensors.lat[:n_sensors]
+        lng = sensors.lng[:n_sensors]
+        deviation = sensors.deviation[:n_sensors]
+        
         # Filter sensors with significant deviation (pressure DROP)
-        affected_sensors = [
-            s for s in sensors.values()
-            if s.deviation_bar >= self.min_deviation_bar
-        ]
+        affected = np.flatnonzero(deviation >= self.min_deviation_bar)
         
-        if not affected_sensors:
+        if len(affected) == 0:
             logger.info(f"No significant pressure deviations in {dma_id}")
             return None
         
         # Use weighted centroid method
         # Weight = deviation ^ exponent (larger drops = closer to leak)
-        total_weight = 0
-        weighted_lat = 0
-        weighted_lng = 0
-        max_deviation = 0
-        max_deviation_sensor = ""
-        
-        for sensor in affected_sensors:
-            weight = sensor.deviation_bar ** self.weight_exponent
-            weighted_lat += sensor.lat * weight
-            weighted_lng += sensor.lng * weight
-            total_weight += weight
-            
-            if sensor.deviation_bar > max_deviation:
-                max_deviation = sensor.deviation_bar
-                max_deviation_sensor = sensor.sensor_id
+        weights = deviation[affected] ** self.weight_exponent
+        total_weight = weights.sum()
         
         if total_weight == 0:
             return None
         
-        estimated_lat = weighted_lat / total_weight
-        estimated_lng = weighted_lng / total_weight
+        estimated_lat = float(weights @ lat[affected] / total_weight)
+        estimated_lng = float(weights @ lng[affected] / total_weight)
+        
+        top = affected[int(np.argmax(deviation[affected]))]
+        max_deviation = float(deviation[top])
+        max_deviation_sensor = sensors.sensor_ids[top]
+        
+        # Distance from the estimate to every sensor, computed once
+        distances = haversine_m(estimated_lat, estimated_lng, lat, lng)
         
         # Calculate confidence and accuracy
-        confidence = self._calculate_confidence(affected_sensors, len(sensors))
-        radius = self._estimate_accuracy_radius(affected_sensors, estimated_lat, estimated_lng)
+        confidence = self._calculate_confidence(deviation[affected], n_sensors)
+        radius = self._estimate_accuracy_radius(distances[affected])
         
         # Generate zone hint
-        zone_hint = self._generate_zone_hint(affected_sensors, estimated_lat, estimated_lng)
+        zone_hint = self._generate_zone_hint(sensors, affected, distances)
         
         # Get nearest sensors to estimate
-        nearest = self._get_nearest_sensors(
-            sensors.values(), estimated_lat, estimated_lng, n=3
-        )
+        nearest = self._get_nearest_sensors(distances, n=3)
         
         estimate = LeakLocationEstimate(
             estimate_id=str(uuid.uuid4()),
@@ -231,131 +298,141 @@ class LeakLocalizer:
             confidence=round(confidence, 2),
             estimated_radius_m=round(radius, 0),
             zone_hint=zone_hint,
-            nearest_sensors=[s.sensor_id for s in nearest],
+            nearest_sensors=[sensors.sensor_ids[i] for i in nearest],
             max_deviation_bar=round(max_deviation, 3),
             max_deviation_sensor=max_deviation_sensor,
-            sensors_affected=len(affected_sensors),
+            sensors_affected=len(affected),
             computed_at=datetime.utcnow()
         )
         
-        # Store estimate
-        if tenant_id not in self._estimates:
-            self._estimates[tenant_id] = []
-        self._estimates[tenant_id].append(estimate)
+        self._store_estimate(estimate)
         
         logger.info(f"Leak localized in {dma_id}: ({estimated_lat:.5f}, {estimated_lng:.5f}) confidence={confidence:.2f}")
         return estimate
     
+    def localize_many(
+        self,
+        tenant_id: str,
+        dma_ids: Optional[Iterable[str]] = None,
+        incident_ids: Optional[Dict[str, str]] = None
+    ) -> Dict[str, LeakLocationEstimate]:
+        """
+        Localize across many DMAs at once (e.g. on a burst event).
+        
+        Args:
+            tenant_id: Tenant identifier
+            dma_ids: DMAs to localize (default: all registered)
+            incident_ids: Optional dma_id -> incident reference
+            
+        Returns:
+            Estimates keyed by DMA, for DMAs where localization was possible
+        """
+        incident_ids = incident_ids or {}
+        results = {}
+        for dma_id in (self._sensors if dma_ids is None else dma_ids):
+            estimate = self.localize_leak(tenant_id, dma_id, incident_ids.get(dma_id))
+            if estimate is not None:
+                results[dma_id] = estimate
+        return results
+    
+    def _store_estimate(self, estimate: LeakLocationEstimate):
+        """Append to the tenant's bounded, time-ordered estimate log."""
+        tenant_id = estimate.tenant_id
+        estimates = self._estimates.get(tenant_id)
+        if estimates is None:
+            estimates = self._estimates[tenant_id] = deque(maxlen=self.max_estimates)
+            self._by_incident[tenant_id] = {}
+        by_incident = self._by_incident[tenant_id]
+        
+        if len(estimates) == estimates.maxlen:
+            evicted = estimates[0]
+            if evicted.incident_id and by_incident.get(evicted.incident_id) is evicted:
+                del by_incident[evicted.incident_id]
+        estimates.append(estimate)
+        if estimate.incident_id:
+            by_incident[estimate.incident_id] = estimate
+    
     def _calculate_confidence(
         self,
-        affected_sensors: List[SensorLocation],
+        affected_deviations: np.ndarray,
         total_sensors: int
     ) -> float:
         """Calculate localization confidence score."""
         base_confidence = 0.3
+        n_affected = len(affected_deviations)
         
         # More affected sensors = higher confidence
-        if len(affected_sensors) >= 5:
+        if n_affected >= 5:
             base_confidence += 0.3
-        elif len(affected_sensors) >= 3:
+        elif n_affected >= 3:
             base_confidence += 0.2
         
         # Higher deviations = higher confidence
-        max_dev = max(s.deviation_bar for s in affected_sensors)
+        max_dev = affected_deviations.max()
         if max_dev > 1.0:
             base_confidence += 0.2
         elif max_dev > 0.5:
             base_confidence += 0.1
         
         # Coverage factor
-        coverage = len(affected_sensors) / total_sensors
+        coverage = n_affected / total_sensors
         base_confidence += coverage * 0.1
         
         return min(0.95, base_confidence)
     
     def _estimate_accuracy_radius(
         self,
-        sensors: List[SensorLocation],
-        est_lat: float,
-        est_lng: float
+        distances: np.ndarray
     ) -> float:
-        """Estimate accuracy radius in meters."""
-        if not sensors:
+        """Estimate accuracy radius in meters from estimate-to-sensor distances."""
+        if len(distances) == 0:
             return 500  # Default 500m uncertainty
         
-        # Calculate average distance from estimate to affected sensors
-        distances = []
-        for sensor in sensors:
-            dist = self._haversine_distance(
-                est_lat, est_lng,
-                sensor.lat, sensor.lng
-            )
-            distances.append(dist)
-        
-        avg_distance = sum(distances) / len(distances) if distances else 500
+        # Average distance from estimate to affected sensors
+        avg_distance = float(distances.mean())
         
         # Radius is fraction of average sensor distance
         # More sensors and stronger signals = smaller radius
-        confidence_factor = 0.3 + (len(sensors) * 0.05)
+        confidence_factor = 0.3 + (len(distances) * 0.05)
         radius = avg_distance * (1 - min(0.7, confidence_factor))
         
         return max(50, min(500, radius))  # Clamp between 50m and 500m
     
     def _generate_zone_hint(
         self,
-        sensors: List[SensorLocation],
-        est_lat: float,
-        est_lng: float
+        sensors: DMASensorArrays,
+        affected: np.ndarray,
+        distances: np.ndarray
     ) -> str:
         """Generate human-readable zone hint."""
-        if not sensors:
+        if len(affected) == 0:
             return "Unknown location"
         
-        # Find two nearest sensors
-        nearest = self._get_nearest_sensors(sensors, est_lat, est_lng, n=2)
+        # Find two nearest affected sensors
+        nearest = affected[self._get_nearest_sensors(distances[affected], n=2)]
         
         if len(nearest) >= 2:
-            return f"Between {nearest[0].name} and {nearest[1].name}"
+            return f"Between {sensors.names[nearest[0]]} and {sensors.names[nearest[1]]}"
         elif len(nearest) == 1:
-            return f"Near {nearest[0].name}"
+            return f"Near {sensors.names[nearest[0]]}"
         else:
-            return f"Within DMA {sensors[0].dma_id}"
+            return f"Within DMA {sensors.dma_id}"
     
     def _get_nearest_sensors(
         self,
-        sensors,
-        lat: float,
-        lng: float,
+        distances: np.ndarray,
         n: int = 3
-    ) -> List[SensorLocation]:
-        """Get n nearest sensors to a point."""
-        sensor_list = list(sensors)
-        
-        def distance_to_point(sensor):
-            return self._haversine_distance(lat, lng, sensor.lat, sensor.lng)
-        
-        sorted_sensors = sorted(sensor_list, key=distance_to_point)
-        return sorted_sensors[:n]
-    
-    def _haversine_distance(
-        self,
-        lat1: float, lng1: float,
-        lat2: float, lng2: float
-    ) -> float:
-        """Calculate distance between two points in meters."""
-        R = 6371000  # Earth radius in meters
-        
-        phi1 = math.radians(lat1)
-        phi2 = math.radians(lat2)
-        delta_phi = math.radians(lat2 - lat1)
-        delta_lambda = math.radians(lng2 - lng1)
-        
-        a = (math.sin(delta_phi / 2) ** 2 +
-             math.cos(phi1) * math.cos(phi2) *
-             math.sin(delta_lambda / 2) ** 2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        
-        return R * c
+    ) -> np.ndarray:
+        """Indices of the n smallest distances, nearest first (ties keep order)."""
+        if len(distances) > n:
+            candidates = np.argpartition(distances, n - 1)[:n]
+            # Keep registration order among ties at the cut-off
+            cutoff = distances[candidates].max()
+            candidates = np.flatnonzero(distances <= cutoff)
+        else:
+            candidates = np.arange(len(distances))
+        order = np.argsort(distances[candidates], kind='stable')
+        return candidates[order][:n]
     
     def get_estimate(
         self,
@@ -363,11 +440,7 @@ class LeakLocalizer:
         incident_id: str
     ) -> Optional[LeakLocationEstimate]:
         """Get location estimate for an incident."""
-        estimates = self._estimates.get(tenant_id, [])
-        for estimate in reversed(estimates):
-            if estimate.incident_id == incident_id:
-                return estimate
-        return None
+        return self._by_incident.get(tenant_id, {}).get(incident_id)
     
     def get_recent_estimates(
         self,
@@ -375,25 +448,25 @@ class LeakLocalizer:
         dma_id: Optional[str] = None,
         hours: int = 24
     ) -> List[LeakLocationEstimate]:
-        """Get recent location estimates."""
-        from datetime import timedelta
-        
+        """Get recent location estimates, newest first."""
         cutoff = datetime.utcnow() - timedelta(hours=hours)
-        estimates = self._estimates.get(tenant_id, [])
         
+        # Estimates are stored in computation order: walk back to the cutoff
         results = []
-        for est in estimates:
+        for est in reversed(self._estimates.get(tenant_id, ())):
             if est.computed_at < cutoff:
-                continue
+                break
             if dma_id and est.dma_id != dma_id:
                 continue
             results.append(est)
         
-        return sorted(results, key=lambda x: x.computed_at, reverse=True)
+        return results
     
     def get_sensors_for_dma(self, dma_id: str) -> List[Dict]:
         """Get sensor information for a DMA."""
-        sensors = self._sensors.get(dma_id, {})
+        sensors = self._sensors.get(dma_id)
+        if sensors is None:
+            return []
         return [
             {
                 "sensor_id": s.sensor_id,
@@ -404,7 +477,7 @@ class LeakLocalizer:
                 "current_pressure": s.current_pressure_bar,
                 "deviation": s.deviation_bar
             }
-            for s in sensors.values()
+            for s in map(sensors.sensor, range(len(sensors)))
         ]
     
     def get_summary(self, tenant_id: str) -> Dict[str, Any]:
@@ -412,7 +485,6 @@ class LeakLocalizer:
         total_dmas = len(self._sensors)
         total_sensors = sum(len(sensors) for sensors in self._sensors.values())
         
-        estimates = self._estimates.get(tenant_id, [])
         recent = self.get_recent_estimates(tenant_id, hours=24)
         
         return {
@@ -11,6 +11,9 @@ MNF Components:
   - Burst/Excess Leakage - detected anomalies
 
 When MNF exceeds baseline for multiple consecutive nights → Real Loss Alert
+
+Historical flow tables for many DMAs are backfilled in one vectorized pass
+(backfill_mnf) via the shared MNFBatchEngine.
 """
 
 import uuid
@@ -21,6 +24,13 @@ from dataclasses import dataclass, field
 from enum import Enum
 import statistics
 
+import numpy as np
+import pandas as pd
+
+from src.nrw.mnf_batch import MNFBatchEngine
+
+from .state_store import IncidentStore, ReadingBuffer
+
 logger = logging.getLogger(__name__)
 
 
@@ -169,15 +179,20 @@ class MNFAnalyzer:
         self.lnu_factor = self.config.get('lnu_factor', 0.06)  # 6%
         
         # In-memory storage (replace with database in production)
-        self._readings: Dict[str, List[MNFReading]] = {}  # key: tenant_id:dma_id
-        self._baselines: Dict[str, MNFBaseline] = {}      # key: tenant_id:dma_id
-        self._anomalies: Dict[str, List[MNFAnomaly]] = {} # key: tenant_id:dma_id
+        self.retention_days = self.config.get('retention_days', 90)
+        self._readings = ReadingBuffer(timedelta(days=self.retention_days), lambda r: r.timestamp)
+        self._baselines: Dict[str, Dict[str, MNFBaseline]] = {}  # tenant_id -> dma_id -> baseline
+        self._anomalies = IncidentStore(
+            "anomaly_id",
+            tally=lambda a: {"persistent": int(a.is_persistent), "loss_m3_day": a.estimated_daily_loss_m3},
+            max_per_dma=self.config.get('max_anomalies_per_dma', 1000)
+        )
         
         logger.info(f"MNFAnalyzer initialized - Window: {self.mnf_start_hour:02d}:00-{self.mnf_end_hour:02d}:00")
     
-    def _get_key(self, tenant_id: str, dma_id: str) -> str:
+    def _get_key(self, tenant_id: str, dma_id: str) -> Tuple[str, str]:
         """Get storage key for tenant+DMA combination."""
-        return f"{tenant_id}:{dma_id}"
+        return (tenant_id, dma_id)
     
     def record_mnf(
         self,
@@ -236,15 +251,8 @@ class MNFAnalyzer:
             is_valid=completeness_pct >= 75  # Need at least 75% completeness
         )
         
-        # Store reading
-        key = self._get_key(tenant_id, dma_id)
-        if key not in self._readings:
-            self._readings[key] = []
-        self._readings[key].append(reading)
-        
-        # Keep only last 90 days
-        cutoff = datetime.utcnow() - timedelta(days=90)
-        self._readings[key] = [r for r in self._readings[key] if r.timestamp > cutoff]
+        # Store reading (readings past retention are evicted as it is appended)
+        self._readings.append(self._get_key(tenant_id, dma_id), reading)
         
         logger.info(f"Recorded MNF for {dma_id}: {avg_flow:.2f} m³/hr ({completeness_pct:.0f}% complete)")
         return reading
@@ -271,11 +279,10 @@ class MNFAnalyzer:
             MNFBaseline object
         """
         key = self._get_key(tenant_id, dma_id)
-        readings = self._readings.get(key, [])
         
         # Get last 30 days of valid readings
         cutoff = datetime.utcnow() - timedelta(days=30)
-        valid_readings = [r for r in readings if r.timestamp > cutoff and r.is_valid]
+        valid_readings = [r for r in self._readings.since(key, cutoff) if r.is_valid]
         
         if len(valid_readings) < 7:
             logger.warning(f"Insufficient data for baseline: {len(valid_readings)} readings (need 7+)")
@@ -296,6 +303,22 @@ class MNFAnalyzer:
         baseline_mnf = statistics.mean(filtered_flows)
         baseline_std = statistics.stdev(filtered_flows) if len(filtered_flows) > 1 else 0
         
+        return self._store_baseline(
+            tenant_id, dma_id, baseline_mnf, baseline_std, len(filtered_flows),
+            connection_count, avg_demand_per_connection_m3_day
+        )
+    
+    def _store_baseline(
+        self,
+        tenant_id: str,
+        dma_id: str,
+        baseline_mnf: float,
+        baseline_std: float,
+        sample_count: int,
+        connection_count: int,
+        avg_demand_per_connection_m3_day: float
+    ) -> MNFBaseline:
+        """Derive LNU and alert thresholds from baseline statistics and store the baseline."""
         # Estimate LNU (Legitimate Night Use)
         # Typically 6% of connections active at night, using 30% of normal hourly demand
         night_demand_factor = 0.3
@@ -318,7 +341,7 @@ class MNFAnalyzer:
             baseline_std_dev=round(baseline_std, 3),
             estimated_lnu_m3_hour=round(estimated_lnu, 3),
             background_leakage_m3_hour=round(background_leakage, 3),
-            sample_count=len(filtered_flows),
+            sample_count=sample_count,
             computed_at=datetime.utcnow(),
             valid_from=datetime.utcnow(),
             warning_threshold_m3_hour=round(warning_threshold, 3),
@@ -327,11 +350,80 @@ class MNFAnalyzer:
         )
         
         # Store baseline
-        self._baselines[key] = baseline
+        self._baselines.setdefault(tenant_id, {})[dma_id] = baseline
         
         logger.info(f"Computed MNF baseline for {dma_id}: {baseline_mnf:.2f} m³/hr (σ={baseline_std:.2f})")
         return baseline
     
+    def backfill_mnf(
+        self,
+        tenant_id: str,
+        flow_data: pd.DataFrame,
+        timezone_offset_hours: int = 2,
+        connection_counts: Optional[Dict[str, int]] = None,
+        avg_demand_per_connection_m3_day: float = 0.5
+    ) -> pd.DataFrame:
+        """
+        Record MNF and baselines for many DMAs and nights in one vectorized pass.
+        
+        Args:
+            tenant_id: Tenant identifier
+            flow_data: Long-format DataFrame with dma_id, timestamp, flow_m3_hour
+            timezone_offset_hours: Local timezone offset from UTC
+            connection_counts: DMA id -> service connections (default 1000)
+            avg_demand_per_connection_m3_day: Average daily demand per connection
+            
+        Returns:
+            Per-night DataFrame from MNFBatchEngine (window means, completeness,
+            trailing baselines) for the full history.
+        
+        Nights within retention that are newer than a DMA's latest stored
+        reading become MNFReadings stamped at their window end. Each DMA's
+        baseline is set from its last 30 days of nights, as compute_baseline
+        would.
+        """
+        engine = MNFBatchEngine(
+            mnf_start_hour=self.mnf_start_hour,
+            mnf_end_hour=self.mnf_end_hour,
+            timezone_offset_hours=timezone_offset_hours
+        )
+        nights = engine.rolling_baselines(engine.nightly(flow_data), include_current=True)
+        connection_counts = connection_counts or {}
+        
+        retention_cutoff = np.datetime64(datetime.utcnow() - self._readings.retention, "ns")
+        stored = 0
+        for dma_id, group in nights.groupby("dma_id", sort=False):
+            key = self._get_key(tenant_id, dma_id)
+            latest = self._readings.last(key, 1)
+            cutoff = max(retention_cutoff, np.datetime64(latest[0].timestamp, "ns")) if latest else retention_cutoff
+            
+            new = group[group["window_end"].to_numpy() > cutoff]
+            for row in new.itertuples(index=False):
+                self._readings.append(key, MNFReading(
+                    reading_id=str(uuid.uuid4()),
+                    tenant_id=tenant_id,
+                    dma_id=dma_id,
+                    timestamp=row.window_end.to_pydatetime(),
+                    flow_m3_hour=round(row.mnf_m3_hour, 3),
+                    window_start=row.window_start.to_pydatetime(),
+                    window_end=row.window_end.to_pydatetime(),
+                    reading_count=int(row.reading_count),
+                    completeness_pct=round(row.completeness_pct, 1),
+                    is_valid=bool(row.is_valid)
+                ))
+            stored += len(new)
+            
+            last = group.iloc[-1]
+            if not np.isnan(last["baseline_m3_hour"]):
+                self._store_baseline(
+                    tenant_id, dma_id, last["baseline_m3_hour"], last["baseline_std"],
+                    int(last["baseline_samples"]), connection_counts.get(dma_id, 1000),
+                    avg_demand_per_connection_m3_day
+                )
+        
+        logger.info(f"Backfilled MNF for {nights['dma_id'].nunique()} DMAs: {len(nights)} nights, {stored} stored")
+        return nights
+    
     def analyze_mnf(
         self,
         tenant_id: str,
@@ -352,13 +444,13 @@ class MNFAnalyzer:
         key = self._get_key(tenant_id, dma_id)
         
         # Get baseline
-        baseline = self._baselines.get(key)
+        baseline = self._baselines.get(tenant_id, {}).get(dma_id)
         if not baseline:
             logger.warning(f"No baseline for {dma_id} - run compute_baseline first")
             return None
         
-        # Get latest reading
-        readings = self._readings.get(key, [])
+        # Get latest readings
+        readings = self._readings.last(key, self.persistence_threshold * 2)
         if not readings:
             return None
         
@@ -384,7 +476,7 @@ class MNFAnalyzer:
         
         # Check persistence (consecutive nights above warning)
         consecutive = 0
-        for reading in reversed(readings[-self.persistence_threshold * 2:]):
+        for reading in reversed(readings):
             if reading.flow_m3_hour >= baseline.warning_threshold_m3_hour:
                 consecutive += 1
             else:
@@ -426,9 +518,7 @@ class MNFAnalyzer:
         )
         
         # Store anomaly
-        if key not in self._anomalies:
-            self._anomalies[key] = []
-        self._anomalies[key].append(anomaly)
+        self._anomalies.add(anomaly)
         
         logger.warning(f"MNF anomaly detected for {dma_id}: {severity.value} - {deviation_pct:.1f}% above baseline")
         return anomaly
@@ -491,11 +581,10 @@ class MNFAnalyzer:
             List of MNFTrendPoint for charting
         """
         key = self._get_key(tenant_id, dma_id)
-        readings = self._readings.get(key, [])
-        baseline = self._baselines.get(key)
+        baseline = self._baselines.get(tenant_id, {}).get(dma_id)
         
         cutoff = datetime.utcnow() - timedelta(days=days)
-        filtered_readings = [r for r in readings if r.timestamp > cutoff and r.is_valid]
+        filtered_readings = [r for r in self._readings.since(key, cutoff) if r.is_valid]
         
         trends = []
         baseline_mnf = baseline.baseline_mnf_m3_hour if baseline else 0
@@ -537,17 +626,7 @@ class MNFAnalyzer:
         dma_id: Optional[str] = None
     ) -> List[MNFAnomaly]:
         """Get all active MNF anomalies for a tenant."""
-        results = []
-        
-        for key, anomalies in self._anomalies.items():
-            if not key.startswith(tenant_id):
-                continue
-            if dma_id and not key.endswith(dma_id):
-                continue
-            
-            active = [a for a in anomalies if a.status == "active"]
-            results.extend(active)
-        
+        results = self._anomalies.active(tenant_id, dma_id or None)
         return sorted(results, key=lambda x: x.detected_at, reverse=True)
     
     def acknowledge_anomaly(
@@ -557,14 +636,11 @@ class MNFAnalyzer:
         acknowledged_by: str
     ) -> bool:
         """Acknowledge an MNF anomaly."""
-        for anomalies in self._anomalies.values():
-            for anomaly in anomalies:
-                if anomaly.anomaly_id == anomaly_id and anomaly.tenant_id == tenant_id:
-                    anomaly.status = "acknowledged"
-                    anomaly.acknowledged_by = acknowledged_by
-                    anomaly.acknowledged_at = datetime.utcnow()
-                    return True
-        return False
+        anomaly = self._anomalies.set_status(
+            anomaly_id, "acknowledged", tenant_id=tenant_id,
+            acknowledged_by=acknowledged_by, acknowledged_at=datetime.utcnow()
+        )
+        return anomaly is not None
     
     def resolve_anomaly(
         self,
@@ -572,50 +648,28 @@ class MNFAnalyzer:
         anomaly_id: str
     ) -> bool:
         """Mark an MNF anomaly as resolved."""
-        for anomalies in self._anomalies.values():
-            for anomaly in anomalies:
-                if anomaly.anomaly_id == anomaly_id and anomaly.tenant_id == tenant_id:
-                    anomaly.status = "resolved"
-                    anomaly.resolved_at = datetime.utcnow()
-                    return True
-        return False
+        anomaly = self._anomalies.set_status(
+            anomaly_id, "resolved", tenant_id=tenant_id, resolved_at=datetime.utcnow()
+        )
+        return anomaly is not None
     
     def get_summary(self, tenant_id: str) -> Dict[str, Any]:
         """
         Get MNF analysis summary for tenant dashboard.
         
         Returns summary with real data or appropriate empty states.
+        Counts come from the state store indexes, so this is O(1) per call.
         """
-        readings_count = 0
-        dmas_with_baseline = 0
-        active_anomalies = 0
-        persistent_anomalies = 0
-        total_estimated_loss = 0
-        
-        for key, readings in self._readings.items():
-            if key.startswith(tenant_id):
-                readings_count += len(readings)
-        
-        for key, baseline in self._baselines.items():
-            if key.startswith(tenant_id):
-                dmas_with_baseline += 1
-        
-        for key, anomalies in self._anomalies.items():
-            if key.startswith(tenant_id):
-                for a in anomalies:
-                    if a.status == "active":
-                        active_anomalies += 1
-                        total_estimated_loss += a.estimated_daily_loss_m3
-                        if a.is_persistent:
-                            persistent_anomalies += 1
+        readings_count = self._readings.count(tenant_id)
+        counts = self._anomalies.counts(tenant_id)
         
         return {
             "has_data": readings_count > 0,
             "total_readings": readings_count,
-            "dmas_with_baseline": dmas_with_baseline,
-            "active_anomalies": active_anomalies,
-            "persistent_anomalies": persistent_anomalies,
-            "total_estimated_loss_m3_day": round(total_estimated_loss, 1),
+            "dmas_with_baseline": len(self._baselines.get(tenant_id, {})),
+            "active_anomalies": int(counts["active"]),
+            "persistent_anomalies": int(counts.get("persistent", 0)),
+            "total_estimated_loss_m3_day": round(max(0.0, counts.get("loss_m3_day", 0.0)), 1),
             "data_status": "ready" if readings_count > 0 else "waiting_for_sensors",
             "last_updated": datetime.utcnow().isoformat()
         }
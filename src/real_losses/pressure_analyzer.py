@@ -27,6 +27,8 @@ from enum import Enum
 import statistics
 import math
 
+from .state_store import IncidentStore, ReadingBuffer
+
 logger = logging.getLogger(__name__)
 
 
@@ -145,9 +147,13 @@ class PressureInstabilityAnalyzer:
         
         # Storage
         self._baselines: Dict[str, float] = {}  # sensor_id -> baseline
-        self._history: Dict[str, List[Tuple[datetime, float]]] = {}  # sensor_id -> [(ts, pressure)]
-        self._alerts: Dict[str, List[PressureAlert]] = {}  # tenant_id:dma_id -> alerts
-        self._zone_status: Dict[str, PressureZoneStatus] = {}  # dma_id -> status
+        self._history = ReadingBuffer(timedelta(hours=1), lambda r: r[0])  # sensor_id -> (ts, pressure)
+        self._alerts = IncidentStore(
+            "alert_id",
+            tally=lambda a: {f"priority:{a.priority.value}": 1, f"type:{a.alert_type.value}": 1},
+            max_per_dma=100  # Keep only last 100 alerts per DMA
+        )
+        self._zone_status: Dict[str, Dict[str, PressureZoneStatus]] = {}  # tenant_id -> dma_id -> status
         
         logger.info("PressureInstabilityAnalyzer initialized")
     
@@ -172,23 +178,13 @@ class PressureInstabilityAnalyzer:
         """
         timestamp = timestamp or datetime.utcnow()
         
-        # Add to history
-        if sensor_id not in self._history:
-            self._history[sensor_id] = []
-        
-        self._history[sensor_id].append((timestamp, pressure_bar))
-        
-        # Keep 1 hour of history
-        cutoff = datetime.utcnow() - timedelta(hours=1)
-        self._history[sensor_id] = [
-            (ts, p) for ts, p in self._history[sensor_id]
-            if ts > cutoff
-        ]
+        # Add to history (keeps 1 hour)
+        self._history.append(sensor_id, (timestamp, pressure_bar))
         
         # Get or compute baseline
         baseline = self._baselines.get(sensor_id)
         if baseline is None:
-            history = self._history[sensor_id]
+            history = self._history.get(sensor_id)
             if len(history) >= 10:
                 baseline = statistics.mean([p for _, p in history])
                 self._baselines[sensor_id] = baseline
@@ -389,15 +385,14 @@ class PressureInstabilityAnalyzer:
         threshold_pct: float
     ) -> Tuple[bool, float]:
         """Check if deviation has been sustained."""
-        history = self._history.get(sensor_id, [])
         baseline = self._baselines.get(sensor_id, 0)
         
-        if not history or baseline == 0:
+        if not self._history.get(sensor_id) or baseline == 0:
             return False, 0
         
         # Check last N minutes
         cutoff = datetime.utcnow() - timedelta(minutes=self.sustained_alert_minutes)
-        recent = [(ts, p) for ts, p in history if ts > cutoff]
+        recent = self._history.since(sensor_id, cutoff)
         
         if len(recent) < 3:
             return False, 0
@@ -416,13 +411,11 @@ class PressureInstabilityAnalyzer:
     
     def _calculate_rate_of_change(self, sensor_id: str) -> float:
         """Calculate pressure rate of change (bar/min)."""
-        history = self._history.get(sensor_id, [])
-        
-        if len(history) < 3:
+        if len(self._history.get(sensor_id)) < 3:
             return 0
         
         # Use last 5 readings
-        recent = history[-5:]
+        recent = self._history.last(sensor_id, 5)
         if len(recent) < 2:
             return 0
         
@@ -435,13 +428,11 @@ class PressureInstabilityAnalyzer:
     
     def _detect_oscillation(self, sensor_id: str) -> Optional[Tuple[float, float]]:
         """Detect pressure oscillation. Returns (amplitude, frequency) if detected."""
-        history = self._history.get(sensor_id, [])
-        
-        if len(history) < 10:
+        if len(self._history.get(sensor_id)) < 10:
             return None
         
         # Use last 20 readings
-        recent = history[-20:]
+        recent = self._history.last(sensor_id, 20)
         pressures = [p for _, p in recent]
         
         if len(pressures) < 10:
@@ -470,14 +461,8 @@ class PressureInstabilityAnalyzer:
         return None
     
     def _store_alert(self, tenant_id: str, dma_id: str, alert: PressureAlert):
-        """Store alert in memory."""
-        key = f"{tenant_id}:{dma_id}"
-        if key not in self._alerts:
-            self._alerts[key] = []
-        self._alerts[key].append(alert)
-        
-        # Keep only last 100 alerts per DMA
-        self._alerts[key] = self._alerts[key][-100:]
+        """Store alert in memory (the store keeps the last 100 alerts per DMA)."""
+        self._alerts.add(alert)
         
         logger.warning(f"Pressure alert: {alert.alert_type.value} at {alert.sensor_id} - {alert.priority.value}")
     
@@ -517,9 +502,7 @@ class PressureInstabilityAnalyzer:
         sensors_offline = len(sensor_data) - sensors_online
         
         # Count sensors in alert state
-        sensors_alert = 0
-        key = f"{tenant_id}:{dma_id}"
-        active_alerts = [a for a in self._alerts.get(key, []) if a.status == "active"]
+        active_alerts = self._alerts.active(tenant_id, dma_id)
         sensors_alert = len(set(a.sensor_id for a in active_alerts))
         
         if not pressures:
@@ -566,7 +549,7 @@ class PressureInstabilityAnalyzer:
             status=status
         )
         
-        self._zone_status[dma_id] = zone_status
+        self._zone_status.setdefault(tenant_id, {})[dma_id] = zone_status
         return zone_status
     
     def get_active_alerts(
@@ -576,20 +559,9 @@ class PressureInstabilityAnalyzer:
         priority: Optional[AlertPriority] = None
     ) -> List[PressureAlert]:
         """Get active pressure alerts."""
-        results = []
-        
-        for key, alerts in self._alerts.items():
-            if not key.startswith(tenant_id):
-                continue
-            if dma_id and not key.endswith(dma_id):
-                continue
-            
-            for alert in alerts:
-                if alert.status != "active":
-                    continue
-                if priority and alert.priority != priority:
-                    continue
-                results.append(alert)
+        results = self._alerts.active(tenant_id, dma_id or None)
+        if priority:
+            results = [a for a in results if a.priority == priority]
         
         return sorted(results, key=lambda x: (
             -{"critical": 4, "high": 3, "medium": 2, "low": 1, "info": 0}[x.priority.value],
@@ -598,41 +570,34 @@ class PressureInstabilityAnalyzer:
     
     def acknowledge_alert(self, alert_id: str, user: str) -> bool:
         """Acknowledge a pressure alert."""
-        for alerts in self._alerts.values():
-            for alert in alerts:
-                if alert.alert_id == alert_id:
-                    alert.status = "acknowledged"
-                    alert.notes = f"Acknowledged by {user} at {datetime.utcnow().isoformat()}"
-                    return True
-        return False
+        alert = self._alerts.set_status(
+            alert_id, "acknowledged",
+            notes=f"Acknowledged by {user} at {datetime.utcnow().isoformat()}"
+        )
+        return alert is not None
     
     def resolve_alert(self, alert_id: str, resolution_notes: str = "") -> bool:
         """Resolve a pressure alert."""
-        for alerts in self._alerts.values():
-            for alert in alerts:
-                if alert.alert_id == alert_id:
-                    alert.status = "resolved"
-                    alert.notes = resolution_notes
-                    return True
-        return False
+        alert = self._alerts.set_status(alert_id, "resolved", notes=resolution_notes)
+        return alert is not None
     
     def get_summary(self, tenant_id: str) -> Dict[str, Any]:
-        """Get pressure monitoring summary for dashboard."""
-        active_alerts = self.get_active_alerts(tenant_id)
+        """Get pressure monitoring summary for dashboard (counts read from the alert indexes)."""
+        counts = self._alerts.counts(tenant_id)
         
-        critical = len([a for a in active_alerts if a.priority == AlertPriority.CRITICAL])
-        high = len([a for a in active_alerts if a.priority == AlertPriority.HIGH])
-        medium = len([a for a in active_alerts if a.priority == AlertPriority.MEDIUM])
+        critical = int(counts.get(f"priority:{AlertPriority.CRITICAL.value}", 0))
+        high = int(counts.get(f"priority:{AlertPriority.HIGH.value}", 0))
+        medium = int(counts.get(f"priority:{AlertPriority.MEDIUM.value}", 0))
         
         # Alert type breakdown
-        type_counts = {}
-        for alert in active_alerts:
-            t = alert.alert_type.value
-            type_counts[t] = type_counts.get(t, 0) + 1
+        type_counts = {
+            name[len("type:"):]: int(count)
+            for name, count in counts.items() if name.startswith("type:") and count
+        }
         
         # Get zone statuses
         zones = []
-        for dma_id, status in self._zone_status.items():
+        for dma_id, status in self._zone_status.get(tenant_id, {}).items():
             zones.append({
                 "dma_id": dma_id,
                 "status": status.status,
@@ -641,9 +606,9 @@ class PressureInstabilityAnalyzer:
             })
         
         return {
-            "has_data": len(self._history) > 0,
-            "sensors_monitored": len(self._history),
-            "total_active_alerts": len(active_alerts),
+            "has_data": len(self._history.keys()) > 0,
+            "sensors_monitored": len(self._history.keys()),
+            "total_active_alerts": int(counts["active"]),
             "critical_alerts": critical,
             "high_alerts": high,
             "medium_alerts": medium,
@@ -0,0 +1,248 @@
+"""
+AquaWatch NRW - Real Loss State Store
+=====================================
+
+Bounded, indexed in-memory state shared by the real-loss analyzers.
+
+- ReadingBuffer: per-key deques of time-stamped readings with age and
+  length retention (no list rebuilds on insert)
+- IncidentStore: anomalies, burst events and alerts indexed by id,
+  tenant, DMA and status, with per-tenant counters of active incidents
+  so dashboard summaries are O(1) under heavy polling
+
+Both assume readings and incidents arrive roughly in time order, which is
+how sensors and analyzers produce them.
+"""
+
+import itertools
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class ReadingBuffer:
+    """
+    Per-key ring buffers of time-stamped readings.
+
+    Readings older than ``retention`` (relative to ``now``) are evicted from
+    the left of each deque as new ones arrive, and ``maxlen`` caps each key.
+    Tuple keys such as ``(tenant_id, dma_id)`` are grouped by their first
+    element, so ``count(tenant_id)`` is O(1).
+    """
+
+    def __init__(
+        self,
+        retention,
+        time_of: Callable[[Any], datetime],
+        maxlen: Optional[int] = None
+    ):
+        """
+        Args:
+            retention: timedelta of history kept per key
+            time_of: Timestamp of a reading
+            maxlen: Optional cap on readings per key
+        """
+        self.retention = retention
+        self.time_of = time_of
+        self.maxlen = maxlen
+        self._buffers: Dict[Hashable, Deque[Any]] = {}
+        self._group_counts: Dict[Hashable, int] = {}
+        self._total = 0
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._buffers
+
+    def keys(self) -> Iterable[Hashable]:
+        """Every key that has received readings (kept after its readings age out)."""
+        return self._buffers.keys()
+
+    @staticmethod
+    def _group(key: Hashable) -> Hashable:
+        return key[0] if isinstance(key, tuple) else key
+
+    def _adjust(self, key: Hashable, delta: int):
+        group = self._group(key)
+        self._group_counts[group] = self._group_counts.get(group, 0) + delta
+        self._total += delta
+
+    def append(self, key: Hashable, reading: Any, now: Optional[datetime] = None) -> bool:
+        """
+        Add a reading and evict expired ones.
+
+        Returns False when the reading itself is already past retention.
+        """
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = deque()
+
+        cutoff = (now or datetime.utcnow()) - self.retention
+        while buffer and self.time_of(buffer[0]) <= cutoff:
+            buffer.popleft()
+            self._adjust(key, -1)
+        if self.time_of(reading) <= cutoff:
+            return False
+
+        buffer.append(reading)
+        self._adjust(key, 1)
+        if self.maxlen is not None and len(buffer) > self.maxlen:
+            buffer.popleft()
+            self._adjust(key, -1)
+        return True
+
+    def get(self, key: Hashable) -> Deque[Any]:
+        """All retained readings of a key, oldest first (empty if unknown)."""
+        return self._buffers.get(key, deque())
+
+    def last(self, key: Hashable, n: int) -> List[Any]:
+        """The latest ``n`` readings of a key, oldest first."""
+        return list(itertools.islice(reversed(self.get(key)), n))[::-1]
+
+    def since(self, key: Hashable, cutoff: datetime) -> List[Any]:
+        """Readings of a key newer than ``cutoff``, oldest first (scans only those)."""
+        recent = []
+        for reading in reversed(self.get(key)):
+            if self.time_of(reading) <= cutoff:
+                break
+            recent.append(reading)
+        return recent[::-1]
+
+    def count(self, group: Optional[Hashable] = None) -> int:
+        """Readings retained in a key group (all readings when None)."""
+        if group is None:
+            return self._total
+        return self._group_counts.get(group, 0)
+
+
+class IncidentStore:
+    """
+    Incidents indexed by id, tenant, DMA and status.
+
+    Incidents are dataclasses with ``tenant_id``, ``dma_id`` and (optionally)
+    ``status`` attributes. While an incident's status is in
+    ``active_statuses`` its tally (``{"active": 1, **tally(incident)}``) is
+    added to its tenant's counters, so summaries read counters instead of
+    scanning history. Status changes must go through set_status to keep the
+    indexes exact. ``max_per_dma`` bounds the history kept per DMA; the
+    oldest incident is dropped first.
+    """
+
+    def __init__(
+        self,
+        id_attr: str,
+        active_statuses: Iterable[str] = ("active",),
+        tally: Optional[Callable[[Any], Dict[str, float]]] = None,
+        max_per_dma: Optional[int] = None
+    ):
+        self.id_attr = id_attr
+        self.active_statuses = frozenset(active_statuses)
+        self.tally = tally or (lambda incident: {})
+        self.max_per_dma = max_per_dma
+
+        self._items: Dict[str, Any] = {}
+        self._by_dma: Dict[Tuple[str, str], Deque[str]] = {}  # Insertion (time) order
+        self._dmas: Dict[str, Dict[str, None]] = {}  # tenant -> DMAs with incidents
+        self._active: Dict[Tuple[str, str], Dict[str, Dict[str, float]]] = {}  # -> id -> tally
+        self._counts: Dict[str, Dict[str, float]] = {}  # tenant -> summed active tallies
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, incident_id: str) -> bool:
+        return incident_id in self._items
+
+    def get(self, incident_id: str) -> Optional[Any]:
+        return self._items.get(incident_id)
+
+    def add(self, incident: Any) -> Any:
+        """Store an incident (indexed as active if its status is active)."""
+        incident_id = getattr(incident, self.id_attr)
+        if incident_id in self._items:
+            self._drop(incident_id)
+
+        key = (incident.tenant_id, incident.dma_id)
+        ids = self._by_dma.get(key)
+        if ids is None:
+            ids = self._by_dma[key] = deque()
+            self._dmas.setdefault(incident.tenant_id, {})[incident.dma_id] = None
+        ids.append(incident_id)
+        self._items[incident_id] = incident
+        if getattr(incident, "status", None) in self.active_statuses:
+            self._activate(key, incident_id, incident)
+
+        while self.max_per_dma is not None and len(ids) > self.max_per_dma:
+            self._drop(ids[0])
+        return incident
+
+    def _activate(self, key: Tuple[str, str], incident_id: str, incident: Any):
+        tally = {"active": 1, **self.tally(incident)}
+        self._active.setdefault(key, {})[incident_id] = tally
+        counts = self._counts.setdefault(key[0], {})
+        for name, value in tally.items():
+            counts[name] = counts.get(name, 0) + value
+
+    def _deactivate(self, key: Tuple[str, str], incident_id: str):
+        tally = self._active.get(key, {}).pop(incident_id, None)
+        if tally:
+            counts = self._counts[key[0]]
+            for name, value in tally.items():
+                counts[name] -= value
+
+    def _drop(self, incident_id: str):
+        incident = self._items.pop(incident_id)
+        key = (incident.tenant_id, incident.dma_id)
+        self._deactivate(key, incident_id)
+        ids = self._by_dma[key]
+        if ids and ids[0] == incident_id:
+            ids.popleft()
+        else:
+            ids.remove(incident_id)
+
+    def set_status(self, incident_id: str, status: str, tenant_id: Optional[str] = None, **changes) -> Optional[Any]:
+        """
+        Change an incident's status (and other fields) and update the indexes.
+
+        Returns the incident, or None if unknown or owned by another tenant.
+        """
+        incident = self._items.get(incident_id)
+        if incident is None or (tenant_id is not None and incident.tenant_id != tenant_id):
+            return None
+
+        key = (incident.tenant_id, incident.dma_id)
+        was_active = incident_id in self._active.get(key, {})
+        incident.status = status
+        for name, value in changes.items():
+            setattr(incident, name, value)
+
+        if was_active and status not in self.active_statuses:
+            self._deactivate(key, incident_id)
+        elif not was_active and status in self.active_statuses:
+            self._activate(key, incident_id, incident)
+        return incident
+
+    def active(self, tenant_id: str, dma_id: Optional[str] = None) -> List[Any]:
+        """Active incidents of a tenant (or one DMA), oldest first per DMA."""
+        dmas = [dma_id] if dma_id is not None else list(self._dmas.get(tenant_id, ()))
+        return [self._items[i] for dma in dmas for i in self._active.get((tenant_id, dma), ())]
+
+    def for_dma(self, tenant_id: str, dma_id: str) -> List[Any]:
+        """Every retained incident of a DMA, oldest first."""
+        return [self._items[i] for i in self._by_dma.get((tenant_id, dma_id), ())]
+
+    def recent(self, tenant_id: str, since: datetime, time_attr: str = "detected_at") -> List[Any]:
+        """Incidents of a tenant newer than ``since`` (scans only those)."""
+        results = []
+        for dma_id in self._dmas.get(tenant_id, ()):
+            for incident_id in reversed(self._by_dma[(tenant_id, dma_id)]):
+                incident = self._items[incident_id]
+                if getattr(incident, time_attr) <= since:
+                    break
+                results.append(incident)
+        return results
+
+    def counts(self, tenant_id: str) -> Dict[str, float]:
+        """Summed tallies of a tenant's active incidents (always includes "active")."""
+        counts = self._counts.get(tenant_id, {})
+        return {"active": 0, **counts}
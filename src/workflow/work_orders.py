@@ -25,6 +25,10 @@ from dataclasses import dataclass, field
 from enum import Enum
 import json
 
+import numpy as np
+
+from src.gis.gis_integration import RouteStop, RouteVehicle, RoutingEngine, RoutingPlan, haversine_m
+
 logger = logging.getLogger(__name__)
 
 
@@ -80,6 +84,18 @@ class SkillLevel(Enum):
     SPECIALIST = "specialist" # Specialized equipment/conditions
 
 
+SKILL_RANK = {level: rank for rank, level in enumerate(SkillLevel)}
+
+# Minimum skill needed per work order type (anything else: BASIC)
+REQUIRED_SKILL = {
+    WorkOrderType.LEAK_REPAIR: SkillLevel.INTERMEDIATE,
+    WorkOrderType.BURST_REPAIR: SkillLevel.ADVANCED,
+    WorkOrderType.METER_INSTALLATION: SkillLevel.BASIC,
+    WorkOrderType.PIPE_REPLACEMENT: SkillLevel.SPECIALIST,
+    WorkOrderType.INSPECTION: SkillLevel.BASIC
+}
+
+
 # =============================================================================
 # DATA STRUCTURES
 # =============================================================================
@@ -321,6 +337,7 @@ class WorkOrderService:
         
         # Configuration
         self.sla_config = DEFAULT_SLA_CONFIG
+        self.routing = RoutingEngine()
         
         # Statistics
         self.stats = {
@@ -377,9 +394,16 @@ class WorkOrderService:
         if not available:
             return None
         
-        # Sort by distance (simplified - just return first for now)
-        # In production, calculate actual distances using coordinates
-        return available[0]
+        # Technicians without a known position are only used as a fallback
+        located = [t for t in available if t.current_location is not None]
+        if not located:
+            return available[0]
+        
+        coords = np.array(
+            [(t.current_location.latitude, t.current_location.longitude) for t in located]
+        )
+        distances = haversine_m(location.latitude, location.longitude, coords[:, 0], coords[:, 1])
+        return located[int(np.argmin(distances))]
     
     def update_technician_status(
         self, 
@@ -547,14 +571,7 @@ AI Recommendation: Investigate and repair if leak confirmed.
         wo = self.work_orders[work_order_id]
         
         # Determine required skill level
-        skill_mapping = {
-            WorkOrderType.LEAK_REPAIR: SkillLevel.INTERMEDIATE,
-            WorkOrderType.BURST_REPAIR: SkillLevel.ADVANCED,
-            WorkOrderType.METER_INSTALLATION: SkillLevel.BASIC,
-            WorkOrderType.PIPE_REPLACEMENT: SkillLevel.SPECIALIST,
-            WorkOrderType.INSPECTION: SkillLevel.BASIC
-        }
-        required_skill = skill_mapping.get(wo.type, SkillLevel.BASIC)
+        required_skill = REQUIRED_SKILL.get(wo.type, SkillLevel.BASIC)
         
         # Find best technician
         tech = self.get_nearest_technician(wo.location, required_skill)
@@ -566,6 +583,72 @@ AI Recommendation: Investigate and repair if leak confirmed.
         logger.warning(f"No available technician for {work_order_id}")
         return None
     
+    def plan_daily_routes(
+        self,
+        work_order_ids: List[str] = None,
+        day_start: datetime = None,
+        working_hours: float = 8.0,
+        service_minutes: float = 60.0,
+        time_budget_s: float = 2.0,
+        assign: bool = False
+    ) -> RoutingPlan:
+        """
+        Split work orders across available technicians and order each route.
+        
+        Defaults to every unassigned work order with a location. Technicians
+        leave from their current location and must be back within their
+        working hours; a work order must be reached before its SLA response
+        deadline (when that is still ahead), needs the skill auto-assignment
+        would require, and higher priorities are placed first.
+        """
+        day_start = day_start or datetime.now(timezone.utc)
+        if work_order_ids is None:
+            orders = [wo for wo in self.work_orders.values()
+                      if wo.status == WorkOrderStatus.CREATED and wo.location]
+        else:
+            orders = [self.work_orders[i] for i in work_order_ids
+                      if i in self.work_orders and self.work_orders[i].location]
+        
+        stops = []
+        for wo in orders:
+            latest = float("inf")
+            if wo.sla_response_deadline and wo.sla_response_deadline > day_start:
+                latest = (wo.sla_response_deadline - day_start).total_seconds() / 60
+            stops.append(RouteStop(
+                stop_id=wo.work_order_id,
+                latitude=wo.location.latitude,
+                longitude=wo.location.longitude,
+                service_minutes=service_minutes,
+                latest_minute=latest,
+                priority=len(Priority) - wo.priority.value,
+                required_level=SKILL_RANK[REQUIRED_SKILL.get(wo.type, SkillLevel.BASIC)]
+            ))
+        
+        vehicles = [
+            RouteVehicle(
+                vehicle_id=tech.technician_id,
+                latitude=tech.current_location.latitude,
+                longitude=tech.current_location.longitude,
+                end_minute=working_hours * 60,
+                level=SKILL_RANK[tech.skill_level]
+            )
+            for tech in self.get_available_technicians() if tech.current_location
+        ]
+        
+        plan = self.routing.solve(vehicles, stops, time_budget_s=time_budget_s)
+        logger.info(
+            f"Planned {len(stops) - len(plan.unassigned)}/{len(stops)} work orders across "
+            f"{len(vehicles)} technicians ({plan.total_distance_km:.1f} km)"
+        )
+        
+        if assign:
+            for route in plan.routes:
+                # Reverse order leaves each technician's current work order as the first stop
+                for wo_id in reversed(route.stop_ids):
+                    self.assign_work_order(wo_id, route.vehicle_id)
+        
+        return plan
+    
     # =========================================================================
     # STATUS UPDATES
     # =========================================================================
@@ -990,3 +1073,25 @@ if __name__ == "__main__":
     # Daily summary
     print("\nDaily Summary:")
     print(json.dumps(service.get_daily_summary(), indent=2))
+    
+    # Daily route planning
+    import random
+    random.seed(7)
+    for tech in service.technicians.values():
+        tech.current_location = Location(-15.4167, 28.2833)
+    for i in range(40):
+        service.create_work_order(
+            wo_type=random.choice([WorkOrderType.INSPECTION, WorkOrderType.LEAK_REPAIR,
+                                   WorkOrderType.METER_REPAIR]),
+            priority=random.choice(list(Priority)),
+            location=Location(-15.4167 + random.uniform(-0.08, 0.08),
+                              28.2833 + random.uniform(-0.08, 0.08)),
+            title=f"Field job {i + 1}"
+        )
+    plan = service.plan_daily_routes(service_minutes=30)
+    print("\nDaily Routes:")
+    for route in plan.routes:
+        print(f"  {route.vehicle_id}: {len(route.stop_ids)} stops, {route.distance_km:.1f} km, "
+              f"done at minute {route.finish_minute:.0f}")
+    print(f"  Unassigned: {len(plan.unassigned)}  "
+          f"(greedy {plan.construction_distance_km:.1f} km -> improved {plan.total_distance_km:.1f} km)")
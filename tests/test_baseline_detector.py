@@ -0,0 +1,93 @@
+"""
+Tests for vectorized baseline rule evaluation
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.baseline.detector import BaselineLeakDetector, BaselineVsAIComparison
+
+
+@pytest.fixture
+def feature_dicts():
+    """Per-sensor feature dicts spanning every rule's thresholds."""
+    rng = np.random.default_rng(3)
+    features = {}
+    for i in range(300):
+        f = {
+            'pressure_min': rng.uniform(0.5, 4.0),
+            'pressure_mean': rng.uniform(2.0, 4.0),
+            'pressure_1h_change_rate': rng.uniform(-0.8, 0.2),
+            'pressure_24h_change': rng.uniform(-0.8, 0.3),
+            'deviation_from_baseline': rng.uniform(-0.8, 0.3),
+            'night_day_ratio': rng.uniform(0.9, 1.1),
+            'mnf_deviation': rng.uniform(-0.6, 0.1),
+            'pressure_std': rng.uniform(0.01, 0.3),
+            'baseline_std': rng.uniform(0.01, 0.1),
+            f'gradient_to_S{i + 1}': rng.uniform(-0.15, 0.15),
+        }
+        # Sparse sensors exercise the scalar defaults
+        for key in rng.choice(list(f), size=rng.integers(0, 4), replace=False):
+            del f[key]
+        features[f"S{i}"] = f
+    return features
+
+
+class TestDetectBatch:
+    """Batch evaluation must match `detect` sensor by sensor."""
+
+    def test_matches_scalar_detect_over_periods(self, feature_dicts):
+        scalar, batch = BaselineLeakDetector(), BaselineLeakDetector()
+
+        for _ in range(4):  # Consecutive-anomaly counters carry across periods
+            expected = [scalar.detect(f, sid) for sid, f in feature_dicts.items()]
+            results = {r.sensor_id: r for r in batch.detect_batch(pd.DataFrame.from_dict(feature_dicts, orient='index'))}
+
+            for exp in expected:
+                if not exp.alert:
+                    assert exp.sensor_id not in results
+                    continue
+                got = results[exp.sensor_id]
+                assert got.severity == exp.severity
+                assert got.summary == exp.summary
+                assert got.recommended_action == exp.recommended_action
+                assert got.confidence == exp.confidence
+                assert [(r.rule_name, r.severity, r.description) for r in got.triggered_rules] == \
+                    [(r.rule_name, r.severity, r.description) for r in exp.triggered_rules]
+
+            assert batch.consecutive_anomalies == scalar.consecutive_anomalies
+
+
+class TestIncrementalMetrics:
+    """Running counters must reproduce the DataFrame-based metrics."""
+
+    def test_counters_match_recomputation(self, feature_dicts):
+        detector = BaselineLeakDetector()
+        comparison = BaselineVsAIComparison()
+        rng = np.random.default_rng(5)
+
+        rows = []
+        for sensor_id, f in feature_dicts.items():
+            result = detector.detect(f, sensor_id)
+            prob = float(rng.random())
+            actual = [None, True, False][rng.integers(0, 3)]
+            comparison.log_comparison(sensor_id, result, prob, prob, actual)
+            rows.append((result.alert, prob > 0.5, actual))
+
+        df = pd.DataFrame(rows, columns=['baseline', 'ai', 'actual'])
+        confirmed = df[df['actual'].notna()]
+        leaks = confirmed['actual'].astype(bool)
+
+        metrics = comparison.calculate_metrics()
+        assert metrics['total_samples'] == len(df)
+        assert metrics['baseline']['alert_count'] == df['baseline'].sum()
+        assert metrics['ai']['true_positive_rate'] == pytest.approx(
+            (confirmed['ai'] & leaks).sum() / leaks.sum())
+        assert metrics['baseline']['false_positive_rate'] == pytest.approx(
+            (confirmed['baseline'] & ~leaks).sum() / (~leaks).sum())
+        assert metrics['comparison']['agreement_rate'] == pytest.approx((df['baseline'] == df['ai']).mean())
+        assert metrics['comparison']['ai_only_detections'] == (df['ai'] & ~df['baseline']).sum()
+
+        comparison.reset_metrics()
+        assert comparison.calculate_metrics() == {'status': 'insufficient_data'}
@@ -0,0 +1,110 @@
+"""
+Tests for space-time indexed event correlation
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from src.events.event_management import (
+    CentralEventManager, Event, EventCorrelationEngine, EventSeverity, EventSource, EventStatus,
+    EventType, geohash_encode
+)
+
+
+def make_event(i, event_type, minutes, coordinates=None, status=EventStatus.NEW):
+    return Event(
+        event_id=f"E{i}", event_type=event_type, severity=EventSeverity.LOW, status=status,
+        zone_id="Z", coordinates=coordinates,
+        detected_at=datetime(2026, 3, 1) + timedelta(minutes=minutes)
+    )
+
+
+def brute_force(engine, new_event, events):
+    """Pairwise scan the index replaces"""
+    window = engine.time_window.total_seconds()
+    temporal, spatial = [], []
+    for e in events:
+        diff = abs((new_event.detected_at - e.detected_at).total_seconds())
+        if diff <= window and 1 - diff / window > 0.3:
+            temporal.append(e.event_id)
+        if new_event.coordinates and e.coordinates:
+            d = engine._calculate_distance(new_event.coordinates, e.coordinates)
+            if d <= engine.distance_threshold and 1 - d / engine.distance_threshold > 0.3:
+                spatial.append(e.event_id)
+    return temporal, spatial
+
+
+class TestEventCorrelationIndex:
+    """Bucketed lookups against the pairwise scan they replace."""
+
+    def test_geohash_matches_reference(self):
+        assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+    def test_index_matches_pairwise_scan(self):
+        rng = random.Random(4)
+        types = [EventType.LEAK, EventType.PRESSURE_ANOMALY, EventType.METER_ANOMALY]
+        events = [
+            make_event(i, rng.choice(types), rng.uniform(0, 3 * 24 * 60),
+                       None if rng.random() < 0.1 else (-15.4 + rng.uniform(-0.2, 0.2),
+                                                        28.3 + rng.uniform(-0.2, 0.2)),
+                       rng.choice([EventStatus.NEW, EventStatus.CLOSED]))
+            for i in range(1500)
+        ]
+        engine = EventCorrelationEngine()
+        for e in events[:-50]:
+            engine.add_event(e)
+
+        for j in range(len(events) - 50, len(events)):
+            new_event = events[j]
+            found = engine.find_correlations(new_event)
+            temporal, spatial = brute_force(engine, new_event, events[:j])
+            assert [c["event_id"] for c in found if c["correlation_type"] == "temporal"] == temporal
+            assert [c["event_id"] for c in found if c["correlation_type"] == "spatial"] == spatial
+            for match in (c for c in found if c["correlation_type"] == "rule_based"):
+                rule = next(r for r in engine.correlation_rules if r["name"] == match["rule_name"])
+                expected = [e.event_id for e in events[:j]
+                            if e.event_type in rule["event_types"] and e.status != EventStatus.CLOSED]
+                assert match["event_ids"] == expected[-engine.max_rule_event_ids:]
+                assert match["event_count"] == len(expected)
+            assert found == engine.find_correlations(new_event, events[:j])
+            engine.add_event(new_event)
+
+    def test_closing_an_event_drops_it_from_rule_matches(self):
+        cem = CentralEventManager()
+        source = EventSource(source_type="sensor", source_id="S1")
+        first = cem.create_event(EventType.LEAK, "Z", {}, source, auto_classify=False)
+        second = cem.create_event(EventType.LEAK, "Z", {}, source, auto_classify=False)
+        probe = make_event("P", EventType.LEAK, 0)
+
+        rules = [c for c in cem.correlation_engine.find_correlations(probe)
+                 if c.get("rule_name") == "leak_cluster"]
+        assert rules[0]["event_ids"] == [first.event_id, second.event_id]
+        assert first.event_id in second.correlated_events
+
+        cem.update_event_status(first.event_id, EventStatus.CLOSED, "ops")
+        rules = [c for c in cem.correlation_engine.find_correlations(probe)
+                 if c.get("rule_name") == "leak_cluster"]
+        assert rules[0]["event_ids"] == [second.event_id]
+
+    def test_rule_matches_list_only_latest_ids_during_a_storm(self):
+        engine = EventCorrelationEngine(max_rule_event_ids=5)
+        storm = [make_event(i, EventType.PRESSURE_ANOMALY, i * 0.1) for i in range(200)]
+        for e in storm:
+            engine.add_event(e)
+        storm[-1].status = EventStatus.CLOSED
+        engine.update_event(storm[-1])
+
+        # The probe is already indexed: it is neither counted nor listed
+        match = next(c for c in engine.find_correlations(storm[-2]) if c["correlation_type"] == "rule_based")
+        assert match["event_count"] == 198
+        assert match["event_ids"] == [e.event_id for e in storm[193:198]]
+        assert match["strength"] == 1.0
+
+        probe = make_event("P", EventType.PRESSURE_ANOMALY, 0)
+        small = EventCorrelationEngine(max_rule_event_ids=5)
+        small.add_event(storm[0])
+        assert not [c for c in small.find_correlations(probe) if c["correlation_type"] == "rule_based"]
+        small.add_event(storm[1])
+        match = next(c for c in small.find_correlations(probe) if c["correlation_type"] == "rule_based")
+        assert (match["event_ids"], match["event_count"]) == (["E0", "E1"], 2)
+        assert match["strength"] == 2 / 3
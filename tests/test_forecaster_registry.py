@@ -0,0 +1,125 @@
+"""
+Tests for the per-DMA forecaster registry
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.ai.baseline_comparison import BaselineComparisonConfig, BaselineComparisonService
+from src.ai.forecaster_registry import ForecasterRegistry, ForecasterRegistryConfig, _artifact_path
+
+
+def history(level, periods=96):
+    stamps = pd.date_range("2026-01-01", periods=periods, freq="15min")
+    return pd.DataFrame({"timestamp": stamps, "value": level + 0.1 * np.sin(np.arange(periods) / 8)})
+
+
+class RecordingSession:
+    """Stands in for a SQLAlchemy session; keeps added rows and retire calls."""
+
+    def __init__(self, log):
+        self.log = log
+
+    def query(self, model):
+        return self
+
+    def filter(self, *conditions):
+        return self
+
+    def update(self, values, synchronize_session=None):
+        self.log["retired"].append(values)
+        return 0
+
+    def add(self, row):
+        self.log["added"].append(row)
+
+
+def recording_factory():
+    log = {"added": [], "retired": []}
+
+    @contextmanager
+    def session_factory():
+        yield RecordingSession(log)
+
+    return session_factory, log
+
+
+class TestForecasterRegistry:
+
+    def test_dmas_are_fitted_and_stored_independently(self, tmp_path):
+        registry = ForecasterRegistry(ForecasterRegistryConfig(model_dir=str(tmp_path)))
+        first = registry.fit("DMA_A", history(3.0, periods=96))
+        second = registry.fit("DMA_B", history(5.0, periods=120))
+
+        assert registry.get("DMA_A") is first and registry.get("DMA_B") is second
+        assert (first.training_samples, second.training_samples) == (96, 120)
+        assert _artifact_path(str(tmp_path), "DMA_A", first.version).exists()
+        assert _artifact_path(str(tmp_path), "DMA_B", second.version).exists()
+
+        refit = registry.fit("DMA_B", history(6.0, periods=100))
+        assert registry.get("DMA_A").version == first.version
+        assert registry.get("DMA_B").version == refit.version != second.version
+
+    def test_lru_evicts_least_recently_used_and_reloads_from_disk(self, tmp_path):
+        registry = ForecasterRegistry(ForecasterRegistryConfig(model_dir=str(tmp_path), max_resident_models=2))
+        fitted = {dma: registry.fit(dma, history(level)) for level, dma in enumerate(["A", "B", "C"], start=1)}
+        assert registry.resident_dmas() == ["B", "C"]
+
+        registry.get("B")
+        reloaded = registry.get("A")
+        assert registry.resident_dmas() == ["B", "A"]
+        assert reloaded is not fitted["A"] and reloaded.version == fitted["A"].version
+
+    def test_manifest_survives_restart_and_bulk_fit_resumes(self, tmp_path):
+        started = datetime.utcnow() - timedelta(seconds=1)
+        config = ForecasterRegistryConfig(model_dir=str(tmp_path), max_workers=1)
+        fitted = ForecasterRegistry(config).fit("A", history(2.0))
+
+        restarted = ForecasterRegistry(config)
+        assert restarted.fitted_dmas() == ["A"]
+        assert restarted.resident_dmas() == []
+        assert restarted.get("A").version == fitted.version
+
+        loaded = []
+
+        def loader(dma_id):
+            loaded.append(dma_id)
+            return history(4.0)
+
+        try:
+            results = restarted.fit_many(["A", "B"], loader, resume_since=started)
+        finally:
+            restarted.shutdown()
+        assert loaded == ["B"] and list(results) == ["B"]
+        assert ForecasterRegistry(config).fitted_dmas() == ["A", "B"]
+
+    def test_fitted_versions_are_recorded(self, tmp_path):
+        session_factory, log = recording_factory()
+        service = BaselineComparisonService(
+            BaselineComparisonConfig(model_dir=str(tmp_path)), session_factory=session_factory
+        )
+        assert service.registry.session_factory is session_factory
+
+        first = service.registry.fit("DMA_A", history(3.0))
+        second = service.registry.fit("DMA_A", history(3.5))
+
+        assert [row.version for row in log["added"]] == [first.version, second.version]
+        row = log["added"][-1]
+        assert row.model_name == "baseline_forecaster:DMA_A" and row.is_active
+        assert row.training_samples == 96 and len(row.checksum) == 64
+        assert [values["is_active"] for values in log["retired"]] == [False, False]
+
+    @pytest.mark.parametrize("dma_id", ["..", ".", "../outside", "a/b", "a\\b", "/etc/passwd", ""])
+    def test_artifact_path_stays_under_model_dir(self, tmp_path, dma_id):
+        path = _artifact_path(str(tmp_path), dma_id, "v1")
+        assert tmp_path.resolve() in path.parents
+        assert path.parent.parent == tmp_path.resolve()
+
+    def test_sanitized_ids_do_not_collide(self, tmp_path):
+        paths = {_artifact_path(str(tmp_path), dma_id, "v1") for dma_id in ["a/b", "a_b", "a\\b", "a:b"]}
+        assert len(paths) == 4
+        assert _artifact_path(str(tmp_path), "DMA-001", "v1") == tmp_path.resolve() / "DMA-001" / "v1.joblib"
@@ -0,0 +1,276 @@
+"""
+Tests for GIS spatial indexes, leak heatmaps, route optimization and geometry encoding
+"""
+
+import copy
+import itertools
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from src.gis.gis_integration import (
+    AssetType, GeoLineString, GeoPoint, GeoPolygon, GISService, GridPointIndex, LeakReport, RouteStop,
+    RouteVehicle, RoutingEngine, WaterAsset, Zone, decode_polyline, douglas_peucker_ranks, encode_polyline,
+    _PackedGeometry, haversine_distance, local_xy_m
+)
+from src.workflow.work_orders import Location, Priority, WorkOrderService, WorkOrderType
+
+
+@pytest.fixture
+def service():
+    rng = np.random.default_rng(3)
+    gis = GISService()
+    types = [AssetType.PIPE, AssetType.VALVE, AssetType.HYDRANT]
+    for i in range(3000):
+        gis.add_asset(WaterAsset(
+            asset_id=f"A{i}",
+            asset_type=types[i % 3],
+            name=f"Asset {i}",
+            location=GeoPoint(-15.5 + 0.2 * rng.random(), 28.2 + 0.2 * rng.random()),
+            zone_id=f"Z{i % 7}"
+        ))
+    for z in range(40):
+        lat0, lon0 = -15.5 + (z // 8) * 0.04, 28.2 + (z % 8) * 0.025
+        gis.add_zone(Zone(f"Z{z}", f"Zone {z}", GeoPolygon(exterior=[
+            GeoPoint(lat0, lon0), GeoPoint(lat0, lon0 + 0.03),
+            GeoPoint(lat0 + 0.05, lon0 + 0.03), GeoPoint(lat0 + 0.05, lon0)
+        ])))
+    return gis
+
+
+def brute_force(gis, center, asset_type=None):
+    return sorted(
+        (haversine_distance(center.latitude, center.longitude, a.location.latitude, a.location.longitude), a.asset_id)
+        for a in gis.assets.values() if asset_type is None or a.asset_type == asset_type
+    )
+
+
+class TestSpatialQueries:
+    """Indexed queries must agree with exhaustive scans."""
+
+    def test_radius_and_nearest_match_brute_force(self, service):
+        for center in [GeoPoint(-15.4, 28.3), GeoPoint(-15.49, 28.21), GeoPoint(-15.2, 28.6)]:
+            expected = brute_force(service, center)
+
+            in_radius = service.get_assets_in_radius(center, 1.5)
+            assert [a.asset_id for a, _ in in_radius] == [aid for d, aid in expected if d <= 1.5]
+
+            nearest = service.find_nearest_assets(center, k=7)
+            assert [a.asset_id for a, _ in nearest] == [aid for _, aid in expected[:7]]
+            assert nearest[0][1] == pytest.approx(expected[0][0])
+
+            valve, _ = service.find_nearest_asset(center, AssetType.VALVE)
+            assert valve.asset_id == brute_force(service, center, AssetType.VALVE)[0][1]
+
+    def test_point_in_zone_matches_ray_casting_scan(self, service):
+        rng = np.random.default_rng(4)
+        for lat, lon in zip(-15.52 + 0.26 * rng.random(300), 28.18 + 0.24 * rng.random(300)):
+            point = GeoPoint(lat, lon)
+            expected = next((z for z in service.zones.values() if z.boundary.contains_point(point)), None)
+            assert service.find_zone_for_point(point) is expected
+
+    def test_secondary_indexes_follow_updates(self, service):
+        moved = WaterAsset("A5", AssetType.METER, "Moved", GeoPoint(-15.0, 29.0), zone_id="Z_NEW")
+        service.add_asset(moved)
+
+        assert moved in service.get_assets_in_zone("Z_NEW")
+        assert all(a.asset_id != "A5" for a in service.get_assets_in_zone("Z5"))
+        assert service.get_assets_by_type(AssetType.METER) == [moved]
+        assert service.find_nearest_asset(GeoPoint(-15.0, 29.0))[0] is moved
+        assert service.get_assets_in_radius(GeoPoint(-15.0, 29.0), 0.1) == [(moved, 0.0)]
+
+    def test_bulk_load_equals_incremental_inserts(self):
+        rng = np.random.default_rng(5)
+        lats, lons = rng.uniform(-16, -15, 500), rng.uniform(28, 29, 500)
+        ids = [f"P{i}" for i in range(500)]
+        bulk, incremental = GridPointIndex(0.05), GridPointIndex(0.05)
+        bulk.bulk_load(ids, lats, lons)
+        for i, lat, lon in zip(ids, lats, lons):
+            incremental.insert(i, lat, lon)
+
+        assert bulk.nearest(-15.5, 28.5, 20) == incremental.nearest(-15.5, 28.5, 20)
+        assert bulk.within_radius(-15.5, 28.5, 10) == incremental.within_radius(-15.5, 28.5, 10)
+
+
+class TestLeakHeatmap:
+    """Binned heatmaps and the cached tile pyramid."""
+
+    def test_grid_and_tiles_account_for_every_leak_and_fold_in_new_reports(self):
+        rng = np.random.default_rng(6)
+        gis = GISService()
+        now = datetime.now(timezone.utc)
+        ages = rng.uniform(0, 200, 400)
+        for i, age in enumerate(ages):
+            gis.add_leak_report(LeakReport(
+                f"L{i}", GeoPoint(-15.5 + 0.1 * rng.random(), 28.2 + 0.1 * rng.random()),
+                "leak", "low", reported_at=now - timedelta(days=float(age)), estimated_loss_lph=10.0
+            ))
+
+        grid = gis.generate_leak_heatmap_data(grid_size_km=0.5, days=90)
+        assert sum(cell["count"] for cell in grid) == int((ages < 90).sum())
+        assert all(cell["total_loss_lph"] == pytest.approx(10.0 * cell["count"]) for cell in grid)
+
+        # Zoom 6 tile holding Lusaka; the cached level absorbs a new report
+        assert sum(p["count"] for p in gis.get_leak_heatmap_tile(6, 37, 34)) == 400
+        assert sum(p["count"] for p in gis.get_leak_heatmap_tile(6, 37, 34, days=90)) == int((ages < 90).sum())
+        gis.add_leak_report(LeakReport("NEW", GeoPoint(-15.45, 28.25), "burst", "high"))
+        assert sum(p["count"] for p in gis.get_leak_heatmap_tile(6, 37, 34)) == 401
+        assert sum(p["count"] for p in gis.get_leak_heatmap_tile(6, 37, 34, days=90)) == int((ages < 90).sum()) + 1
+        assert gis.get_leak_heatmap_tile(6, 0, 0) == []
+
+
+class TestRouting:
+    """Single-route local search and multi-vehicle planning with time windows."""
+
+    def test_small_routes_match_exhaustive_search_or_beat_nearest_neighbour(self):
+        rng = np.random.default_rng(11)
+        gis = GISService()
+        start = GeoPoint(-15.45, 28.25)
+        for _ in range(10):
+            points = [GeoPoint(*p) for p in rng.uniform([-15.5, 28.2], [-15.4, 28.3], (6, 2))]
+
+            def length(order):
+                stops = [start] + [points[i] for i in order] + [start]
+                return sum(haversine_distance(a.latitude, a.longitude, b.latitude, b.longitude)
+                           for a, b in zip(stops, stops[1:]))
+
+            order = gis.optimize_technician_route(start, points)
+            best = min(length(p) for p in itertools.permutations(range(6)))
+            assert sorted(order) == list(range(6))
+            assert length(order) <= best * 1.02
+
+        assert gis.optimize_technician_route(start, []) == []
+
+    def test_plan_respects_windows_levels_and_shift_end(self):
+        rng = np.random.default_rng(5)
+        stops = [
+            RouteStop(f"S{i}", *rng.uniform([-15.5, 28.2], [-15.35, 28.35]), service_minutes=20,
+                      earliest_minute=float(rng.choice([0, 120])),
+                      latest_minute=float(rng.choice([200, 400, np.inf])),
+                      priority=int(rng.integers(0, 3)), required_level=int(rng.integers(0, 2)))
+            for i in range(60)
+        ]
+        stops.append(RouteStop("OUT_OF_REACH", -15.0, 29.0, latest_minute=10))
+        vehicles = [RouteVehicle(f"V{r}", -15.42, 28.28, end_minute=480, level=r % 2) for r in range(4)]
+
+        plan = RoutingEngine(time_budget_s=1.0).solve(vehicles, stops)
+
+        by_id = {s.stop_id: s for s in stops}
+        routed = [sid for r in plan.routes for sid in r.stop_ids]
+        assert sorted(routed + plan.unassigned) == sorted(by_id)
+        assert "OUT_OF_REACH" in plan.unassigned
+        for route, vehicle in zip(plan.routes, vehicles):
+            assert route.finish_minute <= 480 + 1e-6
+            for sid, minute in zip(route.stop_ids, route.service_start_minutes):
+                stop = by_id[sid]
+                assert stop.earliest_minute - 1e-6 <= minute <= stop.latest_minute + 1e-6
+                assert stop.required_level <= vehicle.level
+        assert plan.total_distance_km <= plan.construction_distance_km + 1e-9
+
+    def test_no_vehicles_leaves_every_stop_unassigned(self):
+        stops = [RouteStop("a", -15.4, 28.3), RouteStop("b", -15.41, 28.31, priority=2)]
+        plan = RoutingEngine().solve([], stops)
+        assert plan.routes == [] and plan.unassigned == ["a", "b"]
+        assert plan.total_distance_km == 0
+
+        # No technician with a known location: nothing can be routed
+        service = WorkOrderService()
+        order = service.create_work_order(
+            WorkOrderType.LEAK_REPAIR, Priority.HIGH, Location(-15.4, 28.3), "Leak on main"
+        )
+        assert service.plan_daily_routes().unassigned == [order.work_order_id]
+
+
+def reference_douglas_peucker(xy, tolerance, first, last):
+    """Recursive Douglas-Peucker (segment distance), kept vertex indices between first and last."""
+    if last - first < 2:
+        return []
+    a, b = xy[first], xy[last]
+    ab = b - a
+    best, split = -1.0, None
+    for i in range(first + 1, last):
+        t = 0.0 if ab @ ab == 0 else min(1.0, max(0.0, (xy[i] - a) @ ab / (ab @ ab)))
+        d = float(np.hypot(*(xy[i] - (a + t * ab))))
+        if d > best:
+            best, split = d, i
+    if best <= tolerance:
+        return []
+    return (reference_douglas_peucker(xy, tolerance, first, split) + [split]
+            + reference_douglas_peucker(xy, tolerance, split, last))
+
+
+class TestGeometryEncoding:
+    """Douglas-Peucker ranks, polyline encoding and cached geometry properties."""
+
+    def test_ranks_reproduce_douglas_peucker_and_polyline_round_trips(self):
+        rng = np.random.default_rng(7)
+        for trial in range(20):
+            xy = np.cumsum(rng.normal(size=(int(rng.integers(3, 80)), 2)), axis=0)
+            if trial % 2:
+                xy = np.vstack([xy, xy[:1]])  # Closed ring
+            ranks = douglas_peucker_ranks(xy)
+            for tolerance in (0.2, 1.0, 3.0):
+                expected = [0] + reference_douglas_peucker(xy, tolerance, 0, len(xy) - 1) + [len(xy) - 1]
+                assert np.flatnonzero(ranks > tolerance).tolist() == expected
+
+        # Reference vector from the format documentation (lat, lng pairs)
+        coords = np.array([[-120.2, 38.5], [-120.95, 40.7], [-126.453, 43.252]])
+        assert encode_polyline(coords) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+        lonlat = np.column_stack([rng.uniform(28, 29, 50), rng.uniform(-16, -15, 50)])
+        assert np.abs(decode_polyline(encode_polyline(lonlat, 6), 6) - lonlat).max() <= 5e-7
+
+    def test_polygon_outputs_are_cached_and_follow_vertex_changes(self):
+        angles = np.linspace(0, 2 * np.pi, 400, endpoint=False)
+        radius = 0.01 * (1 + 0.1 * np.sin(5 * angles))
+        exterior = [GeoPoint(-15.4 + r * np.sin(a), 28.3 + r * np.cos(a)) for a, r in zip(angles, radius)]
+        polygon = GeoPolygon(exterior=exterior)
+
+        full = polygon.to_geojson()
+        assert full["coordinates"][0][0] == full["coordinates"][0][-1] == [28.3 + radius[0], -15.4]
+        assert len(full["coordinates"][0]) == 401
+
+        simplified = polygon.to_geojson(tolerance_m=10)
+        ring = np.array(simplified["coordinates"][0])
+        assert 4 <= len(ring) < 100 and (ring[0] == ring[-1]).all()
+        # Every dropped vertex lies within the tolerance of the simplified outline
+        xy = local_xy_m(np.vstack([polygon.rings[0], ring]))
+        original, kept = xy[:401], xy[401:]
+        a, b = kept[:-1], kept[1:]
+        for p in original:
+            t = np.clip(np.einsum("ij,ij->i", p - a, b - a) / np.einsum("ij,ij->i", b - a, b - a), 0, 1)
+            assert np.hypot(*(p - (a + t[:, None] * (b - a))).T).min() <= 10 + 1e-6
+        assert polygon.to_geojson(tolerance_m=10) == simplified
+        assert len(polygon.simplify(10).exterior) == len(ring)
+
+        encoded = polygon.to_geojson(tolerance_m=10, encoding="polyline")
+        assert encoded["encoding"] == "polyline" and encoded["precision"] == 5
+        assert np.abs(decode_polyline(encoded["coordinates"][0]) - ring).max() <= 5e-6
+        assert polygon.centroid.latitude == pytest.approx(-15.4, abs=1e-4)
+        assert polygon.contains_point(GeoPoint(-15.4, 28.3))
+
+        polygon.exterior = exterior[:100] + [GeoPoint(-15.3, 28.3)] + exterior[100:]
+        assert polygon.bbox[1].latitude == -15.3
+        assert len(polygon.to_geojson()["coordinates"][0]) == 402
+
+        line = GeoLineString(exterior[:50])
+        assert line.length_km == pytest.approx(sum(
+            haversine_distance(p.latitude, p.longitude, q.latitude, q.longitude)
+            for p, q in zip(exterior[:49], exterior[1:50])
+        ))
+
+
+    def test_geojson_callers_get_their_own_coordinate_lists(self):
+        exterior = [GeoPoint(-15.4, 28.3), GeoPoint(-15.4, 28.31), GeoPoint(-15.41, 28.31), GeoPoint(-15.41, 28.3)]
+        polygon, line = GeoPolygon(exterior=exterior), GeoLineString(exterior)
+        for geometry in (polygon, line):
+            for kwargs in ({}, {"precision": 3}, {"tolerance_m": 5}):
+                first = geometry.to_geojson(**kwargs)
+                expected = copy.deepcopy(first)
+                path = first["coordinates"][0] if isinstance(geometry, GeoPolygon) else first["coordinates"]
+                path[0][0] = 0.0
+                path.append([1.0, 1.0])
+                assert geometry.to_geojson(**kwargs) == expected
+
+        with pytest.raises(TypeError):
+            _PackedGeometry()
@@ -0,0 +1,181 @@
+"""
+Tests for network-aware leak localization
+"""
+
+import re
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from src.ai.localization.localizer import (
+    HierarchicalLocalizer,
+    LeakLocalizer,
+    PipeSegment,
+    SensorNode,
+    generate_synthetic_network,
+)
+
+
+def reference_distance(network, sensor_id, segment_id):
+    """Point-to-point search per (sensor, segment), as before the distance index."""
+    sensor = network.sensors[sensor_id]
+    segment = network.segments[segment_id]
+    try:
+        return min(
+            nx.shortest_path_length(network.graph, sensor.node_id, segment.upstream_node, weight='length'),
+            nx.shortest_path_length(network.graph, sensor.node_id, segment.downstream_node, weight='length')
+        ) + segment.length_m / 2
+    except nx.NetworkXNoPath:
+        return float('inf')
+
+
+def reference_posteriors(localizer, sensor_probabilities):
+    """Per-segment posterior loop, normalized, with reference distances."""
+    posteriors = {}
+    for segment_id in localizer.network.segments:
+        posterior = localizer.segment_priors.get(segment_id, 0.01)
+        for sensor_id, p in sensor_probabilities.items():
+            distance = reference_distance(localizer.network, sensor_id, segment_id)
+            if distance == float('inf'):
+                continue
+            signal = np.exp(-distance / localizer.decay_constant)
+            posterior *= max(signal * p if p > 0.5 else (1 - signal) * (1 - p), 0.01)
+        posteriors[segment_id] = posterior
+    total = sum(posteriors.values())
+    return {k: v / total for k, v in posteriors.items()}
+
+
+def sensor_probabilities(network, seed):
+    rng = np.random.default_rng(seed)
+    probs = {sid: float(rng.uniform(0.0, 0.4)) for sid in network.sensors}
+    for sid in rng.choice(sorted(probs), size=2, replace=False):
+        probs[str(sid)] = float(rng.uniform(0.7, 0.95))
+    return probs
+
+
+def assert_matches_reference(localizer, probs):
+    expected = reference_posteriors(localizer, probs)
+    segment_ids, posteriors = localizer._calculate_posteriors(probs)
+    assert sorted(segment_ids) == sorted(expected)
+    assert posteriors == pytest.approx([expected[s] for s in segment_ids], rel=1e-9)
+
+    ranked = localizer.localize(probs).ranked_segments
+    assert [r['segment_id'] for r in ranked[:3]] == sorted(expected, key=expected.get, reverse=True)[:3]
+
+
+@pytest.fixture
+def grid():
+    """Small street grid with six sensors plus a detached pipe no sensor reaches."""
+    network = generate_synthetic_network(n_segments=60, n_sensors=6, seed=5)
+    network.add_segment(PipeSegment(
+        segment_id='ISOLATED', upstream_node='X1', downstream_node='X2', length_m=50.0,
+        diameter_mm=150.0, material='pvc', age_years=10, failure_count=0,
+        last_inspection=None, street_name='Detached Road', coordinates=None
+    ))
+    return network
+
+
+class TestDistanceIndex:
+    """The cached Dijkstra index must reproduce per-pair network searches."""
+
+    def test_segment_and_sensor_distances_match_pairwise_search(self, grid):
+        index = grid.get_distance_index()
+        for sensor_id in grid.sensors:
+            for segment_id in grid.segments:
+                assert grid.get_distance_to_segment(sensor_id, segment_id) == pytest.approx(
+                    reference_distance(grid, sensor_id, segment_id)
+                )
+
+            expected = []
+            for other_id, other in grid.sensors.items():
+                if other_id == sensor_id:
+                    continue
+                try:
+                    d = nx.shortest_path_length(grid.graph, grid.sensors[sensor_id].node_id, other.node_id, weight='length')
+                except nx.NetworkXNoPath:
+                    continue
+                if d <= 600:
+                    expected.append((other_id, d))
+            neighbors = grid.get_neighboring_sensors(sensor_id, max_distance=600)
+            assert [n for n, _ in neighbors] == [n for n, _ in sorted(expected, key=lambda x: x[1])]
+            assert [d for _, d in neighbors] == pytest.approx(sorted(d for _, d in expected))
+        assert grid.get_distance_index() is index
+        assert np.isinf(index.segment_distances[:, index.segment_index['ISOLATED']]).all()
+
+    def test_vectorized_posteriors_match_per_segment_loop(self, grid):
+        localizer = LeakLocalizer(decay_constant=150.0)
+        localizer.set_network(grid)
+        for seed in range(3):
+            assert_matches_reference(localizer, sensor_probabilities(grid, seed))
+
+    def test_topology_edits_reindex_on_set_network(self, grid):
+        localizer = LeakLocalizer(decay_constant=150.0)
+        localizer.set_network(grid)
+        probs = sensor_probabilities(grid, 1)
+        localizer.localize(probs)
+        before = grid.get_distance_index()
+        version = grid.topology_version
+
+        removed = next(iter(grid.segments))
+        grid.remove_segment(removed)
+        grid.add_segment(PipeSegment(
+            segment_id='NEW', upstream_node='N0', downstream_node='N_new', length_m=80.0,
+            diameter_mm=100.0, material='cast_iron', age_years=60, failure_count=3,
+            last_inspection=None, street_name='New Street', coordinates=None
+        ))
+        grid.add_sensor(SensorNode('S_new', 'N_new', 'pressure', 0.0, (0.0, 0.0)))
+        localizer.set_network(grid)
+
+        index = grid.get_distance_index()
+        assert index is not before and grid.topology_version > version
+        assert removed not in index.segment_index and 'NEW' in index.segment_index
+        assert grid.get_distance_to_segment('S_new', 'NEW') == pytest.approx(40.0)
+        assert_matches_reference(localizer, {**probs, 'S_new': 0.9})
+
+
+@pytest.fixture(scope='module')
+def city():
+    """Connected street grid of ~3000 pipes and 150 sensors."""
+    network = generate_synthetic_network(n_segments=3000, n_sensors=150, seed=11)
+    main = max(nx.connected_components(network.graph), key=len)
+    for segment_id, segment in list(network.segments.items()):
+        if segment.upstream_node not in main:
+            network.remove_segment(segment_id)
+    for sensor_id, sensor in list(network.sensors.items()):
+        if sensor.node_id not in main:
+            network.remove_sensor(sensor_id)
+    network.graph.remove_nodes_from([n for n in list(network.graph) if n not in main])
+    return network
+
+
+class TestHierarchicalLocalizer:
+    """Coarse-to-fine pruning must not change the flat ranking."""
+
+    def test_matches_flat_ranking_for_known_leaks(self, city):
+        flat = LeakLocalizer(decay_constant=300.0)
+        flat.set_network(city)
+        hierarchical = HierarchicalLocalizer(city, decay_constant=300.0, top_k_clusters=3, cluster_size=100)
+        index = city.get_distance_index()
+
+        # Leaks with at least two sensors close enough to fire
+        near = (index.segment_distances < 150).sum(axis=0) >= 2
+        leaks = np.random.default_rng(0).choice(np.asarray(index.segment_ids)[near], size=8, replace=False)
+
+        for leak in leaks:
+            distances = index.segment_distances[:, index.segment_index[leak]]
+            probs = {s: float(0.05 + 0.9 * np.exp(-distances[i] / 300.0)) for i, s in enumerate(index.sensor_ids)}
+
+            expected = flat.localize(probs)
+            result = hierarchical.localize(probs)
+            expected_ids = [r['segment_id'] for r in expected.ranked_segments]
+
+            assert [r['segment_id'] for r in result.ranked_segments] == expected_ids
+            assert leak in expected_ids
+            # Same relative weights; only the normalizing area differs
+            ratio = np.array([r['probability'] for r in result.ranked_segments]) / \
+                np.array([r['probability'] for r in expected.ranked_segments])
+            assert ratio == pytest.approx(np.full(len(ratio), ratio[0]), rel=1e-3)
+
+            refined = re.search(r"Refined \d+ of \d+ clusters \((\d+) of (\d+) segments\)", result.reasoning[-1])
+            assert int(refined.group(1)) < int(refined.group(2)) // 2
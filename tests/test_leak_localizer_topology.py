@@ -0,0 +1,142 @@
+"""
+Tests for the segment-level network topology used by the leak localizer
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.ai.leak_localizer import LeakLocalizer, NetworkTopology, PipeSegment
+
+
+class ReferenceTopology(NetworkTopology):
+    """Adjacency-dict neighbours and list-path BFS, as before the CSR index."""
+
+    def get_adjacent_segments(self, segment_id):
+        if segment_id not in self.segments:
+            return []
+        segment = self.segments[segment_id]
+        adjacent = []
+        for node in [segment.start_node, segment.end_node]:
+            for adj_seg in self.nodes.get(node, []):
+                if adj_seg != segment_id and adj_seg not in adjacent:
+                    adjacent.append(adj_seg)
+        return adjacent
+
+    def get_path_between_sensors(self, sensor1, sensor2, weighted=False):
+        if sensor1 not in self.sensor_locations or sensor2 not in self.sensor_locations:
+            return []
+        start = self.sensor_locations[sensor1]
+        end = self.sensor_locations[sensor2]
+        if start == end:
+            return [start]
+        visited = {start}
+        queue = [[start]]
+        while queue:
+            path = queue.pop(0)
+            for adjacent in self.get_adjacent_segments(path[-1]):
+                if adjacent == end:
+                    return path + [adjacent]
+                if adjacent not in visited:
+                    visited.add(adjacent)
+                    queue.append(path + [adjacent])
+        return []
+
+
+def build(topology_cls):
+    """5x5 street grid with sensors on every third pipe, plus a detached loop."""
+    topology = topology_cls()
+    count = 0
+
+    def add(start, end, length):
+        nonlocal count
+        sensors = [f"S{count}"] if count % 3 == 0 else []
+        topology.add_segment(PipeSegment(
+            segment_id=f"SEG{count}", pipe_id=f"P{count}", start_node=start, end_node=end,
+            length_m=length, diameter_mm=150, material="ductile_iron", age_years=20, sensors=sensors
+        ))
+        count += 1
+
+    for row in range(5):
+        for col in range(5):
+            if col < 4:
+                add(f"N{row}_{col}", f"N{row}_{col + 1}", 80.0 + 10 * ((row + col) % 3))
+            if row < 4:
+                add(f"N{row}_{col}", f"N{row + 1}_{col}", 100.0 + 15 * (col % 2))
+
+    # Detached loop with its own sensors
+    for i in range(4):
+        add(f"X{i}", f"X{(i + 1) % 4}", 60.0)
+    topology.add_segment(PipeSegment(
+        segment_id="LOOP_S", pipe_id="PL", start_node="X0", end_node="X2", length_m=90.0,
+        diameter_mm=100, material="pvc", age_years=5, sensors=["SX"]
+    ))
+    return topology
+
+
+@pytest.fixture
+def pair():
+    return build(NetworkTopology), build(ReferenceTopology)
+
+
+class TestCsrTopology:
+    """The CSR index and predecessor BFS must reproduce the adjacency-dict search."""
+
+    def test_adjacency_order_matches(self, pair):
+        topology, reference = pair
+        for segment_id in reference.segments:
+            assert topology.get_adjacent_segments(segment_id) == reference.get_adjacent_segments(segment_id)
+        assert topology.get_adjacent_segments("missing") == []
+
+    def test_paths_and_hop_distances_match_including_disconnected(self, pair):
+        topology, reference = pair
+        sensors = sorted(reference.sensor_locations)
+        unconnected = 0
+        for s1 in sensors:
+            for s2 in sensors:
+                expected = reference.get_path_between_sensors(s1, s2)
+                path = topology.get_path_between_sensors(s1, s2)
+                assert path == expected
+                if not expected:
+                    unconnected += 1
+                    assert topology.get_sensor_distance(s1, s2) == float("inf")
+                else:
+                    assert topology.get_sensor_distance(s1, s2) < float("inf")
+        # Every grid sensor against every loop sensor, both ways
+        loop = [s for s in sensors if reference.segments[reference.sensor_locations[s]].start_node.startswith("X")]
+        assert unconnected == 2 * len(loop) * (len(sensors) - len(loop))
+
+        assert topology.get_path_between_sensors("S0", "missing") == []
+
+    def test_paths_match_after_edits_and_precompute(self, pair):
+        topology, reference = pair
+        topology.precompute_sensor_paths()
+        assert topology.get_path_between_sensors("S0", "SX") == []
+
+        # Bridge the loop into the grid; cached searches must be dropped
+        for t in pair:
+            t.add_segment(PipeSegment(
+                segment_id="BRIDGE", pipe_id="PB", start_node="N4_4", end_node="X1", length_m=40.0,
+                diameter_mm=150, material="pvc", age_years=1, sensors=[]
+            ))
+        for s1 in ["S0", "S12", "SX"]:
+            for s2 in sorted(reference.sensor_locations):
+                assert topology.get_path_between_sensors(s1, s2) == reference.get_path_between_sensors(s1, s2)
+        assert topology.get_sensor_distance("S0", "SX") < float("inf")
+
+    def test_localization_candidates_match(self, pair):
+        topology, reference = pair
+        start = datetime(2026, 1, 1, 3, 0)
+        for primary in ["S0", "S12", "S27", "SX"]:
+            results = []
+            for t in pair:
+                localizer = LeakLocalizer(t)
+                localizer.record_pressure_drop(primary, start, 4.0)
+                for offset, sensor in enumerate(["S3", "S15", "S24", "SX"], start=1):
+                    localizer.record_pressure_drop(sensor, start + timedelta(seconds=offset), 2.0)
+                results.append(localizer.localize(primary, start, 4.0))
+
+            result, expected = results
+            assert set(result.probability_map) == set(expected.probability_map)
+            assert result.probability_map == pytest.approx(expected.probability_map)
+            assert result.segment_id == expected.segment_id
@@ -0,0 +1,171 @@
+"""
+Tests for snapshot-backed map layer endpoints
+"""
+
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.map_geojson_api import (
+    MapLayerService, SampleGeoJSONGenerator, get_map_layer_service, router, simplify_geometry,
+    tile_bbox
+)
+from src.events.event_management import CentralEventManager, EventSource, EventStatus, EventType
+
+
+class CountingGenerator(SampleGeoJSONGenerator):
+    calls = 0
+
+    @classmethod
+    def generate_full_geojson(cls, tenant_id):
+        cls.calls += 1
+        return super().generate_full_geojson(tenant_id)
+
+
+def make_client():
+    CountingGenerator.calls = 0
+    service = MapLayerService(generator=CountingGenerator)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_map_layer_service] = lambda: service
+    return TestClient(app), service
+
+
+class TestMapLayerService:
+    """Cached layer responses against the snapshot they are built from."""
+
+    def test_polling_uses_snapshot_and_etag(self):
+        client, service = make_client()
+        first = client.get("/tenants/lusaka/map/geojson")
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert client.get("/tenants/lusaka/map/geojson").content == first.content
+        assert client.get("/tenants/lusaka/map/geojson", headers={"If-None-Match": etag}).status_code == 304
+        client.get("/tenants/lusaka/map/dmas", params={"min_nrw": 40})
+        client.get("/tenants/lusaka/map/layers/sensors", params={"bbox": "28.2,-15.5,28.3,-15.4"})
+        assert CountingGenerator.calls == 1
+
+        leak = service.snapshot("lusaka", "leaks").features[0]
+        service.update_properties("lusaka", "leaks", leak["id"], {"status": "repaired"})
+        updated = client.get("/tenants/lusaka/map/geojson", headers={"If-None-Match": etag})
+        assert updated.status_code == 200 and updated.headers["etag"] != etag
+        leaks = updated.json()["layers"]["leaks"]["features"]
+        assert next(f for f in leaks if f["id"] == leak["id"])["properties"]["status"] == "repaired"
+
+        dmas = client.get("/tenants/lusaka/map/dmas", params={"min_nrw": 40}).json()
+        expected = sorted(
+            (f for f in service.snapshot("lusaka", "dmas").features if f["properties"]["nrw_percent"] >= 40),
+            key=lambda f: f["properties"]["nrw_percent"], reverse=True
+        )
+        assert [f["id"] for f in dmas["geojson"]["features"]] == [f["id"] for f in expected]
+        assert dmas["count"] == len(expected)
+
+    def test_tiles_and_viewports_select_intersecting_features(self):
+        client, service = make_client()
+        z, x, y = 12, 2369, 2225  # Tile over central Lusaka
+        west, south, east, north = tile_bbox(z, x, y)
+        tile = client.get(f"/tenants/lusaka/map/tiles/dmas/{z}/{x}/{y}").json()
+
+        expected = []
+        for feature in service.snapshot("lusaka", "dmas").features:
+            ring = feature["geometry"]["coordinates"][0]
+            lngs, lats = [p[0] for p in ring], [p[1] for p in ring]
+            if min(lngs) <= east and max(lngs) >= west and min(lats) <= north and max(lats) >= south:
+                expected.append(feature["id"])
+        assert expected and [f["id"] for f in tile["features"]] == expected
+        for feature in tile["features"]:
+            ring = feature["geometry"]["coordinates"][0]
+            assert ring[0] == ring[-1] and len(ring) >= 4
+            assert all(round(c, 4) == c for p in ring for c in p)
+
+        viewport = client.get(
+            "/tenants/lusaka/map/layers/dmas", params={"bbox": f"{west},{south},{east},{north}"}
+        ).json()
+        assert [f["id"] for f in viewport["geojson"]["features"]] == expected
+        assert client.get("/tenants/lusaka/map/layers/pipes").status_code == 404
+        assert client.get("/tenants/lusaka/map/layers/dmas", params={"bbox": "1,2"}).status_code == 400
+
+    def test_simplify_geometry_collapses_close_vertices(self):
+        ring = [[28.0, -15.0], [28.00001, -15.00001], [28.1, -15.0], [28.1, -15.1], [28.0, -15.0]]
+        simplified = simplify_geometry({"type": "Polygon", "coordinates": [ring]}, 3)
+        assert simplified["coordinates"] == [[[28.0, -15.0], [28.1, -15.0], [28.1, -15.1], [28.0, -15.0]]]
+        tiny = simplify_geometry({"type": "Polygon", "coordinates": [ring]}, 0)
+        assert len(tiny["coordinates"][0]) == 4
+        assert json.dumps(simplify_geometry({"type": "Point", "coordinates": [28.123456, -15.5]}, 2)) == \
+            '{"type": "Point", "coordinates": [28.12, -15.5]}'
+
+    def test_unknown_bounds_layer_is_404(self):
+        class NoDmaGenerator(SampleGeoJSONGenerator):
+            @classmethod
+            def generate_full_geojson(cls, tenant_id):
+                layers = super().generate_full_geojson(tenant_id)
+                del layers["dmas"]
+                return layers
+
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_map_layer_service] = lambda: MapLayerService(generator=NoDmaGenerator)
+        assert TestClient(app).get("/tenants/lusaka/map/bounds").status_code == 404
+
+        client, _ = make_client()
+        assert client.get("/tenants/lusaka/map/bounds").json()["zoom"] == 12
+
+    def test_snapshots_expire_after_ttl(self, monkeypatch):
+        CountingGenerator.calls = 0
+        service = MapLayerService(generator=CountingGenerator, snapshot_ttl_seconds=60)
+        now = [1000.0]
+        monkeypatch.setattr("src.api.map_geojson_api.time.monotonic", lambda: now[0])
+
+        versions = service.versions("lusaka")
+        now[0] += 60
+        assert service.versions("lusaka") == versions and CountingGenerator.calls == 1
+        now[0] += 1
+        assert min(service.versions("lusaka")) > max(versions) and CountingGenerator.calls == 2
+
+        service.refresh("lusaka")
+        service.layers("lusaka")
+        assert CountingGenerator.calls == 3
+
+
+class TestEventManagerLeakLayer:
+    """Leak and burst events from the central event manager drive the leak layer."""
+
+    def test_events_are_mirrored_onto_the_leak_layer(self):
+        client, service = make_client()
+        cem = CentralEventManager()
+        source = EventSource(source_type="sensor", source_id="S1")
+        before = cem.create_event(EventType.LEAK, "dma-matero", {"latitude": -15.39, "longitude": 28.25},
+                                  source, auto_classify=False)
+        cem.create_event(EventType.LEAK, "dma-matero", {}, source, auto_classify=False)  # No position
+        service.connect_event_manager(cem, "lusaka")
+
+        # Events raised before connecting are replayed into the snapshot
+        leaks = service.snapshot("lusaka", "leaks")
+        assert before.event_id in leaks.positions and len(leaks.features) == 15
+
+        burst = cem.create_event(EventType.BURST, "dma-chilenje", {"latitude": -15.45, "longitude": 28.3},
+                                 source, auto_classify=False)
+        cem.create_event(EventType.PRESSURE_ANOMALY, "dma-chilenje", {"latitude": -15.45, "longitude": 28.3},
+                         source, auto_classify=False)
+        feature = leaks.features[leaks.positions[burst.event_id]]
+        assert feature["geometry"]["coordinates"] == [28.3, -15.45]
+        assert feature["properties"]["status"] == "active" and feature["properties"]["event_type"] == "burst"
+        assert len(leaks.features) == 16
+
+        cem.acknowledge_event(burst.event_id, "ops")
+        assert leaks.features[leaks.positions[burst.event_id]]["properties"]["status"] == "assigned"
+        version = leaks.version
+        polled = client.get("/tenants/lusaka/map/leaks", params={"status": "assigned"}).json()
+        assert burst.event_id in [f["id"] for f in polled["geojson"]["features"]]
+
+        cem.update_event_status(burst.event_id, EventStatus.RESOLVED, "ops")
+        resolved = leaks.features[leaks.positions[burst.event_id]]["properties"]
+        assert resolved["status"] == "repaired" and resolved["flow_rate_lph"] == 0
+        cem.update_event_status(before.event_id, EventStatus.FALSE_ALARM, "ops")
+        assert before.event_id not in leaks.positions and leaks.version > version
+
+        # A rebuilt snapshot keeps the event markers
+        service.refresh("lusaka")
+        rebuilt = service.snapshot("lusaka", "leaks")
+        assert burst.event_id in rebuilt.positions and before.event_id not in rebuilt.positions
@@ -0,0 +1,103 @@
+"""
+Tests for the vectorized batch MNF engine
+"""
+
+import statistics
+
+import numpy as np
+import pandas as pd
+
+from src.ai.iwa_water_balance import DMAInfrastructure, IWAWaterBalanceCalculator
+from src.nrw.mnf_batch import MNFBatchEngine
+
+
+def make_flows(n_dma=6, days=50, seed=3):
+    rng = np.random.default_rng(seed)
+    stamps = pd.date_range("2026-01-01", periods=days * 96, freq="15min")
+    frames = []
+    for i in range(n_dma):
+        flows = rng.uniform(20, 30, len(stamps))
+        flows[(stamps.day % 7 == i) & (stamps.hour < 2)] *= 1.6  # Occasional elevated nights
+        keep = rng.random(len(stamps)) > 0.1 * (i % 3)          # Gaps lower completeness
+        frames.append(pd.DataFrame({"dma_id": f"D{i}", "timestamp": stamps[keep], "flow_m3_hour": flows[keep]}))
+    return pd.concat(frames, ignore_index=True).sample(frac=1, random_state=seed)
+
+
+def reference_nights(engine, flow_data):
+    """Per-DMA, per-night loop with the MNFAnalyzer.record_mnf window rules"""
+    nights = {}
+    for row in flow_data.itertuples(index=False):
+        local = row.timestamp + pd.Timedelta(hours=engine.timezone_offset_hours)
+        if engine.mnf_start_hour <= local.hour < engine.mnf_end_hour:
+            nights.setdefault((row.dma_id, local.normalize()), []).append(row.flow_m3_hour)
+    return nights
+
+
+def reference_baseline(flows):
+    """MNFAnalyzer.compute_baseline statistics"""
+    if len(flows) < 7:
+        return None
+    mean_flow = statistics.mean(flows)
+    std_dev = statistics.stdev(flows)
+    filtered = [f for f in flows if abs(f - mean_flow) <= 2 * std_dev] or flows
+    return statistics.mean(filtered), statistics.stdev(filtered) if len(filtered) > 1 else 0, len(filtered)
+
+
+class TestMNFBatchEngine:
+    """Grouped results against per-DMA loops."""
+
+    def test_nightly_and_baselines_match_reference(self):
+        flow_data = make_flows()
+        engine = MNFBatchEngine(mnf_start_hour=2, mnf_end_hour=4, timezone_offset_hours=2)
+        nights = engine.rolling_baselines(engine.nightly(flow_data), window_days=30)
+        reference = reference_nights(engine, flow_data)
+
+        assert len(nights) == len(reference)
+        valid = {}
+        for row in nights.itertuples(index=False):
+            flows = reference[(row.dma_id, row.night)]
+            assert row.reading_count == len(flows)
+            assert np.isclose(row.mnf_m3_hour, statistics.mean(flows))
+            assert row.min_m3_hour == min(flows) and row.max_m3_hour == max(flows)
+            assert row.is_valid == (min(100, len(flows) / 8 * 100) >= 75)
+
+            prior = [v for night, v in valid.get(row.dma_id, []) if (row.night - night).days <= 30]
+            expected = reference_baseline(prior)
+            if expected is None:
+                assert np.isnan(row.baseline_m3_hour)
+            else:
+                assert np.allclose([row.baseline_m3_hour, row.baseline_std], expected[:2])
+                assert row.baseline_samples == expected[2]
+            if row.is_valid:
+                valid.setdefault(row.dma_id, []).append((row.night, row.mnf_m3_hour))
+
+    def test_analyze_scores_severity_and_persistence(self):
+        stamps = pd.date_range("2026-01-01", periods=40 * 96, freq="15min")
+        flows = np.full(len(stamps), 10.0) + np.tile([0.0, 0.2], len(stamps) // 2)
+        flows[stamps >= "2026-02-05"] *= np.where(stamps[stamps >= "2026-02-05"] < "2026-02-07", 1.2, 1.6)
+        flow_data = pd.DataFrame({"dma_id": "D1", "timestamp": stamps, "flow_m3_hour": flows})
+
+        report = MNFBatchEngine(mnf_start_hour=2, mnf_end_hour=4).analyze(flow_data).set_index("night")
+        assert report["severity"].loc[:"2026-02-04"].isna().all()
+        assert list(report["severity"].loc["2026-02-05":"2026-02-08"]) == ["warning", "warning", "critical", "critical"]
+        assert list(report["consecutive_nights"].loc["2026-02-04":"2026-02-08"]) == [0, 1, 2, 3, 4]
+
+    def test_iwa_batch_matches_single_dma(self):
+        flow_data = make_flows(n_dma=3, days=5)
+        infrastructure = {
+            f"D{i}": DMAInfrastructure(dma_id=f"D{i}", mains_length_km=10, number_of_connections=500 * (i + 1),
+                                       average_operating_pressure_m=30)
+            for i in range(3)
+        }
+        calculator = IWAWaterBalanceCalculator()
+        batch = calculator.calculate_mnf_batch(flow_data, infrastructure)
+
+        for dma_id, infra in infrastructure.items():
+            single = calculator.calculate_mnf_from_flow_data(
+                flow_data[flow_data["dma_id"] == dma_id].drop(columns="dma_id"), infra
+            )
+            subset = flow_data[flow_data["dma_id"] == dma_id]
+            night = subset[subset["timestamp"].dt.hour.isin(range(1, 4))]["flow_m3_hour"]
+            assert np.isclose(single["mnf_m3_hour"], night.mean())
+            assert np.isclose(single["mnf_percent_of_daily"], night.mean() / subset["flow_m3_hour"].mean() * 100)
+            assert single == batch.loc[dma_id].to_dict()
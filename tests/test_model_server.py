@@ -0,0 +1,132 @@
+"""
+Tests for the local model server
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.ai.anomaly.detector import AnomalyDetectorManager, IsolationForestDetector
+from src.ai.model_server import ModelClient, ModelServer, ModelServerConfig
+
+
+@pytest.fixture
+def served_detector(tmp_path):
+    rng = np.random.default_rng(0)
+    detector = IsolationForestDetector(n_estimators=50).fit(
+        rng.normal(size=(500, 4)), [f"f{i}" for i in range(4)], 'DMA001'
+    )
+    detector.save(str(tmp_path / 'DMA001_latest.joblib'))
+
+    server = ModelServer(ModelServerConfig(
+        socket_path=str(tmp_path / 'models.sock'),
+        anomaly_model_dir=str(tmp_path),
+        probability_model_dir=str(tmp_path)
+    ))
+    server.start()
+    yield detector, ModelClient(server.config.socket_path), server
+    server.stop()
+
+
+class TestModelServer:
+    """Served results must match in-process inference."""
+
+    def test_concurrent_requests_match_local_predictions(self, served_detector):
+        detector, client, _ = served_detector
+        X = np.random.default_rng(1).normal(size=(40, 4))
+        expected = [detector.predict(x, f"S{i}").anomaly_score for i, x in enumerate(X)]
+
+        scores = [None] * len(X)
+
+        def work(i):
+            scores[i] = client.detect_anomaly('DMA001', f"S{i}", X[i]).anomaly_score
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(len(X))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert scores == pytest.approx(expected)
+        assert client.stats()['rows'] == len(X)
+
+    def test_unknown_dma_returns_none(self, served_detector):
+        _, client, _ = served_detector
+        assert client.detect_anomaly('NOPE', 'S1', np.zeros(4)) is None
+
+    def test_traversal_ids_never_reach_the_loader(self, served_detector, tmp_path):
+        # DMA001_latest.joblib sits one level above this server's model dir
+        (tmp_path / 'models').mkdir()
+        server = ModelServer(ModelServerConfig(
+            socket_path=str(tmp_path / 'jail.sock'),
+            anomaly_model_dir=str(tmp_path / 'models'),
+            probability_model_dir=str(tmp_path / 'models')
+        ))
+        server.start()
+        try:
+            client = ModelClient(server.config.socket_path)
+            for dma_id in ('../DMA001', '..', 'models/../../DMA001', '/tmp/DMA001', 'DMA\x00'):
+                assert client.detect_anomaly(dma_id, 'S1', np.zeros(4)) is None
+            assert client.stats()['loaded_models'] == []
+        finally:
+            server.stop()
+
+        assert server._model_path('anomaly', '../DMA001') is None
+        assert server._model_path('anomaly', 'DMA-7.b') == (tmp_path / 'models' / 'DMA-7.b_latest.joblib').resolve()
+
+    def test_cold_load_does_not_block_resident_models(self, served_detector):
+        detector, client, server = served_detector
+        client.detect_anomaly('DMA001', 'S0', np.zeros(4))  # DMA001 resident
+
+        def slow_read(kind, dma_id):
+            time.sleep(0.5)
+            return detector
+
+        server._read_model = slow_read
+        cold = threading.Thread(target=lambda: ModelClient(server.config.socket_path).detect_anomaly(
+            'COLD', 'S1', np.zeros(4)))
+        cold.start()
+        time.sleep(0.05)
+
+        started = time.perf_counter()
+        assert client.detect_anomaly('DMA001', 'S2', np.zeros(4)) is not None
+        assert time.perf_counter() - started < 0.3
+        cold.join()
+        assert 'anomaly:COLD' in client.stats()['loaded_models']
+
+
+class TestAnomalyDetectorManager:
+    """The manager scores through the server and falls back in-process."""
+
+    def test_served_and_in_process_results_agree(self, served_detector, tmp_path):
+        detector, client, _ = served_detector
+        X = np.random.default_rng(2).normal(size=(5, 4))
+        ids = [f"S{i}" for i in range(5)]
+
+        served = AnomalyDetectorManager(str(tmp_path), model_client=client)
+        local = AnomalyDetectorManager(str(tmp_path), use_model_server=False)
+        down = AnomalyDetectorManager(str(tmp_path), model_client=ModelClient(str(tmp_path / 'gone.sock')))
+
+        expected = [r.anomaly_score for r in detector.predict_batch(X, ids)]
+        for manager in (served, local, down):
+            assert [r.anomaly_score for r in manager.detect_anomalies('DMA001', ids, X)] == pytest.approx(expected)
+        assert served.detectors == {} and 'DMA001' in local.detectors and 'DMA001' in down.detectors
+        assert client.stats()['rows'] == len(X)
+
+    def test_server_with_other_model_dir_is_not_used(self, served_detector, tmp_path):
+        _, client, _ = served_detector
+        rng = np.random.default_rng(3)
+        other = tmp_path / 'tenant-b'
+        own = AnomalyDetectorManager(str(other), model_client=client)
+        trained = own.train_detector('DMA001', rng.normal(2, 1, size=(300, 4)), [f"f{i}" for i in range(4)])
+        X = rng.normal(size=(5, 4))
+        ids = [f"S{i}" for i in range(5)]
+
+        results = own.detect_anomalies('DMA001', ids, X)
+        assert [r.anomaly_score for r in results] == pytest.approx(
+            [r.anomaly_score for r in trained.predict_batch(X, ids)]
+        )
+        assert client.stats()['rows'] == 0
+        assert client.model_dirs()['anomaly'] == str(tmp_path.resolve())
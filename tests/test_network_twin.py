@@ -0,0 +1,243 @@
+"""
+Tests for the digital twin gradient hydraulic solver
+"""
+
+import numpy as np
+import pytest
+
+from src.digital_twin.network_twin import (
+    DigitalTwinEngine, GradientHydraulicSolver, NetworkLink, NetworkNode,
+    generate_synthetic_twin
+)
+from src.digital_twin.calibration import CalibrationConfig, DemandCalibrator
+from src.digital_twin.scenario_engine import ScenarioRunner, WhatIfScenario
+
+
+def hazen_williams(length, diameter_mm, roughness, flow):
+    """Head loss (m) for a flow in m³/s, computed by hand"""
+    d = diameter_mm / 1000
+    return 10.67 * length * abs(flow) ** 1.852 / (roughness ** 1.852 * d ** 4.87) * np.sign(flow)
+
+
+def make_solver(node_types, pipes, **kwargs):
+    node_ids = list(node_types)
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    return GradientHydraulicSolver(
+        node_ids=node_ids,
+        fixed_mask=np.array([t == "reservoir" for t in node_types.values()]),
+        link_ids=[p[0] for p in pipes],
+        start_idx=np.array([index[p[1]] for p in pipes]),
+        end_idx=np.array([index[p[2]] for p in pipes]),
+        length=np.array([p[3] for p in pipes], dtype=float),
+        diameter_mm=np.array([p[4] for p in pipes], dtype=float),
+        roughness=np.array([p[5] for p in pipes], dtype=float),
+        **kwargs
+    )
+
+
+class TestGradientHydraulicSolver:
+    """Steady-state solutions on networks small enough to check by hand."""
+
+    def test_series_pipes_match_hand_calculation(self):
+        solver = make_solver(
+            {"R": "reservoir", "A": "junction", "B": "junction"},
+            [("P1", "R", "A", 1000, 300, 130), ("P2", "A", "B", 500, 200, 120)]
+        )
+        solution = solver.solve(np.array([0.0, 0.02, 0.01]), np.array([100.0, 0.0, 0.0]))
+
+        assert solution.converged
+        np.testing.assert_allclose(solution.flows, [0.03, 0.01], rtol=1e-9)
+        head_a = 100.0 - hazen_williams(1000, 300, 130, 0.03)
+        head_b = head_a - hazen_williams(500, 200, 120, 0.01)
+        np.testing.assert_allclose(solution.heads, [100.0, head_a, head_b], rtol=1e-9)
+
+    def test_identical_parallel_pipes_split_flow(self):
+        solver = make_solver(
+            {"R": "reservoir", "J": "junction"},
+            [("A", "R", "J", 800, 250, 130), ("B", "J", "R", 800, 250, 130)]
+        )
+        solution = solver.solve(np.array([0.0, 0.08]), np.array([50.0, 0.0]))
+
+        np.testing.assert_allclose(solution.flows, [0.04, -0.04], rtol=1e-9)
+        assert solution.heads[1] == pytest.approx(50.0 - hazen_williams(800, 250, 130, 0.04))
+
+    def test_two_reservoirs_feed_by_head_difference(self):
+        solver = make_solver(
+            {"R1": "reservoir", "R2": "reservoir"},
+            [("P", "R1", "R2", 1000, 300, 130)]
+        )
+        solution = solver.solve(np.zeros(2), np.array([110.0, 100.0]))
+
+        assert hazen_williams(1000, 300, 130, solution.flows[0]) == pytest.approx(10.0, rel=1e-9)
+
+    def test_looped_network_satisfies_continuity_and_energy(self):
+        pipes = [
+            ("1", "R", "A", 500, 400, 130), ("2", "A", "B", 800, 250, 120),
+            ("3", "A", "C", 600, 200, 110), ("4", "B", "D", 700, 200, 140),
+            ("5", "C", "D", 900, 150, 100)
+        ]
+        solver = make_solver(
+            {"R": "reservoir", "A": "junction", "B": "junction", "C": "junction", "D": "junction"},
+            pipes
+        )
+        demands = np.array([0.0, 0.02, 0.03, 0.01, 0.04])
+        solution = solver.solve(demands, np.array([80.0, 0, 0, 0, 0]))
+
+        inflow = (np.bincount(solver.end_idx, solution.flows, 5)
+                  - np.bincount(solver.start_idx, solution.flows, 5))
+        np.testing.assert_allclose(inflow[1:], demands[1:], atol=1e-10)
+        expected = [hazen_williams(p[3], p[4], p[5], q) for p, q in zip(pipes, solution.flows)]
+        np.testing.assert_allclose(solution.head_losses, expected, rtol=1e-8)
+        # Loop A-B-D-C-A has zero net head loss
+        h = solution.head_losses
+        assert h[1] + h[3] - h[4] - h[2] == pytest.approx(0.0, abs=1e-9)
+
+    def test_closed_pipe_isolates_downstream_junction(self):
+        solver = make_solver(
+            {"R": "reservoir", "A": "junction", "B": "junction"},
+            [("P1", "R", "A", 1000, 300, 130), ("P2", "A", "B", 500, 200, 120)],
+            open_mask=np.array([True, False])
+        )
+        solution = solver.solve(np.array([0.0, 0.02, 0.01]), np.array([100.0, 0.0, 0.0]))
+
+        assert np.isnan(solution.heads[2])
+        np.testing.assert_allclose(solution.flows, [0.02, 0.0], rtol=1e-9)
+
+    def test_warm_start_needs_fewer_iterations(self):
+        solver = make_solver(
+            {"R": "reservoir", "A": "junction", "B": "junction", "C": "junction"},
+            [("1", "R", "A", 500, 300, 130), ("2", "A", "B", 400, 200, 120),
+             ("3", "B", "C", 400, 150, 120), ("4", "A", "C", 600, 200, 110)]
+        )
+        heads = np.array([60.0, 0, 0, 0])
+        cold = solver.solve(np.array([0.0, 0.01, 0.02, 0.015]), heads)
+        warm = solver.solve(np.array([0.0, 0.011, 0.021, 0.016]), heads, cold.flows)
+
+        assert warm.converged
+        assert warm.iterations < cold.iterations
+
+
+class TestDigitalTwinSimulation:
+    """Engine-level extended-period simulation on top of the solver."""
+
+    def test_timestep_reports_solved_pressures(self):
+        twin = DigitalTwinEngine()
+        twin.nodes.clear()
+        twin.links.clear()
+        twin.nodes["R"] = NetworkNode("R", "Source", 0, 0, 100, 0, "reservoir", head=140)
+        twin.nodes["J"] = NetworkNode("J", "Junction", 0, 0, 90, 20.0)
+        twin.links["P"] = NetworkLink("P", "Main", "R", "J", 1000, 300, 130)
+        twin.invalidate_hydraulics()
+
+        result = twin._simulate_timestep(7)  # 1.2x demand multiplier
+
+        demand = result["node_demands"]["J"]
+        head = 140 - hazen_williams(1000, 300, 130, demand / 1000)
+        assert result["link_flows"]["P"] == pytest.approx(demand)
+        assert result["node_pressures"]["J"] == pytest.approx((head - 90) / 10.2)
+        assert result["solver"]["converged"]
+
+    def test_sample_network_eps_converges(self):
+        twin = DigitalTwinEngine()
+        results = twin.run_hydraulic_simulation(24)
+
+        assert all(ts["solver"]["converged"] for ts in results["timesteps"])
+        assert not any(w["type"] == "solver_not_converged" for w in results["warnings"])
+
+    def test_results_are_arrays_with_lazy_json_and_bounded_history(self, tmp_path):
+        twin = DigitalTwinEngine(history_limit=1, history_spill_dir=str(tmp_path))
+        first = twin.run_hydraulic_simulation(6)
+        latest = twin.run_hydraulic_simulation(6)
+
+        assert latest.pressures.shape == (6, len(twin.nodes))
+        assert latest.flows.shape == (6, len(twin.links))
+        step = latest.to_dict()["timesteps"][5]
+        assert step["node_pressures"] == {n.node_id: n.pressure for n in twin.nodes.values()}
+        assert latest["summary"]["min_pressure"] == pytest.approx(latest.pressures.min())
+        low = [w for w in latest["warnings"] if w["type"] == "low_pressure"]
+        assert len(low) == int(((latest.pressures < 1.5) & latest.junction_mask).sum())
+
+        assert len(twin.simulation_history) == 1
+        assert twin.simulation_history.spilled_ids == [first.simulation_id]
+        spilled = twin.simulation_history.get(first.simulation_id)
+        assert isinstance(spilled.pressures, np.memmap)
+        np.testing.assert_array_equal(spilled.flows, first.flows)
+        assert spilled.summary == first.summary
+
+    def test_leak_scenario_leaves_live_state_and_drops_cached_solver(self):
+        twin = DigitalTwinEngine()
+        twin.run_hydraulic_simulation(1)
+        link_id = "P_CBD_KAMWALA"
+        pressures = {n.node_id: n.pressure for n in twin.nodes.values()}
+        flows = {l.link_id: l.flow_rate for l in twin.links.values()}
+
+        impact = twin.simulate_leak_scenario(link_id, 20.0)
+
+        assert impact["affected_nodes"]
+        end_node = twin.links[link_id].end_node
+        assert end_node in {a["node_id"] for a in impact["affected_nodes"]}
+        assert {n.node_id: n.pressure for n in twin.nodes.values()} == pressures
+        assert {l.link_id: l.flow_rate for l in twin.links.values()} == flows
+        assert twin._solver is None and twin._last_flows is None
+
+
+class TestScenarioRunner:
+    """Batched what-if evaluation against a frozen snapshot."""
+
+    def test_pool_matches_in_process_without_touching_live_state(self):
+        twin = DigitalTwinEngine()
+        live = {node_id: (n.pressure, n.actual_demand, n.head) for node_id, n in twin.nodes.items()}
+        scenarios = [WhatIfScenario("close", closed_links=("P_CBD_KAMWALA",))] + [
+            WhatIfScenario.pipe_burst(l.link_id, l.start_node, l.end_node, 5.0)
+            for l in twin.links.values()
+        ]
+
+        with ScenarioRunner.from_engine(twin, max_workers=1) as runner:
+            local = runner.run(scenarios, include_flows=True)
+        with ScenarioRunner.from_engine(twin, max_workers=2, chunk_size=4) as runner:
+            pooled = runner.run(scenarios, include_flows=True)
+
+        for a, b in zip(local, pooled):
+            assert a.scenario_id == b.scenario_id
+            np.testing.assert_allclose(a.pressure_delta, b.pressure_delta)
+            np.testing.assert_allclose(a.link_flow_delta, b.link_flow_delta)
+        assert set(local[0].unsupplied_nodes) == {"J_KAMWALA", "J_INDUSTRIAL"}
+        assert all(o.pressure_delta.max() <= 1e-9 for o in local[1:])  # Bursts only lower pressure
+        assert live == {node_id: (n.pressure, n.actual_demand, n.head) for node_id, n in twin.nodes.items()}
+
+    def test_burst_ranking_recovers_pipe_and_rate(self):
+        runner = ScenarioRunner.from_engine(generate_synthetic_twin(400), max_workers=1)
+        sensors = list(runner.snapshot.node_ids[::4])
+        truth = runner.burst_scenarios(6.0, ["P_8_11_E"])[0]
+        observed = runner.run([truth], observe=sensors)[0]
+
+        ranked = runner.rank_burst_candidates(dict(zip(observed.node_ids, observed.pressure)), top_k=3)
+
+        assert ranked[0]["link_id"] == "P_8_11_E"
+        assert ranked[0]["leak_rate_lps"] == pytest.approx(6.0, rel=0.05)
+
+
+class TestDemandCalibrator:
+    """Incremental demand calibration against observed pressures."""
+
+    def test_recovers_zone_multiplier_and_skips_resolve_within_tolerance(self):
+        twin = generate_synthetic_twin(400)
+        zones = {n: ("west" if int(n.split("_")[2]) < 10 else "east")
+                 for n in twin.nodes if n.startswith("J_")}
+        calibrator = DemandCalibrator(twin, groups=zones, config=CalibrationConfig(tolerance_bar=1e-4))
+        truth = np.array([1.5 if g == "west" else 1.0 for g in calibrator.group_names])
+        field = calibrator.solver.solve(calibrator._demands(8, truth) / 1000, calibrator.snapshot.fixed_heads)
+        pressure = calibrator._pressures(field)
+        observed = {n: float(pressure[calibrator.node_index[n]]) for n in list(twin.nodes)[::10]}
+
+        first = calibrator.update(observed, hour=8)
+        again = calibrator.update(observed, hour=8)
+
+        assert first.resimulated and first.converged
+        np.testing.assert_allclose(calibrator.multipliers, truth, rtol=0.01)
+        assert not again.resimulated and again.iterations == 0
+        calibrator.apply_to_engine()
+        node_id = next(n for n, g in zones.items() if g == "west")
+        assert twin.nodes[node_id].actual_demand == pytest.approx(
+            twin.nodes[node_id].base_demand * DigitalTwinEngine.DEMAND_PATTERN[8] * 1.5, rel=0.01
+        )
@@ -14,7 +14,7 @@ from src.public_engagement.models import (
 )
 from src.public_engagement.services import (
     PublicReportService, DuplicateDetectionService, SpamDetectionService,
-    AnalyticsService, ReportCreateRequest, SpamCheckResult
+    AnalyticsService, ReportCreateRequest, SpamCheckResult, SlidingWindowCounter
 )
 
 
@@ -188,6 +188,63 @@ class TestDuplicateDetectionService:
             )
         
         assert len(duplicates) == 0
+    
+    def test_index_is_per_tenant_and_absorbs_repeat_reports(self):
+        """Indexed lookups stay within the tenant; linked duplicates are not re-indexed"""
+        now = datetime.utcnow()
+        other_tenant = {
+            'id': 'other', 'ticket': 'TKT-OTHER1', 'tenant_id': 'other',
+            'latitude': -15.4167, 'longitude': 28.2833, 'category': 'burst',
+            'created_at': now.isoformat()
+        }
+        service = PublicReportService(duplicate_service=DuplicateDetectionService([other_tenant]))
+        
+        for i in range(50):
+            service.create_report(ReportCreateRequest(
+                tenant_id='test',
+                category='burst',
+                latitude=-15.4167 + i * 1e-6,
+                longitude=28.2833,
+                reporter_ip=f'10.0.0.{i}',
+                description=f'Water gushing from the road, report {i}'
+            ))
+        
+        duplicates = service.duplicate_service.find_duplicates(
+            tenant_id='test', latitude=-15.4167, longitude=28.2833,
+            category='burst', created_at=now
+        )
+        assert len(duplicates) == 1
+        assert duplicates[0].ticket != 'TKT-OTHER1'
+        assert len(service.duplicate_service.index) == 2
+    
+    def test_quarantined_reports_are_not_indexed_as_masters(self):
+        """A quarantined report must not absorb the genuine reports that follow it"""
+        service = PublicReportService()
+        
+        service.create_report(ReportCreateRequest(
+            tenant_id='test',
+            category='burst',
+            latitude=-15.4167,
+            longitude=28.2833,
+            reporter_ip='10.0.0.1',
+            description='Visit www.example.com for free stuff'
+        ))
+        assert len(service.duplicate_service.index) == 0
+        
+        service.create_report(ReportCreateRequest(
+            tenant_id='test',
+            category='burst',
+            latitude=-15.4167,
+            longitude=28.2833,
+            reporter_ip='10.0.0.2',
+            description='Water gushing from the road'
+        ))
+        duplicates = service.duplicate_service.find_duplicates(
+            tenant_id='test', latitude=-15.4167, longitude=28.2833,
+            category='burst', created_at=datetime.utcnow()
+        )
+        assert len(duplicates) == 1
+        assert len(service.duplicate_service.index) == 1
 
 
 class TestSpamDetectionService:
@@ -277,6 +334,17 @@ class TestSpamDetectionService:
         result = service.check_report(request)
         
         # Check if flagged (depends on limit setting)
+    
+    def test_sliding_window_counter_expires_old_hits(self):
+        """Counts cover only the trailing window and idle keys are dropped"""
+        counter = SlidingWindowCounter(window_seconds=60)
+        
+        for t in range(0, 120, 10):
+            counter.add('ip', 1000.0 + t)
+        
+        assert counter.count('ip', 1110.0) == 7  # Hits at 1050..1110
+        assert counter.count('ip', 1300.0) == 0
+        assert 'ip' not in counter
 
 
 class TestAnalyticsService:
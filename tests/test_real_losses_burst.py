@@ -0,0 +1,260 @@
+"""
+Tests for streaming burst detection against the per-reading rules it replaces
+"""
+
+import math
+import random
+import statistics
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.real_losses.burst_detector import (
+    BurstDetector, BurstSeverity, FlowReading, PressureReading, occurrence_rounds
+)
+
+# Sudden rules only: the CUSUM has no counterpart in the per-reading rules
+NO_CUSUM = {"pressure_cusum_threshold": 1e9, "flow_cusum_threshold": 1e9}
+
+
+class ReferenceRules:
+    """List histories and mean baselines, as _check_pressure_burst / _check_flow_burst did."""
+
+    def __init__(self, baselines=None):
+        self.history = {}
+        self.baselines = dict(baselines or {})
+
+    def _push(self, key, timestamp, value):
+        history = self.history.setdefault(key, [])
+        history.append((timestamp, value))
+        if len(history) < 3:
+            return None
+        baseline = self.baselines.get(key)
+        if baseline is None:
+            recent = [v for _, v in history[-20:]]
+            if len(recent) < 10:
+                return None
+            baseline = self.baselines[key] = statistics.mean(recent)
+        return baseline
+
+    def pressure(self, sensor_id, timestamp, pressure):
+        baseline = self._push(sensor_id, timestamp, pressure)
+        if baseline is None or baseline - pressure < 0.5:
+            return None
+        drop = baseline - pressure
+        recent = self.history[sensor_id][-5:]
+        span = (recent[-1][0] - recent[0][0]).total_seconds() / 60
+        rate = (recent[0][1] - recent[-1][1]) / span if span > 0 else 0
+        if drop > 1.5 or rate > 0.3:
+            severity = BurstSeverity.CATASTROPHIC
+        elif drop > 1.0 or rate > 0.2:
+            severity = BurstSeverity.MAJOR
+        elif drop > 0.7:
+            severity = BurstSeverity.CONFIRMED
+        else:
+            severity = BurstSeverity.SUSPECTED
+        return (sensor_id, severity, round(drop, 3), round(rate, 3), round(10 * math.sqrt(drop), 1))
+
+    def flow(self, dma_id, timestamp, flow):
+        baseline = self._push(dma_id, timestamp, flow)
+        if baseline is None:
+            return None
+        increase = flow - baseline
+        pct = increase / baseline * 100 if baseline > 0 else 0
+        if pct < 30 and increase < 50:
+            return None
+        if pct > 100 or increase > 200:
+            severity = BurstSeverity.CATASTROPHIC
+        elif pct > 60 or increase > 100:
+            severity = BurstSeverity.MAJOR
+        elif pct > 40:
+            severity = BurstSeverity.CONFIRMED
+        else:
+            severity = BurstSeverity.SUSPECTED
+        return (dma_id, severity, round(increase, 1), round(pct, 1))
+
+
+def pressure_key(event):
+    return (event.nearest_sensor_id, event.severity, event.pressure_drop_bar,
+            event.pressure_drop_rate_bar_min, event.estimated_loss_m3_hour)
+
+
+def flow_key(event):
+    return (event.dma_id, event.severity, event.flow_increase_m3_hour, event.flow_increase_percent)
+
+
+def pressure_stream(seed=7, sensors=6, count=600):
+    """Interleaved readings around 3.5 bar with sudden drops, 2 s apart, within the history window."""
+    rng = random.Random(seed)
+    start = datetime.utcnow() - timedelta(minutes=25)
+    readings = []
+    for i in range(count):
+        sensor = f"PS{rng.randrange(sensors)}"
+        pressure = 3.5 + rng.gauss(0, 0.05)
+        if rng.random() < 0.08:
+            pressure -= rng.uniform(0.4, 2.0)
+        readings.append((sensor, start + timedelta(seconds=2 * i), pressure))
+    return readings
+
+
+def ewma_crossings(values, alpha=0.2):
+    """Per-reading flags: deviation from the EWMA level changed sign."""
+    flags, level, last = [], None, 0.0
+    for value in values:
+        if level is None:
+            deviation, level = 0.0, value
+        else:
+            deviation = value - level
+            level += alpha * deviation
+        flags.append(deviation * last < 0)
+        if deviation != 0:
+            last = deviation
+    return flags
+
+
+class TestBurstReplay:
+    """Readings replayed through the streaming detector and the reference rules."""
+
+    def test_sudden_drops_match_reference(self):
+        readings = pressure_stream()
+        reference = ReferenceRules({"PS0": 3.6, "PS1": 3.4})
+        detector = BurstDetector(NO_CUSUM)
+        detector.set_pressure_baseline("PS0", 3.6)
+        detector.set_pressure_baseline("PS1", 3.4)
+
+        expected, found = [], []
+        for i, (sensor, timestamp, pressure) in enumerate(readings):
+            ref = reference.pressure(sensor, timestamp, pressure)
+            if ref:
+                expected.append((i, ref))
+            event = detector.ingest_pressure(PressureReading(sensor, timestamp, pressure, -15.4, 28.3, "DMA1"))
+            if event:
+                found.append((i, pressure_key(event)))
+                assert event.dma_id == "DMA1" and event.detection_method == "pressure_drop"
+
+        assert len(expected) > 20
+        assert [i for i, _ in found] == [i for i, _ in expected]
+        for (_, got), (_, want) in zip(found, expected):
+            assert got[:2] == want[:2]
+            assert got[2:] == pytest.approx(want[2:], abs=1e-3)
+
+    def test_ingest_many_keeps_per_sensor_order_in_batches(self):
+        readings = pressure_stream(seed=11, sensors=3)
+        reference = ReferenceRules()
+        expected = [ref for ref in (reference.pressure(*r) for r in readings) if ref]
+
+        detector = BurstDetector(NO_CUSUM)
+        found = []
+        for start in range(0, len(readings), 37):
+            chunk = readings[start:start + 37]  # Each sensor appears many times per batch
+            sensors, times, pressures = zip(*chunk)
+            found += detector.ingest_many(
+                sensors, np.array(pressures), times, dma_ids=["DMA1"] * len(chunk)
+            )
+
+        assert len(expected) > 10
+        assert [pressure_key(e)[:2] for e in found] == [ref[:2] for ref in expected]
+        assert [pressure_key(e)[2:] for e in found] == pytest.approx([ref[2:] for ref in expected], abs=1e-3)
+        assert {e.dma_id for e in found} == {"DMA1"}
+
+    def test_flow_spikes_match_reference(self):
+        rng = random.Random(5)
+        start = datetime.utcnow() - timedelta(minutes=20)
+        reference = ReferenceRules({"DMA_B": 120.0})
+        detector = BurstDetector(NO_CUSUM)
+        detector.set_flow_baseline("DMA_B", 120.0)
+
+        expected, found, batch = [], [], []
+        for i in range(400):
+            dma = rng.choice(["DMA_A", "DMA_B", "DMA_C"])
+            flow = 100 + rng.gauss(0, 5) + (rng.uniform(20, 250) if rng.random() < 0.1 else 0)
+            timestamp = start + timedelta(seconds=3 * i)
+            ref = reference.flow(dma, timestamp, flow)
+            if ref:
+                expected.append(ref)
+            batch.append((dma, flow, timestamp))
+
+        single = BurstDetector(NO_CUSUM)
+        single.set_flow_baseline("DMA_B", 120.0)
+        for dma, flow, timestamp in batch:
+            event = single.ingest_flow(FlowReading(f"FM_{dma}", timestamp, flow, dma))
+            if event:
+                found.append(event)
+        dmas, flows, times = zip(*batch)
+        batched = detector.ingest_flow_many(dmas, flows, times)
+
+        assert len(expected) > 10
+        for events in (found, batched):
+            assert [flow_key(e)[:2] for e in events] == [ref[:2] for ref in expected]
+            assert [flow_key(e)[2:] for e in events] == pytest.approx([ref[2:] for ref in expected], abs=0.11)
+
+    def test_empty_batches(self):
+        detector = BurstDetector()
+        assert occurrence_rounds(np.array([], dtype=np.int64))[0].tolist() == []
+        assert detector.ingest_many([], []) == []
+        assert detector.ingest_many(np.array([], dtype=str), np.array([]), np.array([], dtype="datetime64[ns]")) == []
+        assert detector.ingest_flow_many([], [], []) == []
+        assert detector._pressure_state.active_count == detector._flow_state.active_count == 0
+        assert detector.detect_oscillation("PS0", "t", "DMA1") is None
+
+
+class TestStreamingSignals:
+    """CUSUM latch and incremental level crossings."""
+
+    def test_cusum_fires_once_and_rearms(self):
+        detector = BurstDetector()
+        detector.set_pressure_baseline("PS", 4.0)
+        start = datetime.utcnow() - timedelta(minutes=10)
+        clock = iter(range(1000))
+
+        def feed(pressure, n):
+            return [detector.ingest_pressure(PressureReading(
+                "PS", start + timedelta(seconds=5 * next(clock)), pressure, 0, 0, "DMA1")) for _ in range(n)]
+
+        # 0.4 bar below baseline: under the sudden threshold, CUSUM grows 0.3 per reading
+        events = feed(3.6, 12)
+        assert [i for i, e in enumerate(events) if e] == [3]
+        assert events[3].detection_method == "pressure_cusum"
+        assert events[3].severity == BurstSeverity.SUSPECTED
+
+        # Latched until the CUSUM drains back to zero
+        assert not any(feed(4.0, 2))
+        assert not any(feed(3.6, 3))
+        assert not any(feed(4.4, 30))
+        assert [i for i, e in enumerate(feed(3.6, 6)) if e] == [3]
+
+        # A new baseline resets the accumulator and the latch
+        detector.set_pressure_baseline("PS", 4.0)
+        assert [i for i, e in enumerate(feed(3.6, 6)) if e] == [3]
+
+    def test_flow_cusum_catches_slow_rise(self):
+        detector = BurstDetector()
+        detector.set_flow_baseline("DMA1", 100.0)
+        events = detector.ingest_flow_many(["DMA1"] * 10, [120.0] * 10)  # +20%: below the spike threshold
+        fired = [e for e in events if e]
+        assert len(fired) == 1 and fired[0].detection_method == "flow_cusum"
+        assert fired[0].severity == BurstSeverity.SUSPECTED
+
+    @pytest.mark.parametrize("stale, fresh", [(0, 30), (0, 12), (15, 12)])
+    def test_oscillation_crossings_full_and_partial_ring(self, stale, fresh):
+        rng = random.Random(stale + fresh)
+        detector = BurstDetector()
+        now = datetime.utcnow()
+        old = [now - timedelta(minutes=45, seconds=-i) for i in range(stale)]  # Outside the window
+        recent = [now - timedelta(seconds=2 * (fresh - i)) for i in range(fresh)]
+        pressures = [3.5 + (0.6 if (i // rng.choice([1, 2, 3])) % 2 else -0.6) + rng.gauss(0, 0.05)
+                     for i in range(stale + fresh)]
+        detector.ingest_many(["PS"] * len(pressures), pressures, old + recent, dma_ids=["DMA1"] * len(pressures))
+
+        in_window = min(fresh, 20)
+        crossings = sum(ewma_crossings(pressures)[-in_window + 1:])
+        span = (recent[-1] - recent[-in_window]).total_seconds()
+        window = pressures[-in_window:]
+
+        oscillation = detector.detect_oscillation("PS", "t", "DMA1")
+        assert crossings > 0
+        assert oscillation.frequency_hz == round(crossings / (2 * span), 3)
+        assert oscillation.amplitude_bar == pytest.approx(max(window) - min(window), abs=1e-3)
+        assert oscillation.duration_seconds == round(span, 1)
+        assert detector.get_recent_oscillations("t") == [oscillation]
@@ -0,0 +1,139 @@
+"""
+Tests for pressure-gradient leak localization over per-DMA sensor arrays
+"""
+
+import math
+
+import pytest
+
+from src.real_losses.leak_localizer import LeakLocalizer
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin(math.radians(lat2 - lat1) / 2) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 6371000 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def reference_estimate(sensors, min_deviation=0.3, exponent=2):
+    """Per-sensor weighted centroid, as before the column-wise arrays."""
+    affected = [s for s in sensors if s["deviation"] >= min_deviation]
+    weights = [s["deviation"] ** exponent for s in affected]
+    total = sum(weights)
+    lat = sum(w * s["lat"] for w, s in zip(weights, affected)) / total
+    lng = sum(w * s["lng"] for w, s in zip(weights, affected)) / total
+
+    def nearest(candidates, n):
+        return sorted(candidates, key=lambda s: haversine(lat, lng, s["lat"], s["lng"]))[:n]
+
+    confidence = 0.3 + (0.3 if len(affected) >= 5 else 0.2 if len(affected) >= 3 else 0)
+    max_dev = max(s["deviation"] for s in affected)
+    confidence += 0.2 if max_dev > 1.0 else 0.1 if max_dev > 0.5 else 0
+    confidence = min(0.95, confidence + len(affected) / len(sensors) * 0.1)
+
+    avg = sum(haversine(lat, lng, s["lat"], s["lng"]) for s in affected) / len(affected)
+    radius = max(50, min(500, avg * (1 - min(0.7, 0.3 + len(affected) * 0.05))))
+
+    pair = nearest(affected, 2)
+    hint = f"Between {pair[0]['name']} and {pair[1]['name']}" if len(pair) == 2 else f"Near {pair[0]['name']}"
+    return {
+        "estimated_lat": round(lat, 6),
+        "estimated_lng": round(lng, 6),
+        "confidence": round(confidence, 2),
+        "estimated_radius_m": round(radius, 0),
+        "zone_hint": hint,
+        "nearest_sensors": [s["sensor_id"] for s in nearest(sensors, 3)],
+        "max_deviation_sensor": max(affected, key=lambda s: s["deviation"])["sensor_id"],
+        "sensors_affected": len(affected),
+    }
+
+
+@pytest.fixture
+def network():
+    """4x4 grid of pressure sensors (~550 m apart) with a leak near one corner."""
+    localizer = LeakLocalizer()
+    leak = (-15.405, 28.285)
+    readings = {}
+    for row in range(4):
+        for col in range(4):
+            sensor_id = f"PS_{row}{col}"
+            lat, lng = -15.41 + 0.005 * row, 28.28 + 0.005 * col
+            localizer.register_sensor("DMA_A", sensor_id, f"Junction {row}-{col}", lat, lng, baseline_pressure=3.5)
+            # Pressure drop fades with distance from the leak
+            readings[sensor_id] = 3.5 - 1.6 * math.exp(-haversine(lat, lng, *leak) / 600)
+    return localizer, leak, readings
+
+
+class TestLeakLocalizer:
+    """Localization from sensor readings against the per-sensor computation."""
+
+    def test_readings_localize_near_the_leak(self, network):
+        localizer, leak, readings = network
+        for sensor_id, pressure in readings.items():
+            localizer.update_sensor_reading("DMA_A", sensor_id, pressure)
+
+        estimate = localizer.localize_leak("tenant-1", "DMA_A", incident_id="INC-1")
+        sensors = localizer.get_sensors_for_dma("DMA_A")
+        expected = reference_estimate(sensors)
+
+        assert {k: getattr(estimate, k) for k in expected} == pytest.approx(expected)
+        assert haversine(estimate.estimated_lat, estimate.estimated_lng, *leak) < 400
+        assert estimate.max_deviation_sensor == "PS_11"
+        assert localizer.get_estimate("tenant-1", "INC-1") is estimate
+        assert localizer.get_recent_estimates("tenant-1", "DMA_A") == [estimate]
+
+    def test_batch_update_matches_single_updates(self, network):
+        localizer, _, readings = network
+        single = LeakLocalizer()
+        for sensor in localizer.get_sensors_for_dma("DMA_A"):
+            single.register_sensor("DMA_A", sensor["sensor_id"], sensor["name"], sensor["lat"], sensor["lng"], 3.5)
+            single.update_sensor_reading("DMA_A", sensor["sensor_id"], readings[sensor["sensor_id"]])
+        localizer.update_readings("DMA_A", {**readings, "UNKNOWN": 0.0})
+
+        assert localizer.get_sensors_for_dma("DMA_A") == single.get_sensors_for_dma("DMA_A")
+        batch = localizer.localize_leak("t", "DMA_A")
+        one_by_one = single.localize_leak("t", "DMA_A")
+        assert (batch.estimated_lat, batch.estimated_lng, batch.nearest_sensors, batch.zone_hint) == \
+            (one_by_one.estimated_lat, one_by_one.estimated_lng, one_by_one.nearest_sensors, one_by_one.zone_hint)
+
+    def test_no_sensors_or_no_deviation_gives_no_estimate(self, network):
+        localizer, _, _ = network
+        assert localizer.localize_leak("t", "DMA_EMPTY") is None
+        localizer.update_sensor_reading("DMA_EMPTY", "PS_00", 1.0)  # Unknown DMA is ignored
+        localizer.update_sensor_reading("DMA_A", "PS_99", 1.0)  # Unknown sensor is ignored
+
+        # Registered sensors that have not dropped
+        assert localizer.localize_leak("t", "DMA_A") is None
+
+        localizer.register_sensor("DMA_B", "S1", "Only", -15.4, 28.3)
+        localizer.update_sensor_reading("DMA_B", "S1", 1.0)
+        assert localizer.localize_leak("t", "DMA_B") is None  # Below min_sensors
+        assert localizer.get_summary("t")["recent_localizations_24h"] == 0
+
+    def test_single_affected_sensor(self, network):
+        localizer, _, _ = network
+        localizer.update_sensor_reading("DMA_A", "PS_23", 2.4)
+
+        estimate = localizer.localize_leak("t", "DMA_A")
+        assert (estimate.estimated_lat, estimate.estimated_lng) == (pytest.approx(-15.4), pytest.approx(28.295))
+        assert estimate.zone_hint == "Near Junction 2-3"
+        assert estimate.nearest_sensors[0] == "PS_23" and estimate.sensors_affected == 1
+        assert estimate.estimated_radius_m == 50
+
+        lone = LeakLocalizer({"min_sensors": 1})
+        lone.register_sensor("DMA_B", "S1", "Only", -15.4, 28.3)
+        lone.update_sensor_reading("DMA_B", "S1", 2.0)
+        estimate = lone.localize_leak("t", "DMA_B")
+        assert estimate.nearest_sensors == ["S1"] and estimate.zone_hint == "Near Only"
+        assert estimate.max_deviation_bar == pytest.approx(1.0)
+
+    def test_estimate_log_is_bounded(self, network):
+        localizer, _, readings = network
+        localizer.max_estimates = 3
+        localizer.update_readings("DMA_A", readings)
+        estimates = [localizer.localize_leak("t", "DMA_A", incident_id=f"INC-{i}") for i in range(5)]
+
+        assert localizer.get_recent_estimates("t") == estimates[:1:-1]
+        assert localizer.get_estimate("t", "INC-0") is None
+        assert localizer.get_estimate("t", "INC-4") is estimates[4]
@@ -0,0 +1,312 @@
+"""
+Tests for the real-loss state store and the analyzers built on it
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from src.real_losses.burst_detector import BurstDetector, BurstEvent, BurstSeverity, BurstType
+from src.real_losses.mnf_analyzer import MNFAnalyzer
+from src.real_losses.pressure_analyzer import AlertPriority, PressureInstabilityAnalyzer
+from src.real_losses.state_store import IncidentStore, ReadingBuffer
+
+
+@dataclass
+class Incident:
+    incident_id: str
+    tenant_id: str
+    dma_id: str
+    detected_at: datetime
+    loss: float = 0.0
+    status: str = "active"
+    note: Optional[str] = None
+
+
+def night(flow, day=1):
+    """Eight 15-minute readings inside the 02:00-04:00 local (UTC+2) window."""
+    start = datetime(2026, 1, day, 0, 0)
+    return [(start + timedelta(minutes=15 * i), flow) for i in range(8)]
+
+
+def burst_event(event_id, dma_id, severity, loss):
+    return BurstEvent(
+        event_id=event_id, tenant_id="", dma_id=dma_id, detected_at=datetime.utcnow(),
+        detection_method="pressure_drop", burst_type=BurstType.SUDDEN_BURST, severity=severity,
+        confidence=0.8, pressure_drop_bar=1.0, pressure_drop_rate_bar_min=0.2,
+        flow_increase_m3_hour=0, flow_increase_percent=0, estimated_loss_m3_hour=loss
+    )
+
+
+# Summaries as computed before the state store: full scans of "tenant:dma" keyed lists
+
+def scan_mnf_summary(tenant_id, readings, baselines, anomalies):
+    active = [a for key, items in anomalies.items() if key.startswith(tenant_id)
+              for a in items if a.status == "active"]
+    return {
+        "has_data": sum(len(r) for k, r in readings.items() if k.startswith(tenant_id)) > 0,
+        "total_readings": sum(len(r) for k, r in readings.items() if k.startswith(tenant_id)),
+        "dmas_with_baseline": sum(1 for k in baselines if k.startswith(tenant_id)),
+        "active_anomalies": len(active),
+        "persistent_anomalies": len([a for a in active if a.is_persistent]),
+        "total_estimated_loss_m3_day": round(sum(a.estimated_daily_loss_m3 for a in active), 1),
+    }
+
+
+def scan_pressure_summary(tenant_id, alerts):
+    active = [a for key, items in alerts.items() if key.startswith(tenant_id)
+              for a in items[-100:] if a.status == "active"]
+    type_counts = {}
+    for alert in active:
+        type_counts[alert.alert_type.value] = type_counts.get(alert.alert_type.value, 0) + 1
+    return {
+        "total_active_alerts": len(active),
+        "critical_alerts": len([a for a in active if a.priority == AlertPriority.CRITICAL]),
+        "high_alerts": len([a for a in active if a.priority == AlertPriority.HIGH]),
+        "medium_alerts": len([a for a in active if a.priority == AlertPriority.MEDIUM]),
+        "alert_types": type_counts,
+    }
+
+
+def scan_burst_summary(tenant_id, events):
+    active = [e for e in events if e.tenant_id.startswith(tenant_id)
+              and e.status in BurstDetector.ACTIVE_STATUSES]
+    return {
+        "active_events": len(active),
+        "catastrophic_count": len([e for e in active if e.severity == BurstSeverity.CATASTROPHIC]),
+        "major_count": len([e for e in active if e.severity == BurstSeverity.MAJOR]),
+        "confirmed_count": len([e for e in active if e.severity == BurstSeverity.CONFIRMED]),
+        "total_estimated_loss_m3_hour": round(sum(e.estimated_loss_m3_hour for e in active), 1),
+    }
+
+
+class TestReadingBuffer:
+    """Per-key deques with age and length retention and grouped counts."""
+
+    def test_age_retention_and_tenant_counts(self):
+        now = datetime(2026, 1, 10)
+        buffer = ReadingBuffer(timedelta(days=2), time_of=lambda r: r[0])
+
+        for day in range(5):
+            buffer.append(("t1", "A"), (now - timedelta(days=4 - day), day), now=now)
+        assert [v for _, v in buffer.get(("t1", "A"))] == [3, 4]
+        assert not buffer.append(("t1", "A"), (now - timedelta(days=3), 9), now=now)
+
+        buffer.append(("t1", "B"), (now, 5), now=now)
+        buffer.append(("t10", "A"), (now, 6), now=now)
+        buffer.append("sensor-1", (now, 7), now=now)
+        assert (buffer.count("t1"), buffer.count("t10"), buffer.count("sensor-1")) == (3, 1, 1)
+        assert buffer.count() == len(buffer) == 5
+
+        # A later append ages out the older readings of that key only
+        later = now + timedelta(days=1, hours=12)
+        buffer.append(("t1", "A"), (later, 8), now=later)
+        assert [v for _, v in buffer.get(("t1", "A"))] == [4, 8]
+        assert buffer.count("t1") == 3 and buffer.count() == 5
+        assert buffer.since(("t1", "A"), now) == [(later, 8)]
+        assert buffer.last(("t1", "A"), 5) == list(buffer.get(("t1", "A")))
+        assert len(buffer.get(("t2", "A"))) == 0
+
+    def test_maxlen_caps_each_key(self):
+        now = datetime(2026, 1, 10)
+        buffer = ReadingBuffer(timedelta(hours=1), time_of=lambda r: r[0], maxlen=3)
+        for i in range(5):
+            buffer.append(("t1", "A"), (now + timedelta(seconds=i), i), now=now)
+        buffer.append(("t1", "B"), (now, 0), now=now)
+
+        assert [v for _, v in buffer.get(("t1", "A"))] == [2, 3, 4]
+        assert buffer.last(("t1", "A"), 2) == [(now + timedelta(seconds=3), 3), (now + timedelta(seconds=4), 4)]
+        assert buffer.count("t1") == 4 and len(buffer) == 4
+
+
+class TestIncidentStore:
+    """Active indexes and per-tenant tallies across status changes and eviction."""
+
+    def store(self, **kwargs):
+        return IncidentStore("incident_id", tally=lambda i: {"loss": i.loss}, **kwargs)
+
+    def test_counters_follow_status_transitions(self):
+        store = IncidentStore(
+            "incident_id", active_statuses=("active", "acknowledged"), tally=lambda i: {"loss": i.loss}
+        )
+        now = datetime(2026, 1, 1)
+        for i, (tenant, dma, loss) in enumerate([("t1", "A", 2.0), ("t1", "B", 3.0), ("t2", "A", 5.0)]):
+            store.add(Incident(f"I{i}", tenant, dma, now + timedelta(minutes=i), loss))
+        assert store.counts("t1") == {"active": 2, "loss": 5.0}
+
+        # Moving between two active statuses keeps the tally
+        assert store.set_status("I0", "acknowledged", note="crew") is store.get("I0")
+        assert store.get("I0").note == "crew"
+        assert store.counts("t1") == {"active": 2, "loss": 5.0}
+
+        assert store.set_status("I0", "resolved").status == "resolved"
+        assert store.counts("t1") == {"active": 1, "loss": 3.0}
+        assert [i.incident_id for i in store.active("t1")] == ["I1"]
+
+        # Reopening adds it back; other tenants are untouched
+        store.set_status("I0", "active")
+        assert store.counts("t1") == {"active": 2, "loss": 5.0}
+        assert store.counts("t2") == {"active": 1, "loss": 5.0}
+
+        # Wrong tenant or unknown id changes nothing
+        assert store.set_status("I2", "resolved", tenant_id="t1") is None
+        assert store.set_status("missing", "resolved") is None
+        assert store.counts("t2") == {"active": 1, "loss": 5.0}
+        assert store.counts("nobody") == {"active": 0}
+
+    def test_re_adding_an_incident_replaces_it(self):
+        store = self.store()
+        store.add(Incident("I0", "t1", "A", datetime(2026, 1, 1), 2.0))
+        store.add(Incident("I0", "t1", "A", datetime(2026, 1, 2), 4.0))
+        assert len(store) == 1 and store.counts("t1") == {"active": 1, "loss": 4.0}
+        assert len(store.for_dma("t1", "A")) == 1
+
+    def test_max_per_dma_evicts_oldest_and_its_tally(self):
+        store = self.store(max_per_dma=2)
+        start = datetime(2026, 1, 1)
+        for i in range(4):
+            store.add(Incident(f"A{i}", "t1", "A", start + timedelta(hours=i), float(i + 1)))
+        store.add(Incident("B0", "t1", "B", start, 10.0))
+
+        assert [i.incident_id for i in store.for_dma("t1", "A")] == ["A2", "A3"]
+        assert "A0" not in store and store.get("A1") is None
+        assert store.counts("t1") == {"active": 3, "loss": 17.0}
+        assert len(store) == 3
+
+        # A resolved incident that is evicted does not touch the counters again
+        store.set_status("A2", "resolved")
+        store.add(Incident("A4", "t1", "A", start + timedelta(hours=4), 5.0))
+        assert store.counts("t1") == {"active": 3, "loss": 19.0}
+        assert [i.incident_id for i in store.recent("t1", start + timedelta(hours=2, minutes=30))] == ["A4", "A3"]
+
+
+class TestAnalyzerSummaries:
+    """Counter-based summaries must match the old full scans."""
+
+    def test_mnf_summary_matches_scan(self):
+        analyzer = MNFAnalyzer()
+        readings, baselines, anomalies = {}, {}, {}
+
+        def check():
+            for tenant in ("north", "south"):
+                summary = analyzer.get_summary(tenant)
+                expected = scan_mnf_summary(tenant, readings, baselines, anomalies)
+                assert {k: summary[k] for k in expected} == expected
+
+        for tenant, dma, leak in [("north", "A", 6.0), ("north", "B", 9.0), ("south", "A", 4.0)]:
+            key = f"{tenant}:{dma}"
+            for day in range(7):
+                readings.setdefault(key, []).append(analyzer.record_mnf(tenant, dma, night(10.0 + 0.1 * day, day + 1)))
+            baselines[key] = analyzer.compute_baseline(tenant, dma)
+            for day in range(7, 11):
+                readings[key].append(analyzer.record_mnf(tenant, dma, night(10.0 + leak + day, day + 1)))
+                anomaly = analyzer.analyze_mnf(tenant, dma)
+                anomalies.setdefault(key, []).append(anomaly)
+            check()
+
+        assert any(a.is_persistent for items in anomalies.values() for a in items)
+        north = anomalies["north:A"]
+        assert analyzer.acknowledge_anomaly("north", north[0].anomaly_id, "ops")
+        assert analyzer.resolve_anomaly("north", north[1].anomaly_id)
+        assert not analyzer.resolve_anomaly("south", north[2].anomaly_id)
+        check()
+        assert [a.anomaly_id for a in analyzer.get_active_anomalies("north", "A")] == \
+            [a.anomaly_id for a in reversed(north[2:])]
+
+    def test_pressure_summary_matches_scan(self):
+        analyzer = PressureInstabilityAnalyzer()
+        alerts = {}
+        now = datetime.utcnow()
+        for i, (tenant, dma, pressure) in enumerate([
+            ("north", "A", 1.2), ("north", "A", 0.8), ("north", "B", 7.5),
+            ("south", "A", 6.5), ("south", "A", 1.4), ("north", "B", 0.5)
+        ]):
+            sensor = f"{tenant}-{dma}-{i}"
+            analyzer.set_baseline(sensor, 3.0)
+            alert = analyzer.ingest_reading(tenant, sensor, dma, pressure, timestamp=now)
+            alerts.setdefault(f"{tenant}:{dma}", []).append(alert)
+
+        analyzer.acknowledge_alert(alerts["north:A"][0].alert_id, "ops")
+        analyzer.resolve_alert(alerts["south:A"][1].alert_id)
+        for tenant in ("north", "south"):
+            summary = analyzer.get_summary(tenant)
+            expected = scan_pressure_summary(tenant, alerts)
+            assert {k: summary[k] for k in expected} == expected
+        assert analyzer.get_summary("north")["sensors_monitored"] == 6
+
+    def test_pressure_alerts_keep_last_hundred_per_dma(self):
+        analyzer = PressureInstabilityAnalyzer()
+        analyzer.set_baseline("S1", 3.0)
+        now = datetime.utcnow()
+        alerts = {"t:A": [analyzer.ingest_reading("t", "S1", "A", 1.0, now) for _ in range(130)]}
+
+        assert analyzer.get_summary("t")["total_active_alerts"] == 100
+        analyzer.resolve_alert(alerts["t:A"][0].alert_id)  # Already evicted
+        analyzer.resolve_alert(alerts["t:A"][-1].alert_id)
+        assert analyzer.get_summary("t")["total_active_alerts"] == scan_pressure_summary("t", alerts)["total_active_alerts"] == 99
+
+    def test_burst_summary_matches_scan(self):
+        detector = BurstDetector()
+        events = []
+        severities = [BurstSeverity.CATASTROPHIC, BurstSeverity.MAJOR, BurstSeverity.CONFIRMED, BurstSeverity.SUSPECTED]
+        for i in range(12):
+            tenant = "north" if i % 3 else "south"
+            event = burst_event(f"E{i}", f"DMA{i % 2}", severities[i % 4], 1.1 * i)
+            events.append(detector.record_event(tenant, event))
+
+        for event_id, status in [("E1", "acknowledged"), ("E2", "responding"), ("E4", "contained"),
+                                 ("E5", "resolved"), ("E4", "active"), ("E7", "resolved")]:
+            tenant = events[int(event_id[1:])].tenant_id
+            assert detector.update_event_status(tenant, event_id, status).status == status
+        assert detector.update_event_status("south", "E1", "resolved") is None
+        assert events[5].resolved_at is not None and events[1].acknowledged_at is not None
+
+        for tenant in ("north", "south"):
+            summary = detector.get_summary(tenant)
+            expected = scan_burst_summary(tenant, events)
+            assert {k: summary[k] for k in expected} == expected
+
+
+class TestChangedBehaviour:
+    """Behaviour that differs from the old string-keyed scans."""
+
+    def test_tenant_and_dma_ids_match_exactly(self):
+        detector = BurstDetector()
+        detector.record_event("t1", burst_event("E1", "DMA1", BurstSeverity.MAJOR, 4.0))
+        detector.record_event("t10", burst_event("E2", "DMA1", BurstSeverity.MAJOR, 4.0))
+        detector.record_event("t1", burst_event("E3", "SUBDMA1", BurstSeverity.MAJOR, 4.0))
+
+        # The old prefix/suffix match counted t10 under t1 and SUBDMA1 under DMA1
+        assert detector.get_summary("t1")["active_events"] == 2
+        assert [e.event_id for e in detector.get_active_events("t1", "DMA1")] == ["E1"]
+        assert [e.event_id for e in detector.get_active_events("t10")] == ["E2"]
+
+        analyzer = MNFAnalyzer()
+        analyzer.record_mnf("t1", "A", night(10.0))
+        analyzer.record_mnf("t10", "A", night(10.0))
+        assert analyzer.get_summary("t1")["total_readings"] == 1
+
+    def test_zone_statuses_are_per_tenant(self):
+        analyzer = PressureInstabilityAnalyzer()
+        analyzer.update_zone_status("north", "DMA1", [{"sensor_id": "S1", "pressure_bar": 3.0, "is_online": True}])
+        analyzer.update_zone_status("south", "DMA1", [{"sensor_id": "S2", "pressure_bar": 1.0, "is_online": False}])
+
+        north = analyzer.get_summary("north")["zones"]
+        south = analyzer.get_summary("south")["zones"]
+        assert [(z["dma_id"], z["avg_pressure"]) for z in north] == [("DMA1", 3.0)]
+        assert [(z["dma_id"], z["avg_pressure"]) for z in south] == [("DMA1", 0)]
+        assert analyzer.get_summary("east")["zones"] == []
+
+    def test_loss_counters_clamp_float_drift(self):
+        losses = [0.1, 0.2, 0.3, 0.7]
+        detector = BurstDetector()
+        for i, loss in enumerate(losses):
+            detector.record_event("t1", burst_event(f"E{i}", "DMA1", BurstSeverity.SUSPECTED, loss))
+        for i in (0, 2, 3, 1):
+            detector.update_event_status("t1", f"E{i}", "resolved")
+
+        # Adding and removing the same losses leaves a tiny negative residue
+        assert detector._events.counts("t1")["loss_m3_hour"] < 0
+        total = detector.get_summary("t1")["total_estimated_loss_m3_hour"]
+        assert total == 0.0 and math.copysign(1.0, total) == 1.0